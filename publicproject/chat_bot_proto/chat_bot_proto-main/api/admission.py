@@ -0,0 +1,154 @@
+"""
+/chat 요청 동시성 제어
+동기 챗봇 파이프라인(process_user_input)을 이벤트 루프 밖의 고정 크기 스레드 풀에서 실행하고, 입장 제한으로 과부하를 빠르게 거절
+
+- 실행 슬롯(max_concurrency) = 스레드 풀 크기: 풀 내부 큐에 작업이 쌓이지 않도록 슬롯을 얻은 요청만 풀에 제출
+- 대기열(max_queue): 슬롯을 기다리는 요청 수 제한, 가득 차면 바로 429
+- 대기 시간(queue_timeout): 그 안에 슬롯을 못 얻으면 503 (클라이언트 타임아웃 전에 빨리 실패)
+- 이벤트 루프는 막히지 않으므로 /health 등 다른 엔드포인트는 부하 중에도 바로 응답
+"""
+
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+from inference.pipeline_timing import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """입장 거절 (429: 대기열 가득 참, 503: 대기 시간 초과/종료 중)"""
+
+    def __init__(self, status_code: int, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+
+class ChatDispatcher:
+    """입장 제한 + 전용 스레드 풀 실행기"""
+
+    def __init__(self, max_concurrency: int = 4, max_queue: int = 32, queue_timeout: float = 5.0):
+        """
+        Args:
+            max_concurrency: 동시에 실행할 최대 요청 수 (스레드 풀 크기)
+            max_queue: 실행 슬롯을 기다릴 수 있는 최대 요청 수
+            queue_timeout: 실행 슬롯 최대 대기 시간 (초)
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="chat-worker")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._closed = False
+
+        # 이벤트 루프 스레드에서만 변경
+        self.active = 0
+        self.waiting = 0
+        self.queue_wait = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.stats = {
+            "admitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+            "max_active": 0,
+            "max_waiting": 0,
+        }
+
+    @classmethod
+    def from_config(cls, inference_config) -> "ChatDispatcher":
+        """InferenceConfig 설정으로 생성"""
+        return cls(
+            max_concurrency=inference_config.max_concurrent_requests,
+            max_queue=inference_config.max_queued_requests,
+            queue_timeout=inference_config.queue_timeout
+        )
+
+    async def run(self, func: Callable, *args) -> Any:
+        """실행 슬롯을 얻어 func(*args)를 스레드 풀에서 실행 (거절 시 AdmissionRejected)"""
+        if self._closed:
+            raise AdmissionRejected(503, "서버가 종료 중입니다")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        # 실행 중 + 대기 중이 한도면 기다리지 않고 거절
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            self.stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(429, "요청이 너무 많습니다. 잠시 후 다시 시도해주세요")
+
+        start = time.perf_counter()
+        self.waiting += 1
+        self.stats["max_waiting"] = max(self.stats["max_waiting"], self.waiting)
+        # wait_for는 (Python 3.11 이하) 슬롯을 얻은 순간과 시간 초과/취소가 겹치면 슬롯을 잃거나 취소를 삼키므로
+        # 대기 작업을 직접 만들고, 포기할 때 이미 얻었으면 반환/아니면 취소
+        acquire = asyncio.ensure_future(self._slots.acquire())
+        try:
+            await asyncio.wait({acquire}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            self._abandon_slot(acquire)
+            raise
+        finally:
+            self.waiting -= 1
+        if not acquire.done():
+            self._abandon_slot(acquire)
+            self.stats["rejected_timeout"] += 1
+            raise AdmissionRejected(503, "서버가 바쁩니다. 잠시 후 다시 시도해주세요",
+                                    retry_after=max(1, round(self.queue_timeout)))
+
+        self.active += 1
+        self.stats["admitted"] += 1
+        self.stats["max_active"] = max(self.stats["max_active"], self.active)
+        run_start = time.perf_counter()
+        self.queue_wait.record((run_start - start) * 1000)
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # 클라이언트 연결이 끊겨도 스레드 작업이 끝날 때까지 슬롯 유지
+            future.add_done_callback(lambda done: self._release(done, run_start))
+            raise
+        except Exception:
+            self._release(future, run_start)
+            raise
+        self._release(future, run_start)
+        return result
+
+    def _abandon_slot(self, acquire: asyncio.Future):
+        """슬롯 대기 포기 (이미 얻었으면 반환, 대기 중이면 취소 - Semaphore가 넘겨받던 슬롯은 스스로 반환)"""
+        if not acquire.done():
+            acquire.cancel()
+        elif not acquire.cancelled() and acquire.exception() is None:
+            self._slots.release()
+
+    def _release(self, future: asyncio.Future, run_start: float):
+        """실행 완료 집계 후 슬롯 반환"""
+        failed = future.cancelled() or future.exception() is not None
+        self.stats["failed" if failed else "completed"] += 1
+        self.service_time.record((time.perf_counter() - run_start) * 1000)
+        self.active -= 1
+        self._slots.release()
+
+    def shutdown(self, wait: bool = True):
+        """새 요청 거절 후 실행 중인 요청 완료 대기"""
+        self._closed = True
+        self._executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """입장 제한/실행 통계"""
+        stats = dict(self.stats)
+        stats.update({
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_wait_ms": self.queue_wait.summary(),
+            "service_time_ms": self.service_time.summary()
+        })
+        return stats
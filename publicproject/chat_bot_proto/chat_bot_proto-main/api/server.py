@@ -14,9 +14,10 @@ import asyncio
 import uuid
 
 from inference.chatbot import NaviyamChatbot, create_naviyam_chatbot
+from api.admission import ChatDispatcher, AdmissionRejected
 from data.data_structure import UserInput, ChatbotOutput
 from utils.config import load_config
-from utils.logging_utils import setup_logging
+from utils.logging_utils import setup_logger
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -41,6 +42,7 @@ app.add_middleware(
 
 # 전역 변수
 chatbot: Optional[NaviyamChatbot] = None
+dispatcher: Optional[ChatDispatcher] = None
 
 
 # === 요청/응답 모델 정의 ===
@@ -109,6 +111,13 @@ def get_chatbot() -> NaviyamChatbot:
     return chatbot
 
 
+def get_dispatcher() -> ChatDispatcher:
+    """/chat 실행기 의존성"""
+    if dispatcher is None:
+        raise HTTPException(status_code=503, detail="챗봇이 초기화되지 않았습니다")
+    return dispatcher
+
+
 def generate_session_id() -> str:
     """세션 ID 생성"""
     return str(uuid.uuid4())
@@ -119,20 +128,23 @@ def generate_session_id() -> str:
 @app.on_event("startup")
 async def startup_event():
     """서버 시작 시 초기화"""
-    global chatbot
+    global chatbot, dispatcher
     try:
         logger.info("나비얌 챗봇 API 서버 시작...")
         
         # 설정 로드
         config = load_config()
         
-        # 로깅 설정
-        setup_logging(config)
+        # 로깅 설정 (루트 로거: inference/api 모듈 로그 포함)
+        setup_logger(name=None, log_level=config.log_level)
         
         # 챗봇 초기화
         logger.info("챗봇 초기화 중...")
         chatbot = create_naviyam_chatbot(config)
         
+        # 챗봇 파이프라인은 이벤트 루프 밖 스레드 풀에서 실행
+        dispatcher = ChatDispatcher.from_config(config.inference)
+        
         logger.info("나비얌 챗봇 API 서버 초기화 완료")
         
     except Exception as e:
@@ -147,9 +159,15 @@ async def shutdown_event():
     try:
         logger.info("나비얌 챗봇 API 서버 종료 중...")
         
+        # 새 요청 거절, 실행 중인 요청 완료 대기
+        if dispatcher:
+            dispatcher.shutdown()
+        
         # 챗봇 상태 저장
         if chatbot:
             chatbot.save_state("outputs/chatbot_state_backup.json")
+            # 대기 중인 프로필/학습 데이터 저장 후 writer 종료
+            chatbot.shutdown()
             
         logger.info("나비얌 챗봇 API 서버 종료 완료")
         
@@ -191,8 +209,12 @@ async def health_check():
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, chatbot_instance: NaviyamChatbot = Depends(get_chatbot)):
-    """메인 채팅 엔드포인트"""
+async def chat(
+    request: ChatRequest,
+    chatbot_instance: NaviyamChatbot = Depends(get_chatbot),
+    chat_dispatcher: ChatDispatcher = Depends(get_dispatcher)
+):
+    """메인 채팅 엔드포인트 (과부하 시 429/503)"""
     try:
         # 세션 ID 처리
         session_id = request.session_id or generate_session_id()
@@ -205,8 +227,8 @@ async def chat(request: ChatRequest, chatbot_instance: NaviyamChatbot = Depends(
             timestamp=datetime.now()
         )
         
-        # 챗봇 처리
-        output: ChatbotOutput = chatbot_instance.process_user_input(user_input)
+        # 챗봇 처리 (스레드 풀에서 실행, 이벤트 루프는 다른 요청 처리)
+        output: ChatbotOutput = await chat_dispatcher.run(chatbot_instance.process_user_input, user_input)
         
         # 응답 변환
         response = ChatResponse(
@@ -224,6 +246,10 @@ async def chat(request: ChatRequest, chatbot_instance: NaviyamChatbot = Depends(
         logger.info(f"챗봇 응답 완료 - 사용자: {request.user_id}, 의도: {output.extracted_info.intent.value}")
         return response
         
+    except AdmissionRejected as e:
+        logger.warning(f"채팅 요청 거절 ({e.status_code}) - 사용자: {request.user_id}")
+        raise HTTPException(status_code=e.status_code, detail=e.message,
+                            headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         logger.error(f"챗봇 처리 실패: {e}")
         raise HTTPException(status_code=500, detail=f"챗봇 처리 실패: {str(e)}")
@@ -291,6 +317,8 @@ async def get_metrics(chatbot_instance: NaviyamChatbot = Depends(get_chatbot)):
     """성능 지표 조회"""
     try:
         metrics = chatbot_instance.get_performance_metrics()
+        if dispatcher:
+            metrics["admission"] = dispatcher.get_stats()
         return {
             "timestamp": datetime.now().isoformat(),
             "metrics": metrics
@@ -333,7 +361,8 @@ async def http_exception_handler(request, exc):
             "error": "HTTP_ERROR",
             "message": exc.detail,
             "timestamp": datetime.now().isoformat()
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -376,6 +405,21 @@ async def reload_chatbot():
         raise HTTPException(status_code=500, detail="챗봇 재로드 실패")
 
 
+@app.post("/admin/reload-index", status_code=202)
+async def reload_index(chatbot_instance: NaviyamChatbot = Depends(get_chatbot)):
+    """벡터 인덱스 현재 세대로 무중단 교체 (챗봇 전체 재로드 없이)"""
+    retriever = chatbot_instance.retriever
+    if retriever is None or not hasattr(retriever, 'request_reload'):
+        raise HTTPException(status_code=503, detail="RAG 시스템을 사용할 수 없습니다")
+    
+    # 로드·워밍은 백그라운드에서 수행하고, 진행 중인 검색은 이전 세대로 완료됨
+    retriever.request_reload()
+    return {
+        "message": "인덱스 세대 교체를 시작했습니다",
+        "active_generation": retriever.get_index_stats()["active_generation"]
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+협업 필터링 모델 오프라인 학습 스크립트
+
+LearningDataCollector가 저장한 추천/피드백 로그(raw/*.jsonl)로
+사용자×매장 상호작용 행렬을 만들고 implicit ALS 요인을 학습해 npz로 저장합니다.
+CollaborativeFunnel은 시작 시 이 파일을 로드해 이력 있는 사용자에게 사용합니다.
+"""
+
+import logging
+import argparse
+from typing import Dict, Any
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def build_collaborative_model(log_dir: str, output_path: str, restaurants_path: str,
+                              factors: int = 32, regularization: float = 0.1, alpha: float = 10.0,
+                              iterations: int = 10, min_interactions: int = 1) -> Dict[str, Any]:
+    """상호작용 로그 → ALS 모델 파일"""
+    from recommendation.restaurant_catalog import get_catalog
+    from recommendation.interaction_matrix import InteractionMatrix, ImplicitALSModel
+
+    catalog = get_catalog(restaurants_path)
+    # 카탈로그 매장 순서를 열 순서로 사용 (카탈로그에 없는 매장 로그는 제외)
+    interactions = InteractionMatrix.from_log_dir(log_dir, shop_ids=[shop.shop_id for shop in catalog])
+    stats = interactions.get_stats()
+    logger.info(f"상호작용 행렬: 사용자 {stats['users']}명 × 매장 {stats['shops']}개, "
+                f"상호작용 {stats['interactions']}건")
+
+    if stats['interactions'] < min_interactions:
+        return {"success": False, "error": f"상호작용이 부족합니다 ({stats['interactions']}건)"}
+
+    model = ImplicitALSModel.fit(interactions, factors=factors, regularization=regularization,
+                                 alpha=alpha, iterations=iterations)
+    model.save(output_path)
+    logger.info(f"모델 저장: {output_path}")
+    return {"success": True, "model_file": output_path, **stats, **model.get_stats()}
+
+
+def main():
+    """메인 함수"""
+    from recommendation.restaurant_catalog import DEFAULT_RESTAURANTS_PATH
+    from recommendation.interaction_matrix import DEFAULT_LEARNING_DATA_PATH, DEFAULT_COLLABORATIVE_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="협업 필터링 ALS 모델 학습")
+    parser.add_argument("--log-dir", default=DEFAULT_LEARNING_DATA_PATH, help="학습 데이터 수집기 저장 경로")
+    parser.add_argument("--restaurants", default=DEFAULT_RESTAURANTS_PATH, help="매장 데이터 파일")
+    parser.add_argument("--output", default=DEFAULT_COLLABORATIVE_MODEL_PATH, help="모델 파일 경로")
+    parser.add_argument("--factors", type=int, default=32, help="잠재 요인 수")
+    parser.add_argument("--regularization", type=float, default=0.1, help="L2 정규화 계수")
+    parser.add_argument("--alpha", type=float, default=10.0, help="신뢰도 계수 (c = 1 + alpha·r)")
+    parser.add_argument("--iterations", type=int, default=10, help="ALS 반복 수")
+    parser.add_argument("--min-interactions", type=int, default=1, help="학습에 필요한 최소 상호작용 수")
+
+    args = parser.parse_args()
+
+    result = build_collaborative_model(
+        log_dir=args.log_dir,
+        output_path=args.output,
+        restaurants_path=args.restaurants,
+        factors=args.factors,
+        regularization=args.regularization,
+        alpha=args.alpha,
+        iterations=args.iterations,
+        min_interactions=args.min_interactions
+    )
+
+    if result["success"]:
+        print("SUCCESS: 협업 필터링 모델 학습 성공!")
+        print(f"모델 파일: {result['model_file']}")
+        print(f"사용자 {result['users']}명 × 매장 {result['shops']}개, 상호작용 {result['interactions']}건")
+        print(f"학습 시간: {result['fit_time']:.1f}초")
+    else:
+        print(f"ERROR: 모델 학습 실패 - {result['error']}")
+
+
+if __name__ == "__main__":
+    main()
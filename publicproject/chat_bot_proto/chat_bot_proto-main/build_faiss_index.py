@@ -2,11 +2,15 @@
 """
 FAISS 인덱스 사전 빌드 스크립트
 
-이 스크립트는 test_data.json의 모든 데이터를 미리 임베딩하여 
+이 스크립트는 test_data.json의 모든 데이터를 미리 임베딩하여
 FAISS 인덱스 파일과 메타데이터를 생성합니다.
 
-챗봇 초기화 시 이 사전 생성된 파일들을 로드하여 
+챗봇 초기화 시 이 사전 생성된 파일들을 로드하여
 초기화 시간을 대폭 단축시킵니다.
+
+빌드 결과는 {output}/{name}_generations/ 아래 새 세대 디렉토리에 저장되고
+포인터 파일(CURRENT)을 교체하여 게시됩니다. --incremental 옵션을 사용하면
+현재 세대를 기준으로 내용 해시가 바뀐 문서만 다시 임베딩합니다.
 """
 
 import time
@@ -20,174 +24,464 @@ from typing import List, Dict, Any
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+
+def load_documents(data_file: str):
+    """소스 데이터에서 가게/메뉴 Document와 텍스트 생성"""
+    logger.info(f"데이터 로드: {data_file}")
+    if not Path(data_file).exists():
+        raise FileNotFoundError(f"데이터 파일을 찾을 수 없습니다: {data_file}")
+
+    with open(data_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    logger.info("Document 객체 생성...")
+    from rag.documents import ShopDocument, MenuDocument
+
+    documents = []
+    texts = []
+
+    # 가게 문서 생성
+    shops_dict = {}
+    shops_data = data.get('shops', {})
+    for shop_id, shop_data in shops_data.items():
+        doc = ShopDocument(shop_data)
+        documents.append(doc)
+        texts.append(doc.get_content())
+        shops_dict[shop_data['id']] = shop_data
+
+    # 메뉴 문서 생성
+    menus_data = data.get('menus', {})
+    for menu_id, menu_data in menus_data.items():
+        shop_info = shops_dict.get(menu_data.get('shop_id'), {})
+        doc = MenuDocument(menu_data, shop_info)
+        documents.append(doc)
+        texts.append(doc.get_content())
+
+    logger.info(f"총 {len(documents)}개 문서 준비 완료")
+    return documents, texts
+
+
+def write_generation(output_dir: str, index_name: str, index, index_info: Dict[str, Any],
+                     doc_ids: List[str], contents: List[str], metadatas: List[Dict[str, Any]],
+                     build_info: Dict[str, Any], alive=None, keep_generations: int = 3) -> Dict[str, str]:
+    """인덱스/메타데이터/문서 테이블을 새 세대로 저장하고 포인터 파일 교체
+
+    모든 파일을 임시 디렉토리에 쓴 뒤 디렉토리 이동 + 포인터 교체로 게시하므로
+    실행 중인 서버는 쓰다 만 파일을 보지 않습니다.
+    """
+    import faiss
+    from rag.document_table import write_document_table
+    from rag.index_generations import IndexGenerations
+
+    generations = IndexGenerations(output_dir, index_name)
+    generation = generations.next_name()
+    staging_dir = generations.create_staging_dir(generation)
+    index_info = dict(index_info, generation=generation)
+
+    # FAISS 인덱스
+    faiss.write_index(index, str(staging_dir / f"{index_name}.faiss"))
+
+    # 인덱스 정보 (문서 데이터는 문서 테이블에 저장)
+    with open(staging_dir / f"{index_name}_metadata.json", 'w', encoding='utf-8') as f:
+        json.dump({"index_info": index_info}, f, ensure_ascii=False, indent=2)
+
+    # 문서 테이블 (mmap용 바이너리: 오프셋 테이블 + UTF-8 blob + 고정폭 컬럼 + 해시/tombstone)
+    write_document_table(
+        str(staging_dir / f"{index_name}_docs.bin"),
+        doc_ids=doc_ids,
+        contents=contents,
+        metadatas=metadatas,
+        info=index_info,
+        alive=alive
+    )
+
+    with open(staging_dir / f"{index_name}_build_info.json", 'w', encoding='utf-8') as f:
+        json.dump(dict(build_info, generation=generation), f, ensure_ascii=False, indent=2)
+
+    generation_dir = generations.publish(staging_dir, generation)
+    generations.prune(keep=keep_generations)
+
+    return {
+        "generation": generation,
+        "index_file": str(generation_dir / f"{index_name}.faiss"),
+        "metadata_file": str(generation_dir / f"{index_name}_metadata.json"),
+        "table_file": str(generation_dir / f"{index_name}_docs.bin"),
+        "build_info_file": str(generation_dir / f"{index_name}_build_info.json")
+    }
+
+
 def build_faiss_index(
     data_file: str = "rag/test_data.json",
     output_dir: str = "outputs",
     index_name: str = "prebuilt_faiss",
-    embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_model: str = "all-MiniLM-L6-v2",
+    index_type: str = "flat",
+    nlist: int = None,
+    nprobe: int = None,
+    hnsw_m: int = 32,
+    ef_search: int = 64,
+    pq_m: int = None,
+    train_size: int = None,
+    eval_queries: int = 200,
+    keep_generations: int = 3
 ):
     """
     FAISS 인덱스 사전 빌드
-    
+
     Args:
         data_file: 소스 데이터 파일 경로
         output_dir: 출력 디렉토리
         index_name: 인덱스 파일명 (확장자 제외)
         embedding_model: 사용할 임베딩 모델명
+        index_type: 인덱스 타입 (flat, ivf, hnsw, ivfpq)
+        nlist: IVF 클러스터 수 (None이면 문서 수 기반 자동)
+        nprobe: IVF 검색 시 탐색할 클러스터 수 (메타데이터에 저장)
+        hnsw_m: HNSW 노드당 이웃 수
+        ef_search: HNSW 검색 폭 (메타데이터에 저장)
+        pq_m: IVFPQ 서브양자화기 수 (None이면 차원 기반 자동)
+        train_size: IVF 학습 샘플 수 (None이면 자동)
+        eval_queries: flat 기준 recall 리포트에 사용할 쿼리 수 (0이면 생략)
+        keep_generations: 보관할 인덱스 세대 수
     """
     logger.info("=== FAISS 인덱스 사전 빌드 시작 ===")
     start_time = time.time()
-    
+
     try:
         # 1. 의존성 확인
         logger.info("의존성 라이브러리 확인...")
         import faiss
         from sentence_transformers import SentenceTransformer
-        
-        # 2. 데이터 로드
-        logger.info(f"데이터 로드: {data_file}")
-        if not Path(data_file).exists():
-            raise FileNotFoundError(f"데이터 파일을 찾을 수 없습니다: {data_file}")
-        
-        with open(data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # 3. Document 생성 및 텍스트 추출
-        logger.info("Document 객체 생성...")
-        from rag.documents import ShopDocument, MenuDocument
-        
-        documents = []
-        texts = []
-        
-        # 가게 문서 생성
-        shops_dict = {}
-        shops_data = data.get('shops', {})
-        for shop_id, shop_data in shops_data.items():
-            doc = ShopDocument(shop_data)
-            documents.append(doc)
-            texts.append(doc.get_content())
-            shops_dict[shop_data['id']] = shop_data
-        
-        # 메뉴 문서 생성  
-        menus_data = data.get('menus', {})
-        for menu_id, menu_data in menus_data.items():
-            shop_info = shops_dict.get(menu_data.get('shop_id'), {})
-            doc = MenuDocument(menu_data, shop_info)
-            documents.append(doc)
-            texts.append(doc.get_content())
-        
-        logger.info(f"총 {len(documents)}개 문서 준비 완료")
-        
+
+        # 2~3. 데이터 로드 및 Document 생성
+        documents, texts = load_documents(data_file)
+
         # 4. 임베딩 모델 로드
         logger.info(f"임베딩 모델 로드: {embedding_model}")
         model_load_start = time.time()
         embedding_model_instance = SentenceTransformer(embedding_model)
         model_load_time = time.time() - model_load_start
         logger.info(f"모델 로드 완료: {model_load_time:.2f}초")
-        
+
         # 5. 텍스트 임베딩 생성
         logger.info("텍스트 임베딩 생성...")
         embedding_start = time.time()
         embeddings = embedding_model_instance.encode(texts, convert_to_numpy=True)
         embedding_time = time.time() - embedding_start
         logger.info(f"임베딩 생성 완료: {embedding_time:.2f}초, 차원: {embeddings.shape}")
-        
+
         # 6. FAISS 인덱스 생성
-        logger.info("FAISS 인덱스 생성...")
+        from rag.index_factory import INDEX_CLASS_NAMES, build_index
+        logger.info(f"FAISS 인덱스 생성: {INDEX_CLASS_NAMES.get(index_type, index_type)}")
         embedding_dim = embeddings.shape[1]
-        index = faiss.IndexFlatL2(embedding_dim)
-        index.add(embeddings.astype('float32'))
-        
-        # 7. 출력 디렉토리 생성
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-        
-        # 8. FAISS 인덱스 파일 저장
-        index_file_path = output_path / f"{index_name}.faiss"
-        logger.info(f"FAISS 인덱스 저장: {index_file_path}")
-        faiss.write_index(index, str(index_file_path))
-        
-        # 9. 메타데이터 준비
-        logger.info("메타데이터 준비...")
-        metadata_info = {
-            "index_info": {
-                "total_documents": len(documents),
-                "embedding_dimension": embedding_dim,
-                "embedding_model": embedding_model,
-                "index_type": "IndexFlatL2",
-                "created_at": time.time()
-            },
-            "document_mapping": {},  # {faiss_idx: doc_id}
-            "documents_metadata": {},  # {doc_id: metadata}
-            "documents_content": {}  # {doc_id: content} - 빠른 검색용
+        embeddings = embeddings.astype('float32')
+        index_build_start = time.time()
+        index, search_params = build_index(
+            embeddings, index_type=index_type, nlist=nlist, nprobe=nprobe,
+            hnsw_m=hnsw_m, ef_search=ef_search, pq_m=pq_m, train_size=train_size
+        )
+        index_build_time = time.time() - index_build_start
+        logger.info(f"인덱스 생성 완료: {index_build_time:.2f}초, 설정: {search_params}")
+
+        # 7. 근사 인덱스 품질 리포트 (flat 전수 탐색 대비 recall@k vs 지연)
+        recall_report = []
+        if index_type != "flat" and eval_queries > 0:
+            recall_report = evaluate_against_flat(index, embeddings, search_params, eval_queries)
+
+        # 8. 인덱스 정보
+        index_info = {
+            "total_documents": len(documents),
+            "embedding_dimension": embedding_dim,
+            "embedding_model": embedding_model,
+            "index_type": INDEX_CLASS_NAMES[index_type],
+            "search_params": search_params,
+            "created_at": time.time()
         }
-        
-        for i, doc in enumerate(documents):
-            doc_id = doc.id
-            faiss_idx = i
-            
-            metadata_info["document_mapping"][str(faiss_idx)] = doc_id
-            metadata_info["documents_metadata"][doc_id] = doc.get_metadata()
-            metadata_info["documents_content"][doc_id] = doc.get_content()
-        
-        # 10. 메타데이터 파일 저장
-        metadata_file_path = output_path / f"{index_name}_metadata.json"
-        logger.info(f"메타데이터 저장: {metadata_file_path}")
-        with open(metadata_file_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata_info, f, ensure_ascii=False, indent=2)
-        
-        # 11. 빌드 정보 저장
+
         build_info = {
+            "mode": "full",
             "build_time": time.time() - start_time,
             "model_load_time": model_load_time,
             "embedding_time": embedding_time,
+            "index_build_time": index_build_time,
             "total_documents": len(documents),
-            "index_file": str(index_file_path),
-            "metadata_file": str(metadata_file_path),
+            "embedded_documents": len(documents),
+            "index_type": INDEX_CLASS_NAMES[index_type],
+            "search_params": search_params,
+            "recall_report": recall_report,
             "source_data": data_file,
             "embedding_model": embedding_model,
             "embedding_dimension": embedding_dim
         }
-        
-        build_info_path = output_path / f"{index_name}_build_info.json"
-        with open(build_info_path, 'w', encoding='utf-8') as f:
-            json.dump(build_info, f, ensure_ascii=False, indent=2)
-        
+
+        # 9. 새 세대로 저장 및 게시
+        paths = write_generation(
+            output_dir, index_name, index, index_info,
+            doc_ids=[doc.id for doc in documents],
+            contents=texts,
+            metadatas=[doc.get_metadata() for doc in documents],
+            build_info=build_info,
+            keep_generations=keep_generations
+        )
+
         total_time = time.time() - start_time
         logger.info("=== FAISS 인덱스 빌드 완료 ===")
         logger.info(f"총 소요 시간: {total_time:.2f}초")
-        logger.info(f"인덱스 파일: {index_file_path}")
-        logger.info(f"메타데이터 파일: {metadata_file_path}")
-        logger.info(f"빌드 정보: {build_info_path}")
-        
-        # 12. 검증 테스트
-        logger.info("빌드된 인덱스 검증...")
-        test_query = "치킨"
-        test_embedding = embedding_model_instance.encode([test_query])
-        distances, indices = index.search(test_embedding.astype('float32'), 3)
-        
-        logger.info(f"검증 쿼리 '{test_query}' 결과:")
-        for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-            if idx != -1:
-                doc_id = metadata_info["document_mapping"][str(idx)]
-                content = metadata_info["documents_content"][doc_id][:100]
-                logger.info(f"  {i+1}. [{distance:.4f}] {doc_id}: {content}...")
-        
+        logger.info(f"인덱스 세대: {paths['generation']}")
+        logger.info(f"인덱스 파일: {paths['index_file']}")
+        logger.info(f"메타데이터 파일: {paths['metadata_file']}")
+        logger.info(f"문서 테이블 파일: {paths['table_file']}")
+        logger.info(f"빌드 정보: {paths['build_info_file']}")
+
+        # 10. 검증 테스트
+        verify_index(index, paths['table_file'], embedding_model_instance)
+
+        return dict(paths, success=True, build_time=total_time,
+                    total_documents=len(documents), recall_report=recall_report)
+
+    except Exception as e:
+        logger.error(f"FAISS 인덱스 빌드 실패: {e}")
         return {
-            "success": True,
-            "build_time": total_time,
-            "index_file": str(index_file_path),
-            "metadata_file": str(metadata_file_path),
-            "total_documents": len(documents)
+            "success": False,
+            "error": str(e)
+        }
+
+
+def update_faiss_index(
+    data_file: str = "rag/test_data.json",
+    output_dir: str = "outputs",
+    index_name: str = "prebuilt_faiss",
+    compact_threshold: float = 0.3,
+    keep_generations: int = 3,
+    **build_kwargs
+):
+    """
+    현재 세대를 기준으로 FAISS 인덱스 증분 업데이트
+
+    문서 ID별 내용 해시를 비교하여 새로 추가되거나 바뀐 문서만 임베딩해 인덱스 끝에 추가하고,
+    삭제/변경된 문서의 기존 행은 tombstone으로 표시합니다 (검색 시 IDSelector로 제외).
+    tombstone 비율이 compact_threshold를 넘으면 유효 벡터만으로 인덱스를 재구성합니다.
+
+    Args:
+        data_file: 소스 데이터 파일 경로
+        output_dir: 출력 디렉토리
+        index_name: 인덱스 파일명 (확장자 제외)
+        compact_threshold: 재구성을 시작할 tombstone 비율
+        keep_generations: 보관할 인덱스 세대 수
+        build_kwargs: 기준 세대가 없을 때 전체 빌드에 전달할 인자
+    """
+    logger.info("=== FAISS 인덱스 증분 업데이트 시작 ===")
+    start_time = time.time()
+
+    try:
+        import faiss
+        import numpy as np
+        from rag.document_table import MappedDocumentTable, content_hash
+        from rag.index_generations import resolve_index_path
+
+        # 1. 기준 세대 확인 (없으면 전체 빌드)
+        base_index_path = resolve_index_path(str(Path(output_dir) / f"{index_name}.faiss"))
+        base_table_path = base_index_path.replace('.faiss', '_docs.bin')
+        if not Path(base_index_path).exists() or not Path(base_table_path).exists():
+            logger.info("기준 인덱스가 없어 전체 빌드를 수행합니다")
+            return build_faiss_index(data_file, output_dir, index_name,
+                                     keep_generations=keep_generations, **build_kwargs)
+
+        logger.info(f"기준 인덱스 로드: {base_index_path}")
+        index = faiss.read_index(base_index_path)
+        base_table = MappedDocumentTable(base_table_path)
+        base_info = dict(base_table.info)
+        embedding_model = base_info.get('embedding_model', 'all-MiniLM-L6-v2')
+
+        # 2. 새 데이터 로드 및 해시 비교
+        documents, texts = load_documents(data_file)
+        metadatas = [doc.get_metadata() for doc in documents]
+
+        base_rows = {}
+        for row in np.flatnonzero(base_table.has_doc):
+            base_rows[base_table.doc_id(int(row))] = int(row)
+
+        alive = base_table.has_doc.copy()
+        changed = []  # 다시 임베딩할 문서 위치
+        unchanged = 0
+        updated = 0
+        for position, doc in enumerate(documents):
+            row = base_rows.pop(doc.id, None)
+            if row is not None and base_table.content_hash(row) == content_hash(texts[position], metadatas[position]):
+                unchanged += 1
+                continue
+            if row is not None:
+                alive[row] = False  # 변경된 문서의 기존 행은 tombstone
+                updated += 1
+            changed.append(position)
+
+        for row in base_rows.values():  # 새 데이터에 없는 문서는 삭제
+            alive[row] = False
+        deleted = len(base_rows)
+        added = len(changed) - updated
+        logger.info(f"변경 감지: 유지 {unchanged}, 추가 {added}, 변경 {updated}, 삭제 {deleted}")
+
+        # 3. 변경 문서만 임베딩
+        embedding_time = 0.0
+        new_embeddings = np.empty((0, index.d), dtype='float32')
+        if changed:
+            from sentence_transformers import SentenceTransformer
+            logger.info(f"임베딩 모델 로드: {embedding_model}")
+            embedding_model_instance = SentenceTransformer(embedding_model)
+            embedding_start = time.time()
+            new_embeddings = embedding_model_instance.encode(
+                [texts[position] for position in changed], convert_to_numpy=True).astype('float32')
+            embedding_time = time.time() - embedding_start
+            logger.info(f"임베딩 생성 완료: {len(changed)}개, {embedding_time:.2f}초")
+
+        # 4. 문서 테이블 행 구성 (기존 행 + 추가 행, FAISS 인덱스 순서)
+        doc_ids, contents, row_metadatas = [], [], []
+        for row in range(base_table.count):
+            doc_ids.append(base_table.doc_id(row))
+            if alive[row]:
+                contents.append(base_table.get_content(row))
+                row_metadatas.append(base_table.get_metadata(row))
+            else:
+                contents.append("")
+                row_metadatas.append({})
+        for position in changed:
+            doc_ids.append(documents[position].id)
+            contents.append(texts[position])
+            row_metadatas.append(metadatas[position])
+        alive = np.concatenate([alive, np.ones(len(changed), dtype=bool)])
+
+        if len(new_embeddings):
+            index.add(new_embeddings)
+
+        # 5. tombstone이 많으면 유효 행만으로 재구성
+        tombstones = int((~alive).sum())
+        compacted = False
+        if alive.size and tombstones / alive.size > compact_threshold:
+            logger.info(f"tombstone 비율 {tombstones / alive.size:.1%} > {compact_threshold:.0%}: 인덱스 재구성")
+            index = compact_index(index, alive, base_info.get('search_params', {}))
+            keep = np.flatnonzero(alive)
+            doc_ids = [doc_ids[row] for row in keep]
+            contents = [contents[row] for row in keep]
+            row_metadatas = [row_metadatas[row] for row in keep]
+            alive = np.ones(len(keep), dtype=bool)
+            tombstones = 0
+            compacted = True
+
+        # 6. 새 세대로 저장 및 게시
+        index_info = dict(base_info,
+                          total_documents=int(alive.sum()),
+                          tombstones=tombstones,
+                          base_generation=base_info.get('generation'),
+                          created_at=time.time())
+        build_info = {
+            "mode": "incremental",
+            "build_time": time.time() - start_time,
+            "embedding_time": embedding_time,
+            "total_documents": int(alive.sum()),
+            "embedded_documents": len(changed),
+            "unchanged": unchanged,
+            "added": added,
+            "updated": updated,
+            "deleted": deleted,
+            "tombstones": tombstones,
+            "compacted": compacted,
+            "base_index": base_index_path,
+            "source_data": data_file,
+            "embedding_model": embedding_model
         }
-        
+        paths = write_generation(output_dir, index_name, index, index_info,
+                                 doc_ids, contents, row_metadatas, build_info,
+                                 alive=alive, keep_generations=keep_generations)
+
+        total_time = time.time() - start_time
+        logger.info("=== FAISS 인덱스 증분 업데이트 완료 ===")
+        logger.info(f"총 소요 시간: {total_time:.2f}초 (임베딩 {len(changed)}개)")
+        logger.info(f"인덱스 세대: {paths['generation']}")
+
+        return dict(paths, success=True, build_time=total_time, total_documents=int(alive.sum()),
+                    embedded_documents=len(changed), added=added, updated=updated,
+                    deleted=deleted, tombstones=tombstones, compacted=compacted)
+
     except Exception as e:
-        logger.error(f"FAISS 인덱스 빌드 실패: {e}")
+        logger.error(f"FAISS 인덱스 증분 업데이트 실패: {e}")
         return {
             "success": False,
             "error": str(e)
         }
 
+
+def compact_index(index, alive, search_params: Dict[str, Any]):
+    """유효 행의 벡터만으로 같은 타입의 인덱스 재구성
+
+    IVFPQ처럼 벡터를 복원할 수 없는 인덱스는 복원 근사값으로 재구성되므로
+    정확도가 중요하면 전체 빌드를 다시 수행하세요.
+    """
+    import faiss
+    import numpy as np
+    from rag.index_factory import build_index
+
+    ivf_index = faiss.try_extract_index_ivf(index)
+    if ivf_index is not None:
+        ivf_index.make_direct_map()
+
+    rows = np.flatnonzero(alive)
+    vectors = index.reconstruct_batch(rows.astype('int64'))
+
+    build_kwargs = {key: search_params[key] for key in ('nlist', 'nprobe', 'pq_m', 'pq_nbits', 'train_size')
+                    if key in search_params}
+    if 'hnsw_m' in search_params:
+        build_kwargs.update(hnsw_m=search_params['hnsw_m'], ef_search=search_params['ef_search'],
+                            ef_construction=search_params.get('ef_construction', 200))
+    compacted, _ = build_index(vectors, index_type=search_params.get('index_type', 'flat'), **build_kwargs)
+    return compacted
+
+
+def verify_index(index, table_file_path: str, embedding_model_instance, test_query: str = "치킨"):
+    """빌드된 인덱스로 검증 쿼리 실행"""
+    from rag.document_table import MappedDocumentTable
+
+    logger.info("빌드된 인덱스 검증...")
+    test_embedding = embedding_model_instance.encode([test_query])
+    distances, indices = index.search(test_embedding.astype('float32'), 3)
+
+    document_table = MappedDocumentTable(table_file_path)
+    logger.info(f"검증 쿼리 '{test_query}' 결과:")
+    for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
+        if idx != -1:
+            doc_id = document_table.doc_id(int(idx))
+            content = document_table.get_content(int(idx))[:100]
+            logger.info(f"  {i+1}. [{distance:.4f}] {doc_id}: {content}...")
+
+
+def evaluate_against_flat(index, embeddings, search_params: Dict[str, Any], num_queries: int,
+                          k: int = 10, seed: int = 42) -> List[Dict[str, Any]]:
+    """flat 전수 탐색을 기준으로 근사 인덱스의 recall@k와 지연을 설정값별로 측정
+
+    쿼리는 문서 임베딩을 샘플링하고 약간의 노이즈를 더해 만듭니다
+    (문서 자신이 항상 1위가 되는 자기 검색 편향 방지).
+    """
+    import faiss
+    import numpy as np
+    from rag.index_factory import recall_latency_sweep
+
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(embeddings), size=min(num_queries, len(embeddings)), replace=False)
+    noise_scale = 0.1 * float(embeddings.std())
+    queries = embeddings[rows] + rng.normal(0, noise_scale, size=(len(rows), embeddings.shape[1]))
+    queries = queries.astype('float32')
+
+    baseline = faiss.IndexFlatL2(embeddings.shape[1])
+    baseline.add(embeddings)
+
+    report = recall_latency_sweep(index, baseline, queries, search_params, k=k)
+    logger.info(f"recall@{k} vs 지연 (flat 기준, 쿼리 {len(queries)}개):")
+    for row in report:
+        marker = " *" if row['setting'] and all(
+            search_params.get(name) == value for name, value in row['setting'].items()) else ""
+        logger.info(f"  {row['setting']}: recall={row['recall']:.3f}, "
+                    f"{row['latency_ms']:.3f}ms (flat {row['flat_latency_ms']:.3f}ms, "
+                    f"{row['speedup']:.1f}x){marker}")
+    return report
+
 def main():
     """메인 함수"""
     parser = argparse.ArgumentParser(description="FAISS 인덱스 사전 빌드")
@@ -195,24 +489,65 @@ def main():
     parser.add_argument("--output", default="outputs", help="출력 디렉토리")
     parser.add_argument("--name", default="prebuilt_faiss", help="인덱스 파일명")
     parser.add_argument("--model", default="all-MiniLM-L6-v2", help="임베딩 모델")
-    
+    parser.add_argument("--index-type", default="flat", choices=["flat", "ivf", "hnsw", "ivfpq"],
+                        help="인덱스 타입 (flat: 정확, ivf/hnsw/ivfpq: 근사)")
+    parser.add_argument("--nlist", type=int, default=None, help="IVF 클러스터 수 (기본: 자동)")
+    parser.add_argument("--nprobe", type=int, default=None, help="IVF 검색 클러스터 수 (기본: nlist/16)")
+    parser.add_argument("--hnsw-m", type=int, default=32, help="HNSW 이웃 수")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW 검색 폭")
+    parser.add_argument("--pq-m", type=int, default=None, help="IVFPQ 서브양자화기 수 (기본: 차원/8)")
+    parser.add_argument("--train-size", type=int, default=None, help="IVF 학습 샘플 수 (기본: 자동)")
+    parser.add_argument("--eval-queries", type=int, default=200, help="recall 리포트 쿼리 수 (0: 생략)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="현재 세대 기준으로 변경된 문서만 다시 임베딩")
+    parser.add_argument("--compact-threshold", type=float, default=0.3,
+                        help="증분 업데이트 시 인덱스를 재구성할 tombstone 비율")
+    parser.add_argument("--keep-generations", type=int, default=3, help="보관할 인덱스 세대 수")
+
     args = parser.parse_args()
-    
-    result = build_faiss_index(
-        data_file=args.data,
-        output_dir=args.output,
-        index_name=args.name,
-        embedding_model=args.model
+
+    build_kwargs = dict(
+        embedding_model=args.model,
+        index_type=args.index_type,
+        nlist=args.nlist,
+        nprobe=args.nprobe,
+        hnsw_m=args.hnsw_m,
+        ef_search=args.ef_search,
+        pq_m=args.pq_m,
+        train_size=args.train_size,
+        eval_queries=args.eval_queries
     )
-    
+
+    if args.incremental:
+        result = update_faiss_index(
+            data_file=args.data,
+            output_dir=args.output,
+            index_name=args.name,
+            compact_threshold=args.compact_threshold,
+            keep_generations=args.keep_generations,
+            **build_kwargs
+        )
+    else:
+        result = build_faiss_index(
+            data_file=args.data,
+            output_dir=args.output,
+            index_name=args.name,
+            keep_generations=args.keep_generations,
+            **build_kwargs
+        )
+
     if result["success"]:
         print("SUCCESS: FAISS 인덱스 빌드 성공!")
+        print(f"인덱스 세대: {result['generation']}")
         print(f"인덱스 파일: {result['index_file']}")
         print(f"총 문서 수: {result['total_documents']}")
+        if "embedded_documents" in result:
+            print(f"임베딩 문서 수: {result['embedded_documents']} "
+                  f"(추가 {result['added']}, 변경 {result['updated']}, 삭제 {result['deleted']})")
         print(f"빌드 시간: {result['build_time']:.2f}초")
     else:
         print("ERROR: FAISS 인덱스 빌드 실패!")
         print(f"오류: {result['error']}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -92,6 +92,9 @@ class NaviyamDataLoader:
             # 쿠폰은 빈 딕셔너리로 초기화
             self.knowledge.coupons = {}
 
+            # 가게별 메뉴, 카테고리, 가격 정렬 인덱스 구축
+            self.knowledge.rebuild_indexes()
+
             logger.info(f"지식베이스 로드 완료: 가게 {len(self.knowledge.shops)}개, 메뉴 {len(self.knowledge.menus)}개")
             return self.knowledge
 
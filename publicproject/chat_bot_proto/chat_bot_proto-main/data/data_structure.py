@@ -2,8 +2,9 @@
 나비얌 챗봇 데이터 구조 정의
 """
 
+import bisect
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from enum import Enum
 
@@ -176,6 +177,29 @@ class TrainingData:
     domain: str = "naviyam"  # 도메인
 
 
+def normalize_category(category: Optional[str]) -> str:
+    """카테고리 비교용 정규화 (앞뒤 공백 제거, 소문자)"""
+    return (category or '').strip().lower()
+
+
+@dataclass
+class KnowledgeIndexes:
+    """NaviyamKnowledge 보조 인덱스
+
+    가게/메뉴를 매 요청 전체 스캔하지 않도록 로드 시점에 한 번 구축합니다.
+    목록 순서(dict 삽입 순서)는 인덱스 안에서도 그대로 유지됩니다.
+    """
+    key: Tuple[int, int, int, int]  # (id(shops), len(shops), id(menus), len(menus))
+    shops: List[NaviyamShop]  # knowledge.shops 순서
+    shops_by_category: Dict[str, List[int]]  # 정규화 카테고리 → 가게 순번
+    good_influence_shops: List[NaviyamShop]
+    menus_by_shop: Dict[int, List[NaviyamMenu]]  # 가게 ID → 메뉴 (knowledge.menus 순서)
+    cheapest_menu_by_shop: Dict[int, NaviyamMenu]  # 가게별 최저가 메뉴 (같은 가격이면 먼저 나온 메뉴)
+    menu_prices: List[int]  # 전체 메뉴 가격 오름차순 (bisect 예산 조회용)
+    menu_positions_by_price: List[int]  # menu_prices 순서의 메뉴 순번 (같은 가격은 knowledge.menus 순서)
+    menus: List[NaviyamMenu]  # knowledge.menus 순서
+
+
 @dataclass
 class NaviyamKnowledge:
     """나비얌 도메인 지식베이스"""
@@ -184,18 +208,92 @@ class NaviyamKnowledge:
     coupons: Dict[str, NaviyamCoupon] = field(default_factory=dict)
     reviews: List[Dict] = field(default_factory=list)
     popular_combinations: List[Dict] = field(default_factory=list)  # 인기 조합
+    _indexes: Optional[KnowledgeIndexes] = field(default=None, init=False, repr=False, compare=False)
+
+    def rebuild_indexes(self) -> KnowledgeIndexes:
+        """보조 인덱스 구축 (데이터 로더가 로드 후 호출, 같은 키의 값을 바꿨을 때도 호출)"""
+        shops = list(self.shops.values())
+        shops_by_category: Dict[str, List[int]] = {}
+        for position, shop in enumerate(shops):
+            shops_by_category.setdefault(normalize_category(shop.category), []).append(position)
+
+        menus = list(self.menus.values())
+        menus_by_shop: Dict[int, List[NaviyamMenu]] = {}
+        cheapest_menu_by_shop: Dict[int, NaviyamMenu] = {}
+        for menu in menus:
+            menus_by_shop.setdefault(menu.shop_id, []).append(menu)
+            cheapest = cheapest_menu_by_shop.get(menu.shop_id)
+            if cheapest is None or menu.price < cheapest.price:
+                cheapest_menu_by_shop[menu.shop_id] = menu
+
+        # sorted는 안정 정렬이므로 같은 가격은 knowledge.menus 순서 유지
+        positions_by_price = sorted(range(len(menus)), key=lambda position: menus[position].price)
+
+        self._indexes = KnowledgeIndexes(
+            key=self._index_key(),
+            shops=shops,
+            shops_by_category=shops_by_category,
+            good_influence_shops=[shop for shop in shops if shop.is_good_influence_shop],
+            menus_by_shop=menus_by_shop,
+            cheapest_menu_by_shop=cheapest_menu_by_shop,
+            menu_prices=[menus[position].price for position in positions_by_price],
+            menu_positions_by_price=positions_by_price,
+            menus=menus
+        )
+        return self._indexes
+
+    def _index_key(self) -> Tuple[int, int, int, int]:
+        return (id(self.shops), len(self.shops), id(self.menus), len(self.menus))
+
+    @property
+    def indexes(self) -> KnowledgeIndexes:
+        """보조 인덱스 (가게/메뉴 목록이 교체되거나 개수가 바뀌었으면 다시 구축)"""
+        indexes = self._indexes
+        if indexes is None or indexes.key != self._index_key():
+            indexes = self.rebuild_indexes()
+        return indexes
 
     def get_good_influence_shops(self) -> List[NaviyamShop]:
         """착한가게 목록 반환"""
-        return [shop for shop in self.shops.values() if shop.is_good_influence_shop]
+        return list(self.indexes.good_influence_shops)
 
     def get_shops_by_category(self, category: str) -> List[NaviyamShop]:
-        """카테고리별 가게 목록 반환"""
-        return [shop for shop in self.shops.values() if shop.category == category]
+        """카테고리별 가게 목록 반환 (정규화된 카테고리 일치)"""
+        indexes = self.indexes
+        return [indexes.shops[position]
+                for position in indexes.shops_by_category.get(normalize_category(category), [])]
+
+    def get_shops_matching_category(self, category_fragment: str) -> List[NaviyamShop]:
+        """정규화된 카테고리에 category_fragment가 포함된 가게 목록 (knowledge.shops 순서)
+
+        가게가 아니라 서로 다른 카테고리 수만큼만 비교합니다 ("치킨" → "한식/치킨" 포함).
+        """
+        indexes = self.indexes
+        fragment = normalize_category(category_fragment)
+        positions = [position
+                     for category, category_positions in indexes.shops_by_category.items()
+                     if fragment in category
+                     for position in category_positions]
+        positions.sort()
+        return [indexes.shops[position] for position in positions]
+
+    def get_menus_by_shop(self, shop_id: int) -> List[NaviyamMenu]:
+        """가게 메뉴 목록 반환"""
+        return list(self.indexes.menus_by_shop.get(shop_id, []))
+
+    def get_cheapest_menu(self, shop_id: int, max_price: Optional[int] = None) -> Optional[NaviyamMenu]:
+        """가게 최저가 메뉴 (max_price를 넘으면 예산 안의 메뉴가 없으므로 None)"""
+        menu = self.indexes.cheapest_menu_by_shop.get(shop_id)
+        if menu is None or (max_price is not None and menu.price > max_price):
+            return None
+        return menu
 
     def get_menus_in_budget(self, max_budget: int) -> List[NaviyamMenu]:
-        """예산 내 메뉴 목록 반환"""
-        return [menu for menu in self.menus.values() if menu.price <= max_budget]
+        """예산 내 메뉴 목록 반환 (knowledge.menus 순서)"""
+        indexes = self.indexes
+        count = bisect.bisect_right(indexes.menu_prices, max_budget)
+        positions = sorted(indexes.menu_positions_by_price[:count])
+        return [indexes.menus[position] for position in positions]
 
 
 @dataclass
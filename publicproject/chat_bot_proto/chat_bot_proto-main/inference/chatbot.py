@@ -5,6 +5,7 @@
 
 import time
 import logging
+import threading
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from dataclasses import asdict
@@ -23,8 +24,14 @@ from nlp.nlu import NaviyamNLU
 from nlp.nlg import NaviyamNLG, ResponseTone
 from nlp.llm_normalizer import LLMNormalizer, LLMNormalizedOutput
 from .user_manager import NaviyamUserManager
+from .data_collector import WriteBehindDataCollector
+from .write_behind import WriteBehindQueue
+from .llm_worker import LLMWorker
 from .response_generator import NaviyamResponseGenerator
 from rag.retriever import create_naviyam_retriever
+from rag.embedding_cache import QueryEmbeddingCache
+from rag.embedding_batcher import MicroBatchingEncoder
+from .pipeline_timing import RequestTrace, StageLatencyRecorder
 
 logger = logging.getLogger(__name__)
 
@@ -38,9 +45,6 @@ class ConversationMemory:
 
     def add_conversation(self, user_id: str, user_input: str, bot_response: str, extracted_info: ExtractedInfo):
         """대화 추가"""
-        if user_id not in self.conversations:
-            self.conversations[user_id] = []
-
         conversation_item = {
             "timestamp": datetime.now().isoformat(),
             "user_input": user_input,
@@ -50,7 +54,8 @@ class ConversationMemory:
             "entities": asdict(extracted_info.entities)
         }
 
-        self.conversations[user_id].append(conversation_item)
+        # setdefault: 동시 요청에서도 목록이 덮어써지지 않도록
+        self.conversations.setdefault(user_id, []).append(conversation_item)
 
         # 최대 히스토리 유지
         if len(self.conversations[user_id]) > self.max_history:
@@ -84,37 +89,47 @@ class PerformanceMonitor:
             "successful_recommendations": 0
         }
         self.response_times = []
+        self.stage_latency = StageLatencyRecorder()
+        # API 서버에서는 여러 스레드가 동시에 기록
+        self._lock = threading.Lock()
 
     def record_conversation(self, response_time: float, success: bool = True):
         """대화 기록"""
-        self.metrics["total_conversations"] += 1
-        self.metrics["total_response_time"] += response_time
-        self.response_times.append(response_time)
+        with self._lock:
+            self.metrics["total_conversations"] += 1
+            self.metrics["total_response_time"] += response_time
+            self.response_times.append(response_time)
 
-        if success:
-            self.metrics["successful_recommendations"] += 1
-        else:
-            self.metrics["error_count"] += 1
+            if success:
+                self.metrics["successful_recommendations"] += 1
+            else:
+                self.metrics["error_count"] += 1
 
-        # 평균 응답 시간 계산
-        if self.metrics["total_conversations"] > 0:
-            self.metrics["avg_response_time"] = (
-                    self.metrics["total_response_time"] / self.metrics["total_conversations"]
-            )
+            # 평균 응답 시간 계산
+            if self.metrics["total_conversations"] > 0:
+                self.metrics["avg_response_time"] = (
+                        self.metrics["total_response_time"] / self.metrics["total_conversations"]
+                )
+
+    def record_stages(self, trace: RequestTrace):
+        """요청 1건의 단계별 소요 시간 기록"""
+        self.stage_latency.record_trace(trace)
 
     def get_performance_summary(self) -> Dict[str, Any]:
         """성능 요약 반환"""
-        recent_times = self.response_times[-100:] if len(self.response_times) > 100 else self.response_times
+        with self._lock:
+            recent_times = self.response_times[-100:]
+            summary = self.metrics.copy()
 
-        summary = self.metrics.copy()
         if recent_times:
             summary["recent_avg_response_time"] = sum(recent_times) / len(recent_times)
             summary["recent_max_response_time"] = max(recent_times)
             summary["recent_min_response_time"] = min(recent_times)
 
         summary["success_rate"] = (
-                self.metrics["successful_recommendations"] / max(self.metrics["total_conversations"], 1)
+                summary["successful_recommendations"] / max(summary["total_conversations"], 1)
         )
+        summary["stage_latency_ms"] = self.stage_latency.summary()
 
         return summary
 
@@ -132,6 +147,7 @@ class NaviyamChatbot:
         # 핵심 컴포넌트들
         self.knowledge: Optional[NaviyamKnowledge] = None
         self.model = None  # A.X 3.1 Lite 또는 KoAlpaca 모델
+        self.llm_worker: Optional[LLMWorker] = None
         self.preprocessor: Optional[NaviyamTextPreprocessor] = None
         self.nlu: Optional[NaviyamNLU] = None
         self.nlg: Optional[NaviyamNLG] = None
@@ -139,6 +155,10 @@ class NaviyamChatbot:
         self.response_generator: Optional[NaviyamResponseGenerator] = None
         self.llm_normalizer: Optional[LLMNormalizer] = None
         self.data_collector = None
+        self.retriever = None
+        self.query_cache: Optional[QueryEmbeddingCache] = None
+        self.embedding_batcher: Optional[MicroBatchingEncoder] = None
+        self.write_behind: Optional[WriteBehindQueue] = None
 
         # 메모리 및 모니터링
         self.conversation_memory = ConversationMemory(config.data.max_conversations)
@@ -261,6 +281,14 @@ class NaviyamChatbot:
 
             logger.info(f"{model_name} 모델 로드 완료")
 
+            # 생성은 전용 워커 스레드 하나에서 (동시 요청은 워커 큐에서 대기)
+            if getattr(self.config.inference, 'llm_worker', False):
+                self.llm_worker = LLMWorker(
+                    self.model,
+                    max_queue=self.config.inference.llm_queue_size,
+                    timeout=self.config.inference.response_timeout
+                )
+
         except Exception as e:
             logger.warning(f"언어 모델 로드 실패: {e}. 템플릿 기반으로 동작합니다.")
             self.model = None
@@ -274,7 +302,7 @@ class NaviyamChatbot:
         self.nlg = NaviyamNLG(default_tone=ResponseTone.FRIENDLY)
 
         if self.model:
-            self.llm_normalizer = LLMNormalizer(self.model)
+            self.llm_normalizer = LLMNormalizer(self.llm_worker or self.model)
             logger.info("LLM 정규화기 초기화 완료")
 
         logger.info("NLP 컴포넌트 초기화 완료")
@@ -286,7 +314,7 @@ class NaviyamChatbot:
         self.response_generator = NaviyamResponseGenerator(
             knowledge=self.knowledge,
             nlg=self.nlg,
-            model=self.model
+            model=self.llm_worker or self.model
         )
 
         logger.info("응답 생성기 초기화 완료")
@@ -295,9 +323,14 @@ class NaviyamChatbot:
         """사용자 관리자 초기화"""
         logger.info("사용자 관리자 초기화...")
 
+        # 프로필/학습 데이터 저장은 요청 경로 밖(writer 스레드)에서
+        if self.config.inference.write_behind:
+            self.write_behind = WriteBehindQueue(max_size=self.config.inference.write_behind_queue_size)
+
         self.user_manager = NaviyamUserManager(
             save_path=str(Path(self.config.data.output_path) / "user_profiles"),
-            enable_personalization=self.config.inference.enable_personalization
+            enable_personalization=self.config.inference.enable_personalization,
+            write_behind=self.write_behind
         )
 
         logger.info("사용자 관리자 초기화 완료")
@@ -316,8 +349,18 @@ class NaviyamChatbot:
                 store_type = "mock"  # 기본값
                 index_path = None
             
+            # 검색 모드 (dense / sparse / hybrid)
+            retrieval_mode = getattr(vector_store_type, 'retrieval_mode', "dense")
+            hybrid_weights = {
+                "dense": getattr(vector_store_type, 'hybrid_dense_weight', 1.0),
+                "sparse": getattr(vector_store_type, 'hybrid_sparse_weight', 1.0)
+            }
+            
             logger.info(f"RAG Vector Store 타입: {store_type}")
             
+            # 쿼리 임베딩 캐시 생성
+            self.query_cache = self._create_query_cache()
+            
             # RAG Retriever 생성 (test_data.json 사용)
             if store_type == "faiss" and index_path:
                 # FAISS 전용 생성 로직
@@ -328,14 +371,16 @@ class NaviyamChatbot:
                 # Vector Store 생성
                 faiss_store = FAISSVectorStore(
                     embedding_model=None,
-                    index_path=index_path
+                    index_path=index_path,
+                    query_cache=self.query_cache
                 )
                 
                 # Query Structurizer 생성
                 query_structurizer = QueryStructurizer(llm_client=None)
                 
                 # Retriever 생성
-                self.retriever = NaviyamRetriever(faiss_store, query_structurizer)
+                self.retriever = NaviyamRetriever(faiss_store, query_structurizer,
+                                                  retrieval_mode=retrieval_mode, hybrid_weights=hybrid_weights)
                 
                 # 지식 베이스 로드 및 추가
                 knowledge_data = load_knowledge_from_file("rag/test_data.json")
@@ -347,22 +392,78 @@ class NaviyamChatbot:
                 # Mock 또는 기타 타입
                 self.retriever = create_naviyam_retriever(
                     knowledge_file_path="rag/test_data.json",
-                    vector_store_type=store_type
+                    vector_store_type=store_type,
+                    query_cache=self.query_cache,
+                    index_reload_interval=getattr(vector_store_type, 'index_reload_interval', 0.0),
+                    retrieval_mode=retrieval_mode,
+                    hybrid_weights=hybrid_weights
                 )
                 logger.info(f"{store_type} RAG 시스템 초기화 완료")
             
+            # 동시 요청의 쿼리 임베딩을 묶어서 처리
+            self.embedding_batcher = self._create_embedding_batcher(self.retriever.vector_store)
+            
         except Exception as e:
             logger.error(f"RAG 시스템 초기화 실패: {e}")
             # RAG 실패 시에도 챗봇이 동작하도록 None으로 설정
             self.retriever = None
             logger.warning("RAG 없이 챗봇 실행")
 
+    def _create_query_cache(self) -> Optional[QueryEmbeddingCache]:
+        """RAGConfig 설정으로 쿼리 임베딩 캐시 생성"""
+        rag_config = getattr(self.config, 'rag', None)
+        if not rag_config or not getattr(rag_config, 'enable_query_cache', False):
+            return None
+        
+        query_cache = QueryEmbeddingCache(
+            max_size=rag_config.query_cache_size,
+            ttl_seconds=rag_config.query_cache_ttl,
+            persist_path=rag_config.query_cache_path
+        )
+        logger.info(f"쿼리 임베딩 캐시 활성화 (최대 {rag_config.query_cache_size}개, {len(query_cache)}개 로드)")
+        return query_cache
+
+    def _create_embedding_batcher(self, vector_store) -> Optional[MicroBatchingEncoder]:
+        """RAGConfig 설정으로 Vector Store의 임베딩 모델을 마이크로 배처로 교체"""
+        rag_config = getattr(self.config, 'rag', None)
+        if not rag_config or not getattr(rag_config, 'enable_embedding_batching', False):
+            return None
+        
+        model = getattr(vector_store, 'embedding_model', None)
+        model_loader = getattr(vector_store, 'load_embedding_model', None)
+        if model is None and model_loader is None:
+            logger.info("임베딩 모델을 사용하지 않는 Vector Store: 마이크로 배칭 생략")
+            return None
+        
+        embedding_batcher = MicroBatchingEncoder(
+            model=model,
+            model_loader=None if model is not None else model_loader,
+            max_batch_size=rag_config.embedding_batch_size,
+            max_wait_ms=rag_config.embedding_batch_wait_ms
+        )
+        vector_store.embedding_model = embedding_batcher
+        return embedding_batcher
+
+    def attach_data_collector(self, collector):
+        """학습 데이터 수집기 연결 (챗봇/NLU 수집 호출은 write-behind 큐를 거쳐 전달)"""
+        if self.write_behind and not isinstance(collector, WriteBehindDataCollector):
+            collector = WriteBehindDataCollector(collector, self.write_behind)
+        self.data_collector = collector
+
+        if self.nlu:
+            self.nlu.set_learning_data_collector(collector)
+        return collector
+
     def process_user_input(self, user_input: UserInput) -> ChatbotOutput:
-        """사용자 입력 처리 (메인 메서드)"""
+        """사용자 입력 처리 (메인 메서드)
+
+        단계별(PIPELINE_STAGES) 소요 시간을 측정해 PerformanceMonitor에 기록하고,
+        디버그 모드에서는 요청별 trace를 session_data["stage_trace"]로 반환합니다.
+        """
         if not self.is_initialized:
             raise RuntimeError("챗봇이 초기화되지 않았습니다")
 
-        start_time = time.time()
+        trace = RequestTrace()
 
         try:
             # 1. 입력 검증
@@ -370,82 +471,78 @@ class NaviyamChatbot:
                 return self._generate_empty_input_response(user_input)
 
             # 2. 전처리
-            preprocessed = self.preprocessor.preprocess(user_input.text)
+            with trace.stage("preprocess"):
+                preprocessed = self.preprocessor.preprocess(user_input.text)
 
-            # 3. 의도 및 엔티티 추출
-            # extracted_info = self.nlu.extract_intent_and_entities(
-            #     user_input.text, user_input.user_id
-            # )
             # 3. 스마트 NLU 처리 (LLM 통합)
-            extracted_info = self._smart_nlu_processing(user_input, preprocessed)
+            with trace.stage("nlu"):
+                extracted_info = self._smart_nlu_processing(user_input, preprocessed)
 
             # 3.5. RAG 검색 (추천 관련 의도인 경우)
-            rag_context = self._perform_rag_search(user_input, extracted_info)
+            with trace.stage("rag"):
+                rag_context = self._perform_rag_search(user_input, extracted_info)
 
             # 4. 사용자 프로필 조회/업데이트
-            user_profile = self.user_manager.get_or_create_user_profile(user_input.user_id)
-            self.user_manager.update_user_interaction(
-                user_input.user_id, extracted_info, preprocessed.emotion
-            )
-
-            # 5. 응답 생성
-            # response = self.response_generator.generate_response(
-            #     extracted_info=extracted_info,
-            #     user_profile=user_profile,
-            #     conversation_context=self.conversation_memory.get_recent_conversations(
-            #         user_input.user_id, 3
-            #     )
-            # )
+            with trace.stage("profile"):
+                user_profile = self.user_manager.get_or_create_user_profile(user_input.user_id)
+                self.user_manager.update_user_interaction(
+                    user_input.user_id, extracted_info, preprocessed.emotion
+                )
 
             # 5. 스마트 응답 생성 (LLM 통합)
-            response = self._smart_response_generation(
-                extracted_info, user_profile, user_input.user_id, rag_context
-            )
-            if response.metadata.get("onboarding_complete"):
-                # 사용자를 normal_mode로 전환하기 위해 interaction_count 증가
-                if user_profile:
-                    user_profile.interaction_count = max(user_profile.interaction_count, 3)
-                    user_profile.data_completeness = 1.0  # 온보딩 완료로 설정
-                    self.user_manager._save_user_profile(user_profile)
+            with trace.stage("response"):
+                response = self._smart_response_generation(
+                    extracted_info, user_profile, user_input.user_id, rag_context
+                )
+
+            # 6. 온보딩 완료 처리 및 개인화 적용
+            with trace.stage("personalize"):
+                if response.metadata.get("onboarding_complete"):
+                    # 사용자를 normal_mode로 전환하기 위해 interaction_count 증가
+                    if user_profile:
+                        user_profile.interaction_count = max(user_profile.interaction_count, 3)
+                        user_profile.data_completeness = 1.0  # 온보딩 완료로 설정
+                        self.user_manager._save_user_profile(user_profile)
 
-                logger.info(f"사용자 {user_input.user_id} 온보딩 완료")
-            # 6. 개인화 적용
-            response = self.user_manager.personalize_response(response, user_profile)
+                    logger.info(f"사용자 {user_input.user_id} 온보딩 완료")
+                response = self.user_manager.personalize_response(response, user_profile)
 
             # 7. 학습 데이터 수집
-            learning_data = self._collect_learning_data(
-                user_input, extracted_info, response, preprocessed
-            )
+            with trace.stage("learning_data"):
+                learning_data = self._collect_learning_data(
+                    user_input, extracted_info, response, preprocessed
+                )
 
-            # 8. 데이터 수집기에 전달 (새로 추가)
-            if self.data_collector:
-                self.data_collector.collect_interaction_data(user_input.user_id, learning_data)
+                # 데이터 수집기에 전달
+                if self.data_collector:
+                    self.data_collector.collect_interaction_data(user_input.user_id, learning_data)
 
-                # 추천 데이터도 수집
-                if response.recommendations:
-                    self.data_collector.collect_recommendation_data(
-                        user_id=user_input.user_id,
-                        recommendations=response.recommendations,
-                        user_selection=None  # 나중에 사용자 선택시 업데이트
-                    )
+                    # 추천 데이터도 수집
+                    if response.recommendations:
+                        self.data_collector.collect_recommendation_data(
+                            user_id=user_input.user_id,
+                            recommendations=response.recommendations,
+                            user_selection=None  # 나중에 사용자 선택시 업데이트
+                        )
 
             # 8. 세션 데이터 생성
-            session_data = self._generate_session_data(
-                user_input, extracted_info, response
-            )
-
-            # 9. 대화 기록 저장
-            if self.config.inference.save_conversations:
-                self.conversation_memory.add_conversation(
-                    user_input.user_id, user_input.text, response.text, extracted_info
+            with trace.stage("session"):
+                session_data = self._generate_session_data(
+                    user_input, extracted_info, response
                 )
 
-            # 10. 성능 모니터링
-            response_time = time.time() - start_time
-            self.performance_monitor.record_conversation(response_time, True)
+            # 9. 대화 기록 저장 및 메모리 정리 (주기적)
+            with trace.stage("memory"):
+                if self.config.inference.save_conversations:
+                    self.conversation_memory.add_conversation(
+                        user_input.user_id, user_input.text, response.text, extracted_info
+                    )
+                self._periodic_cleanup()
 
-            # 11. 메모리 정리 (주기적)
-            self._periodic_cleanup()
+            # 10. 성능 모니터링
+            self._record_performance(trace, True)
+            if self.config.debug:
+                session_data["stage_trace"] = trace.to_dict()
 
             return ChatbotOutput(
                 response=response,
@@ -455,16 +552,22 @@ class NaviyamChatbot:
             )
 
         except Exception as e:
-            logger.error(f"사용자 입력 처리 실패: {e}")
+            logger.error(f"사용자 입력 처리 실패 (단계: {trace.failed_stage}): {e}")
 
             # 에러 응답 생성
             error_response = self._generate_error_response(user_input, str(e))
 
-            response_time = time.time() - start_time
-            self.performance_monitor.record_conversation(response_time, False)
+            self._record_performance(trace, False)
+            if self.config.debug:
+                error_response.session_data["stage_trace"] = trace.to_dict()
 
             return error_response
 
+    def _record_performance(self, trace: RequestTrace, success: bool):
+        """전체 응답 시간과 단계별 소요 시간 기록"""
+        self.performance_monitor.record_conversation(trace.total_ms / 1000, success)
+        self.performance_monitor.record_stages(trace)
+
     def _generate_empty_input_response(self, user_input: UserInput) -> ChatbotOutput:
         """빈 입력 응답 생성"""
         response = ChatbotResponse(
@@ -658,6 +761,21 @@ class NaviyamChatbot:
             "coupons": len(self.knowledge.coupons) if self.knowledge else 0
         }
 
+        if self.query_cache:
+            metrics["query_embedding_cache"] = self.query_cache.get_stats()
+
+        if self.embedding_batcher:
+            metrics["embedding_batcher"] = self.embedding_batcher.get_stats()
+
+        if self.retriever and hasattr(self.retriever, 'get_index_stats'):
+            metrics["vector_index"] = self.retriever.get_index_stats()
+
+        if self.write_behind:
+            metrics["write_behind"] = self.write_behind.get_stats()
+
+        if self.llm_worker:
+            metrics["llm_worker"] = self.llm_worker.get_stats()
+
         return metrics
 
     def reset_conversation(self, user_id: str = None):
@@ -684,6 +802,10 @@ class NaviyamChatbot:
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(state, f, ensure_ascii=False, indent=2)
 
+        # 쿼리 임베딩 캐시 저장 (persist_path 설정 시)
+        if self.query_cache:
+            self.query_cache.save()
+
         logger.info(f"챗봇 상태 저장: {file_path}")
 
     def load_state(self, file_path: str):
@@ -700,9 +822,24 @@ class NaviyamChatbot:
         except Exception as e:
             logger.warning(f"챗봇 상태 로드 실패: {e}")
 
+    def shutdown(self):
+        """종료 처리 (대기 중인 프로필/학습 데이터 저장 완료 후 writer 종료, LLM 워커 종료)"""
+        if self.write_behind:
+            self.write_behind.close()
+        if self.llm_worker:
+            self.llm_worker.close()
+
     def __del__(self):
         """소멸자"""
         try:
+            if getattr(self, 'write_behind', None):
+                self.write_behind.close()
+            if getattr(self, 'llm_worker', None):
+                self.llm_worker.close()
+            if self.retriever:
+                self.retriever.stop_hot_reload()
+            if self.embedding_batcher:
+                self.embedding_batcher.close()
             if self.model:
                 self.model.cleanup_memory()
         except:
@@ -15,8 +15,10 @@ from collections import defaultdict, deque
 import threading
 import queue
 import time
+from types import MappingProxyType
 
 from data.data_structure import UserProfile, ExtractedInfo, LearningData, UserState
+from .write_behind import WriteBehindQueue, WriteEvent
 
 logger = logging.getLogger(__name__)
 
@@ -605,6 +607,68 @@ class LearningDataCollector:
             pass
 
 
+class WriteBehindDataCollector:
+    """LearningDataCollector 수집 호출을 write-behind 큐로 넘기는 래퍼
+
+    챗봇/NLU의 collect_* 호출은 불변 이벤트만 큐에 넣고 바로 반환하며, writer 스레드가 배치로
+    원래 수집기에 전달합니다. 학습 데이터는 큐가 가득 차면 버려질 수 있습니다 (큐 통계 dropped).
+    그 외 메서드(통계, 내보내기 등)는 원래 수집기로 위임합니다.
+    """
+
+    def __init__(self, collector: LearningDataCollector, write_behind: WriteBehindQueue):
+        self.collector = collector
+        self.write_behind = write_behind
+
+        write_behind.register("nlu_features", self._write_nlu_features, drop_when_full=True)
+        write_behind.register("interaction", self._write_interactions, drop_when_full=True)
+        write_behind.register("recommendation", self._write_recommendations, drop_when_full=True)
+
+    def collect_nlu_features(self, user_id: str, features: Dict[str, Any]):
+        """NLU Feature 수집 (큐에 추가)"""
+        self.write_behind.submit("nlu_features", user_id, MappingProxyType(dict(features)))
+
+    def collect_interaction_data(self, user_id: str, interaction_data: Dict[str, Any]):
+        """상호작용 데이터 수집 (큐에 추가)"""
+        self.write_behind.submit("interaction", user_id, MappingProxyType(dict(interaction_data)))
+
+    def collect_recommendation_data(self, user_id: str, recommendations: List[Dict],
+                                    user_selection: Optional[Dict] = None):
+        """추천 데이터 수집 (큐에 추가)"""
+        self.write_behind.submit("recommendation", user_id, (
+            tuple(MappingProxyType(dict(recommendation)) for recommendation in recommendations),
+            MappingProxyType(dict(user_selection)) if user_selection else None
+        ))
+
+    def _write_nlu_features(self, events: List[WriteEvent]):
+        for event in events:
+            self.collector.collect_nlu_features(event.key, dict(event.payload))
+
+    def _write_interactions(self, events: List[WriteEvent]):
+        for event in events:
+            self.collector.collect_interaction_data(event.key, dict(event.payload))
+
+    def _write_recommendations(self, events: List[WriteEvent]):
+        for event in events:
+            recommendations, user_selection = event.payload
+            self.collector.collect_recommendation_data(
+                event.key, [dict(recommendation) for recommendation in recommendations],
+                dict(user_selection) if user_selection else None
+            )
+
+    def force_save(self):
+        """대기 중인 수집 이벤트를 반영한 뒤 강제 저장"""
+        self.write_behind.flush(timeout=10.0)
+        self.collector.force_save()
+
+    def shutdown(self):
+        """대기 중인 수집 이벤트를 반영한 뒤 수집기 종료"""
+        self.write_behind.flush(timeout=10.0)
+        self.collector.shutdown()
+
+    def __getattr__(self, name):
+        return getattr(self.collector, name)
+
+
 # 편의 함수들
 def create_data_collector(save_path: str, buffer_size: int = 100) -> LearningDataCollector:
     """데이터 수집기 생성 (편의 함수)"""
@@ -0,0 +1,167 @@
+"""
+LLM 전용 생성 워커
+모델(generate_text)은 스레드 하나에서만 실행하고, 요청 스레드는 자체 큐에 작업을 넣고 결과를 기다림
+
+- 요청은 실행기(executor) 스레드 여러 개에서 동시에 처리되지만 GPU 모델 생성은 한 번에 하나씩 (메모리/스레드 안전)
+- 큐 크기 제한: 큐가 가득 차면 기다리지 않고 LLMOverloadedError (호출부는 템플릿 응답으로 폴백)
+- 대기 시간 제한: timeout 안에 결과가 없으면 LLMTimeoutError, 아직 시작 안 한 작업은 취소되어 실행하지 않음
+- 모델과 같은 generate_text 시그니처라 LLMNormalizer/응답 생성기에 모델 대신 그대로 전달
+"""
+
+import time
+import queue
+import atexit
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+from .pipeline_timing import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LLMOverloadedError(RuntimeError):
+    """LLM 큐가 가득 참"""
+
+
+class LLMTimeoutError(RuntimeError):
+    """LLM 결과 대기 시간 초과"""
+
+
+@dataclass
+class _GenerationJob:
+    kwargs: Dict[str, Any]
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class LLMWorker:
+    """모델 1개를 전용 스레드 1개로 실행하는 생성 큐"""
+
+    def __init__(self, model, max_queue: int = 8, timeout: Optional[float] = 30.0, name: str = "llm-worker"):
+        """
+        Args:
+            model: generate_text를 가진 언어 모델
+            max_queue: 대기 가능한 최대 생성 요청 수
+            timeout: 생성 결과 최대 대기 시간 (초, 큐 대기 포함, None이면 무제한)
+            name: 워커 스레드 이름
+        """
+        self.model = model
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self.queue_wait = LatencyHistogram()
+        self.generation = LatencyHistogram()
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "cancelled": 0,
+            "high_watermark": 0,
+        }
+
+        self._worker = threading.Thread(target=self._worker_loop, name=name, daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def generate_text(self, prompt: str, max_new_tokens: Optional[int] = None,
+                      temperature: Optional[float] = None, stop_words: Optional[List[str]] = None,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+        """워커 스레드에서 model.generate_text 실행 후 결과 반환 (호출 스레드는 대기)"""
+        if self._closed:
+            raise LLMOverloadedError("LLM 워커가 종료됨")
+
+        job = _GenerationJob(dict(prompt=prompt, max_new_tokens=max_new_tokens,
+                                  temperature=temperature, stop_words=stop_words))
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count("rejected")
+            raise LLMOverloadedError(f"LLM 큐가 가득 참 ({self.max_queue}건 대기 중)")
+
+        with self._stats_lock:
+            self.stats["submitted"] += 1
+            self.stats["high_watermark"] = max(self.stats["high_watermark"], self._queue.qsize())
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return job.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # 아직 시작 전이면 취소 (실행 중이면 결과는 버려짐)
+            job.future.cancel()
+            self._count("timeouts")
+            raise LLMTimeoutError(f"LLM 생성 대기 시간 초과 ({timeout}초)")
+
+    def _worker_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+
+            if not job.future.set_running_or_notify_cancel():
+                self._count("cancelled")
+                continue
+
+            start = time.perf_counter()
+            self.queue_wait.record((start - job.enqueued_at) * 1000)
+            try:
+                result = self.model.generate_text(**job.kwargs)
+            except Exception as e:
+                self._count("failed")
+                job.future.set_exception(e)
+            else:
+                self._count("completed")
+                job.future.set_result(result)
+            finally:
+                self.generation.record((time.perf_counter() - start) * 1000)
+
+        # 종료 후 남은 작업은 실패 처리
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not _STOP and job.future.set_running_or_notify_cancel():
+                job.future.set_exception(LLMOverloadedError("LLM 워커가 종료됨"))
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """대기 중인 생성까지 마치고 워커 종료 (여러 번 호출해도 됨)"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning(f"LLM 워커 종료 시간 초과: {self.depth}건 남음")
+            return
+        self._worker.join(timeout)
+
+    @property
+    def depth(self) -> int:
+        """대기 중인 생성 요청 수"""
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """큐/생성 통계"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["depth"] = self.depth
+        stats["max_queue"] = self.max_queue
+        stats["queue_wait_ms"] = self.queue_wait.summary()
+        stats["generation_ms"] = self.generation.summary()
+        stats["closed"] = self._closed
+        return stats
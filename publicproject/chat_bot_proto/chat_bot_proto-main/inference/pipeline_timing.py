@@ -0,0 +1,132 @@
+"""
+챗봇 파이프라인 단계별 시간 측정
+process_user_input의 각 단계(전처리, NLU, RAG, 프로필, 응답 생성 ...)를 단조 고해상도 시계(perf_counter)로 측정
+
+- RequestTrace: 요청 1건의 단계별 소요 시간 (디버그 모드에서 ChatbotOutput.session_data로 반환)
+- LatencyHistogram: 단계별 최근 지연 시간 분포 (p50/p95/p99, get_performance_metrics와 /metrics로 노출)
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterable
+
+import numpy as np
+
+# process_user_input 단계 순서
+PIPELINE_STAGES = (
+    "preprocess",     # 텍스트 전처리
+    "nlu",            # 의도/엔티티 추출 (LLM 정규화 포함)
+    "rag",            # RAG 검색 (FAISS)
+    "profile",        # 사용자 프로필 조회/상호작용 업데이트 (디스크 I/O)
+    "response",       # 응답 생성 (LLM 포함)
+    "personalize",    # 온보딩 완료 저장 + 개인화
+    "learning_data",  # 학습 데이터 수집/데이터 수집기 전달
+    "session",        # 세션 데이터 생성
+    "memory",         # 대화 기록 저장 + 주기적 정리
+)
+
+PERCENTILES = (50, 95, 99)
+
+
+class RequestTrace:
+    """요청 1건의 단계별 소요 시간 (ms)"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages_ms: Dict[str, float] = {}
+        self.failed_stage: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """with 블록 소요 시간을 name 단계로 기록 (예외가 나도 기록하고 실패 단계로 표시)"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.failed_stage = name
+            raise
+        finally:
+            self.stages_ms[name] = self.stages_ms.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        """요청 시작부터 지금까지 경과 시간"""
+        return (time.perf_counter() - self.start) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """session_data용 요약 (단계 순서 유지)"""
+        stages = {name: round(elapsed, 3) for name, elapsed in self.stages_ms.items()}
+        total_ms = self.total_ms
+        trace = {
+            "stages_ms": stages,
+            "total_ms": round(total_ms, 3),
+            # 단계 밖(검증, 응답 조립 등) 시간
+            "untracked_ms": round(max(0.0, total_ms - sum(self.stages_ms.values())), 3),
+            "slowest_stage": max(self.stages_ms, key=self.stages_ms.get) if self.stages_ms else None
+        }
+        if self.failed_stage:
+            trace["failed_stage"] = self.failed_stage
+        return trace
+
+
+class LatencyHistogram:
+    """최근 window개 지연 시간(ms) 분포 (스레드 안전)"""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, elapsed_ms: float):
+        with self._lock:
+            self._samples.append(elapsed_ms)
+            self.count += 1
+            self.total_ms += elapsed_ms
+
+    def summary(self, percentiles: Iterable[int] = PERCENTILES) -> Dict[str, Any]:
+        """누적 횟수/평균과 최근 window개 기준 백분위수"""
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+            count, total_ms = self.count, self.total_ms
+
+        result = {"count": count, "avg_ms": round(total_ms / count, 3) if count else 0.0}
+        if len(samples):
+            values = np.percentile(samples, list(percentiles))
+            result.update({f"p{p}_ms": round(float(value), 3) for p, value in zip(percentiles, values)})
+            result["max_ms"] = round(float(samples.max()), 3)
+        return result
+
+
+class StageLatencyRecorder:
+    """단계별 LatencyHistogram 모음"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, name: str) -> LatencyHistogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, LatencyHistogram(self.window))
+        return histogram
+
+    def record_trace(self, trace: RequestTrace):
+        """요청 1건의 단계별 시간과 전체 시간 기록"""
+        for name, elapsed_ms in trace.stages_ms.items():
+            self._histogram(name).record(elapsed_ms)
+        self._histogram("total").record(trace.total_ms)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """단계별 분포 요약 (파이프라인 순서, 그 외 단계, 마지막에 total)"""
+        with self._lock:
+            names = list(self._histograms)
+        ordered = [name for name in PIPELINE_STAGES if name in names]
+        ordered += [name for name in names if name not in PIPELINE_STAGES and name != "total"]
+        if "total" in names:
+            ordered.append("total")
+        return {name: self._histograms[name].summary() for name in ordered}
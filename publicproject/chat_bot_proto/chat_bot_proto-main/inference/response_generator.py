@@ -8,6 +8,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, time
 import logging
 
+import numpy as np
+
 from data.data_structure import (
     ExtractedInfo, ChatbotResponse, UserProfile, NaviyamKnowledge,
     NaviyamShop, NaviyamMenu, NaviyamCoupon, IntentType, UserState, LearningData
@@ -15,6 +17,10 @@ from data.data_structure import (
 from nlp.nlg import NaviyamNLG, ResponseTone
 from nlp.llm_normalizer import LLMNormalizer
 from models.koalpaca_model import KoAlpacaModel
+from recommendation.budget_query import BudgetQueryEngine
+from recommendation.opening_hours import (
+    OpeningHoursTimeline, make_schedule, parse_clock, is_open_at, STATUS_OPEN, STATUS_UNKNOWN
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +29,17 @@ class RecommendationEngine:
 
     def __init__(self, knowledge: NaviyamKnowledge):
         self.knowledge = knowledge
+        self._budget_engine: Optional[BudgetQueryEngine] = None
+        self._budget_engine_source = None
+
+    @property
+    def budget_engine(self) -> BudgetQueryEngine:
+        """예산 조회 엔진 (지식베이스 보조 인덱스가 다시 구축되면 함께 다시 구축)"""
+        indexes = self.knowledge.indexes
+        if self._budget_engine is None or self._budget_engine_source is not indexes:
+            self._budget_engine = BudgetQueryEngine(indexes.menus, self.knowledge.shops)
+            self._budget_engine_source = indexes
+        return self._budget_engine
 
     def recommend_by_food_type(self, food_type: str, budget: int = None, limit: int = 3) -> List[Dict]:
         """음식 종류별 추천"""
@@ -52,11 +69,8 @@ class RecommendationEngine:
                 # 그래도 못 찾으면 원본 그대로 사용
                 target_category = food_type
 
-        # 해당 카테고리 가게 찾기
-        matching_shops = [
-            shop for shop in self.knowledge.shops.values()
-            if target_category.lower() in shop.category.lower()
-        ]
+        # 해당 카테고리 가게 찾기 (카테고리 인덱스)
+        matching_shops = self.knowledge.get_shops_matching_category(target_category)
 
         # 착한가게 우선 정렬
         matching_shops.sort(key=lambda x: (
@@ -65,20 +79,10 @@ class RecommendationEngine:
         ))
 
         for shop in matching_shops[:limit]:
-            # 해당 가게의 메뉴 찾기
-            shop_menus = [
-                menu for menu in self.knowledge.menus.values()
-                if menu.shop_id == shop.id
-            ]
-
-            # 예산에 맞는 메뉴 필터링
-            if budget:
-                shop_menus = [menu for menu in shop_menus if menu.price <= budget]
-
-            if shop_menus:
-                # 가장 인기있거나 저렴한 메뉴 선택
-                best_menu = min(shop_menus, key=lambda x: x.price)
+            # 해당 가게의 가장 저렴한 메뉴 (예산을 넘으면 예산에 맞는 메뉴 없음)
+            best_menu = self.knowledge.get_cheapest_menu(shop.id, budget or None)
 
+            if best_menu:
                 recommendations.append({
                     'shop_id': shop.id,
                     'shop_name': shop.name,
@@ -99,13 +103,8 @@ class RecommendationEngine:
         """예산별 추천"""
         recommendations = []
 
-        # 예산 내 메뉴 찾기
-        affordable_menus = [
-            menu for menu in self.knowledge.menus.values()
-            if menu.price <= budget
-        ]
-
         # 음식 종류 필터링
+        target_category = None
         if food_type:
             category_mapping = {
                 '치킨': '치킨',
@@ -115,31 +114,10 @@ class RecommendationEngine:
             }
             target_category = category_mapping.get(food_type, food_type)
 
-            filtered_menus = []
-            for menu in affordable_menus:
-                shop = self.knowledge.shops.get(menu.shop_id)
-                if shop and target_category.lower() in shop.category.lower():
-                    filtered_menus.append(menu)
-            affordable_menus = filtered_menus
-
-        # 가격 대비 가치 정렬 (가격 낮은 순, 착한가게 우선)
-        menu_recommendations = []
+        # 가격 대비 가치 상위 메뉴 (가격 정렬 배열 이진 탐색 + 벡터화 점수, 착한가게/할인 가게 보너스)
+        menu_recommendations = self.budget_engine.query(budget, target_category, limit)
 
-        for menu in affordable_menus:
-            shop = self.knowledge.shops.get(menu.shop_id)
-            if shop:
-                score = budget - menu.price  # 남은 예산이 높을수록 좋음
-                if shop.is_good_influence_shop:
-                    score += 1000  # 착한가게 보너스
-                if shop.ordinary_discount:
-                    score += 500   # 할인 가게 보너스
-
-                menu_recommendations.append((score, menu, shop))
-
-        # 점수 순 정렬
-        menu_recommendations.sort(key=lambda x: x[0], reverse=True)
-
-        for score, menu, shop in menu_recommendations[:limit]:
+        for score, menu, shop in menu_recommendations:
             recommendations.append({
                 'shop_id': shop.id,
                 'shop_name': shop.name,
@@ -200,6 +178,10 @@ class NaviyamResponseGenerator:
 
         self.llm_normalizer = LLMNormalizer(model) if model else None
 
+        # 가게 영업시간 타임라인 (knowledge.shops 기준, 처음 필요할 때 구축)
+        self._opening_hours_key = None
+        self._opening_hours: Tuple[Tuple[NaviyamShop, ...], Optional[OpeningHoursTimeline]] = ((), None)
+
         # 응답 생성 통계
         self.generation_stats = {
             "total_responses": 0,
@@ -264,11 +246,10 @@ class NaviyamResponseGenerator:
                 )
             else:
                 # 일반 추천 (착한가게 우선)
-                good_shops = [shop for shop in self.knowledge.shops.values() if shop.is_good_influence_shop]
+                good_shops = self.knowledge.get_good_influence_shops()
                 for shop in good_shops[:3]:
-                    shop_menus = [menu for menu in self.knowledge.menus.values() if menu.shop_id == shop.id]
-                    if shop_menus:
-                        best_menu = min(shop_menus, key=lambda x: x.price)
+                    best_menu = self.knowledge.get_cheapest_menu(shop.id)
+                    if best_menu:
                         recommendations.append({
                             'shop_id': shop.id,
                             'shop_name': shop.name,
@@ -295,33 +276,35 @@ class NaviyamResponseGenerator:
             )
 
         elif intent == IntentType.TIME_INQUIRY:
-            # 현재 운영중인 가게 추천
-            current_time = datetime.now().time()
+            # 현재 운영중인 가게 추천 (시간 정보 없는 가게는 열린 것으로 가정)
+            shops, timeline = self._get_opening_hours()
+            status = timeline.status_at(datetime.now())
+            open_positions = np.flatnonzero((status == STATUS_OPEN) | (status == STATUS_UNKNOWN))
             open_shops = []
 
-            for shop in self.knowledge.shops.values():
-                if self._is_shop_open(shop, current_time):
-                    shop_menus = [menu for menu in self.knowledge.menus.values() if menu.shop_id == shop.id]
-                    if shop_menus:
-                        best_menu = min(shop_menus, key=lambda x: x.price)
-                        open_shops.append({
-                            'shop_id': shop.id,
-                            'shop_name': shop.name,
-                            'menu_name': best_menu.name,
-                            'price': best_menu.price,
-                            'current_status': 'OPEN',
-                            'close_hour': shop.close_hour
-                        })
+            for position in open_positions:
+                if len(open_shops) >= 3:
+                    break
+                shop = shops[position]
+                best_menu = self.knowledge.get_cheapest_menu(shop.id)
+                if best_menu:
+                    open_shops.append({
+                        'shop_id': shop.id,
+                        'shop_name': shop.name,
+                        'menu_name': best_menu.name,
+                        'price': best_menu.price,
+                        'current_status': 'OPEN',
+                        'close_hour': shop.close_hour
+                    })
 
             recommendations = open_shops[:3]
 
         elif intent == IntentType.LOCATION_INQUIRY:
             # 근처 가게 추천 (실제로는 GPS 연동 필요)
-            nearby_shops = list(self.knowledge.shops.values())[:3]
+            nearby_shops = self.knowledge.indexes.shops[:3]
             for shop in nearby_shops:
-                shop_menus = [menu for menu in self.knowledge.menus.values() if menu.shop_id == shop.id]
-                if shop_menus:
-                    best_menu = min(shop_menus, key=lambda x: x.price)
+                best_menu = self.knowledge.get_cheapest_menu(shop.id)
+                if best_menu:
                     recommendations.append({
                         'shop_id': shop.id,
                         'shop_name': shop.name,
@@ -339,32 +322,27 @@ class NaviyamResponseGenerator:
 
         return recommendations
 
-    def _is_shop_open(self, shop: NaviyamShop, current_time: time) -> bool:
-        """가게 운영시간 확인"""
-        try:
-            if not shop.open_hour or not shop.close_hour:
-                return True  # 시간 정보 없으면 열린 것으로 가정
-
-            open_time = time.fromisoformat(shop.open_hour + ":00") if ":" not in shop.open_hour else time.fromisoformat(shop.open_hour)
-            close_time = time.fromisoformat(shop.close_hour + ":00") if ":" not in shop.close_hour else time.fromisoformat(shop.close_hour)
-
-            # 브레이크타임 확인
-            if shop.break_start_hour and shop.break_end_hour:
-                break_start = time.fromisoformat(shop.break_start_hour + ":00") if ":" not in shop.break_start_hour else time.fromisoformat(shop.break_start_hour)
-                break_end = time.fromisoformat(shop.break_end_hour + ":00") if ":" not in shop.break_end_hour else time.fromisoformat(shop.break_end_hour)
-
-                if break_start <= current_time <= break_end:
-                    return False  # 브레이크타임
-
-            # 운영시간 확인
-            if close_time < open_time:  # 자정 넘어가는 경우
-                return current_time >= open_time or current_time <= close_time
-            else:
-                return open_time <= current_time <= close_time
+    def _get_opening_hours(self) -> Tuple[Tuple[NaviyamShop, ...], OpeningHoursTimeline]:
+        """가게 목록과 같은 순서의 영업시간 타임라인 (가게 목록이 바뀌면 다시 구축)"""
+        key = (id(self.knowledge.shops), len(self.knowledge.shops))
+        if key != self._opening_hours_key:
+            shops = tuple(self.knowledge.shops.values())
+            timeline = OpeningHoursTimeline.from_hours(
+                (shop.open_hour, shop.close_hour, shop.break_start_hour, shop.break_end_hour)
+                for shop in shops
+            )
+            self._opening_hours = (shops, timeline)
+            self._opening_hours_key = key
+        return self._opening_hours
 
-        except Exception as e:
-            logger.warning(f"운영시간 확인 실패 ({shop.name}): {e}")
-            return True
+    def _is_shop_open(self, shop: NaviyamShop, current_time: time) -> bool:
+        """가게 운영시간 확인 (브레이크타임 제외, 시간 정보 없으면 열린 것으로 가정)"""
+        schedule = make_schedule(
+            parse_clock(shop.open_hour), parse_clock(shop.close_hour),
+            parse_clock(shop.break_start_hour), parse_clock(shop.break_end_hour)
+        )
+        is_open = is_open_at(schedule, current_time.hour * 60 + current_time.minute)
+        return True if is_open is None else is_open
 
     def _generate_contextual_response(
             self,
@@ -5,34 +5,78 @@
 import json
 import pickle
 from pathlib import Path
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Callable
 from datetime import datetime, timedelta
 import logging
 
 from data.data_structure import UserProfile, ExtractedInfo, ChatbotResponse, IntentType, UserState, LearningData
 from nlp.preprocessor import EmotionType
+from .write_behind import WriteBehindQueue, WriteEvent
 
 logger = logging.getLogger(__name__)
 
 class NaviyamUserManager:
     """나비얌 사용자 관리자"""
 
-    def __init__(self, save_path: str, enable_personalization: bool = True):
+    def __init__(self, save_path: str, enable_personalization: bool = True,
+                 write_behind: Optional[WriteBehindQueue] = None):
         """
         Args:
             save_path: 사용자 프로필 저장 경로
             enable_personalization: 개인화 기능 활성화 여부
+            write_behind: 프로필 파일 저장을 넘길 write-behind 큐 (None이면 요청 스레드에서 바로 저장)
         """
         self.save_path = Path(save_path)
         self.enable_personalization = enable_personalization
         self.user_profiles: Dict[str, UserProfile] = {}
 
+        # 프로필 변경 버전 및 알림 (추천 결과 캐시 무효화 등)
+        # 추천에 쓰이는 항목의 지문이 바뀔 때만 버전을 올림 (interaction_count 등 매 턴 바뀌는 값 제외)
+        self.profile_versions: Dict[str, int] = {}
+        self._profile_fingerprints: Dict[str, str] = {}
+        self._profile_listeners: List[Callable[[str], None]] = []
+
+        # 프로필 파일 저장 (사용자별 병합, 큐가 가득 차도 버리지 않음)
+        self.write_behind = write_behind
+        if write_behind:
+            write_behind.register("profile", self._write_profile_batch, coalesce=True)
+
         # 디렉토리 생성
         self.save_path.mkdir(parents=True, exist_ok=True)
 
         # 기존 프로필 로드
         self._load_existing_profiles()
 
+    def add_profile_listener(self, listener: Callable[[str], None]):
+        """프로필 변경 시 호출할 함수 등록 (인자: user_id)"""
+        self._profile_listeners.append(listener)
+
+    def get_profile_version(self, user_id: str) -> int:
+        """프로필 변경 버전 (추천에 쓰이는 항목이 바뀌거나 프로필이 삭제될 때마다 증가)"""
+        return self.profile_versions.get(user_id, 0)
+
+    @staticmethod
+    def _recommendation_fingerprint(profile: UserProfile) -> str:
+        """추천 결과에 영향을 주는 프로필 항목 지문 (선호 카테고리, 예산, 즐겨찾기, 맛/동행/위치 선호)"""
+        return json.dumps({
+            "preferred_categories": profile.preferred_categories,
+            "average_budget": profile.average_budget,
+            "favorite_shops": profile.favorite_shops,
+            "taste_preferences": profile.taste_preferences,
+            "companion_patterns": profile.companion_patterns,
+            "location_preferences": profile.location_preferences,
+            "good_influence_preference": profile.good_influence_preference
+        }, sort_keys=True, ensure_ascii=False, default=str)
+
+    def _notify_profile_changed(self, user_id: str):
+        """프로필 버전 증가 및 등록된 함수 호출"""
+        self.profile_versions[user_id] = self.profile_versions.get(user_id, 0) + 1
+        for listener in self._profile_listeners:
+            try:
+                listener(user_id)
+            except Exception as e:
+                logger.warning(f"프로필 변경 알림 실패 ({user_id}): {e}")
+
     def determine_user_strategy(self, user_id: str) -> str:
         """사용자 상태에 따른 전략 결정"""
         profile = self.get_user_profile(user_id)
@@ -129,6 +173,7 @@ class NaviyamUserManager:
                     )
 
                     self.user_profiles[user_id] = profile
+                    self._profile_fingerprints[user_id] = self._recommendation_fingerprint(profile)
                     loaded_count += 1
 
                 except Exception as e:
@@ -247,35 +292,67 @@ class NaviyamUserManager:
                 profile.conversation_style = suggested_style
 
     def _save_user_profile(self, profile: UserProfile):
-        """사용자 프로필 저장"""
+        """사용자 프로필 저장
+
+        JSON 직렬화(스냅샷)는 호출 스레드에서 하고, 파일 쓰기는 write-behind 큐가 있으면 writer 스레드에서 합니다.
+        """
         if not self.enable_personalization:
             return
 
+        fingerprint = self._recommendation_fingerprint(profile)
+        if self._profile_fingerprints.get(profile.user_id) != fingerprint:
+            self._profile_fingerprints[profile.user_id] = fingerprint
+            self._notify_profile_changed(profile.user_id)
+
         try:
-            profile_file = self.save_path / f"{profile.user_id}.json"
+            profile_json = self._serialize_profile(profile)
+        except Exception as e:
+            logger.error(f"프로필 직렬화 실패 ({profile.user_id}): {e}")
+            return
 
-            # UserProfile을 JSON으로 변환
-            profile_data = {
-                "user_id": profile.user_id,
-                "preferred_categories": profile.preferred_categories,
-                "average_budget": profile.average_budget,
-                "favorite_shops": profile.favorite_shops,
-                "recent_orders": profile.recent_orders,
-                "conversation_style": profile.conversation_style,
-                "last_updated": profile.last_updated.isoformat(),
-                "taste_preferences": profile.taste_preferences,
-                "companion_patterns": profile.companion_patterns,
-                "location_preferences": profile.location_preferences,
-                "good_influence_preference": profile.good_influence_preference,
-                "interaction_count": profile.interaction_count,
-                "data_completeness": profile.data_completeness
-            }
+        if self.write_behind:
+            self.write_behind.submit("profile", profile.user_id, profile_json)
+        else:
+            self._write_profile_file(profile.user_id, profile_json)
+
+    def _serialize_profile(self, profile: UserProfile) -> str:
+        """UserProfile → 프로필 파일 내용 (JSON)"""
+        profile_data = {
+            "user_id": profile.user_id,
+            "preferred_categories": profile.preferred_categories,
+            "average_budget": profile.average_budget,
+            "favorite_shops": profile.favorite_shops,
+            "recent_orders": profile.recent_orders,
+            "conversation_style": profile.conversation_style,
+            "last_updated": profile.last_updated.isoformat(),
+            "taste_preferences": profile.taste_preferences,
+            "companion_patterns": profile.companion_patterns,
+            "location_preferences": profile.location_preferences,
+            "good_influence_preference": profile.good_influence_preference,
+            "interaction_count": profile.interaction_count,
+            "data_completeness": profile.data_completeness
+        }
+        return json.dumps(profile_data, ensure_ascii=False, indent=2)
+
+    def _write_profile_file(self, user_id: str, profile_json: Optional[str]):
+        """프로필 파일 쓰기 (profile_json이 None이면 파일 삭제)"""
+        profile_file = self.save_path / f"{user_id}.json"
+        try:
+            if profile_json is None:
+                if profile_file.exists():
+                    profile_file.unlink()
+                return
 
             with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, ensure_ascii=False, indent=2)
+                f.write(profile_json)
 
         except Exception as e:
-            logger.error(f"프로필 저장 실패 ({profile.user_id}): {e}")
+            logger.error(f"프로필 저장 실패 ({user_id}): {e}")
+
+    def _write_profile_batch(self, events: List[WriteEvent]):
+        """write-behind 배치 저장 (사용자별 마지막 프로필만 전달됨)"""
+        for event in events:
+            self._write_profile_file(event.key, event.payload)
 
     def add_favorite_shop(self, user_id: str, shop_id: int):
         """즐겨찾는 가게 추가"""
@@ -477,6 +554,8 @@ class NaviyamUserManager:
 
                 # 메모리에서 제거
                 del self.user_profiles[user_id]
+                self._profile_fingerprints.pop(user_id, None)
+                self._notify_profile_changed(user_id)
                 removed_count += 1
 
         logger.info(f"오래된 프로필 {removed_count}개 정리 완료")
@@ -507,11 +586,15 @@ class NaviyamUserManager:
             # 메모리에서 제거
             if user_id in self.user_profiles:
                 del self.user_profiles[user_id]
+            self._profile_fingerprints.pop(user_id, None)
+            self._notify_profile_changed(user_id)
 
-            # 파일에서 제거
-            profile_file = self.save_path / f"{user_id}.json"
-            if profile_file.exists():
-                profile_file.unlink()
+            # 파일에서 제거 (대기 중인 저장 뒤에 삭제되도록 같은 큐로 보내고 완료까지 대기)
+            if self.write_behind:
+                self.write_behind.submit("profile", user_id, None)
+                self.write_behind.flush(timeout=5.0)
+            else:
+                self._write_profile_file(user_id, None)
 
             logger.info(f"사용자 {user_id} 데이터 삭제 완료")
             return True
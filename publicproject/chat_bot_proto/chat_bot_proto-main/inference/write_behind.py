@@ -0,0 +1,248 @@
+"""
+Write-behind 저장 큐
+요청 스레드는 불변 이벤트를 제한된 크기의 큐에 넣고 바로 반환, 백그라운드 writer 스레드가 모아서 저장
+
+- 이벤트 종류(kind)별 배치 핸들러: writer가 큐에서 한 번에 꺼낸 이벤트를 종류별로 묶어 한 번 호출
+- 병합(coalesce) 종류: 같은 배치 안에서 같은 키(사용자 ID)는 마지막 이벤트만 저장 (프로필 파일 재작성 횟수 감소)
+- 배압(backpressure): 큐가 가득 차면 유실 불가 종류(프로필)는 자리가 날 때까지 대기,
+  유실 허용 종류(학습 데이터)는 잠깐 기다린 뒤 버리고 dropped로 집계
+- 종료 시 큐에 남은 이벤트를 모두 저장 (close, 인터프리터 종료 시 atexit)
+"""
+
+import time
+import queue
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass(frozen=True)
+class WriteEvent:
+    """저장 이벤트 (payload는 JSON 문자열, 튜플, MappingProxyType 등 불변 값)"""
+    kind: str
+    key: str
+    payload: Any
+    enqueued_at: float
+
+
+@dataclass(frozen=True)
+class _EventKind:
+    handler: Callable[[List[WriteEvent]], None]
+    coalesce: bool
+    drop_when_full: bool
+
+
+class WriteBehindQueue:
+    """제한된 크기의 write-behind 큐와 writer 스레드 1개"""
+
+    def __init__(self, max_size: int = 10000, max_batch: int = 256, flush_interval: float = 0.05,
+                 put_timeout: float = 0.01, name: str = "write-behind"):
+        """
+        Args:
+            max_size: 큐 최대 이벤트 수
+            max_batch: writer가 한 번에 처리할 최대 이벤트 수
+            flush_interval: 이벤트가 없을 때 writer 대기 간격 (초)
+            put_timeout: 큐가 가득 찼을 때 유실 허용 이벤트의 최대 대기 시간 (초)
+            name: writer 스레드 이름
+        """
+        self.max_size = max_size
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_size)
+        self._kinds: Dict[str, _EventKind] = {}
+        # 종료 여부 확인/큐에 넣는 중인 submit 수 (큐 대기는 잠금 밖에서, close는 모두 끝난 뒤 종료 신호)
+        self._submitters = threading.Condition()
+        self._in_flight = 0
+        self._progress = threading.Condition()
+        self._closed = False
+
+        self.stats = {
+            "submitted": 0,
+            "processed": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "blocked_puts": 0,
+            "blocked_wait_ms": 0.0,
+            "batches": 0,
+            "max_batch_size": 0,
+            "high_watermark": 0,
+            "handler_errors": 0,
+            "last_batch_ms": 0.0,
+            "max_lag_ms": 0.0,
+        }
+
+        self._writer = threading.Thread(target=self._writer_loop, name=name, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def register(self, kind: str, handler: Callable[[List[WriteEvent]], None],
+                 coalesce: bool = False, drop_when_full: bool = False):
+        """이벤트 종류 등록
+
+        Args:
+            kind: 이벤트 종류 이름
+            handler: 배치 저장 함수 (같은 종류 이벤트 목록, 큐에 들어간 순서)
+            coalesce: 같은 배치의 같은 키는 마지막 이벤트만 저장
+            drop_when_full: 큐가 put_timeout 동안 가득 차 있으면 버림 (False면 자리가 날 때까지 대기)
+        """
+        self._kinds[kind] = _EventKind(handler, coalesce, drop_when_full)
+
+    def submit(self, kind: str, key: str, payload: Any) -> bool:
+        """이벤트 추가 (버려졌으면 False)"""
+        event_kind = self._kinds[kind]
+        event = WriteEvent(kind, key, payload, time.perf_counter())
+
+        with self._submitters:
+            closed = self._closed
+            if not closed:
+                self._in_flight += 1
+        if closed:
+            # 종료 후에는 호출 스레드에서 바로 저장
+            self._process([event])
+            return True
+
+        try:
+            return self._enqueue(event, event_kind)
+        finally:
+            with self._submitters:
+                self._in_flight -= 1
+                if self._in_flight == 0:
+                    self._submitters.notify_all()
+
+    def _enqueue(self, event: WriteEvent, event_kind: _EventKind) -> bool:
+        """큐에 추가 (가득 차면 유실 허용 종류는 put_timeout까지, 나머지는 자리가 날 때까지 대기)"""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            start = time.perf_counter()
+            try:
+                self._queue.put(event, timeout=self.put_timeout if event_kind.drop_when_full else None)
+            except queue.Full:
+                with self._progress:
+                    self.stats["dropped"] += 1
+                return False
+            finally:
+                with self._progress:
+                    self.stats["blocked_puts"] += 1
+                    self.stats["blocked_wait_ms"] += (time.perf_counter() - start) * 1000
+
+        with self._progress:
+            self.stats["submitted"] += 1
+            self.stats["high_watermark"] = max(self.stats["high_watermark"], self._queue.qsize())
+        return True
+
+    def _writer_loop(self):
+        """큐에서 최대 max_batch개씩 꺼내 저장"""
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            item = first
+            while True:
+                if item is _STOP:
+                    # 종료 신호 뒤에 남은 이벤트까지 처리
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch: List[WriteEvent]):
+        """배치를 종류별로 병합/저장"""
+        start = time.perf_counter()
+        by_kind: Dict[str, List[WriteEvent]] = {}
+        for event in batch:
+            by_kind.setdefault(event.kind, []).append(event)
+
+        coalesced = 0
+        for kind, events in by_kind.items():
+            event_kind = self._kinds[kind]
+            if event_kind.coalesce:
+                # 키별 마지막 이벤트만 (마지막 이벤트 순서 유지)
+                latest = {event.key: event for event in events}
+                coalesced += len(events) - len(latest)
+                events = sorted(latest.values(), key=lambda event: event.enqueued_at)
+            try:
+                event_kind.handler(events)
+            except Exception as e:
+                logger.error(f"write-behind 저장 실패 ({kind}, {len(events)}건): {e}")
+                with self._progress:
+                    self.stats["handler_errors"] += 1
+
+        end = time.perf_counter()
+        with self._progress:
+            self.stats["processed"] += len(batch)
+            self.stats["coalesced"] += coalesced
+            self.stats["batches"] += 1
+            self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(batch))
+            self.stats["last_batch_ms"] = (end - start) * 1000
+            self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"],
+                                           (end - min(event.enqueued_at for event in batch)) * 1000)
+            self._progress.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """지금까지 추가된 이벤트가 모두 저장될 때까지 대기 (시간 초과 시 False)"""
+        with self._progress:
+            target = self.stats["submitted"]
+            return self._progress.wait_for(lambda: self.stats["processed"] >= target, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """남은 이벤트를 모두 저장하고 writer 종료 (여러 번 호출해도 됨)"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._submitters:
+            if self._closed:
+                return True
+            self._closed = True
+            # 큐에 넣는 중인 submit이 끝난 뒤 종료 신호 (종료 신호 뒤에 이벤트가 남지 않도록)
+            self._submitters.wait_for(lambda: self._in_flight == 0, timeout=timeout)
+
+        remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        try:
+            self._queue.put(_STOP, timeout=remaining)
+        except queue.Full:
+            logger.warning(f"write-behind 큐 종료 시간 초과: {self.depth}건 남음")
+            return False
+
+        remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        self._writer.join(remaining)
+        drained = not self._writer.is_alive()
+        if drained:
+            logger.info(f"write-behind 큐 종료: {self.stats['processed']}건 저장")
+        else:
+            logger.warning(f"write-behind 큐 종료 시간 초과: {self.depth}건 남음")
+        return drained
+
+    @property
+    def depth(self) -> int:
+        """큐에 대기 중인 이벤트 수"""
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """배압/처리 통계"""
+        with self._progress:
+            stats = dict(self.stats)
+        stats["depth"] = self.depth
+        stats["max_size"] = self.max_size
+        stats["utilization"] = stats["depth"] / self.max_size if self.max_size else 0.0
+        stats["avg_batch_size"] = stats["processed"] / stats["batches"] if stats["batches"] else 0.0
+        stats["closed"] = self._closed
+        return stats
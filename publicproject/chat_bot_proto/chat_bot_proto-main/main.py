@@ -61,11 +61,8 @@ def run_chat_mode(config, logger):
             buffer_size=100,
             auto_save_interval=300
         )
-        chatbot.data_collector = data_collector
-
-        # NLU에도 연결
-        if hasattr(chatbot, 'nlu') and chatbot.nlu:
-            chatbot.nlu.set_learning_data_collector(data_collector)
+        # 챗봇/NLU에 연결 (수집 호출은 write-behind 큐를 거쳐 전달)
+        chatbot.attach_data_collector(data_collector)
 
         print("초기화 완료!")
         print(get_config_summary(config))
@@ -196,6 +193,9 @@ def run_chat_mode(config, logger):
                     print(f"   학습 데이터 저장: {learning_data_file}")
                 else:
                     print("   학습 데이터 저장 실패")
+
+        # 대기 중인 프로필/학습 데이터 저장
+        chatbot.shutdown()
         print("\n👋 나비얌 챗봇을 이용해주셔서 감사합니다!")
 
     except Exception as e:
@@ -279,6 +279,15 @@ def handle_special_commands(command, chatbot, user_id, config):
    지식베이스: 가게 {metrics['knowledge_base_size']['shops']}개, 메뉴 {metrics['knowledge_base_size']['menus']}개
         """)
 
+        # 단계별 지연 시간 (p50/p95/p99)
+        stage_latency = metrics.get('stage_latency_ms', {})
+        if stage_latency:
+            print("   단계별 지연 시간 (ms):")
+            for stage, stats in stage_latency.items():
+                if 'p50_ms' in stats:
+                    print(f"     {stage:14s} p50 {stats['p50_ms']:8.1f}  p95 {stats['p95_ms']:8.1f}  "
+                          f"p99 {stats['p99_ms']:8.1f}  ({stats['count']}회)")
+
     elif command == '/reset':
         chatbot.reset_conversation(user_id)
         print("✅ 대화 기록이 리셋되었습니다.")
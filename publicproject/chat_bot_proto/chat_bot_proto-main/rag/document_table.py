@@ -0,0 +1,311 @@
+"""
+사전 빌드 인덱스용 문서 테이블
+
+build_faiss_index.py가 생성하는 바이너리 문서 테이블(_docs.bin)을
+mmap으로 열어 검색 결과로 반환되는 문서만 디코딩합니다.
+파일 전체를 파싱하지 않으므로 초기화 비용이 문서 수와 무관하고,
+같은 호스트의 워커 프로세스들은 OS 페이지 캐시를 통해 페이지를 공유합니다.
+
+파일 구조:
+    MAGIC(8) | header_len(uint64) | header(JSON) | padding | 섹션들(8바이트 정렬)
+
+섹션:
+    id_offsets / id_blob             문서 ID (UTF-8) 오프셋 테이블 + blob
+    content_offsets / content_blob   문서 내용 (UTF-8)
+    meta_offsets / meta_blob         문서별 메타데이터 (compact JSON)
+    id_order                         유효 문서 ID 정렬 순서 (ID → 행 번호 이진 탐색용)
+    content_hash                     문서별 내용 해시 (16바이트, 증분 빌드용)
+    alive                            유효 문서 여부 (0 = 삭제/변경된 문서의 tombstone)
+    col_*                            MetadataColumns 고정폭 컬럼
+"""
+
+import json
+import mmap
+import hashlib
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from .metadata_columns import MetadataColumns
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NVDOCTB1'
+ALIGNMENT = 64
+HASH_SIZE = 16
+
+
+def _align(offset: int, alignment: int = 8) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def _encode_strings(values: List[str]):
+    """문자열 목록을 (오프셋 테이블, UTF-8 blob)으로 변환"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return offsets, blob
+
+
+def _encode_metadata(metadata: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(metadata or {}, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def content_hash(content: str, metadata: Optional[Dict[str, Any]]) -> bytes:
+    """문서 내용 + 메타데이터 해시 (증분 빌드 시 변경 감지용)"""
+    digest = hashlib.blake2b(digest_size=HASH_SIZE)
+    digest.update(content.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(_encode_metadata(metadata).encode('utf-8'))
+    return digest.digest()
+
+
+def write_document_table(path: str, doc_ids: List[str], contents: List[str],
+                         metadatas: List[Dict[str, Any]], info: Optional[Dict[str, Any]] = None,
+                         alive: Optional[np.ndarray] = None):
+    """FAISS 인덱스 순서의 문서들을 바이너리 문서 테이블로 저장
+
+    Args:
+        path: 출력 파일 경로 (_docs.bin)
+        doc_ids: 문서 ID 목록 (FAISS 인덱스 순서)
+        contents: 문서 내용 목록
+        metadatas: 문서 메타데이터 목록
+        info: 헤더에 함께 저장할 인덱스 정보
+        alive: 유효 문서 여부 (None이면 전체 유효). False인 행은 검색/조회에서 제외
+    """
+    alive = np.ones(len(doc_ids), dtype=np.uint8) if alive is None else np.asarray(alive, dtype=np.uint8)
+
+    id_offsets, id_blob = _encode_strings(doc_ids)
+    content_offsets, content_blob = _encode_strings(contents)
+    meta_offsets, meta_blob = _encode_strings([
+        json.dumps(metadata, ensure_ascii=False, separators=(',', ':')) for metadata in metadatas
+    ])
+    hashes = np.frombuffer(b''.join(content_hash(content, metadata)
+                                    for content, metadata in zip(contents, metadatas)), dtype=np.uint8)
+
+    # 유효 문서만 바이트 기준 정렬 (UTF-8 바이트 비교 = 코드포인트 비교)
+    id_order = np.array(sorted(np.flatnonzero(alive), key=lambda i: doc_ids[i].encode('utf-8')),
+                        dtype=np.int64)
+
+    columns = MetadataColumns.from_metadata(metadatas)
+
+    sections = {
+        'id_offsets': id_offsets,
+        'id_blob': id_blob,
+        'content_offsets': content_offsets,
+        'content_blob': content_blob,
+        'meta_offsets': meta_offsets,
+        'meta_blob': meta_blob,
+        'id_order': id_order,
+        'content_hash': hashes,
+        'alive': alive,
+    }
+    for name, array in columns.to_arrays().items():
+        sections[f'col_{name}'] = array
+
+    # 섹션 배치 (데이터 영역 시작 기준 상대 오프셋)
+    layout = {}
+    offset = 0
+    for name, array in sections.items():
+        offset = _align(offset)
+        layout[name] = [array.dtype.str, offset, int(array.size)]
+        offset += array.nbytes
+
+    header = json.dumps({
+        'count': len(doc_ids),
+        'info': info or {},
+        'vocabs': columns.vocabs,
+        'sections': layout,
+    }, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header), ALIGNMENT)
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, array in sections.items():
+            f.write(b'\0' * (data_start + layout[name][1] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    Path(tmp_path).replace(path)
+
+
+class MappedDocumentTable:
+    """mmap 기반 바이너리 문서 테이블 (읽기 전용)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"문서 테이블 형식이 아닙니다: {path}")
+
+        header_len = int(np.frombuffer(self._mm, dtype=np.uint64, count=1, offset=len(MAGIC))[0])
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mm[header_start:header_start + header_len].decode('utf-8'))
+        data_start = _align(header_start + header_len, ALIGNMENT)
+
+        self.count: int = header['count']
+        self.info: Dict[str, Any] = header.get('info', {})
+
+        # 섹션은 복사 없이 mmap 위의 읽기 전용 뷰로 생성
+        self._sections: Dict[str, np.ndarray] = {}
+        for name, (dtype, offset, size) in header['sections'].items():
+            self._sections[name] = np.frombuffer(self._mm, dtype=np.dtype(dtype), count=size,
+                                                 offset=data_start + offset)
+
+        self._id_offsets = self._sections['id_offsets']
+        self._content_offsets = self._sections['content_offsets']
+        self._meta_offsets = self._sections['meta_offsets']
+        self._id_order = self._sections['id_order']
+        self._id_blob_start = data_start + header['sections']['id_blob'][1]
+        self._content_blob_start = data_start + header['sections']['content_blob'][1]
+        self._meta_blob_start = data_start + header['sections']['meta_blob'][1]
+
+        self.columns = MetadataColumns.from_arrays(
+            {name[len('col_'):]: array for name, array in self._sections.items() if name.startswith('col_')},
+            header.get('vocabs', {})
+        )
+        # 이전 형식 테이블에는 tombstone/해시 섹션이 없음
+        if 'alive' in self._sections:
+            self.has_doc = self._sections['alive'].astype(bool)
+        else:
+            self.has_doc = np.ones(self.count, dtype=bool)
+        self._hashes = self._sections.get('content_hash')
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _read(self, blob_start: int, offsets: np.ndarray, row: int) -> bytes:
+        return self._mm[blob_start + int(offsets[row]):blob_start + int(offsets[row + 1])]
+
+    def doc_id(self, row: int) -> str:
+        return self._read(self._id_blob_start, self._id_offsets, row).decode('utf-8')
+
+    def doc_ids(self, rows) -> List[str]:
+        return [self.doc_id(row) for row in rows]
+
+    def get_content(self, row: int) -> str:
+        return self._read(self._content_blob_start, self._content_offsets, row).decode('utf-8')
+
+    def get_metadata(self, row: int) -> Dict[str, Any]:
+        return json.loads(self._read(self._meta_blob_start, self._meta_offsets, row))
+
+    def content_hash(self, row: int) -> Optional[bytes]:
+        if self._hashes is None:
+            return None
+        return self._hashes[row * HASH_SIZE:(row + 1) * HASH_SIZE].tobytes()
+
+    def find(self, doc_id: str) -> Optional[int]:
+        """유효 문서 ID의 행 번호를 정렬 순서 이진 탐색으로 찾음 (없으면 None)"""
+        target = doc_id.encode('utf-8')
+        num_ids = len(self._id_order)
+        low, high = 0, num_ids
+        while low < high:
+            mid = (low + high) // 2
+            if self._read(self._id_blob_start, self._id_offsets, int(self._id_order[mid])) < target:
+                low = mid + 1
+            else:
+                high = mid
+        if low < num_ids:
+            row = int(self._id_order[low])
+            if self._read(self._id_blob_start, self._id_offsets, row) == target:
+                return row
+        return None
+
+
+class JSONDocumentTable:
+    """기존 _metadata.json 형식용 문서 테이블 (하위 호환)
+
+    document_mapping / documents_metadata / documents_content를 모두 메모리에 올립니다.
+    """
+
+    def __init__(self, metadata_info: Dict[str, Any], count: int, columns_path: Optional[str] = None):
+        self.count = count
+        self.info = metadata_info.get('index_info', {})
+        self._documents_metadata = metadata_info.get('documents_metadata', {})
+        self._documents_content = metadata_info.get('documents_content', {})
+
+        self._doc_ids = np.empty(count, dtype=object)
+        self.has_doc = np.zeros(count, dtype=bool)
+        self._rows: Dict[str, int] = {}
+        for faiss_idx_str, doc_id in metadata_info.get('document_mapping', {}).items():
+            faiss_idx = int(faiss_idx_str)
+            if doc_id and 0 <= faiss_idx < count:
+                self._doc_ids[faiss_idx] = doc_id
+                self.has_doc[faiss_idx] = True
+                self._rows[doc_id] = faiss_idx
+
+        # 컬럼형 메타데이터: build_faiss_index.py가 만든 사이드카 우선 사용
+        if columns_path and Path(columns_path).exists():
+            logger.info(f"컬럼 메타데이터 로드: {columns_path}")
+            self.columns = MetadataColumns.load(columns_path)
+        else:
+            logger.info("컬럼 메타데이터 파일 없음: JSON 메타데이터로부터 생성")
+            self.columns = MetadataColumns.from_metadata([
+                self._documents_metadata.get(doc_id) if has_doc else None
+                for doc_id, has_doc in zip(self._doc_ids, self.has_doc)
+            ])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def doc_id(self, row: int) -> str:
+        return self._doc_ids[row]
+
+    def doc_ids(self, rows) -> List[str]:
+        return self._doc_ids[rows].tolist()
+
+    def get_content(self, row: int) -> str:
+        return self._documents_content.get(self._doc_ids[row], "")
+
+    def get_metadata(self, row: int) -> Optional[Dict[str, Any]]:
+        return self._documents_metadata.get(self._doc_ids[row])
+
+    def find(self, doc_id: str) -> Optional[int]:
+        row = self._rows.get(doc_id)
+        # 메타데이터가 없는 문서는 기존과 같이 조회 대상에서 제외
+        if row is None or doc_id not in self._documents_metadata:
+            return None
+        return row
+
+
+class ContentTable:
+    """메모리 문서 내용 테이블 (색인 시 렌더링한 get_content() 결과를 오프셋 + UTF-8 blob으로 보관)
+
+    MockVectorStore/FAISSVectorStore처럼 ShopDocument/MenuDocument를 들고 있는 저장소에서
+    요청마다 내용 문자열을 다시 조립하지 않도록 add_knowledge_base 시점에 한 번만 렌더링합니다.
+    """
+
+    def __init__(self):
+        # (doc_id → 행, 오프셋, blob)을 한 번에 교체하여 읽는 쪽은 잠금 없이 일관된 상태를 봄
+        self._state = ({}, np.zeros(1, dtype=np.int64), b'')
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def add_documents(self, documents: List[Any]):
+        """Document 내용 렌더링 후 추가 (같은 ID는 새 내용으로 교체)"""
+        rows, _, _ = self._state
+        contents = {doc_id: self.get(doc_id) for doc_id in rows}
+        contents.update((doc.id, doc.get_content()) for doc in documents)
+
+        offsets, blob = _encode_strings(list(contents.values()))
+        self._state = ({doc_id: row for row, doc_id in enumerate(contents)}, offsets, blob.tobytes())
+
+    def get(self, doc_id: str) -> Optional[str]:
+        """렌더링된 내용 (없으면 None)"""
+        rows, offsets, blob = self._state
+        row = rows.get(doc_id)
+        if row is None:
+            return None
+        return blob[offsets[row]:offsets[row + 1]].decode('utf-8')
+
+    def clear(self):
+        self._state = ({}, np.zeros(1, dtype=np.int64), b'')
@@ -211,4 +211,24 @@ class CouponDocument(Document):
             "discount_amount": self._data.get('discount_amount'),
             "discount_rate": self._data.get('discount_rate'),
             "shop_name": self._shop_info.get('name')
-        }
\ No newline at end of file
+        }
+
+class StoredDocument:
+    """색인 시 렌더링된 내용/메타데이터만 가진 가벼운 Document
+    
+    PrebuiltFAISSVectorStore처럼 원본 데이터 없이 문서 테이블에서 읽은 값을 돌려줄 때 사용합니다.
+    (검색 결과마다 만들어지므로 __slots__로 인스턴스 dict를 두지 않음)
+    """
+    
+    __slots__ = ('id', '_content', '_metadata')
+    
+    def __init__(self, doc_id: str, content: str, metadata: Dict[str, Any]):
+        self.id = doc_id
+        self._content = content
+        self._metadata = metadata
+    
+    def get_content(self) -> str:
+        return self._content
+    
+    def get_metadata(self) -> Dict[str, Any]:
+        return self._metadata
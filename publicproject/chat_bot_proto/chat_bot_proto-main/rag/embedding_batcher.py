@@ -0,0 +1,163 @@
+"""
+임베딩 마이크로 배처
+
+동시에 들어온 /chat 요청들이 각자 batch size 1로 SentenceTransformer.encode를
+호출하는 대신, 몇 ms 동안(또는 최대 배치 크기까지) 모인 쿼리를 한 번의 encode로
+처리하고 각 호출자에게 Future로 결과를 돌려줍니다.
+
+Vector Store의 embedding_model 자리에 그대로 끼워 넣을 수 있도록
+encode() 인터페이스를 제공합니다.
+"""
+
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchingEncoder:
+    """여러 스레드의 encode 요청을 모아 한 번에 처리하는 임베딩 모델 래퍼"""
+
+    def __init__(self, model=None, model_loader: Optional[Callable[[], Any]] = None,
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Args:
+            model: encode(texts)를 제공하는 임베딩 모델 (예: SentenceTransformer)
+            model_loader: model이 None일 때 첫 배치에서 모델을 로드하는 함수 (Lazy Loading)
+            max_batch_size: 한 번에 인코딩할 최대 텍스트 수
+            max_wait_ms: 첫 요청 도착 후 배치를 모으는 최대 대기 시간
+        """
+        if model is None and model_loader is None:
+            raise ValueError("model 또는 model_loader 중 하나는 필요합니다")
+
+        self.model = model
+        self.model_loader = model_loader
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._model_lock = threading.Lock()
+        self._closed = False
+
+        # 통계
+        self.total_requests = 0
+        self.total_batches = 0
+        self.total_texts = 0
+
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+        logger.info(f"MicroBatchingEncoder 시작 (최대 배치 {self.max_batch_size}, 대기 {max_wait_ms}ms)")
+
+    def _get_model(self):
+        if self.model is None:
+            with self._model_lock:
+                if self.model is None:
+                    self.model = self.model_loader()
+        return self.model
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self._get_model().get_sentence_embedding_dimension()
+
+    def submit(self, texts: List[str]) -> Future:
+        """텍스트 목록을 배치 큐에 넣고 (len(texts), dim) 배열을 돌려줄 Future 반환"""
+        future: Future = Future()
+        if self._closed:
+            future.set_exception(RuntimeError("MicroBatchingEncoder가 종료되었습니다"))
+            return future
+        if not texts:
+            future.set_result(np.empty((0, 0), dtype=np.float32))
+            return future
+
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts, timeout: Optional[float] = None, **kwargs) -> np.ndarray:
+        """SentenceTransformer.encode 호환 인터페이스 (결과는 항상 NumPy 배열)"""
+        if isinstance(texts, str):
+            return self.submit([texts]).result(timeout)[0]
+        return self.submit(texts).result(timeout)
+
+    def _collect_batch(self, first_request) -> List:
+        """첫 요청 이후 max_wait 동안 또는 max_batch_size까지 요청 수집"""
+        batch = [first_request]
+        batch_texts = len(first_request[0])
+        deadline = time.monotonic() + self.max_wait
+
+        while batch_texts < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # 종료 신호는 현재 배치 처리 후 반영
+                self._queue.put(None)
+                break
+            batch.append(request)
+            batch_texts += len(request[0])
+
+        return batch
+
+    def _run(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                break
+
+            batch = self._collect_batch(request)
+            texts = [text for request_texts, _ in batch for text in request_texts]
+
+            try:
+                embeddings = np.asarray(self._get_model().encode(texts, convert_to_numpy=True),
+                                        dtype=np.float32)
+            except Exception as e:
+                logger.error(f"배치 임베딩 실패 ({len(texts)}개): {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.total_batches += 1
+            self.total_requests += len(batch)
+            self.total_texts += len(texts)
+
+            # 요청 순서대로 결과 분배
+            start = 0
+            for request_texts, future in batch:
+                end = start + len(request_texts)
+                future.set_result(embeddings[start:end])
+                start = end
+
+    def get_stats(self) -> Dict[str, Any]:
+        """배치 처리 통계"""
+        return {
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "total_texts": self.total_texts,
+            "avg_batch_size": self.total_texts / self.total_batches if self.total_batches else 0.0,
+            "queue_size": self._queue.qsize()
+        }
+
+    def close(self, timeout: float = 5.0):
+        """대기 중인 요청을 처리한 뒤 워커 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join(timeout)
+
+        # 종료 신호 이후에 들어온 요청은 실패 처리
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request[1].set_exception(RuntimeError("MicroBatchingEncoder가 종료되었습니다"))
@@ -0,0 +1,201 @@
+"""
+쿼리 임베딩 캐시
+
+아이들의 질문은 반복이 많고("치킨 먹고 싶어", "떡볶이 추천해줘"),
+QueryStructurizer가 여러 질문을 같은 semantic_query로 줄이는 경우가 많으므로
+정규화된 쿼리 텍스트 → float32 벡터를 LRU/TTL 방식으로 캐싱하여
+SentenceTransformer.encode 호출을 줄입니다.
+
+벡터는 만든 임베딩 모델(이름, 차원)과 함께 저장하며, 다른 모델에 연결되면
+(같은 384차원이라도) 이전 항목을 쓰지 않습니다.
+"""
+
+import re
+import time
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_query_text(query_text: str) -> str:
+    """캐시 키용 쿼리 정규화 (NFC, 소문자, 공백 정리)"""
+    text = unicodedata.normalize('NFC', query_text)
+    return _WHITESPACE_PATTERN.sub(' ', text).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """크기 제한 LRU + TTL 쿼리 임베딩 캐시 (스레드 안전)"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 0.0,
+                 persist_path: Optional[str] = None, model_name: Optional[str] = None,
+                 embedding_dim: Optional[int] = None):
+        """
+        Args:
+            max_size: 최대 보관 쿼리 수 (초과 시 가장 오래 사용되지 않은 항목 제거)
+            ttl_seconds: 항목 유효 시간 (0 이하면 만료 없음)
+            persist_path: 디스크 저장 경로 (.npz). None이면 메모리에만 보관
+            model_name: 임베딩 모델 이름 (None이면 Vector Store가 bind_model로 연결)
+            embedding_dim: 임베딩 차원
+        """
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        # 캐시 항목을 만든 임베딩 모델 (이름, 차원)
+        self.model_identity: Optional[Tuple[str, int]] = (
+            (model_name, int(embedding_dim)) if model_name and embedding_dim else None)
+
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if persist_path and Path(persist_path).exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, query_text: str) -> Optional[np.ndarray]:
+        """캐시된 임베딩 반환 (없거나 만료되면 None)"""
+        key = normalize_query_text(query_text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[1], now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, query_text: str, embedding):
+        """임베딩 저장 (읽기 전용 float32 벡터로 보관)"""
+        key = normalize_query_text(query_text)
+        vector = np.array(embedding, dtype=np.float32).reshape(-1)
+        vector.setflags(write=False)
+
+        with self._lock:
+            self._entries[key] = (vector, time.time())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def bind_model(self, model_name: str, embedding_dim: int):
+        """캐시를 임베딩 모델에 연결 (다른 모델로 만든 항목은 버림)"""
+        identity = (model_name, int(embedding_dim))
+        with self._lock:
+            if self.model_identity is not None and self.model_identity != identity and self._entries:
+                logger.warning(f"쿼리 임베딩 캐시 모델 변경 {self.model_identity} → {identity}: "
+                               f"{len(self._entries)}개 항목 삭제")
+                self._entries.clear()
+            self.model_identity = identity
+
+    def clear(self):
+        """캐시 항목 및 통계 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "model": self.model_identity
+        }
+
+    def save(self, path: Optional[str] = None):
+        """캐시 항목을 디스크에 저장 (재시작 후 워밍업 유지용)"""
+        path = path or self.persist_path
+        if not path:
+            return
+
+        with self._lock:
+            items = list(self._entries.items())
+            identity = self.model_identity
+        if identity is None:
+            logger.warning("쿼리 임베딩 캐시 저장 생략: 임베딩 모델이 연결되지 않음")
+            return
+
+        keys = np.array([key for key, _ in items], dtype=str)
+        timestamps = np.array([created_at for _, (_, created_at) in items], dtype=np.float64)
+        vectors = np.stack([vector for _, (vector, _) in items]) if items else np.empty((0, 0), dtype=np.float32)
+
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, keys=keys, vectors=vectors, timestamps=timestamps,
+                         model_name=np.array(identity[0]), embedding_dim=np.array(identity[1]))
+            Path(tmp_path).replace(path)
+            logger.info(f"쿼리 임베딩 캐시 저장: {len(items)}개 → {path}")
+        except Exception as e:
+            logger.warning(f"쿼리 임베딩 캐시 저장 실패: {e}")
+
+    def load(self, path: Optional[str] = None):
+        """디스크에서 캐시 항목 로드 (만료된 항목, 다른 임베딩 모델로 만든 파일은 제외)"""
+        path = path or self.persist_path
+        if not path or not Path(path).exists():
+            return
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                keys = data['keys'].tolist()
+                vectors = data['vectors']
+                timestamps = data['timestamps']
+                identity = ((str(data['model_name']), int(data['embedding_dim']))
+                            if 'model_name' in data.files and 'embedding_dim' in data.files else None)
+        except Exception as e:
+            logger.warning(f"쿼리 임베딩 캐시 로드 실패: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            # 모델 정보가 없거나 연결된 모델과 다르면 벡터 공간이 달라 사용할 수 없음
+            if identity is None or (self.model_identity is not None and identity != self.model_identity):
+                logger.warning(f"쿼리 임베딩 캐시 로드 생략: 파일 모델 {identity} != 현재 모델 {self.model_identity}")
+                return
+            self.model_identity = identity
+            # 저장 순서가 LRU 순서이므로 최근 항목이 뒤에 오도록 유지
+            for key, vector, created_at in zip(keys, vectors, timestamps):
+                if self._is_expired(float(created_at), now):
+                    continue
+                vector = np.array(vector, dtype=np.float32)
+                vector.setflags(write=False)
+                self._entries[key] = (vector, float(created_at))
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        logger.info(f"쿼리 임베딩 캐시 로드: {len(self._entries)}개 ← {path}")
@@ -0,0 +1,264 @@
+"""
+FAISS 인덱스 생성/설정 유틸리티
+
+build_faiss_index.py의 --index-type 옵션과 PrebuiltFAISSVectorStore가 공유합니다.
+
+인덱스 타입:
+    flat   IndexFlatL2      전수 탐색 (정확, 문서 수에 선형)
+    ivf    IndexIVFFlat     k-means 클러스터 중 nprobe개만 탐색
+    hnsw   IndexHNSWFlat    그래프 탐색 (학습 불필요, 메모리 증가)
+    ivfpq  IndexIVFPQ       IVF + Product Quantization (메모리 최소, 근사 거리)
+
+검색 설정(nprobe, efSearch)은 인덱스 파일에 저장되지 않는 값이므로
+메타데이터의 index_info['search_params']에 기록하고 로드 시 다시 적용합니다.
+"""
+
+import time
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ('flat', 'ivf', 'hnsw', 'ivfpq')
+
+INDEX_CLASS_NAMES = {
+    'flat': 'IndexFlatL2',
+    'ivf': 'IndexIVFFlat',
+    'hnsw': 'IndexHNSWFlat',
+    'ivfpq': 'IndexIVFPQ',
+}
+
+# k-means 학습 시 클러스터당 최소 학습 벡터 수 (FAISS 권장값)
+MIN_POINTS_PER_CENTROID = 39
+
+
+# 배치 검색에서 BLAS(sgemm) 거리 계산으로 바꾸는 최소 쿼리 수
+# faiss의 distance_compute_blas_threshold는 (쿼리 수 x 차원) 기준이라 기본값(128000)이면
+# 384차원에서 쿼리 334개 미만의 배치는 쿼리마다 전체 스캔 (배치 검색 이득이 거의 없음)
+BLAS_MIN_QUERIES = 20
+
+
+def enable_blas_batch_search(dim: int, min_queries: int = BLAS_MIN_QUERIES):
+    """min_queries개 이상 쿼리를 한 번에 검색하면 BLAS 행렬곱으로 거리 계산 (프로세스 전역 설정, 낮추기만 함)
+
+    단일 쿼리는 기존 SIMD 스캔 유지 (단일 쿼리에 BLAS를 쓰면 오히려 2~3배 느림)
+    """
+    import faiss
+
+    threshold = min_queries * dim
+    if faiss.cvar.distance_compute_blas_threshold > threshold:
+        faiss.cvar.distance_compute_blas_threshold = threshold
+
+
+def default_nlist(num_vectors: int) -> int:
+    """문서 수에 맞는 IVF 클러스터 수 (4·√N, 클러스터당 학습 벡터 수 보장)"""
+    nlist = int(4 * np.sqrt(num_vectors))
+    return int(max(1, min(nlist, num_vectors // MIN_POINTS_PER_CENTROID)))
+
+
+def default_pq_m(dim: int) -> int:
+    """서브벡터당 약 8차원이 되는 PQ 서브양자화기 수 (dim의 약수)"""
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def sample_training_set(embeddings: np.ndarray, train_size: int, seed: int = 42) -> np.ndarray:
+    """학습용 벡터 무작위 샘플링 (전체가 train_size 이하이면 전체 사용)"""
+    if len(embeddings) <= train_size:
+        return embeddings
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(embeddings), size=train_size, replace=False))
+    return embeddings[rows]
+
+
+def build_index(embeddings: np.ndarray, index_type: str = 'flat', nlist: Optional[int] = None,
+                nprobe: Optional[int] = None, hnsw_m: int = 32, ef_construction: int = 200,
+                ef_search: int = 64, pq_m: Optional[int] = None, pq_nbits: int = 8,
+                train_size: Optional[int] = None, seed: int = 42) -> Tuple[Any, Dict[str, Any]]:
+    """임베딩으로 지정 타입의 FAISS 인덱스 생성 및 학습/추가
+
+    Args:
+        embeddings: (N, dim) float32 임베딩
+        index_type: 'flat' | 'ivf' | 'hnsw' | 'ivfpq'
+        nlist: IVF 클러스터 수 (None이면 default_nlist)
+        nprobe: 검색 시 탐색할 클러스터 수 (None이면 nlist의 약 1/16)
+        hnsw_m: HNSW 노드당 이웃 수
+        ef_construction: HNSW 구축 시 탐색 폭
+        ef_search: HNSW 검색 시 탐색 폭
+        pq_m: PQ 서브양자화기 수 (None이면 default_pq_m)
+        pq_nbits: PQ 코드 비트 수 (학습 벡터가 부족하면 자동 축소)
+        train_size: 학습에 사용할 최대 벡터 수 (None이면 nlist·256, 최대 N)
+        seed: 학습 샘플링 시드
+
+    Returns:
+        (인덱스, 메타데이터에 저장할 검색 설정)
+    """
+    import faiss
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 인덱스 타입: {index_type} (가능: {', '.join(INDEX_TYPES)})")
+
+    embeddings = np.ascontiguousarray(embeddings, dtype='float32')
+    num_vectors, dim = embeddings.shape
+    search_config: Dict[str, Any] = {'index_type': index_type}
+
+    if index_type == 'flat':
+        index = faiss.IndexFlatL2(dim)
+
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+        index.hnsw.efSearch = ef_search
+        search_config.update({'hnsw_m': hnsw_m, 'ef_construction': ef_construction, 'ef_search': ef_search})
+
+    else:
+        nlist = nlist or default_nlist(num_vectors)
+        nprobe = nprobe or max(1, nlist // 16)
+        train_size = min(num_vectors, train_size or nlist * 256)
+        train_size = max(train_size, min(num_vectors, nlist * MIN_POINTS_PER_CENTROID))
+        training_set = sample_training_set(embeddings, train_size, seed)
+
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == 'ivf':
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_L2)
+        else:
+            pq_m = pq_m or default_pq_m(dim)
+            if dim % pq_m != 0:
+                raise ValueError(f"pq_m({pq_m})은 임베딩 차원({dim})의 약수여야 합니다")
+            # 코드북 크기(2^nbits)보다 학습 벡터가 적으면 비트 수 축소
+            pq_nbits = int(max(1, min(pq_nbits, np.floor(np.log2(len(training_set))))))
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_nbits)
+            search_config.update({'pq_m': pq_m, 'pq_nbits': pq_nbits})
+
+        logger.info(f"{INDEX_CLASS_NAMES[index_type]} 학습: {len(training_set)}개 벡터, nlist={nlist}")
+        train_start = time.time()
+        index.train(training_set)
+        logger.info(f"학습 완료: {time.time() - train_start:.2f}초")
+
+        search_config.update({'nlist': nlist, 'nprobe': min(nprobe, nlist), 'train_size': len(training_set)})
+
+    index.add(embeddings)
+    configure_index(index, search_config)
+    return index, search_config
+
+
+def _unwrap_index(index):
+    """IndexIDMap 등 래퍼를 벗겨 실제 인덱스 반환"""
+    import faiss
+
+    index = faiss.downcast_index(index)
+    while hasattr(index, 'id_map') and hasattr(index, 'index'):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def flat_vectors(index) -> Optional[np.ndarray]:
+    """IndexFlat(L2/IP)이면 저장된 벡터의 (ntotal, d) 복사 없는 뷰, 아니면 None"""
+    import faiss
+
+    index = faiss.downcast_index(index)
+    if type(index) not in (faiss.IndexFlatL2, faiss.IndexFlatIP) or index.ntotal == 0:
+        return None
+    return faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+
+
+def configure_index(index, search_config: Optional[Dict[str, Any]]):
+    """메타데이터의 검색 설정(nprobe, efSearch)을 로드된 인덱스에 적용"""
+    if not search_config:
+        return index
+
+    base_index = _unwrap_index(index)
+    if 'nprobe' in search_config and hasattr(base_index, 'nprobe'):
+        base_index.nprobe = int(search_config['nprobe'])
+    if 'ef_search' in search_config and hasattr(base_index, 'hnsw'):
+        base_index.hnsw.efSearch = int(search_config['ef_search'])
+    return index
+
+
+def make_search_parameters(search_config: Optional[Dict[str, Any]] = None, sel=None):
+    """인덱스 타입에 맞는 SearchParameters 생성
+
+    IVF/HNSW 인덱스는 파라미터가 전달되면 인덱스에 설정된 nprobe/efSearch 대신
+    파라미터 값을 사용하므로, IDSelector와 함께 검색 설정도 채워 넣습니다.
+    """
+    import faiss
+
+    search_config = search_config or {}
+    index_type = search_config.get('index_type', 'flat')
+
+    if index_type in ('ivf', 'ivfpq'):
+        params = faiss.SearchParametersIVF()
+        params.nprobe = int(search_config.get('nprobe', 1))
+    elif index_type == 'hnsw':
+        params = faiss.SearchParametersHNSW()
+        params.efSearch = int(search_config.get('ef_search', 16))
+    else:
+        params = faiss.SearchParameters()
+
+    if sel is not None:
+        params.sel = sel
+    return params
+
+
+def evaluate_recall(index, baseline_index, queries: np.ndarray, k: int = 10) -> Dict[str, float]:
+    """전수 탐색 기준 recall@k 및 쿼리당 지연 측정
+
+    Args:
+        index: 평가할 (근사) 인덱스
+        baseline_index: 정답 기준 IndexFlatL2
+        queries: (Q, dim) 쿼리 벡터
+        k: 비교할 상위 결과 수
+
+    Returns:
+        recall@k, 쿼리당 평균 지연(ms) 비교
+    """
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    k = min(k, baseline_index.ntotal)
+
+    start = time.perf_counter()
+    _, expected = baseline_index.search(queries, k)
+    baseline_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    start = time.perf_counter()
+    _, actual = index.search(queries, k)
+    index_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    hits = sum(len(np.intersect1d(expected_row, actual_row[actual_row >= 0]))
+               for expected_row, actual_row in zip(expected, actual))
+
+    return {
+        "k": k,
+        "recall": hits / float(expected.size),
+        "latency_ms": index_ms,
+        "flat_latency_ms": baseline_ms,
+        "speedup": baseline_ms / index_ms if index_ms > 0 else float('inf')
+    }
+
+
+def recall_latency_sweep(index, baseline_index, queries: np.ndarray, search_config: Dict[str, Any],
+                         k: int = 10) -> list:
+    """nprobe/efSearch 값별 recall@k·지연 리포트 (측정 후 원래 설정 복원)"""
+    index_type = search_config.get('index_type', 'flat')
+    if index_type in ('ivf', 'ivfpq'):
+        param_name = 'nprobe'
+        nlist = int(search_config['nlist'])
+        values = sorted({min(2 ** i, nlist) for i in range(int(np.log2(nlist)) + 2)} | {search_config['nprobe']})
+    elif index_type == 'hnsw':
+        param_name = 'ef_search'
+        values = sorted({16, 32, 64, 128, 256, search_config['ef_search']})
+    else:
+        return [dict(evaluate_recall(index, baseline_index, queries, k), setting=None)]
+
+    report = []
+    for value in values:
+        configure_index(index, dict(search_config, **{param_name: value}))
+        result = evaluate_recall(index, baseline_index, queries, k)
+        result['setting'] = {param_name: value}
+        report.append(result)
+
+    configure_index(index, search_config)
+    return report
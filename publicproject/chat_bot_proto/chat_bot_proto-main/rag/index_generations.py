@@ -0,0 +1,111 @@
+"""
+사전 빌드 인덱스 세대(generation) 관리
+
+build_faiss_index.py는 매 빌드 결과를 새 세대 디렉토리에 쓰고
+포인터 파일(CURRENT)을 원자적으로 교체하여 게시합니다.
+실행 중인 서버는 포인터 파일만 다시 읽으면 새 세대를 찾을 수 있고,
+이전 세대 파일은 그대로 남아 있으므로 진행 중인 검색에 영향을 주지 않습니다.
+
+디렉토리 구조:
+    outputs/prebuilt_faiss_generations/
+        CURRENT                       현재 세대 이름 (예: "gen-000003")
+        gen-000002/prebuilt_faiss.faiss, prebuilt_faiss_docs.bin, ...
+        gen-000003/...
+"""
+
+import os
+import re
+import shutil
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+POINTER_FILE = "CURRENT"
+_GENERATION_PATTERN = re.compile(r'^gen-(\d{6})$')
+
+
+class IndexGenerations:
+    """인덱스 세대 디렉토리 + 포인터 파일"""
+
+    def __init__(self, output_dir: str, index_name: str):
+        self.index_name = index_name
+        self.root = Path(output_dir) / f"{index_name}_generations"
+        self.pointer_path = self.root / POINTER_FILE
+
+    def list_generations(self) -> List[str]:
+        """게시된 세대 이름 목록 (오래된 순)"""
+        if not self.root.exists():
+            return []
+        return sorted(path.name for path in self.root.iterdir()
+                      if path.is_dir() and _GENERATION_PATTERN.match(path.name))
+
+    def current_name(self) -> Optional[str]:
+        """현재 세대 이름 (포인터 파일이 없으면 None)"""
+        try:
+            name = self.pointer_path.read_text(encoding='utf-8').strip()
+        except FileNotFoundError:
+            return None
+        return name or None
+
+    def generation_dir(self, name: str) -> Path:
+        return self.root / name
+
+    def index_path(self, name: str) -> Path:
+        return self.generation_dir(name) / f"{self.index_name}.faiss"
+
+    def current_index_path(self) -> Optional[Path]:
+        """현재 세대의 FAISS 인덱스 경로"""
+        name = self.current_name()
+        if name is None:
+            return None
+        path = self.index_path(name)
+        return path if path.exists() else None
+
+    def next_name(self) -> str:
+        numbers = [int(_GENERATION_PATTERN.match(name).group(1)) for name in self.list_generations()]
+        return f"gen-{max(numbers, default=0) + 1:06d}"
+
+    def create_staging_dir(self, name: str) -> Path:
+        """세대 파일을 쓸 임시 디렉토리 (게시 전까지 포인터에서 보이지 않음)"""
+        staging_dir = self.root / f".{name}.tmp"
+        if staging_dir.exists():
+            shutil.rmtree(staging_dir)
+        staging_dir.mkdir(parents=True)
+        return staging_dir
+
+    def publish(self, staging_dir: Path, name: str) -> Path:
+        """임시 디렉토리를 세대 디렉토리로 이동한 뒤 포인터 파일을 원자적으로 교체"""
+        generation_dir = self.generation_dir(name)
+        os.replace(staging_dir, generation_dir)
+
+        tmp_pointer = self.root / f".{POINTER_FILE}.tmp"
+        with open(tmp_pointer, 'w', encoding='utf-8') as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, self.pointer_path)
+
+        logger.info(f"인덱스 세대 게시: {generation_dir}")
+        return generation_dir
+
+    def prune(self, keep: int = 3):
+        """최근 keep개 세대만 남기고 삭제 (현재 세대는 항상 유지)"""
+        current = self.current_name()
+        generations = self.list_generations()
+        for name in generations[:max(0, len(generations) - keep)]:
+            if name != current:
+                shutil.rmtree(self.generation_dir(name), ignore_errors=True)
+                logger.info(f"이전 인덱스 세대 삭제: {name}")
+
+
+def resolve_index_path(index_path: str) -> str:
+    """인덱스 경로를 현재 세대 경로로 변환
+
+    outputs/prebuilt_faiss.faiss → outputs/prebuilt_faiss_generations/<CURRENT>/prebuilt_faiss.faiss
+    게시된 세대가 없으면 기존 경로를 그대로 반환합니다.
+    """
+    path = Path(index_path)
+    current = IndexGenerations(str(path.parent), path.stem).current_index_path()
+    return str(current) if current else index_path
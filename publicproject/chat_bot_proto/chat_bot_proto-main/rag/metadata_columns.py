@@ -0,0 +1,182 @@
+"""
+FAISS 검색용 컬럼형 메타데이터 저장소
+
+가격, 카테고리 코드, 불리언 플래그를 NumPy 배열로 보관하여
+필터 조건을 벡터 연산 한 번으로 평가하고, 그 결과를 FAISS IDSelector
+비트맵으로 변환해 검색 내부에서 필터링(pre-filtering)할 수 있도록 합니다.
+"""
+
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataColumns:
+    """FAISS 인덱스 순서를 따르는 컬럼형 메타데이터
+
+    - 문자열 필드(type, category, location)는 어휘 사전 기반 정수 코드로 저장 (-1 = 없음)
+    - 플래그 필드(is_popular, is_good_influence)는 -1(없음)/0/1 의 int8로 저장
+    - 가격은 float64로 저장 (NaN = 없음)
+    """
+
+    CODED_KEYS = ('type', 'category', 'location')
+    FLAG_KEYS = ('is_popular', 'is_good_influence')
+
+    def __init__(self):
+        self.vocabs: Dict[str, List[str]] = {key: [] for key in self.CODED_KEYS}
+        self._vocab_lookup: Dict[str, Dict[str, int]] = {key: {} for key in self.CODED_KEYS}
+        self.codes: Dict[str, np.ndarray] = {key: np.empty(0, dtype=np.int32) for key in self.CODED_KEYS}
+        self.flags: Dict[str, np.ndarray] = {key: np.empty(0, dtype=np.int8) for key in self.FLAG_KEYS}
+        self.prices = np.empty(0, dtype=np.float64)
+        self.has_metadata = np.empty(0, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.has_metadata)
+
+    @classmethod
+    def from_metadata(cls, metadata_list: List[Optional[Dict[str, Any]]]) -> "MetadataColumns":
+        """FAISS 인덱스 순서의 메타데이터 목록으로 컬럼 생성 (None = 메타데이터 없음)"""
+        columns = cls()
+        columns.append(metadata_list)
+        return columns
+
+    def append(self, metadata_list: List[Optional[Dict[str, Any]]]):
+        """메타데이터 목록을 컬럼 끝에 추가"""
+        count = len(metadata_list)
+        codes = {key: np.full(count, -1, dtype=np.int32) for key in self.CODED_KEYS}
+        flags = {key: np.full(count, -1, dtype=np.int8) for key in self.FLAG_KEYS}
+        prices = np.full(count, np.nan, dtype=np.float64)
+        has_metadata = np.zeros(count, dtype=bool)
+
+        for i, metadata in enumerate(metadata_list):
+            if metadata is None:
+                continue
+            has_metadata[i] = True
+
+            for key in self.CODED_KEYS:
+                value = metadata.get(key)
+                if value is not None:
+                    codes[key][i] = self._encode(key, value)
+
+            for key in self.FLAG_KEYS:
+                value = metadata.get(key)
+                if value is not None:
+                    flags[key][i] = 1 if value else 0
+
+            if metadata.get('price') is not None:
+                prices[i] = metadata['price']
+
+        for key in self.CODED_KEYS:
+            self.codes[key] = np.concatenate([self.codes[key], codes[key]])
+        for key in self.FLAG_KEYS:
+            self.flags[key] = np.concatenate([self.flags[key], flags[key]])
+        self.prices = np.concatenate([self.prices, prices])
+        self.has_metadata = np.concatenate([self.has_metadata, has_metadata])
+
+    def _encode(self, key: str, value: Any) -> int:
+        """문자열 값을 어휘 사전 코드로 변환 (없으면 새로 등록)"""
+        value = str(value)
+        lookup = self._vocab_lookup[key]
+        code = lookup.get(value)
+        if code is None:
+            code = len(self.vocabs[key])
+            self.vocabs[key].append(value)
+            lookup[value] = code
+        return code
+
+    def filter_mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """필터 조건을 만족하는 문서 마스크 반환
+
+        알 수 없는 필터 키는 무시합니다.
+        """
+        mask = np.ones(len(self), dtype=bool)
+
+        for key, value in filters.items():
+            if key in self.CODED_KEYS:
+                if value is None:
+                    mask &= self.codes[key] == -1
+                    continue
+                code = self._vocab_lookup[key].get(str(value))
+                if code is None:
+                    # 어휘 사전에 없는 값은 어떤 문서와도 일치하지 않음
+                    mask[:] = False
+                else:
+                    mask &= self.codes[key] == code
+            elif key in self.FLAG_KEYS:
+                mask &= self.flags[key] == (1 if value else 0)
+            elif key == 'max_price':
+                # 가격이 없는 문서는 0원으로 취급
+                mask &= np.nan_to_num(self.prices, nan=0.0) <= value
+            elif key == 'min_price':
+                # 가격이 없는 문서는 무한대로 취급
+                mask &= np.nan_to_num(self.prices, nan=np.inf) >= value
+
+        return mask
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """컬럼을 이름별 NumPy 배열로 변환 (어휘 사전 제외)"""
+        arrays = {
+            'prices': self.prices,
+            'has_metadata': self.has_metadata,
+        }
+        for key in self.CODED_KEYS:
+            arrays[f'codes_{key}'] = self.codes[key]
+        for key in self.FLAG_KEYS:
+            arrays[f'flags_{key}'] = self.flags[key]
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], vocabs: Dict[str, List[str]]) -> "MetadataColumns":
+        """to_arrays() 결과와 어휘 사전으로 컬럼 복원 (배열은 복사하지 않음)"""
+        columns = cls()
+        columns.prices = arrays['prices']
+        columns.has_metadata = arrays['has_metadata']
+        for key in cls.CODED_KEYS:
+            columns.codes[key] = arrays[f'codes_{key}']
+            columns.vocabs[key] = list(vocabs.get(key, []))
+            columns._vocab_lookup[key] = {value: i for i, value in enumerate(columns.vocabs[key])}
+        for key in cls.FLAG_KEYS:
+            columns.flags[key] = arrays[f'flags_{key}']
+        return columns
+
+    def save(self, path: str):
+        """컬럼을 .npz 사이드카 파일로 저장"""
+        arrays = self.to_arrays()
+        for key in self.CODED_KEYS:
+            arrays[f'vocab_{key}'] = np.array(self.vocabs[key], dtype=str)
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "MetadataColumns":
+        """.npz 사이드카 파일에서 컬럼 로드"""
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files if not name.startswith('vocab_')}
+            vocabs = {key: data[f'vocab_{key}'].tolist() for key in cls.CODED_KEYS}
+        return cls.from_arrays(arrays, vocabs)
+
+
+def build_search_params(mask: np.ndarray, search_config: Optional[Dict[str, Any]] = None):
+    """불리언 마스크를 FAISS IDSelectorBitmap 검색 파라미터로 변환
+
+    비트맵 버퍼가 GC되지 않도록 파라미터 객체에 함께 보관합니다.
+    선택된 행 번호(_rows)도 함께 보관합니다 (Flat 인덱스 부분 검색용).
+    search_config(index_info['search_params'])가 있으면 인덱스 타입에 맞는
+    파라미터(nprobe, efSearch)를 함께 설정합니다.
+    """
+    import faiss
+    from .index_factory import make_search_parameters
+
+    bitmap = np.packbits(mask.astype(bool), bitorder='little')
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+    params = make_search_parameters(search_config, sel=selector)
+    params._bitmap = bitmap
+    params._selector = selector
+    params._rows = np.flatnonzero(mask)
+    return params
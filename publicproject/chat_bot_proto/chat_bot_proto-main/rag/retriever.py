@@ -3,19 +3,63 @@ RAG 시스템의 핵심 Retriever
 
 QueryStructurizer, VectorStore, Documents를 통합하여
 사용자 질문에 대한 관련 문서를 검색하는 메인 컴포넌트
+
+검색 모드 (retrieval_mode):
+- dense: Vector Store 유사도 검색만 사용 (기존 동작)
+- sparse: 문자 n-gram BM25 인덱스만 사용
+- hybrid: 두 검색을 동시에 실행하고 가중 Reciprocal Rank Fusion으로 결합
+  (정확한 메뉴/가게 이름은 BM25가, 표현이 다른 질문은 Dense가 끌어올림)
 """
 
 import json
+import time
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 from .documents import Document, ShopDocument, MenuDocument
-from .vector_stores import VectorStore, create_vector_store
+from .document_table import ContentTable
+from .vector_stores import VectorStore, PrebuiltFAISSVectorStore, create_vector_store
 from .query_parser import QueryStructurizer, StructuredQuery
+from .index_generations import resolve_index_path
+from .sparse_index import BM25Index
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PREBUILT_INDEX_PATH = "outputs/prebuilt_faiss.faiss"
+
+RETRIEVAL_MODES = ("dense", "sparse", "hybrid")
+DEFAULT_HYBRID_WEIGHTS = {"dense": 1.0, "sparse": 1.0}
+RRF_K = 60  # Reciprocal Rank Fusion 순위 완화 상수
+HYBRID_CANDIDATE_MULTIPLIER = 4  # hybrid에서 검색별로 top_k의 몇 배를 가져와 결합할지
+CONTEXT_CACHE_SIZE = 1024  # 문서 ID 조합별 LLM 컨텍스트 캐시 크기
+
+NO_CONTEXT_MESSAGE = "관련된 가게나 메뉴 정보를 찾을 수 없습니다."
+CONTEXT_HEADER = "다음은 관련된 가게 및 메뉴 정보입니다:"
+
+
+def reciprocal_rank_fusion(ranked_lists: Dict[str, List[str]],
+                           weights: Dict[str, float],
+                           top_k: int,
+                           rrf_k: int = RRF_K) -> List[str]:
+    """검색별 순위 목록을 가중 RRF 점수(Σ weight / (rrf_k + 순위))로 결합
+    
+    동점은 ranked_lists 순서상 앞선 검색에서 먼저 나온 문서가 우선합니다.
+    """
+    scores: Dict[str, float] = {}
+    for name, doc_ids in ranked_lists.items():
+        weight = weights.get(name, 0.0)
+        if weight <= 0:
+            continue
+        for rank, doc_id in enumerate(doc_ids, 1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (rrf_k + rank)
+    
+    # dict 삽입 순서가 동점 순서 (sorted는 안정 정렬)
+    return sorted(scores, key=scores.get, reverse=True)[:top_k]
+
 
 class NaviyamRetriever:
     """나비얌 RAG 시스템의 메인 Retriever 클래스"""
@@ -23,17 +67,81 @@ class NaviyamRetriever:
     def __init__(self, 
                  vector_store: VectorStore,
                  query_structurizer: QueryStructurizer,
-                 top_k: int = 5):
+                 top_k: int = 5,
+                 retrieval_mode: str = "dense",
+                 sparse_index: Optional[BM25Index] = None,
+                 hybrid_weights: Optional[Dict[str, float]] = None,
+                 candidate_k: Optional[int] = None):
         """
         Args:
             vector_store: Vector DB 구현체
             query_structurizer: 쿼리 구조화기
             top_k: 검색할 문서 수
+            retrieval_mode: "dense", "sparse", "hybrid"
+            sparse_index: BM25 인덱스 (None이면 sparse/hybrid 모드에서 새로 생성)
+            hybrid_weights: hybrid RRF 가중치 {"dense": w, "sparse": w}
+            candidate_k: hybrid에서 검색별로 가져올 후보 수 (None이면 top_k × HYBRID_CANDIDATE_MULTIPLIER)
         """
-        self.vector_store = vector_store
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"지원하지 않는 검색 모드: {retrieval_mode} (가능: {RETRIEVAL_MODES})")
+        
         self.query_structurizer = query_structurizer
         self.top_k = top_k
-        logger.info(f"NaviyamRetriever initialized (top_k={top_k})")
+        self.retrieval_mode = retrieval_mode
+        self.hybrid_weights = {**DEFAULT_HYBRID_WEIGHTS, **(hybrid_weights or {})}
+        self.candidate_k = candidate_k or top_k * HYBRID_CANDIDATE_MULTIPLIER
+        
+        if sparse_index is None and retrieval_mode != "dense":
+            sparse_index = BM25Index()
+        # 활성 (Vector Store, BM25 인덱스, 컨텍스트 세대) 묶음 - 교체는 한 번의 대입으로만 (_publish)
+        # 요청은 시작할 때 한 번 읽은 묶음을 끝까지 사용하므로 세대 교체 중에도 두 인덱스가 섞이지 않음 (RCU)
+        self._active: Tuple[VectorStore, Optional[BM25Index], int] = (vector_store, sparse_index, 0)
+        # hybrid에서 BM25 검색을 Dense 검색과 동시에 실행할 스레드 풀 (첫 hybrid 검색 시 생성)
+        self._sparse_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        
+        # 색인 시 렌더링한 문서 내용 + 문서 ID 조합별 LLM 컨텍스트 캐시
+        # (지식 베이스 추가/세대 교체 시 _active의 컨텍스트 세대가 바뀌어 이전 항목은 다시 쓰이지 않음)
+        self.content_table = ContentTable()
+        self._context_cache: "OrderedDict[Tuple[int, Tuple[str, ...]], str]" = OrderedDict()
+        self._context_lock = threading.Lock()
+        self.context_stats = {"hits": 0, "misses": 0}
+        
+        # 인덱스 세대 핫 스왑 (PrebuiltFAISS 전용)
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watcher_stop = threading.Event()
+        self.index_path: Optional[str] = None
+        self.index_stats: Dict[str, Any] = {
+            "active_generation": getattr(vector_store, 'generation', None),
+            "active_index_path": getattr(vector_store, 'index_path', None),
+            "load_time": None,
+            "loaded_at": None,
+            "swap_count": 0,
+            "last_error": None
+        }
+        logger.info(f"NaviyamRetriever initialized (top_k={top_k}, mode={retrieval_mode})")
+    
+    @property
+    def vector_store(self) -> VectorStore:
+        """활성 Vector Store"""
+        return self._active[0]
+    
+    @property
+    def sparse_index(self) -> Optional[BM25Index]:
+        """활성 BM25 인덱스"""
+        return self._active[1]
+    
+    @sparse_index.setter
+    def sparse_index(self, sparse_index: Optional[BM25Index]):
+        with self._reload_lock:
+            self._publish(self._active[0], sparse_index)
+    
+    def _publish(self, vector_store: VectorStore, sparse_index: Optional[BM25Index]):
+        """Vector Store / BM25 인덱스 묶음을 새 컨텍스트 세대로 게시하고 컨텍스트 캐시 비우기"""
+        with self._context_lock:
+            self._active = (vector_store, sparse_index, self._active[2] + 1)
+            self._context_cache.clear()
     
     def add_knowledge_base(self, knowledge_data: Dict[str, Any]):
         """지식 베이스 데이터를 Vector Store에 추가
@@ -60,7 +168,12 @@ class NaviyamRetriever:
             documents.append(doc)
         
         # Vector Store에 추가
-        self.vector_store.add_documents(documents)
+        vector_store, sparse_index, _ = self._active
+        vector_store.add_documents(documents)
+        if sparse_index is not None:
+            sparse_index.add_documents(documents)
+        self.content_table.add_documents(documents)
+        self._publish(vector_store, sparse_index)
         logger.info(f"지식 베이스 추가 완료: {len(documents)}개 문서")
     
     def search(self, user_query: str) -> List[Document]:
@@ -72,32 +185,179 @@ class NaviyamRetriever:
         Returns:
             관련도 높은 Document 리스트
         """
+        vector_store, sparse_index, _ = self._active
+        doc_ids = self._search_doc_ids(user_query, vector_store, sparse_index)
+        
+        # Document 객체들 반환
+        documents = vector_store.get_documents_by_ids(doc_ids)
+        logger.info(f"검색 완료: {len(documents)}개 문서 반환")
+        
+        return documents
+    
+    def _search_doc_ids(self, user_query: str, vector_store: VectorStore,
+                        sparse_index: Optional[BM25Index]) -> List[str]:
+        """순위별 document ID (호출부가 _active에서 한 번 읽은 Vector Store / BM25 인덱스로 검색)"""
         # 1. 자연어 질문을 구조화된 쿼리로 변환
         structured_query = self.query_structurizer.parse_query(user_query)
         logger.info(f"구조화된 쿼리: {structured_query.semantic_query}")
         logger.info(f"필터: {structured_query.filters.model_dump(exclude_none=True)}")
+        filters = structured_query.filters.model_dump(exclude_none=True)
+        
+        # 2. 검색 모드별 검색
+        # BM25는 정확한 이름이 그대로 남아 있는 원래 질문으로 검색
+        if self.retrieval_mode == "dense":
+            doc_ids = self._dense_search(vector_store, structured_query.semantic_query, self.top_k, filters)
+        elif self.retrieval_mode == "sparse":
+            doc_ids = sparse_index.search(user_query, self.top_k, filters)
+        else:
+            sparse_future = self._get_sparse_executor().submit(
+                sparse_index.search, user_query, self.candidate_k, filters)
+            dense_ids = self._dense_search(vector_store, structured_query.semantic_query, self.candidate_k, filters)
+            doc_ids = reciprocal_rank_fusion(
+                {"dense": dense_ids, "sparse": sparse_future.result()}, self.hybrid_weights, self.top_k)
         
-        # 2. Vector Store에서 검색
+        return doc_ids
+    
+    def _dense_search(self, vector_store: VectorStore, semantic_query: str, top_k: int,
+                      filters: Dict[str, Any]) -> List[str]:
+        """Vector Store 유사도 검색"""
         # 실제 임베딩 생성 (FAISS용) 또는 더미 벡터 (Mock용)
-        if hasattr(self.vector_store, 'encode_query'):
+        if hasattr(vector_store, 'encode_query'):
             # FAISS 등 실제 Vector DB인 경우
-            query_embedding = self.vector_store.encode_query(structured_query.semantic_query)
+            query_embedding = vector_store.encode_query(semantic_query)
         else:
             # Mock Vector Store인 경우
             query_embedding = [0.1] * 384  # 임시 embedding
         
-        filters = structured_query.filters.model_dump(exclude_none=True)
-        doc_ids = self.vector_store.search(
+        return vector_store.search(
             query_embedding=query_embedding,
-            top_k=self.top_k,
+            top_k=top_k,
             filters=filters
         )
+    
+    def _get_sparse_executor(self) -> ThreadPoolExecutor:
+        if self._sparse_executor is None:
+            with self._executor_lock:
+                if self._sparse_executor is None:
+                    self._sparse_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sparse-retrieval")
+        return self._sparse_executor
+    
+    def build_sparse_index_from_store(self, vector_store: Optional[VectorStore] = None) -> Optional[BM25Index]:
+        """PrebuiltFAISS 문서 테이블로 BM25 인덱스 생성 (sparse/hybrid 모드 전용)
         
-        # 3. Document 객체들 반환
-        documents = self.vector_store.get_documents_by_ids(doc_ids)
-        logger.info(f"검색 완료: {len(documents)}개 문서 반환")
+        add_knowledge_base를 거치지 않는 사전 빌드 인덱스도 같은 문서로 BM25 검색할 수 있게 합니다.
+        """
+        vector_store = vector_store or self.vector_store
+        document_table = getattr(vector_store, 'document_table', None)
+        if self.retrieval_mode == "dense" or document_table is None:
+            return None
         
-        return documents
+        start_time = time.time()
+        sparse_index = BM25Index.from_document_table(document_table)
+        logger.info(f"BM25 인덱스 생성: {len(sparse_index)}개 문서 ({time.time() - start_time:.2f}초)")
+        return sparse_index
+    
+    def reload_index(self, index_path: Optional[str] = None) -> bool:
+        """현재 세대의 인덱스를 새 Vector Store로 로드·워밍한 뒤 원자적으로 교체
+        
+        검색 중인 요청은 교체 전 Vector Store 참조를 계속 사용하며,
+        마지막 참조가 사라지면 이전 세대가 해제됩니다.
+        
+        Args:
+            index_path: 기준 인덱스 경로 (None이면 enable_hot_reload에 지정한 경로)
+            
+        Returns:
+            새 세대로 교체했으면 True, 이미 최신이면 False
+        """
+        index_path = index_path or self.index_path or DEFAULT_PREBUILT_INDEX_PATH
+        
+        with self._reload_lock:
+            old_store = self.vector_store
+            resolved_path = resolve_index_path(index_path)
+            if resolved_path == getattr(old_store, 'index_path', None):
+                return False
+            
+            logger.info(f"새 인덱스 세대 로드: {resolved_path}")
+            start_time = time.time()
+            try:
+                new_store = PrebuiltFAISSVectorStore(resolved_path)
+                
+                # 같은 임베딩 모델이면 모델(배처 포함)과 쿼리 캐시 공유
+                if getattr(old_store, 'embedding_model_name', None) == new_store.embedding_model_name:
+                    new_store.embedding_model = getattr(old_store, 'embedding_model', None)
+                    new_store.query_cache = getattr(old_store, 'query_cache', None)
+                
+                self._warm_up(new_store)
+                new_sparse_index = self.build_sparse_index_from_store(new_store)
+            except Exception as e:
+                self.index_stats["last_error"] = str(e)
+                logger.error(f"인덱스 세대 로드 실패 (기존 세대 유지): {e}")
+                return False
+            
+            load_time = time.time() - start_time
+            if new_sparse_index is None:
+                new_sparse_index = self._active[1]
+            self._publish(new_store, new_sparse_index)
+            self.index_stats.update({
+                "active_generation": new_store.generation,
+                "active_index_path": resolved_path,
+                "load_time": load_time,
+                "loaded_at": time.time(),
+                "swap_count": self.index_stats["swap_count"] + 1,
+                "last_error": None
+            })
+            logger.info(f"인덱스 세대 교체 완료: {new_store.generation} ({load_time:.2f}초)")
+            return True
+    
+    def _warm_up(self, vector_store: PrebuiltFAISSVectorStore):
+        """교체 전 첫 검색 비용(페이지 폴트, 검색 파라미터 생성)을 미리 지불"""
+        import numpy as np
+        
+        if vector_store.index.ntotal == 0:
+            return
+        probe = np.zeros((1, vector_store.index.d), dtype='float32')
+        for row in vector_store.search_batch(probe, top_k=self.top_k):
+            vector_store.get_documents_by_ids(row)
+    
+    def enable_hot_reload(self, index_path: str = DEFAULT_PREBUILT_INDEX_PATH,
+                          poll_interval: float = 30.0):
+        """포인터 파일을 주기적으로 확인하여 새 세대가 게시되면 백그라운드에서 교체"""
+        self.index_path = index_path
+        if self._watcher is not None or poll_interval <= 0:
+            return
+        
+        def watch():
+            while not self._watcher_stop.wait(poll_interval):
+                try:
+                    self.reload_index()
+                except Exception as e:
+                    logger.error(f"인덱스 세대 확인 실패: {e}")
+        
+        self._watcher = threading.Thread(target=watch, name="index-generation-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"인덱스 세대 감시 시작: {index_path} ({poll_interval}초 간격)")
+    
+    def request_reload(self) -> threading.Thread:
+        """백그라운드 스레드에서 reload_index 실행 (요청 처리 스레드를 막지 않음)"""
+        thread = threading.Thread(target=self.reload_index, name="index-generation-loader", daemon=True)
+        thread.start()
+        return thread
+    
+    def stop_hot_reload(self):
+        """인덱스 세대 감시 중지"""
+        self._watcher_stop.set()
+        self._watcher = None
+    
+    def get_index_stats(self) -> Dict[str, Any]:
+        """활성 인덱스 세대 정보"""
+        vector_store, sparse_index, _ = self._active
+        stats = dict(self.index_stats)
+        stats["documents"] = getattr(getattr(vector_store, 'index', None), 'ntotal', None)
+        stats["retrieval_mode"] = self.retrieval_mode
+        if sparse_index is not None:
+            stats["sparse_index"] = sparse_index.get_stats()
+        stats["context_cache"] = dict(self.context_stats, size=len(self._context_cache))
+        return stats
     
     def get_context_for_llm(self, user_query: str) -> str:
         """LLM에게 전달할 컨텍스트 생성
@@ -108,17 +368,36 @@ class NaviyamRetriever:
         Returns:
             LLM용 컨텍스트 문자열
         """
-        documents = self.search(user_query)
-        
-        if not documents:
-            return "관련된 가게나 메뉴 정보를 찾을 수 없습니다."
+        vector_store, sparse_index, epoch = self._active
+        doc_ids = self._search_doc_ids(user_query, vector_store, sparse_index)
         
-        context_parts = ["다음은 관련된 가게 및 메뉴 정보입니다:"]
+        # 같은 문서 ID 조합이면 Document 생성/내용 조립 없이 이전 컨텍스트 재사용
+        cache_key = (epoch, tuple(doc_ids))
+        with self._context_lock:
+            context = self._context_cache.get(cache_key)
+            if context is not None:
+                self._context_cache.move_to_end(cache_key)
+                self.context_stats["hits"] += 1
+                return context
+            self.context_stats["misses"] += 1
         
-        for i, doc in enumerate(documents, 1):
-            context_parts.append(f"\n{i}. {doc.get_content()}")
+        documents = vector_store.get_documents_by_ids(doc_ids)
+        if not documents:
+            context = NO_CONTEXT_MESSAGE
+        else:
+            context_parts = [CONTEXT_HEADER]
+            for i, doc in enumerate(documents, 1):
+                content = self.content_table.get(doc.id)
+                if content is None:
+                    content = doc.get_content()
+                context_parts.append(f"\n{i}. {content}")
+            context = "\n".join(context_parts)
         
-        return "\n".join(context_parts)
+        with self._context_lock:
+            self._context_cache[cache_key] = context
+            while len(self._context_cache) > CONTEXT_CACHE_SIZE:
+                self._context_cache.popitem(last=False)
+        return context
 
 
 def load_knowledge_from_file(file_path: str) -> Dict[str, Any]:
@@ -140,13 +419,21 @@ def load_knowledge_from_file(file_path: str) -> Dict[str, Any]:
 
 def create_naviyam_retriever(knowledge_file_path: str,
                            vector_store_type: str = "mock",
-                           llm_client=None) -> NaviyamRetriever:
+                           llm_client=None,
+                           query_cache=None,
+                           index_reload_interval: float = 0.0,
+                           retrieval_mode: str = "dense",
+                           hybrid_weights: Optional[Dict[str, float]] = None) -> NaviyamRetriever:
     """NaviyamRetriever 팩토리 함수
     
     Args:
         knowledge_file_path: 지식 베이스 파일 경로
         vector_store_type: Vector Store 타입 ("mock", "faiss", etc.)
         llm_client: LLM 클라이언트 (선택사항)
+        query_cache: 쿼리 임베딩 캐시 (선택사항, FAISS 계열에서만 사용)
+        index_reload_interval: PrebuiltFAISS 세대 포인터 확인 주기 (초, 0이면 감시 안 함)
+        retrieval_mode: 검색 모드 ("dense", "sparse", "hybrid")
+        hybrid_weights: hybrid RRF 가중치 {"dense": w, "sparse": w}
         
     Returns:
         설정된 NaviyamRetriever 인스턴스
@@ -155,8 +442,9 @@ def create_naviyam_retriever(knowledge_file_path: str,
     if vector_store_type == "prebuilt_faiss":
         vector_store = create_vector_store(
             store_type=vector_store_type,
-            index_path="outputs/prebuilt_faiss.faiss",
-            metadata_path="outputs/prebuilt_faiss_metadata.json"
+            index_path=DEFAULT_PREBUILT_INDEX_PATH,
+            metadata_path="outputs/prebuilt_faiss_metadata.json",
+            query_cache=query_cache
         )
     else:
         vector_store = create_vector_store(
@@ -168,7 +456,8 @@ def create_naviyam_retriever(knowledge_file_path: str,
     query_structurizer = QueryStructurizer(llm_client)
     
     # Retriever 생성
-    retriever = NaviyamRetriever(vector_store, query_structurizer)
+    retriever = NaviyamRetriever(vector_store, query_structurizer,
+                                 retrieval_mode=retrieval_mode, hybrid_weights=hybrid_weights)
     
     # 지식 베이스 로드 및 추가 (PrebuiltFAISS는 이미 로드됨)
     if vector_store_type != "prebuilt_faiss":
@@ -177,6 +466,10 @@ def create_naviyam_retriever(knowledge_file_path: str,
             retriever.add_knowledge_base(knowledge_data)
     else:
         logger.info("PrebuiltFAISS 사용: 지식 베이스 이미 로드됨")
+        sparse_index = retriever.build_sparse_index_from_store()
+        if sparse_index is not None:
+            retriever.sparse_index = sparse_index
+        retriever.enable_hot_reload(DEFAULT_PREBUILT_INDEX_PATH, poll_interval=index_reload_interval)
     
     return retriever
 
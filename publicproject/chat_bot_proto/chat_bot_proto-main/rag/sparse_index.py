@@ -0,0 +1,199 @@
+"""
+문자 n-gram BM25 희소 인덱스
+
+Dense(FAISS) 유사도만으로는 "치즈카츠"처럼 정확한 메뉴/가게 이름이
+의미만 비슷한 문서보다 뒤로 밀리는 경우가 많아, 같은 문서를 어휘 기반으로도 검색합니다.
+
+- 토큰화: NFKC 정규화(전각 문자 포함) + 소문자 → 공백/구두점을 뺀 문자 2-gram, 3-gram
+  (형태소 분석기 없이 조사·띄어쓰기 차이에 강함: "치즈카츠를" ↔ "치즈 카츠")
+- 점수: BM25 (k1, b). 문서 길이 정규화까지 포함한 포스팅별 가중치를 미리 계산해 두고
+  검색 시에는 쿼리 n-gram별 포스팅 가중치를 더하기만 함
+- 필터: MetadataColumns 마스크 (FAISSVectorStore와 같은 필터 의미)
+"""
+
+import re
+import math
+import logging
+import threading
+import unicodedata
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .metadata_columns import MetadataColumns
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r'[^\W_]+')
+
+DEFAULT_NGRAM_SIZES = (2, 3)
+
+
+def char_ngrams(text: str, ngram_sizes: Tuple[int, ...] = DEFAULT_NGRAM_SIZES) -> List[str]:
+    """공백/구두점을 뺀 연속 문자열의 문자 n-gram
+
+    띄어쓰기·구두점 차이("쏙,닭" ↔ "쏙닭", "치즈 돈까스" ↔ "치즈돈까스")에도 같은 n-gram이 나오도록
+    단어 경계를 넘는 n-gram도 만듭니다. 가장 작은 n보다 짧은 문자열은 그대로 1개 토큰.
+    """
+    text = ''.join(_WORD_PATTERN.findall(unicodedata.normalize('NFKC', text or '').lower()))
+    if len(text) < min(ngram_sizes):
+        return [text] if text else []
+    terms = []
+    for size in ngram_sizes:
+        terms.extend(text[i:i + size] for i in range(len(text) - size + 1))
+    return terms
+
+
+class _CompiledIndex:
+    """검색용 스냅샷 (n-gram → (문서 행, BM25 가중치) 배열)"""
+
+    def __init__(self, doc_ids: List[str], postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 columns: MetadataColumns, avg_doc_length: float):
+        self.doc_ids = doc_ids
+        self.postings = postings
+        self.columns = columns
+        self.avg_doc_length = avg_doc_length
+
+
+class BM25Index:
+    """Document 내용(get_content) 문자 n-gram BM25 인덱스 (스레드 안전)"""
+
+    def __init__(self, ngram_sizes: Tuple[int, ...] = DEFAULT_NGRAM_SIZES, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            ngram_sizes: 사용할 문자 n-gram 길이
+            k1: 단어 빈도 포화 계수
+            b: 문서 길이 정규화 강도 (0이면 정규화 안 함)
+        """
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.k1 = k1
+        self.b = b
+
+        self._doc_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._term_counts: List[Counter] = []
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        self._compiled: Optional[_CompiledIndex] = None
+
+        self.searches = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    @classmethod
+    def from_document_table(cls, document_table, **kwargs) -> "BM25Index":
+        """PrebuiltFAISS 문서 테이블(MappedDocumentTable/JSONDocumentTable)로 인덱스 생성"""
+        index = cls(**kwargs)
+        entries = []
+        for row in np.flatnonzero(document_table.has_doc):
+            content = document_table.get_content(int(row))
+            if content:
+                entries.append((document_table.doc_id(int(row)), content, document_table.get_metadata(int(row))))
+        index.add_entries(entries)
+        return index
+
+    def add_documents(self, documents: List[Any]):
+        """Document 객체 추가 (같은 ID는 새 내용으로 교체)"""
+        self.add_entries([(doc.id, doc.get_content(), doc.get_metadata()) for doc in documents])
+
+    def add_entries(self, entries: List[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        """(doc_id, content, metadata) 목록 추가 (같은 ID는 새 내용으로 교체)"""
+        with self._lock:
+            for doc_id, content, metadata in entries:
+                term_counts = Counter(char_ngrams(content, self.ngram_sizes))
+                row = self._rows.get(doc_id)
+                if row is None:
+                    self._rows[doc_id] = len(self._doc_ids)
+                    self._doc_ids.append(doc_id)
+                    self._term_counts.append(term_counts)
+                    self._metadata.append(metadata)
+                else:
+                    self._term_counts[row] = term_counts
+                    self._metadata[row] = metadata
+            # 다음 검색에서 다시 컴파일
+            self._compiled = None
+
+        logger.info(f"BM25 인덱스 문서 추가: {len(entries)}개 (총 {len(self._doc_ids)}개)")
+
+    def clear(self):
+        """모든 문서 삭제"""
+        with self._lock:
+            self._doc_ids = []
+            self._rows = {}
+            self._term_counts = []
+            self._metadata = []
+            self._compiled = None
+
+    def _compile(self) -> _CompiledIndex:
+        """포스팅별 BM25 가중치(idf × 정규화된 tf) 계산"""
+        with self._lock:
+            if self._compiled is not None:
+                return self._compiled
+
+            num_docs = len(self._doc_ids)
+            doc_lengths = np.array([sum(counts.values()) for counts in self._term_counts], dtype=np.float64)
+            avg_doc_length = float(doc_lengths.mean()) if num_docs and doc_lengths.mean() > 0 else 1.0
+            length_norm = self.k1 * (1.0 - self.b + self.b * doc_lengths / avg_doc_length)
+
+            term_rows: Dict[str, List[int]] = {}
+            term_freqs: Dict[str, List[int]] = {}
+            for row, counts in enumerate(self._term_counts):
+                for term, count in counts.items():
+                    term_rows.setdefault(term, []).append(row)
+                    term_freqs.setdefault(term, []).append(count)
+
+            postings = {}
+            for term, rows in term_rows.items():
+                rows = np.array(rows, dtype=np.int64)
+                tf = np.array(term_freqs[term], dtype=np.float64)
+                idf = math.log(1.0 + (num_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+                postings[term] = (rows, idf * tf * (self.k1 + 1.0) / (tf + length_norm[rows]))
+
+            self._compiled = _CompiledIndex(list(self._doc_ids), postings,
+                                            MetadataColumns.from_metadata(self._metadata), avg_doc_length)
+            logger.info(f"BM25 인덱스 컴파일 완료: 문서 {num_docs}개, n-gram {len(postings)}개")
+            return self._compiled
+
+    def search_with_scores(self, query: str, top_k: int = 10,
+                           filters: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """BM25 점수 상위 (doc_id, 점수) 목록 (점수 0인 문서 제외)"""
+        compiled = self._compiled or self._compile()
+        self.searches += 1
+        if not compiled.doc_ids or top_k <= 0:
+            return []
+
+        scores = np.zeros(len(compiled.doc_ids), dtype=np.float64)
+        for term in set(char_ngrams(query, self.ngram_sizes)):
+            posting = compiled.postings.get(term)
+            if posting is not None:
+                # 한 n-gram의 포스팅 안에서 문서 행은 중복되지 않음
+                scores[posting[0]] += posting[1]
+
+        if filters:
+            scores[~compiled.columns.filter_mask(filters)] = 0.0
+
+        rows = np.flatnonzero(scores > 0)
+        if len(rows) > top_k:
+            # k번째 점수 이상만 남긴 뒤 정렬 (경계 동점도 추가 순서로 결정)
+            kth_score = -np.partition(-scores[rows], top_k - 1)[top_k - 1]
+            rows = rows[scores[rows] >= kth_score]
+        # 점수 내림차순, 동점은 추가 순서
+        rows = rows[np.lexsort((rows, -scores[rows]))][:top_k]
+        return [(compiled.doc_ids[row], float(scores[row])) for row in rows]
+
+    def search(self, query: str, top_k: int = 10, filters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """BM25 점수 상위 document ID 목록"""
+        return [doc_id for doc_id, _ in self.search_with_scores(query, top_k, filters)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """인덱스 통계"""
+        compiled = self._compiled
+        return {
+            "documents": len(self._doc_ids),
+            "ngrams": len(compiled.postings) if compiled else None,
+            "avg_doc_length": compiled.avg_doc_length if compiled else None,
+            "ngram_sizes": self.ngram_sizes,
+            "searches": self.searches
+        }
@@ -12,7 +12,11 @@ import logging
 import numpy as np
 from pathlib import Path
 
-from .documents import Document
+from .documents import Document, StoredDocument
+from .metadata_columns import MetadataColumns, build_search_params
+from .document_table import MappedDocumentTable, JSONDocumentTable
+from .index_factory import configure_index, enable_blas_batch_search, flat_vectors, BLAS_MIN_QUERIES
+from .index_generations import resolve_index_path
 
 logger = logging.getLogger(__name__)
 
@@ -140,14 +144,20 @@ class PrebuiltFAISSVectorStore(VectorStore):
     
     초기화 시간을 대폭 단축하기 위해 미리 생성된 FAISS 인덱스와 
     메타데이터를 로드합니다. 임베딩 모델은 쿼리 처리 시에만 사용됩니다.
+    
+    문서 테이블(_docs.bin)이 있으면 mmap으로 열어 반환되는 문서만 디코딩하고,
+    없으면 기존 _metadata.json 전체를 로드합니다.
     """
     
-    def __init__(self, index_path: str, metadata_path: str = None, embedding_model=None):
+    def __init__(self, index_path: str, metadata_path: str = None, embedding_model=None,
+                 query_cache=None):
         """
         Args:
             index_path: 사전 빌드된 FAISS 인덱스 파일 경로 (.faiss)
-            metadata_path: 메타데이터 파일 경로 (.json). None이면 자동 추론
+            metadata_path: 메타데이터 파일 경로 (.json). None이면 자동 추론. 
+                           문서 테이블이 있으면 사용하지 않음
             embedding_model: 쿼리 임베딩용 모델. None이면 필요시 로드
+            query_cache: 쿼리 임베딩 캐시 (QueryEmbeddingCache). None이면 캐시 미사용
         """
         try:
             import faiss
@@ -158,11 +168,15 @@ class PrebuiltFAISSVectorStore(VectorStore):
         
         self.index_path = index_path
         self.metadata_path = metadata_path or index_path.replace('.faiss', '_metadata.json')
+        self.columns_path = index_path.replace('.faiss', '_columns.npz')
+        self.table_path = index_path.replace('.faiss', '_docs.bin')
         self.embedding_model = embedding_model
+        self.query_cache = query_cache
         
         # 데이터 저장소 초기화
         self.index = None
         self.metadata_info = {}
+        self.document_table = None
         self.embedding_dim = 384  # 기본값
         self.embedding_model_name = "all-MiniLM-L6-v2"  # 기본값
         
@@ -182,32 +196,71 @@ class PrebuiltFAISSVectorStore(VectorStore):
         logger.info(f"FAISS 인덱스 로드: {self.index_path}")
         self.index = faiss.read_index(str(self.index_path))
         
-        # 2. 메타데이터 로드
-        if not Path(self.metadata_path).exists():
-            raise FileNotFoundError(f"메타데이터 파일을 찾을 수 없습니다: {self.metadata_path}")
+        # 2. 문서 테이블 로드 (mmap 우선, 없으면 JSON 메타데이터)
+        ntotal = self.index.ntotal
+        if Path(self.table_path).exists():
+            logger.info(f"문서 테이블 로드 (mmap): {self.table_path}")
+            self.document_table = MappedDocumentTable(self.table_path)
+            self.metadata_info = {'index_info': self.document_table.info}
+        else:
+            if not Path(self.metadata_path).exists():
+                raise FileNotFoundError(f"메타데이터 파일을 찾을 수 없습니다: {self.metadata_path}")
+            
+            logger.info(f"메타데이터 로드: {self.metadata_path}")
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                self.metadata_info = json.load(f)
+            self.document_table = JSONDocumentTable(self.metadata_info, ntotal, self.columns_path)
         
-        logger.info(f"메타데이터 로드: {self.metadata_path}")
-        with open(self.metadata_path, 'r', encoding='utf-8') as f:
-            self.metadata_info = json.load(f)
+        if len(self.document_table) != ntotal:
+            raise ValueError(f"문서 테이블 크기 불일치: {len(self.document_table)} != {ntotal}")
         
         # 3. 설정 정보 업데이트
         index_info = self.metadata_info.get('index_info', {})
         self.embedding_dim = index_info.get('embedding_dimension', 384)
         self.embedding_model_name = index_info.get('embedding_model', 'all-MiniLM-L6-v2')
-        
-        logger.info(f"로드 완료: {self.index.ntotal}개 문서, {self.embedding_dim}차원")
+        self.generation = index_info.get('generation')
+        if self.query_cache is not None:
+            self.query_cache.bind_model(self.embedding_model_name, self.embedding_dim)
+        
+        # 4. 근사 인덱스 검색 설정 (nprobe/efSearch는 인덱스 파일에 저장되지 않음)
+        self.search_config = dict(index_info.get('search_params', {}))
+        configure_index(self.index, self.search_config)
+        enable_blas_batch_search(self.index.d)
+        
+        # 5. 배치 검색용 컬럼 (FAISS 인덱스 순서)
+        self.columns = self.document_table.columns
+        self._has_doc = self.document_table.has_doc
+        self._search_params_cache: Dict[tuple, Any] = {}
+        # Flat 인덱스는 필터 배치 검색을 선택된 벡터에 대한 행렬곱 한 번으로 처리
+        self._flat_vectors = flat_vectors(self.index)
+        
+        logger.info(f"로드 완료: {ntotal}개 문서, {self.embedding_dim}차원, "
+                    f"{index_info.get('index_type', 'IndexFlatL2')}")
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """근사 인덱스의 검색 폭 조정 (recall ↔ 지연 트레이드오프)"""
+        if nprobe is not None:
+            self.search_config['nprobe'] = nprobe
+        if ef_search is not None:
+            self.search_config['ef_search'] = ef_search
+        configure_index(self.index, self.search_config)
+        self._search_params_cache.clear()
+    
+    def load_embedding_model(self):
+        """인덱스 빌드 시 사용한 임베딩 모델 로드"""
+        logger.info(f"임베딩 모델 로드: {self.embedding_model_name}")
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.embedding_model_name)
     
     def _ensure_embedding_model(self):
         """필요시 임베딩 모델 로드 (Lazy Loading)"""
         if self.embedding_model is None:
-            logger.info(f"임베딩 모델 로드: {self.embedding_model_name}")
-            from sentence_transformers import SentenceTransformer
-            self.embedding_model = SentenceTransformer(self.embedding_model_name)
+            self.embedding_model = self.load_embedding_model()
         return self.embedding_model
     
     def add_documents(self, documents: List[Document]):
         """사전 빌드된 인덱스는 추가 불가"""
-        raise NotImplementedError("PrebuiltFAISSVectorStore는 문서 추가를 지원하지 않습니다. build_faiss_index.py를 사용하여 인덱스를 재빌드하세요.")
+        raise NotImplementedError("PrebuiltFAISSVectorStore는 문서 추가를 지원하지 않습니다. build_faiss_index.py --incremental로 변경된 문서만 반영하세요.")
     
     def search(self, query_embedding: List[float], top_k: int = 10, 
                filters: Optional[Dict[str, Any]] = None) -> List[str]:
@@ -216,101 +269,124 @@ class PrebuiltFAISSVectorStore(VectorStore):
             logger.warning("인덱스가 비어있습니다")
             return []
         
+        results = self.search_batch([query_embedding], top_k=top_k, filters=filters)
+        return results[0] if results else []
+    
+    def search_batch(self, query_embeddings, top_k: int = 10,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[str]]:
+        """여러 쿼리를 한 번의 FAISS 호출로 검색
+        
+        Args:
+            query_embeddings: (N, dim) 배열 또는 임베딩 리스트의 리스트
+            top_k: 쿼리별 반환할 문서 수
+            filters: 모든 쿼리에 공통 적용할 메타데이터 필터
+            
+        Returns:
+            쿼리 순서대로 정렬된 document ID 리스트의 리스트
+        """
+        if self.index.ntotal == 0:
+            logger.warning("인덱스가 비어있습니다")
+            return [[] for _ in range(len(query_embeddings))]
+        
         try:
             # 1. 쿼리 임베딩 준비
-            if isinstance(query_embedding, list):
-                query_vector = np.array(query_embedding, dtype='float32').reshape(1, -1)
-            else:
-                query_vector = query_embedding.astype('float32').reshape(1, -1)
+            query_vectors = np.ascontiguousarray(query_embeddings, dtype='float32')
+            if query_vectors.ndim == 1:
+                query_vectors = query_vectors.reshape(1, -1)
+            if query_vectors.shape[0] == 0:
+                return []
             
-            # 2. FAISS 검색
-            search_k = min(top_k * 3, self.index.ntotal)
-            distances, indices = self.index.search(query_vector, search_k)
+            # 2. FAISS 검색 (한 번의 호출, 필터는 IDSelector로 검색 내부에서 적용)
+            search_k = min(top_k, self.index.ntotal)
+            params = self._get_search_params(filters)
+            if params is False:
+                return [[] for _ in range(query_vectors.shape[0])]
             
-            # 3. 결과 처리 및 필터링
-            results = []
-            document_mapping = self.metadata_info.get('document_mapping', {})
-            documents_metadata = self.metadata_info.get('documents_metadata', {})
+            if params is None:
+                distances, indices = self.index.search(query_vectors, search_k)
+            elif self._use_subset_search(query_vectors, params):
+                indices = self._search_subset(query_vectors, search_k, params._rows)
+            else:
+                distances, indices = self.index.search(query_vectors, search_k, params=params)
             
-            for distance, idx in zip(distances[0], indices[0]):
-                if idx == -1:
-                    continue
-                
-                # Document ID 찾기
-                doc_id = document_mapping.get(str(idx))
-                if not doc_id:
-                    continue
-                
-                # 메타데이터 필터링
-                if filters and doc_id in documents_metadata:
-                    metadata = documents_metadata[doc_id]
-                    if not self._match_filters(metadata, filters):
-                        continue
-                
-                results.append(doc_id)
-                
-                if len(results) >= top_k:
-                    break
+            # 3. 쿼리별 doc_id 변환 (-1은 후보 부족으로 채워지지 않은 자리), 전체 행렬을 한 번에 조회
+            valid = indices >= 0
+            doc_ids = self.document_table.doc_ids(indices[valid])
+            ends = np.cumsum(valid.sum(axis=1)).tolist()
+            results = [doc_ids[start:end] for start, end in zip([0] + ends[:-1], ends)]
             
-            logger.debug(f"검색 완료: {len(results)}개 문서 반환")
+            logger.debug(f"배치 검색 완료: {len(results)}개 쿼리")
             return results
             
         except Exception as e:
-            logger.error(f"검색 실패: {e}")
-            return []
+            logger.error(f"배치 검색 실패: {e}")
+            return [[] for _ in range(len(query_embeddings))]
     
-    def _match_filters(self, metadata: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-        """메타데이터 필터링"""
-        for key, value in filters.items():
-            if key == 'type' and metadata.get('type') != value:
-                return False
-            elif key == 'category' and metadata.get('category') != value:
-                return False
-            elif key == 'max_price' and metadata.get('price', 0) > value:
-                return False
-            elif key == 'min_price' and metadata.get('price', float('inf')) < value:
-                return False
-            elif key == 'is_popular' and metadata.get('is_popular') != value:
-                return False
-            elif key == 'is_good_influence' and metadata.get('is_good_influence') != value:
-                return False
-        return True
+    def _use_subset_search(self, query_vectors: np.ndarray, params) -> bool:
+        """필터 배치 검색을 선택 벡터 부분 행렬곱으로 처리할지 여부
+
+        BLAS 경로(쿼리 BLAS_MIN_QUERIES개 이상)에서 IDSelector를 쓰면 전체 문서 거리를 계산한 뒤 걸러내므로,
+        Flat 인덱스이고 선택 문서가 절반 이하면 선택된 벡터만 모아 검색
+        """
+        return (self._flat_vectors is not None
+                and query_vectors.shape[0] >= BLAS_MIN_QUERIES
+                and len(params._rows) * 2 <= self.index.ntotal)
+    
+    def _search_subset(self, query_vectors: np.ndarray, search_k: int, rows: np.ndarray) -> np.ndarray:
+        """선택된 행의 벡터만 모아 k-NN 검색 후 원래 행 번호로 변환 ((N, search_k), 빈 자리는 -1)"""
+        import faiss
+        
+        k = min(search_k, len(rows))
+        _, positions = faiss.knn(query_vectors, self._flat_vectors[rows], k, metric=self.index.metric_type)
+        indices = np.full((query_vectors.shape[0], search_k), -1, dtype=np.int64)
+        indices[:, :k] = np.where(positions >= 0, rows[np.maximum(positions, 0)], -1)
+        return indices
+    
+    def _get_search_params(self, filters: Optional[Dict[str, Any]]):
+        """필터에 해당하는 IDSelector 검색 파라미터 반환 (필터 조합별 캐시)
+        
+        Returns:
+            SearchParameters, 선택이 필요 없으면 None, 일치 문서가 없으면 False
+        """
+        # 'location'은 문서 메타데이터에 없는 키이므로 필터링하지 않음 (기존 동작 유지)
+        filters = {key: value for key, value in (filters or {}).items() if key != 'location'}
+        cache_key = tuple(sorted(filters.items()))
+        if cache_key in self._search_params_cache:
+            return self._search_params_cache[cache_key]
+        
+        mask = self._has_doc
+        if filters:
+            # 메타데이터가 없는 문서는 필터링하지 않음 (기존 동작 유지)
+            mask = mask & (self.columns.filter_mask(filters) | ~self.columns.has_metadata)
+        
+        if mask.all():
+            params = None
+        elif not mask.any():
+            params = False
+        else:
+            params = build_search_params(mask, self.search_config)
+        
+        if len(self._search_params_cache) >= 128:
+            self._search_params_cache.clear()
+        self._search_params_cache[cache_key] = params
+        return params
     
     def get_documents_by_ids(self, doc_ids: List[str]) -> List[Document]:
         """ID로 문서 내용 반환 (재구성)"""
         documents = []
-        documents_metadata = self.metadata_info.get('documents_metadata', {})
-        documents_content = self.metadata_info.get('documents_content', {})
-        
-        from .documents import ShopDocument, MenuDocument
         
         for doc_id in doc_ids:
-            if doc_id not in documents_metadata:
+            # 가게 문서만 재구성 (기존 동작 유지)
+            if not doc_id.startswith('shop_'):
+                continue
+            row = self.document_table.find(doc_id)
+            if row is None:
                 continue
             
-            metadata = documents_metadata[doc_id]
-            content = documents_content.get(doc_id, "")
-            
-            # Document 객체 재구성 (간단한 버전)
-            if doc_id.startswith('shop_'):
-                # 임시 Document 클래스 (내용만 저장)
-                class SimpleDocument:
-                    def __init__(self, doc_id, content, metadata):
-                        self._id = doc_id
-                        self._content = content
-                        self._metadata = metadata
-                    
-                    @property
-                    def id(self):
-                        return self._id
-                    
-                    def get_content(self):
-                        return self._content
-                    
-                    def get_metadata(self):
-                        return self._metadata
-                
-                documents.append(SimpleDocument(doc_id, content, metadata))
+            # 반환되는 문서만 디코딩, 내용은 색인 시 렌더링된 문자열 그대로
+            metadata = self.document_table.get_metadata(row)
+            content = self.document_table.get_content(row)
+            documents.append(StoredDocument(doc_id, content, metadata))
         
         return documents
     
@@ -319,10 +395,17 @@ class PrebuiltFAISSVectorStore(VectorStore):
         raise NotImplementedError("PrebuiltFAISSVectorStore는 데이터 삭제를 지원하지 않습니다.")
     
     def encode_query(self, query_text: str) -> List[float]:
-        """쿼리 텍스트를 임베딩으로 변환 (Lazy Loading)"""
+        """쿼리 텍스트를 임베딩으로 변환 (Lazy Loading, 캐시 우선)"""
+        if self.query_cache is not None:
+            cached = self.query_cache.get(query_text)
+            if cached is not None:
+                return cached.tolist()
+        
         try:
             model = self._ensure_embedding_model()
             embedding = model.encode([query_text])
+            if self.query_cache is not None:
+                self.query_cache.put(query_text, embedding[0])
             return embedding[0].tolist()
         except Exception as e:
             logger.error(f"쿼리 임베딩 실패: {e}")
@@ -332,12 +415,14 @@ class PrebuiltFAISSVectorStore(VectorStore):
 class FAISSVectorStore(VectorStore):
     """FAISS 기반 Vector Store"""
     
-    def __init__(self, embedding_model=None, index_path: Optional[str] = None, embedding_dim: int = 384):
+    def __init__(self, embedding_model=None, index_path: Optional[str] = None, embedding_dim: int = 384,
+                 query_cache=None):
         """
         Args:
             embedding_model: SentenceTransformer 모델 또는 None (기본값 사용)
             index_path: FAISS 인덱스 저장 경로
             embedding_dim: 임베딩 벡터 차원
+            query_cache: 쿼리 임베딩 캐시 (QueryEmbeddingCache). None이면 캐시 미사용
         """
         try:
             import faiss
@@ -350,25 +435,33 @@ class FAISSVectorStore(VectorStore):
         if embedding_model is None:
             logger.info("기본 임베딩 모델 로드: all-MiniLM-L6-v2")
             try:
-                self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+                self.embedding_model_name = 'all-MiniLM-L6-v2'
+                self.embedding_model = SentenceTransformer(self.embedding_model_name)
                 self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
             except Exception as e:
                 logger.warning(f"임베딩 모델 로드 실패: {e}, 다중 언어 모델 시도")
-                self.embedding_model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+                self.embedding_model_name = 'paraphrase-multilingual-MiniLM-L12-v2'
+                self.embedding_model = SentenceTransformer(self.embedding_model_name)
                 self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
         else:
             self.embedding_model = embedding_model
+            self.embedding_model_name = getattr(embedding_model, 'model_name', None) or type(embedding_model).__name__
             self.embedding_dim = embedding_dim
         
         # FAISS 인덱스 초기화
         self.index = faiss.IndexFlatL2(self.embedding_dim)
         self.index_path = index_path
+        # 쿼리 캐시는 실제로 로드된 모델에 연결 (대체 모델도 같은 384차원이므로 이름으로 구분)
+        self.query_cache = query_cache
+        if query_cache is not None:
+            query_cache.bind_model(self.embedding_model_name, self.embedding_dim)
         
         # 메타데이터 및 문서 저장소
         self.metadata_store: Dict[int, Dict] = {}  # {faiss_idx: metadata}
         self.documents: Dict[str, Document] = {}  # {doc_id: Document}
         self.doc_id_to_faiss_idx: Dict[str, int] = {}  # {doc_id: faiss_idx}
         self.faiss_idx_to_doc_id: Dict[int, str] = {}  # {faiss_idx: doc_id}
+        self.columns = MetadataColumns()  # faiss_idx 순서의 컬럼형 메타데이터
         
         # 인덱스 로드 시도
         if index_path and Path(index_path).exists():
@@ -403,6 +496,8 @@ class FAISSVectorStore(VectorStore):
                 self.metadata_store[faiss_idx] = doc.get_metadata()
                 self.documents[doc_id] = doc
             
+            self.columns.append([self.metadata_store[start_idx + i] for i in range(len(documents))])
+            
             logger.info(f"{len(documents)}개 문서 추가 완료. 총 {self.index.ntotal}개 문서")
             
             # 4. 인덱스 저장 (옵션)
@@ -427,28 +522,28 @@ class FAISSVectorStore(VectorStore):
             else:
                 query_vector = query_embedding.astype('float32').reshape(1, -1)
             
-            # 2. FAISS 검색 (더 많이 검색해서 필터링)
-            search_k = min(top_k * 3, self.index.ntotal)  # 필터링 고려하여 더 많이 검색
-            distances, indices = self.index.search(query_vector, search_k)
+            # 2. FAISS 검색 (필터는 IDSelector로 검색 내부에서 적용)
+            search_k = min(top_k, self.index.ntotal)
+            if filters:
+                mask = self.columns.filter_mask(filters)
+                if not mask.any():
+                    logger.info(f"FAISS 검색 완료: 0개 문서 반환 (필터: {filters})")
+                    return []
+                params = build_search_params(mask)
+                distances, indices = self.index.search(query_vector, search_k, params=params)
+            else:
+                distances, indices = self.index.search(query_vector, search_k)
             
             # 3. 결과 처리
             results = []
-            for distance, idx in zip(distances[0], indices[0]):
+            for idx in indices[0]:
                 if idx == -1:  # 유효하지 않은 인덱스
                     continue
                 
-                # 메타데이터 필터링
-                if filters and not self._match_filters(idx, filters):
-                    continue
-                
                 # Document ID 반환
-                doc_id = self.faiss_idx_to_doc_id.get(idx)
+                doc_id = self.faiss_idx_to_doc_id.get(int(idx))
                 if doc_id:
                     results.append(doc_id)
-                
-                # top_k 제한
-                if len(results) >= top_k:
-                    break
             
             logger.info(f"FAISS 검색 완료: {len(results)}개 문서 반환 (필터: {filters})")
             return results
@@ -457,28 +552,6 @@ class FAISSVectorStore(VectorStore):
             logger.error(f"FAISS 검색 실패: {e}")
             return []
     
-    def _match_filters(self, faiss_idx: int, filters: Dict[str, Any]) -> bool:
-        """메타데이터 필터링 확인"""
-        metadata = self.metadata_store.get(faiss_idx, {})
-        
-        for key, value in filters.items():
-            if key == 'type' and metadata.get('type') != value:
-                return False
-            elif key == 'category' and metadata.get('category') != value:
-                return False
-            elif key == 'max_price' and metadata.get('price', 0) > value:
-                return False
-            elif key == 'min_price' and metadata.get('price', float('inf')) < value:
-                return False
-            elif key == 'is_popular' and metadata.get('is_popular') != value:
-                return False
-            elif key == 'is_good_influence' and metadata.get('is_good_influence') != value:
-                return False
-            elif key == 'location' and metadata.get('location') != value:
-                return False
-        
-        return True
-    
     def get_documents_by_ids(self, doc_ids: List[str]) -> List[Document]:
         """Document ID로 문서 객체들 반환"""
         documents = []
@@ -489,7 +562,10 @@ class FAISSVectorStore(VectorStore):
     
     def clear(self):
         """모든 데이터 삭제"""
+        import faiss
+        
         self.index = faiss.IndexFlatL2(self.embedding_dim)
+        self.columns = MetadataColumns()
         self.metadata_store.clear()
         self.documents.clear()
         self.doc_id_to_faiss_idx.clear()
@@ -547,6 +623,9 @@ class FAISSVectorStore(VectorStore):
                 self.metadata_store = {int(k): v for k, v in metadata_info['metadata_store'].items()}
                 self.doc_id_to_faiss_idx = metadata_info['doc_id_to_faiss_idx']
                 self.faiss_idx_to_doc_id = {int(k): v for k, v in metadata_info['faiss_idx_to_doc_id'].items()}
+                self.columns = MetadataColumns.from_metadata([
+                    self.metadata_store.get(i, {}) for i in range(self.index.ntotal)
+                ])
                 
                 logger.info(f"FAISS 인덱스 로드 완료: {self.index.ntotal}개 문서")
             else:
@@ -558,9 +637,16 @@ class FAISSVectorStore(VectorStore):
             self.index = faiss.IndexFlatL2(self.embedding_dim)
     
     def encode_query(self, query_text: str) -> List[float]:
-        """쿼리 텍스트를 임베딩으로 변환"""
+        """쿼리 텍스트를 임베딩으로 변환 (캐시 우선)"""
+        if self.query_cache is not None:
+            cached = self.query_cache.get(query_text)
+            if cached is not None:
+                return cached.tolist()
+        
         try:
             embedding = self.embedding_model.encode([query_text])
+            if self.query_cache is not None:
+                self.query_cache.put(query_text, embedding[0])
             return embedding[0].tolist()
         except Exception as e:
             logger.error(f"쿼리 임베딩 실패: {e}")
@@ -639,12 +725,17 @@ def create_vector_store(store_type: str = "mock", **kwargs) -> VectorStore:
     if store_type == "mock":
         return MockVectorStore(kwargs.get('storage_path'))
     elif store_type == "faiss":
-        return FAISSVectorStore(kwargs.get('embedding_model'), kwargs.get('index_path'))
+        return FAISSVectorStore(kwargs.get('embedding_model'), kwargs.get('index_path'),
+                                query_cache=kwargs.get('query_cache'))
     elif store_type == "prebuilt_faiss":
+        # 게시된 인덱스 세대가 있으면 현재 세대 사용 (메타데이터는 세대 디렉토리에서 자동 추론)
+        index_path = kwargs.get('index_path', 'outputs/prebuilt_faiss.faiss')
+        resolved_path = resolve_index_path(index_path)
         return PrebuiltFAISSVectorStore(
-            index_path=kwargs.get('index_path', 'outputs/prebuilt_faiss.faiss'),
-            metadata_path=kwargs.get('metadata_path'),
-            embedding_model=kwargs.get('embedding_model')
+            index_path=resolved_path,
+            metadata_path=kwargs.get('metadata_path') if resolved_path == index_path else None,
+            embedding_model=kwargs.get('embedding_model'),
+            query_cache=kwargs.get('query_cache')
         )
     elif store_type == "chromadb":
         return ChromaDBVectorStore(kwargs.get('collection_name', 'naviyam_docs'), 
@@ -4,6 +4,8 @@ Layer 1: 후보 생성 (4-Funnel)
 Layer 2: 개인화 랭킹 (Wide & Deep)
 """
 
+from .restaurant_catalog import RestaurantCatalog, ShopRecord, get_catalog
+from .interaction_matrix import InteractionMatrix, ImplicitALSModel
 from .popularity_funnel import PopularityFunnel
 from .contextual_funnel import ContextualFunnel
 from .content_funnel import ContentFunnel
@@ -11,6 +13,11 @@ from .collaborative_funnel import CollaborativeFunnel
 from .candidate_generator import CandidateGenerator, CandidateGenerationConfig
 
 __all__ = [
+    'RestaurantCatalog',
+    'ShopRecord',
+    'get_catalog',
+    'InteractionMatrix',
+    'ImplicitALSModel',
     'PopularityFunnel',
     'ContextualFunnel',
     'ContentFunnel',
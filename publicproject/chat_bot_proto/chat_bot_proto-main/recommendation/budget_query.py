@@ -0,0 +1,154 @@
+"""
+예산 범위 메뉴 조회 엔진 (BUDGET_INQUIRY)
+"예산 안에서 가성비 상위 k개 (선택적으로 카테고리 X)"를 전체 메뉴 스캔/정렬 없이 계산
+
+- 메뉴를 (카테고리 코드, 보너스 그룹) 버킷으로 나누고 버킷 안에서 가격 오름차순 NumPy 배열로 보관
+  (보너스 그룹: 착한가게 × 할인 가게 4가지, 가게 속성은 메뉴와 나란한 열로 보관)
+- 가성비 점수 = 예산 - 가격 + 착한가게 보너스 + 할인 보너스 이므로 한 버킷 안에서는 가격이 낮을수록 점수가 높음
+  → 버킷별로 예산 이하 개수를 이진 탐색하고 앞쪽 k개만 후보로 모은 뒤 벡터화된 점수 계산 + 상위 k개 선택
+- 결과 순서는 기존 구현(예산 내 메뉴 전체 점수 계산 → 안정 정렬)과 같게 점수 내림차순, 동점은 메뉴 목록 순서
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GOOD_INFLUENCE_BONUS = 1000  # 착한가게 보너스
+DISCOUNT_BONUS = 500         # 할인 가게 보너스
+
+# 보너스 그룹 (착한가게 2 + 할인 1) → 보너스 점수
+BONUS_BY_GROUP = np.array([0, DISCOUNT_BONUS, GOOD_INFLUENCE_BONUS, GOOD_INFLUENCE_BONUS + DISCOUNT_BONUS],
+                          dtype=np.float64)
+NUM_BONUS_GROUPS = len(BONUS_BY_GROUP)
+
+
+def value_score(budget: int, price: int, is_good_influence_shop: bool, ordinary_discount: bool) -> int:
+    """가성비 점수 (남은 예산이 높을수록 좋음, 착한가게/할인 가게 보너스)"""
+    score = budget - price
+    if is_good_influence_shop:
+        score += GOOD_INFLUENCE_BONUS
+    if ordinary_discount:
+        score += DISCOUNT_BONUS
+    return score
+
+
+class _BucketedMenus:
+    """버킷별로 (가격, 메뉴 순번) 오름차순 정렬한 메뉴 열"""
+
+    def __init__(self, buckets: np.ndarray, num_buckets: int, prices: np.ndarray, positions: np.ndarray):
+        order = np.lexsort((positions, prices, buckets))
+        self.rows = order  # 정렬 순서의 원래 행
+        self.prices = prices[order]
+        self.positions = positions[order]
+        self.starts = np.searchsorted(buckets[order], np.arange(num_buckets + 1), side='left')
+
+    def head_rows(self, bucket: int, budget: float, k: int) -> np.ndarray:
+        """버킷에서 예산 이하 가장 싼 k개 행 (가격 같으면 메뉴 순서)"""
+        start, end = int(self.starts[bucket]), int(self.starts[bucket + 1])
+        if start == end:
+            return self.rows[:0]
+        count = int(np.searchsorted(self.prices[start:end], budget, side='right'))
+        return self.rows[start:start + min(k, count)]
+
+
+class BudgetQueryEngine:
+    """NaviyamKnowledge 메뉴의 예산 범위 상위 k개 조회
+
+    가게가 없는 메뉴는 제외합니다 (기존 구현과 같음).
+    """
+
+    def __init__(self, menus: List[Any], shops: Dict[int, Any]):
+        """
+        Args:
+            menus: 메뉴 목록 (이 순서가 동점 순서)
+            shops: 가게 ID → 가게
+        """
+        self.menus: List[Any] = []
+        self.shops: List[Any] = []
+        prices, positions, bonus_groups, category_codes = [], [], [], []
+        self.category_codes: Dict[str, int] = {}  # 소문자 카테고리 → 코드
+
+        for position, menu in enumerate(menus):
+            shop = shops.get(menu.shop_id)
+            if shop is None:
+                continue
+            category = (shop.category or '').lower()
+            code = self.category_codes.setdefault(category, len(self.category_codes))
+            self.menus.append(menu)
+            self.shops.append(shop)
+            prices.append(menu.price)
+            positions.append(position)
+            bonus_groups.append(2 * bool(shop.is_good_influence_shop) + bool(shop.ordinary_discount))
+            category_codes.append(code)
+
+        # 가격/순번/가게 속성 열 (self.menus와 같은 행)
+        self.prices = np.array(prices, dtype=np.float64)
+        self.positions = np.array(positions, dtype=np.int64)
+        self.bonus_groups = np.array(bonus_groups, dtype=np.int64)
+        self.category_code_column = np.array(category_codes, dtype=np.int64)
+        self.bonus = BONUS_BY_GROUP[self.bonus_groups]
+
+        # 카테고리 조건 없음: 보너스 그룹 4개 버킷, 카테고리 조건: (카테고리, 보너스 그룹) 버킷
+        self._by_bonus = _BucketedMenus(self.bonus_groups, NUM_BONUS_GROUPS, self.prices, self.positions)
+        self._by_category = _BucketedMenus(self.category_code_column * NUM_BONUS_GROUPS + self.bonus_groups,
+                                           len(self.category_codes) * NUM_BONUS_GROUPS,
+                                           self.prices, self.positions)
+        self._category_match_cache: Dict[str, List[int]] = {}
+
+        logger.info(f"예산 조회 엔진 구축: 메뉴 {len(self.menus)}개, 카테고리 {len(self.category_codes)}개")
+
+    def __len__(self) -> int:
+        return len(self.menus)
+
+    def matching_category_codes(self, category_fragment: str) -> List[int]:
+        """소문자 카테고리에 category_fragment(소문자)가 포함된 카테고리 코드"""
+        fragment = category_fragment.lower()
+        codes = self._category_match_cache.get(fragment)
+        if codes is None:
+            codes = [code for category, code in self.category_codes.items() if fragment in category]
+            self._category_match_cache[fragment] = codes
+        return codes
+
+    def top_rows(self, budget: int, category_fragment: Optional[str] = None, limit: int = 3) -> np.ndarray:
+        """예산 이하 메뉴 중 가성비 점수 상위 limit개 행 (점수 내림차순, 동점은 메뉴 순서)"""
+        if limit <= 0 or not self.menus:
+            return np.empty(0, dtype=np.int64)
+
+        if category_fragment:
+            bucketed = self._by_category
+            buckets = [code * NUM_BONUS_GROUPS + group
+                       for code in self.matching_category_codes(category_fragment)
+                       for group in range(NUM_BONUS_GROUPS)]
+        else:
+            bucketed = self._by_bonus
+            buckets = range(NUM_BONUS_GROUPS)
+
+        heads = [bucketed.head_rows(bucket, budget, limit) for bucket in buckets]
+        rows = np.concatenate(heads) if heads else np.empty(0, dtype=np.int64)
+        if len(rows) == 0:
+            return rows
+
+        scores = budget - self.prices[rows] + self.bonus[rows]
+        order = np.lexsort((self.positions[rows], -scores))[:limit]
+        return rows[order]
+
+    def query(self, budget: int, category_fragment: Optional[str] = None,
+              limit: int = 3) -> List[Tuple[int, Any, Any]]:
+        """예산 이하 가성비 상위 (점수, 메뉴, 가게) 목록"""
+        results = []
+        for row in self.top_rows(budget, category_fragment, limit):
+            menu, shop = self.menus[row], self.shops[row]
+            results.append((value_score(budget, menu.price, shop.is_good_influence_shop, shop.ordinary_discount),
+                            menu, shop))
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """엔진 통계"""
+        return {
+            "menus": len(self.menus),
+            "categories": len(self.category_codes),
+            "buckets": len(self.category_codes) * NUM_BONUS_GROUPS
+        }
@@ -3,8 +3,13 @@ Layer 1: 후보 생성자 (4-Funnel 통합 관리)
 현재 구현된 Funnel들을 통합하여 다양한 후보군 생성
 """
 
+import time
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from datetime import datetime
 
 try:
@@ -12,14 +17,37 @@ try:
     from .contextual_funnel import ContextualFunnel
     from .content_funnel import ContentFunnel
     from .collaborative_funnel import CollaborativeFunnel
+    from .restaurant_catalog import RestaurantCatalog, get_catalog
 except ImportError:
     from popularity_funnel import PopularityFunnel
     from contextual_funnel import ContextualFunnel
     from content_funnel import ContentFunnel
     from collaborative_funnel import CollaborativeFunnel
+    from restaurant_catalog import RestaurantCatalog, get_catalog
 
 logger = logging.getLogger(__name__)
 
+# Funnel 실행 순서 (통합 시 같은 매장은 먼저 나온 Funnel 후보의 이름/이유를 유지)
+FUNNEL_ORDER = ['collaborative', 'content', 'contextual', 'popularity']
+
+# Funnel별 점수 필드
+FUNNEL_SCORE_KEYS = {
+    'collaborative': 'collaborative_score',
+    'content': 'content_score',
+    'contextual': 'context_score',
+    'popularity': 'base_score'
+}
+
+
+@dataclass
+class _FunnelRun:
+    """병렬 실행 중인 Funnel 1개 (실행 시작 시각은 풀 스레드가 기록)"""
+    name: str
+    label: str
+    future: Optional[Future] = None
+    started: threading.Event = field(default_factory=threading.Event)
+    start_time: float = 0.0
+
 
 class CandidateGenerationConfig:
     """후보 생성 설정"""
@@ -33,6 +61,21 @@ class CandidateGenerationConfig:
     # 최종 후보 수 제한
     MAX_TOTAL_CANDIDATES = 150
     
+    # Funnel 실행 방식: True면 생성기 전용 스레드 풀에서 동시 실행, False면 순차 실행
+    PARALLEL_FUNNELS = True
+    # 동시에 처리할 요청 수 (스레드 풀 크기 = Funnel 4개 × 요청 수, /chat 기본 동시 실행 수와 같음)
+    FUNNEL_CONCURRENT_REQUESTS = 4
+    # 풀 대기열에서 이 시간(초) 안에 시작하지 못한 Funnel은 실행하지 않고 결과에서 제외
+    FUNNEL_QUEUE_TIMEOUT = 0.2
+    
+    # Funnel별 시간 예산 (초, 실행 시작 시점부터). 병렬 실행 시 예산을 넘긴 Funnel은 결과에서 제외
+    FUNNEL_TIMEOUTS = {
+        'collaborative': 0.5,
+        'content': 0.5,
+        'contextual': 0.5,
+        'popularity': 0.5
+    }
+    
     # Funnel별 가중치 (추후 튜닝 가능)
     FUNNEL_WEIGHTS = {
         'popularity': 1.0,
@@ -40,23 +83,52 @@ class CandidateGenerationConfig:
         'content': 1.0,
         'collaborative': 1.0
     }
+    
+    # Funnel 결과 통합 방식
+    # - 'rrf': 가중 reciprocal rank fusion, Σ weight / (RRF_K + 순위)
+    # - 'weighted_max': Funnel별 정규화 점수(점수 / Funnel 최고 점수) × 가중치의 최댓값
+    FUSION_METHOD = 'rrf'
+    RRF_K = 60
 
 
 class CandidateGenerator:
     """Layer 1: 4-Funnel 후보 생성 시스템"""
     
-    def __init__(self, config: Optional[CandidateGenerationConfig] = None):
+    def __init__(self,
+                 config: Optional[CandidateGenerationConfig] = None,
+                 catalog: Optional[RestaurantCatalog] = None):
         """
         Args:
             config: 후보 생성 설정
+            catalog: 매장 카탈로그 (없으면 기본 데이터 파일의 공유 카탈로그)
         """
         self.config = config or CandidateGenerationConfig()
         
+        # 모든 Funnel이 같은 불변 카탈로그를 공유 (데이터 파일은 한 번만 로드)
+        self.catalog = catalog if catalog is not None else get_catalog()
+        
         # 구현된 Funnel들 초기화
-        self.popularity_funnel = PopularityFunnel()
-        self.contextual_funnel = ContextualFunnel()
-        self.content_funnel = ContentFunnel()
-        self.collaborative_funnel = CollaborativeFunnel()
+        self.popularity_funnel = PopularityFunnel(catalog=self.catalog)
+        self.contextual_funnel = ContextualFunnel(catalog=self.catalog)
+        self.content_funnel = ContentFunnel(catalog=self.catalog)
+        self.collaborative_funnel = CollaborativeFunnel(catalog=self.catalog)
+        
+        # 병렬 실행용 전용 스레드 풀 (스레드는 첫 제출 시 생성)
+        self.funnel_workers = len(FUNNEL_ORDER) * self.config.FUNNEL_CONCURRENT_REQUESTS
+        self._funnel_executor = ThreadPoolExecutor(max_workers=self.funnel_workers, thread_name_prefix="funnel")
+        
+        # Funnel 실행 통계 (실행 시간과 풀 대기 시간은 따로 기록)
+        self._stats_lock = threading.Lock()
+        self.execution_stats = {
+            'runs': 0,
+            'timeouts': {name: 0 for name in FUNNEL_ORDER},
+            'queue_timeouts': {name: 0 for name in FUNNEL_ORDER},
+            'errors': {name: 0 for name in FUNNEL_ORDER},
+            'last_timed_out': [],
+            'last_funnel_times_ms': {},
+            'last_funnel_queue_ms': {},
+            'last_total_time_ms': 0.0
+        }
         
         logger.info("CandidateGenerator 초기화 완료")
     
@@ -86,100 +158,209 @@ class CandidateGenerator:
         if current_time is None:
             current_time = datetime.now()
         
-        all_candidates = []
+        funnel_tasks = self._build_funnel_tasks(
+            user_id, user_location, query, time_of_day, user_type, filters, current_time
+        )
+        
+        start_time = time.perf_counter()
+        if self.config.PARALLEL_FUNNELS:
+            results, funnel_times, queue_times, timed_out, failed = self._run_funnels_parallel(funnel_tasks)
+        else:
+            results, funnel_times, queue_times, timed_out, failed = self._run_funnels_sequential(funnel_tasks)
+        total_time_ms = (time.perf_counter() - start_time) * 1000
+        
+        self._record_execution(funnel_times, queue_times, timed_out, failed, total_time_ms)
         
-        # Funnel 1: 협업 필터링 기반 후보 생성
-        try:
-            collaborative_candidates = self.collaborative_funnel.get_candidates(
+        # Funnel 순서대로 통합 (실행 완료 순서와 무관하게 결과 일정)
+        # 통합 점수 상위 MAX_TOTAL_CANDIDATES개만 Layer 2로 전달
+        final_candidates = self._fuse_candidates([(name, results.get(name, [])) for name, _, _ in funnel_tasks])
+        
+        logger.info(f"후보 생성 완료: 총 {len(final_candidates)}개 (중복 제거 후)")
+        return final_candidates
+    
+    def _build_funnel_tasks(self,
+                            user_id: Optional[str],
+                            user_location: Optional[str],
+                            query: Optional[str],
+                            time_of_day: Optional[str],
+                            user_type: Optional[str],
+                            filters: Optional[Dict[str, Any]],
+                            current_time: datetime) -> List[Tuple[str, str, Callable[[], List[Dict[str, Any]]]]]:
+        """실행할 Funnel 목록 (이름, 로그 라벨, 호출 함수)"""
+        tasks = [
+            # Funnel 1: 협업 필터링 기반 후보 생성
+            ('collaborative', '협업', lambda: self.collaborative_funnel.get_candidates(
                 user_id=user_id,
                 user_type=user_type,
                 filters=filters,
                 limit=self.config.COLLABORATIVE_CANDIDATES
-            )
-            all_candidates.extend(collaborative_candidates)
-            logger.info(f"협업 Funnel: {len(collaborative_candidates)}개 후보 생성")
-        except Exception as e:
-            logger.error(f"협업 Funnel 오류: {e}")
+            ))
+        ]
         
         # Funnel 2: 콘텐츠 기반 후보 생성
         if query:
-            try:
-                content_candidates = self.content_funnel.get_candidates(
-                    query=query,
-                    filters=filters,
-                    limit=self.config.CONTENT_CANDIDATES
-                )
-                all_candidates.extend(content_candidates)
-                logger.info(f"콘텐츠 Funnel: {len(content_candidates)}개 후보 생성")
-            except Exception as e:
-                logger.error(f"콘텐츠 Funnel 오류: {e}")
-        
-        # Funnel 3: 상황/규칙 기반 후보 생성  
-        try:
-            contextual_candidates = self.contextual_funnel.get_candidates(
-                user_location=user_location,
-                current_time=current_time,
-                time_of_day=time_of_day,
+            tasks.append(('content', '콘텐츠', lambda: self.content_funnel.get_candidates(
+                query=query,
                 filters=filters,
-                limit=self.config.CONTEXTUAL_CANDIDATES
-            )
-            all_candidates.extend(contextual_candidates)
-            logger.info(f"상황 Funnel: {len(contextual_candidates)}개 후보 생성")
-        except Exception as e:
-            logger.error(f"상황 Funnel 오류: {e}")
+                limit=self.config.CONTENT_CANDIDATES
+            )))
+        
+        # Funnel 3: 상황/규칙 기반 후보 생성
+        tasks.append(('contextual', '상황', lambda: self.contextual_funnel.get_candidates(
+            user_location=user_location,
+            current_time=current_time,
+            time_of_day=time_of_day,
+            filters=filters,
+            limit=self.config.CONTEXTUAL_CANDIDATES
+        )))
         
         # Funnel 4: 인기도 기반 후보 생성
-        try:
-            popularity_candidates = self.popularity_funnel.get_candidates(
-                filters=filters,
-                limit=self.config.POPULARITY_CANDIDATES
-            )
-            all_candidates.extend(popularity_candidates)
-            logger.info(f"인기도 Funnel: {len(popularity_candidates)}개 후보 생성")
-        except Exception as e:
-            logger.error(f"인기도 Funnel 오류: {e}")
+        tasks.append(('popularity', '인기도', lambda: self.popularity_funnel.get_candidates(
+            filters=filters,
+            limit=self.config.POPULARITY_CANDIDATES
+        )))
         
-        # 중복 제거 및 통합
-        unique_candidates = self._remove_duplicates(all_candidates)
+        return tasks
+    
+    def _run_funnels_sequential(self, funnel_tasks):
+        """Funnel 순차 실행 (시간 예산 미적용)"""
+        results, funnel_times, failed = {}, {}, []
         
-        # 최종 후보 수 제한
-        final_candidates = unique_candidates[:self.config.MAX_TOTAL_CANDIDATES]
+        for name, label, run in funnel_tasks:
+            start_time = time.perf_counter()
+            try:
+                results[name] = run()
+                logger.info(f"{label} Funnel: {len(results[name])}개 후보 생성")
+            except Exception as e:
+                failed.append(name)
+                logger.error(f"{label} Funnel 오류: {e}")
+            funnel_times[name] = (time.perf_counter() - start_time) * 1000
         
-        logger.info(f"후보 생성 완료: 총 {len(final_candidates)}개 (중복 제거 후)")
-        return final_candidates
+        return results, funnel_times, {name: 0.0 for name in funnel_times}, [], failed
     
-    def _remove_duplicates(self, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """중복 후보 제거 및 통합"""
-        seen_shops = {}
-        unique_candidates = []
+    def _run_funnels_parallel(self, funnel_tasks):
+        """전용 스레드 풀에서 Funnel 동시 실행
         
-        for candidate in candidates:
-            shop_id = candidate['shop_id']
+        모든 Funnel을 한 번에 제출하고, 각 Funnel은 실제로 실행을 시작한 시점부터 자신의 시간 예산까지만 기다립니다.
+        FUNNEL_QUEUE_TIMEOUT 안에 시작하지 못했거나 예산을 넘긴 Funnel은 결과에서 빠지고
+        나머지 Funnel 결과만으로 부분 결과를 반환합니다.
+        """
+        def timed(funnel_run: _FunnelRun, run):
+            funnel_run.start_time = time.perf_counter()
+            funnel_run.started.set()
+            candidates = run()
+            return candidates, (time.perf_counter() - funnel_run.start_time) * 1000
+        
+        submit_time = time.perf_counter()
+        queue_deadline = submit_time + self.config.FUNNEL_QUEUE_TIMEOUT
+        funnel_runs = []
+        for name, label, run in funnel_tasks:
+            funnel_run = _FunnelRun(name, label)
+            funnel_run.future = self._funnel_executor.submit(timed, funnel_run, run)
+            funnel_runs.append(funnel_run)
+        
+        results, funnel_times, queue_times, timed_out, failed = {}, {}, {}, [], []
+        for funnel_run in funnel_runs:
+            name, label, future = funnel_run.name, funnel_run.label, funnel_run.future
             
-            if shop_id not in seen_shops:
-                # 첫 번째 등장하는 매장
-                seen_shops[shop_id] = candidate
-                unique_candidates.append(candidate)
-            else:
-                # 이미 있는 매장 - funnel_source 정보 추가
-                existing = seen_shops[shop_id]
-                existing_sources = existing.get('funnel_sources', [existing['funnel_source']])
-                new_source = candidate['funnel_source']
+            # 1. 실행 시작 대기 (대기열에서 시작 못 하면 취소, 취소 직전 시작했으면 계속 진행)
+            started = funnel_run.started.wait(timeout=max(0.0, queue_deadline - time.perf_counter()))
+            if not started and future.cancel():
+                timed_out.append(name)
+                queue_times[name] = (time.perf_counter() - submit_time) * 1000
+                funnel_times[name] = 0.0
+                with self._stats_lock:
+                    self.execution_stats['queue_timeouts'][name] += 1
+                logger.warning(f"{label} Funnel 대기 시간 초과 ({self.config.FUNNEL_QUEUE_TIMEOUT * 1000:.0f}ms): "
+                               f"부분 결과 반환")
+                continue
+            funnel_run.started.wait()
+            queue_times[name] = (funnel_run.start_time - submit_time) * 1000
+            
+            # 2. 실행 시작 시점부터 시간 예산까지 결과 대기
+            budget = self.config.FUNNEL_TIMEOUTS.get(name)
+            remaining = None if budget is None else max(0.0, funnel_run.start_time + budget - time.perf_counter())
+            try:
+                results[name], funnel_times[name] = future.result(timeout=remaining)
+                logger.info(f"{label} Funnel: {len(results[name])}개 후보 생성")
+            except FutureTimeoutError:
+                # 이미 실행 중인 Funnel은 중단할 수 없으므로 결과만 버림
+                timed_out.append(name)
+                funnel_times[name] = (time.perf_counter() - funnel_run.start_time) * 1000
+                logger.warning(f"{label} Funnel 시간 초과 ({budget * 1000:.0f}ms): 부분 결과 반환")
+            except Exception as e:
+                failed.append(name)
+                funnel_times[name] = (time.perf_counter() - funnel_run.start_time) * 1000
+                logger.error(f"{label} Funnel 오류: {e}")
+        
+        return results, funnel_times, queue_times, timed_out, failed
+    
+    def _record_execution(self, funnel_times: Dict[str, float], queue_times: Dict[str, float],
+                          timed_out: List[str], failed: List[str], total_time_ms: float):
+        """Funnel 실행 통계 갱신 (대기열 시간 초과는 _run_funnels_parallel에서 집계)"""
+        with self._stats_lock:
+            self.execution_stats['runs'] += 1
+            for name in timed_out:
+                self.execution_stats['timeouts'][name] += 1
+            for name in failed:
+                self.execution_stats['errors'][name] += 1
+            self.execution_stats['last_timed_out'] = list(timed_out)
+            self.execution_stats['last_funnel_times_ms'] = dict(funnel_times)
+            self.execution_stats['last_funnel_queue_ms'] = dict(queue_times)
+            self.execution_stats['last_total_time_ms'] = total_time_ms
+    
+    def _fuse_candidates(self, funnel_results: List[Tuple[str, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """Funnel별 후보를 매장 단위로 합치고 통합 점수 상위 MAX_TOTAL_CANDIDATES개 반환
+        
+        각 후보에는 funnel_sources(목록), funnel_source(' + ' 연결), Funnel별 점수 필드,
+        funnel_scores(Funnel별 정규화 점수), fusion_score가 기록됩니다.
+        """
+        use_rrf = self.config.FUSION_METHOD == 'rrf'
+        merged: Dict[str, Dict[str, Any]] = {}
+        
+        for name, candidates in funnel_results:
+            if not candidates:
+                continue
+            weight = self.config.FUNNEL_WEIGHTS.get(name, 1.0)
+            score_key = FUNNEL_SCORE_KEYS.get(name)
+            normalized = self._normalize_scores([candidate.get(score_key, 0) for candidate in candidates])
+            
+            # 각 Funnel 결과는 점수 내림차순
+            for rank, (candidate, score) in enumerate(zip(candidates, normalized), 1):
+                contribution = weight / (self.config.RRF_K + rank) if use_rrf else weight * score
+                existing = merged.get(candidate['shop_id'])
                 
-                if new_source not in existing_sources:
-                    existing_sources.append(new_source)
-                    existing['funnel_sources'] = existing_sources
-                    existing['funnel_source'] = ' + '.join(existing_sources)
+                if existing is None:
+                    candidate['funnel_sources'] = [name]
+                    candidate['funnel_scores'] = {name: score}
+                    candidate['fusion_score'] = contribution
+                    merged[candidate['shop_id']] = candidate
+                    continue
                 
-                # 점수 통합 (최고 점수 사용)
-                existing_score = existing.get('base_score', existing.get('context_score', existing.get('content_score', existing.get('collaborative_score', 0))))
-                new_score = candidate.get('base_score', candidate.get('context_score', candidate.get('content_score', candidate.get('collaborative_score', 0))))
-                if new_score > existing_score:
-                    for score_key in ['base_score', 'context_score', 'content_score', 'collaborative_score']:
-                        if score_key in existing and score_key in candidate:
-                            existing[score_key] = candidate[score_key]
+                # 같은 Funnel에 같은 shopId가 다시 나오면 (중복 shopId) 앞 순위만 반영
+                if name in existing['funnel_scores']:
+                    continue
+                existing['funnel_sources'].append(name)
+                existing['funnel_source'] = ' + '.join(existing['funnel_sources'])
+                existing['funnel_scores'][name] = score
+                if score_key in candidate:
+                    existing[score_key] = candidate[score_key]
+                if use_rrf:
+                    existing['fusion_score'] += contribution
+                else:
+                    existing['fusion_score'] = max(existing['fusion_score'], contribution)
         
-        return unique_candidates
+        # 통합 점수 내림차순 (동점은 Funnel 순서상 먼저 나온 후보 우선)
+        fused = sorted(merged.values(), key=lambda candidate: candidate['fusion_score'], reverse=True)
+        return fused[:self.config.MAX_TOTAL_CANDIDATES]
+    
+    @staticmethod
+    def _normalize_scores(scores: List[float]) -> List[float]:
+        """Funnel 점수를 0~1로 정규화 (Funnel 내 최고 점수 기준, 모두 0 이하면 1.0)"""
+        top = max(scores)
+        if top <= 0:
+            return [1.0] * len(scores)
+        return [max(score, 0) / top for score in scores]
     
     def get_funnel_stats(self) -> Dict[str, Any]:
         """각 Funnel별 통계 정보"""
@@ -191,11 +372,32 @@ class CandidateGenerator:
                     'contextual': self.config.CONTEXTUAL_CANDIDATES,
                     'content': self.config.CONTENT_CANDIDATES,
                     'collaborative': self.config.COLLABORATIVE_CANDIDATES
-                }
+                },
+                'parallel_funnels': self.config.PARALLEL_FUNNELS,
+                'funnel_workers': self.funnel_workers,
+                'funnel_queue_timeout': self.config.FUNNEL_QUEUE_TIMEOUT,
+                'funnel_timeouts': dict(self.config.FUNNEL_TIMEOUTS),
+                'fusion_method': self.config.FUSION_METHOD,
+                'funnel_weights': dict(self.config.FUNNEL_WEIGHTS)
             },
-            'popularity_stats': self.popularity_funnel.get_popularity_stats()
+            'catalog': self.catalog.get_stats(),
+            'popularity_stats': self.popularity_funnel.get_popularity_stats(),
+            'collaborative_model': (self.collaborative_funnel.model.get_stats()
+                                    if self.collaborative_funnel.model is not None else None)
         }
         
+        with self._stats_lock:
+            stats['execution'] = {
+                'runs': self.execution_stats['runs'],
+                'timeouts': dict(self.execution_stats['timeouts']),
+                'queue_timeouts': dict(self.execution_stats['queue_timeouts']),
+                'errors': dict(self.execution_stats['errors']),
+                'last_timed_out': list(self.execution_stats['last_timed_out']),
+                'last_funnel_times_ms': dict(self.execution_stats['last_funnel_times_ms']),
+                'last_funnel_queue_ms': dict(self.execution_stats['last_funnel_queue_ms']),
+                'last_total_time_ms': self.execution_stats['last_total_time_ms']
+            }
+        
         return stats
 
 
@@ -232,7 +434,8 @@ def test_candidate_generator():
         if 'base_score' in candidate:
             score_parts.append(f"인기도: {candidate['base_score']:.1f}")
         
-        score_info = ", ".join(score_parts) if score_parts else "N/A"
+        score_parts.append(f"통합: {candidate['fusion_score']:.4f}")
+        score_info = ", ".join(score_parts)
         
         print(f"{i}. {shop_name} ({category})")
         print(f"   출처: {funnel_source}")
@@ -1,43 +1,77 @@
 """
 협업 필터링 Funnel (Funnel 1)
 사용자 기반 협업 필터링 - 유사한 사용자 취향 기반 추천
-현재는 규칙 기반 시뮬레이션, 추후 실제 데이터로 개선
+
+- 상호작용 로그로 학습한 ALS 모델에 있는 사용자: 매장 요인 × 사용자 요인 점수 상위 N개
+- 그 외 사용자(콜드 스타트): 사용자 타입별 규칙 점수 (매장 순서 배열로 미리 계산)
 """
 
-import json
+import os
 import logging
 from typing import List, Dict, Any, Optional
 from collections import defaultdict, Counter
 import random
 
+import numpy as np
+
+try:
+    from .restaurant_catalog import RestaurantCatalog, ShopRecord, get_catalog, DEFAULT_RESTAURANTS_PATH
+    from .interaction_matrix import ImplicitALSModel, DEFAULT_COLLABORATIVE_MODEL_PATH
+    from .top_k import top_k_indices, first_k_in_order, stable_ranking, basic_filter_mask
+except ImportError:
+    from restaurant_catalog import RestaurantCatalog, ShopRecord, get_catalog, DEFAULT_RESTAURANTS_PATH
+    from interaction_matrix import ImplicitALSModel, DEFAULT_COLLABORATIVE_MODEL_PATH
+    from top_k import top_k_indices, first_k_in_order, stable_ranking, basic_filter_mask
+
 logger = logging.getLogger(__name__)
 
 
 class CollaborativeFunnel:
     """협업 필터링 기반 후보 생성 Funnel"""
     
-    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json"):
+    # _passes_basic_filters와 같은 필터 (벡터화 버전에 적용할 키)
+    FILTER_KEYS = ('category', 'is_good_influence', 'accepts_meal_card', 'max_price')
+    
+    # 학습 모델 점수(0~1 선호 예측)를 규칙 점수와 같은 0~100 범위로 변환
+    MODEL_SCORE_SCALE = 100.0
+    
+    def __init__(self, restaurants_path: str = DEFAULT_RESTAURANTS_PATH,
+                 catalog: Optional[RestaurantCatalog] = None,
+                 model: Optional[ImplicitALSModel] = None,
+                 model_path: Optional[str] = DEFAULT_COLLABORATIVE_MODEL_PATH):
         """
         Args:
             restaurants_path: 매장 데이터 파일 경로
+            catalog: 공유 매장 카탈로그 (없으면 경로별 공유 카탈로그 사용)
+            model: 학습된 ALS 모델 (없으면 model_path에서 로드 시도)
+            model_path: 오프라인 학습 모델 파일 (build_collaborative_model.py 결과)
         """
         self.restaurants_path = restaurants_path
-        self.restaurants = []
-        self._load_data()
+        self.catalog = catalog if catalog is not None else get_catalog(restaurants_path)
+        self.shops = self.catalog.shops
+        logger.info(f"협업 Funnel: {len(self.shops)}개 매장 데이터 로드 완료")
         self._build_user_profiles()
+        
+        if model is None and model_path and os.path.exists(model_path):
+            try:
+                model = ImplicitALSModel.load(model_path)
+            except Exception as e:
+                logger.warning(f"협업 필터링 모델 로드 실패, 규칙 기반으로 동작: {e}")
+        self.set_model(model)
     
-    def _load_data(self):
-        """매장 데이터 로드"""
-        try:
-            with open(self.restaurants_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.restaurants = data.get('restaurants', [])
-            
-            logger.info(f"협業 Funnel: {len(self.restaurants)}개 매장 데이터 로드 완료")
-            
-        except Exception as e:
-            logger.error(f"매장 데이터 로드 실패: {e}")
-            self.restaurants = []
+    def set_model(self, model: Optional[ImplicitALSModel]):
+        """학습 모델 교체 (모델 매장 → 카탈로그 위치 매핑 포함)"""
+        if model is not None:
+            positions = np.array([shop.position if shop is not None else -1
+                                  for shop in map(self.catalog.get, model.shop_ids)], dtype=np.int64)
+            known = positions >= 0
+            self._model_items = np.flatnonzero(known)
+            self._model_positions = positions[known]
+            logger.info(f"협업 Funnel: ALS 모델 사용 (사용자 {len(model.user_ids)}명, "
+                        f"카탈로그 매칭 매장 {len(self._model_positions)}/{len(model.shop_ids)}개)")
+        else:
+            self._model_items = self._model_positions = np.zeros(0, dtype=np.int64)
+        self.model = model
     
     def _build_user_profiles(self):
         """
@@ -79,24 +113,45 @@ class CollaborativeFunnel:
         }
         
         # 매장별 사용자 타입 선호도 점수 계산
+        # 점수는 카테고리·착한가게 여부·가격 구간·메뉴 수 구간에만 의존하므로 같은 조합은 한 번만 계산
         self.shop_type_scores = {}
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            self.shop_type_scores[shop_id] = self._calculate_type_scores(restaurant)
+        scores_by_profile = {}
+        for shop in self.shops:
+            profile = self._shop_profile(shop)
+            if profile not in scores_by_profile:
+                scores_by_profile[profile] = self._calculate_type_scores(shop)
+            self.shop_type_scores[shop.shop_id] = scores_by_profile[profile]
+        
+        # 사용자 타입별 점수를 매장 순서 배열로 (get_candidates에서 전체 매장을 한 번에 필터/선택)
+        self.user_types = list(self.user_type_preferences)
+        self.type_score_matrix = np.array([
+            [self.shop_type_scores[shop.shop_id][user_type] for shop in self.shops]
+            for user_type in self.user_types
+        ], dtype=np.float64).reshape(len(self.user_types), len(self.shops))
+        # 타입별 점수 순위 (점수 10점 미만 매장은 제외) - 요청마다 정렬하지 않음
+        self.type_rankings = []
+        for scores in self.type_score_matrix:
+            ranking = stable_ranking(scores)
+            self.type_rankings.append(ranking[scores[ranking] >= 10])
         
         logger.info(f"사용자 프로필 시뮬레이션 구축 완료")
     
-    def _calculate_type_scores(self, restaurant: Dict[str, Any]) -> Dict[str, float]:
+    def _shop_profile(self, shop: ShopRecord) -> tuple:
+        """_calculate_type_scores 결과를 결정하는 매장 특성 (카테고리 코드, 착한가게, 가격 구간, 메뉴 수 구간)"""
+        avg_price = shop.avg_price if shop.avg_price is not None else 10000
+        price_tier = next((tier for tier, limit in enumerate((8000, 12000, 16000)) if avg_price <= limit), 3)
+        variety_tier = next((tier for tier, count in enumerate((5, 3, 2)) if shop.menu_count >= count), 3)
+        return shop.category_code, shop.is_good_shop, price_tier, variety_tier
+    
+    def _calculate_type_scores(self, shop: ShopRecord) -> Dict[str, float]:
         """매장에 대한 사용자 타입별 점수 계산"""
         scores = {}
-        category = restaurant.get('category', '').lower()
-        is_good_shop = restaurant.get('attributes', {}).get('isGoodShop', False)
-        menus = restaurant.get('menus', [])
+        category = shop.category_lower
+        is_good_shop = shop.is_good_shop
         
         # 가격 정보
-        prices = [menu.get('price', 0) for menu in menus if menu.get('price', 0) > 0]
-        avg_price = sum(prices) / len(prices) if prices else 10000
-        menu_count = len(menus)
+        avg_price = shop.avg_price if shop.avg_price is not None else 10000
+        menu_count = shop.menu_count
         
         for user_type, preferences in self.user_type_preferences.items():
             score = 0.0
@@ -150,7 +205,7 @@ class CollaborativeFunnel:
         협업 필터링 기반 후보 매장 반환
         
         Args:
-            user_id: 사용자 ID (현재는 미사용, 추후 실제 데이터로 확장)
+            user_id: 사용자 ID (학습 모델에 있는 사용자는 상호작용 기반 점수 사용)
             user_type: 사용자 타입 ('healthy_eater', 'convenience_seeker', 'gourmet', 'budget_conscious')
             filters: 추가 필터 조건
             limit: 반환할 후보 수
@@ -158,44 +213,66 @@ class CollaborativeFunnel:
         Returns:
             협업 필터링 점수 순으로 정렬된 후보 매장 리스트
         """
-        # 사용자 타입 결정
+        filters = filters or {}
+        mask = basic_filter_mask(self.catalog, filters, self.FILTER_KEYS)
+        
+        # 1. 상호작용 이력이 있는 사용자: 학습 모델 점수 상위 N개
+        candidates = self._get_model_candidates(user_id, mask, limit) if user_id else []
+        if len(candidates) >= limit:
+            logger.info(f"협업 Funnel: {len(candidates)}개 후보 생성 (상호작용 모델)")
+            return candidates
+        
+        # 2. 콜드 스타트(또는 모델 후보 부족): 사용자 타입 규칙 점수
         if not user_type:
             user_type = self._infer_user_type(user_id, filters)
         
         if user_type not in self.user_type_preferences:
             user_type = 'default'
         
-        candidates = []
+        type_index = self.user_types.index(user_type)
+        type_scores = self.type_score_matrix[type_index]
+        if candidates:
+            mask[[self.catalog.get(candidate['shop_id']).position for candidate in candidates]] = False
         
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            
-            # 기본 필터 적용
-            if not self._passes_basic_filters(restaurant, filters or {}):
-                continue
-            
-            # 협업 필터링 점수 계산
-            collaborative_score = self.shop_type_scores.get(shop_id, {}).get(user_type, 0)
-            
-            # 점수가 너무 낮으면 제외
-            if collaborative_score < 10:
-                continue
-            
-            candidate = {
-                'shop_id': shop_id,
-                'shop_name': restaurant.get('shopName', ''),
-                'category': restaurant.get('category', ''),
+        # 점수 10점 미만은 순위에서 이미 제외
+        for position in first_k_in_order(self.type_rankings[type_index], limit - len(candidates), mask):
+            shop = self.shops[position]
+            candidates.append({
+                'shop_id': shop.shop_id,
+                'shop_name': shop.shop_name,
+                'category': shop.category,
                 'funnel_source': 'collaborative',
-                'collaborative_score': collaborative_score,
-                'reason': self._get_collaborative_reason(restaurant, user_type)
-            }
-            candidates.append(candidate)
+                'collaborative_score': float(type_scores[position]),
+                'reason': self._get_collaborative_reason(shop, user_type)
+            })
         
-        # 협업 필터링 점수로 정렬
-        candidates.sort(key=lambda x: x['collaborative_score'], reverse=True)
+        logger.info(f"협업 Funnel: {len(candidates)}개 후보 생성 (사용자 타입: {user_type})")
+        return candidates
+    
+    def _get_model_candidates(self, user_id: str, mask: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+        """학습 모델 기반 후보 (모델에 없는 사용자는 빈 리스트)"""
+        if self.model is None:
+            return []
+        item_scores = self.model.score_items(user_id)
+        if item_scores is None:
+            return []
+        
+        # 매장 요인 × 사용자 요인 한 번으로 계산한 점수를 카탈로그 매장 순서로 옮김
+        scores = np.full(len(self.shops), -np.inf, dtype=np.float32)
+        scores[self._model_positions] = item_scores[self._model_items]
         
-        logger.info(f"협업 Funnel: {len(candidates[:limit])}개 후보 생성 (사용자 타입: {user_type})")
-        return candidates[:limit]
+        candidates = []
+        for position in top_k_indices(scores, limit, mask & (scores > 0)):
+            shop = self.shops[position]
+            candidates.append({
+                'shop_id': shop.shop_id,
+                'shop_name': shop.shop_name,
+                'category': shop.category,
+                'funnel_source': 'collaborative',
+                'collaborative_score': round(min(float(scores[position]), 1.0) * self.MODEL_SCORE_SCALE, 2),
+                'reason': '비슷한 취향의 사용자들이 선택'
+            })
+        return candidates
     
     def _infer_user_type(self, user_id: Optional[str], filters: Dict[str, Any]) -> str:
         """필터 조건으로부터 사용자 타입 추론"""
@@ -225,35 +302,32 @@ class CollaborativeFunnel:
         
         return 'default'
     
-    def _passes_basic_filters(self, restaurant: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    def _passes_basic_filters(self, shop: ShopRecord, filters: Dict[str, Any]) -> bool:
         """기본 필터 조건 확인"""
         # 카테고리 필터
         if filters.get('category'):
             category_filter = filters['category'].lower()
-            if category_filter not in restaurant.get('category', '').lower():
+            if category_filter not in shop.category_lower:
                 return False
         
         # 착한가게 필터
         if filters.get('is_good_influence'):
-            if not restaurant.get('attributes', {}).get('isGoodShop', False):
+            if not shop.is_good_shop:
                 return False
         
         # 급식카드 필터
         if filters.get('accepts_meal_card'):
-            if not restaurant.get('attributes', {}).get('acceptsMealCard', False):
+            if not shop.accepts_meal_card:
                 return False
         
         # 최대 가격 필터
         if filters.get('max_price'):
-            menus = restaurant.get('menus', [])
-            if menus:
-                min_price = min(menu.get('price', float('inf')) for menu in menus)
-                if min_price > filters['max_price']:
-                    return False
+            if shop.min_price is not None and shop.min_price > filters['max_price']:
+                return False
         
         return True
     
-    def _get_collaborative_reason(self, restaurant: Dict[str, Any], user_type: str) -> str:
+    def _get_collaborative_reason(self, shop: ShopRecord, user_type: str) -> str:
         """협업 필터링 추천 이유 생성"""
         preferences = self.user_type_preferences.get(user_type, {})
         reasons = []
@@ -270,20 +344,16 @@ class CollaborativeFunnel:
             reasons.append(type_descriptions[user_type])
         
         # 구체적인 이유 추가
-        category = restaurant.get('category', '').lower()
+        category = shop.category_lower
         if any(pref_cat.lower() in category for pref_cat in preferences.get('preferred_categories', [])):
             reasons.append('취향 맞춤')
         
-        if restaurant.get('attributes', {}).get('isGoodShop', False) and preferences.get('good_shop_preference', 0) > 0.6:
+        if shop.is_good_shop and preferences.get('good_shop_preference', 0) > 0.6:
             reasons.append('착한가게')
         
-        menus = restaurant.get('menus', [])
-        if menus:
-            prices = [menu.get('price', 0) for menu in menus if menu.get('price', 0) > 0]
-            if prices:
-                avg_price = sum(prices) / len(prices)
-                if avg_price <= 10000 and preferences.get('price_sensitivity', 0) > 0.6:
-                    reasons.append('합리적 가격')
+        if shop.avg_price is not None:
+            if shop.avg_price <= 10000 and preferences.get('price_sensitivity', 0) > 0.6:
+                reasons.append('합리적 가격')
         
         return ' · '.join(reasons) if reasons else '유사 취향 추천'
     
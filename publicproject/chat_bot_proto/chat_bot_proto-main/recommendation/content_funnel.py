@@ -1,80 +1,146 @@
 """
 콘텐츠 기반 Funnel (Funnel 2)
 검색 쿼리와 메뉴/카테고리 매칭 기반 추천
+
+매장명/카테고리/메뉴명/토큰을 역색인(postings)으로 보관하고,
+부분 문자열 매칭은 문자 bigram 역색인으로 후보 문자열을 좁힌 뒤 검증합니다.
+점수 계산은 쿼리와 매칭되는 postings의 매장에 대해서만 수행됩니다.
 """
 
-import json
 import logging
-from typing import List, Dict, Any, Optional
-from collections import Counter
+from typing import List, Dict, Any, Optional, Iterable, Set
+from collections import Counter, defaultdict
 import re
 
+import numpy as np
+
+try:
+    from .restaurant_catalog import RestaurantCatalog, get_catalog, DEFAULT_RESTAURANTS_PATH
+    from .top_k import top_k_positions, basic_filter_mask
+except ImportError:
+    from restaurant_catalog import RestaurantCatalog, get_catalog, DEFAULT_RESTAURANTS_PATH
+    from top_k import top_k_positions, basic_filter_mask
+
 logger = logging.getLogger(__name__)
 
 
+class SubstringIndex:
+    """문자열 어휘에 대한 부분 문자열 검색 (문자 bigram 역색인)
+    
+    한국어는 '비빔밥' ⊃ '비빔'처럼 띄어쓰기 없는 부분 매칭이 많으므로
+    fragment를 포함하는 문자열은 bigram postings 교집합으로 후보를 좁혀 검증하고,
+    text에 포함되는 문자열은 text의 부분 문자열을 어휘에서 직접 조회합니다.
+    """
+    
+    def __init__(self, strings: Iterable[str]):
+        self.strings = list(dict.fromkeys(strings))
+        self._lookup = set(self.strings)
+        self._max_length = max((len(string) for string in self.strings), default=0)
+        self._bigram_postings: Dict[str, Set[int]] = defaultdict(set)
+        for string_id, string in enumerate(self.strings):
+            for i in range(len(string) - 1):
+                self._bigram_postings[string[i:i + 2]].add(string_id)
+    
+    def containing(self, fragment: str) -> List[str]:
+        """fragment를 부분 문자열로 포함하는 어휘 문자열"""
+        if len(fragment) < 2:
+            return [string for string in self.strings if fragment in string]
+        
+        postings = sorted((self._bigram_postings.get(fragment[i:i + 2], set())
+                           for i in range(len(fragment) - 1)), key=len)
+        candidate_ids = set(postings[0]).intersection(*postings[1:])
+        return [self.strings[string_id] for string_id in candidate_ids
+                if fragment in self.strings[string_id]]
+    
+    def contained_in(self, text: str) -> List[str]:
+        """text의 부분 문자열인 어휘 문자열 (빈 문자열 포함)"""
+        found = {''} if '' in self._lookup else set()
+        for start in range(len(text)):
+            for end in range(start + 1, min(len(text), start + self._max_length) + 1):
+                if text[start:end] in self._lookup:
+                    found.add(text[start:end])
+        return list(found)
+
+
 class ContentFunnel:
     """콘텐츠 기반 후보 생성 Funnel"""
     
-    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json"):
+    # basic_filter_mask에 적용할 필터 키
+    FILTER_KEYS = ('category', 'is_good_influence', 'accepts_meal_card')
+    
+    def __init__(self, restaurants_path: str = DEFAULT_RESTAURANTS_PATH,
+                 catalog: Optional[RestaurantCatalog] = None):
         """
         Args:
             restaurants_path: 매장 데이터 파일 경로
+            catalog: 공유 매장 카탈로그 (없으면 경로별 공유 카탈로그 사용)
         """
         self.restaurants_path = restaurants_path
-        self.restaurants = []
-        self._load_data()
+        self.catalog = catalog if catalog is not None else get_catalog(restaurants_path)
+        self.restaurants = self.catalog.restaurants
+        self.shops = self.catalog.shops
+        logger.info(f"콘텐츠 Funnel: {len(self.shops)}개 매장 데이터 로드 완료")
         self._build_content_index()
     
-    def _load_data(self):
-        """매장 데이터 로드"""
-        try:
-            with open(self.restaurants_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.restaurants = data.get('restaurants', [])
-            
-            logger.info(f"콘텐츠 Funnel: {len(self.restaurants)}개 매장 데이터 로드 완료")
-            
-        except Exception as e:
-            logger.error(f"매장 데이터 로드 실패: {e}")
-            self.restaurants = []
-    
     def _build_content_index(self):
         """콘텐츠 검색을 위한 인덱스 구축"""
         self.content_index = {}
         
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            
-            # 검색 가능한 모든 텍스트 수집
-            searchable_text = []
-            
-            # 매장명
-            shop_name = restaurant.get('shopName', '')
-            if shop_name:
-                searchable_text.append(shop_name)
-            
-            # 카테고리
-            category = restaurant.get('category', '')
-            if category:
-                searchable_text.append(category)
-            
-            # 메뉴명들
-            menus = restaurant.get('menus', [])
-            for menu in menus:
-                menu_name = menu.get('name', '')
-                if menu_name:
-                    searchable_text.append(menu_name)
+        for shop in self.shops:
+            # 검색 가능한 모든 텍스트 수집 (매장명, 카테고리, 메뉴명)
+            searchable_text = [text for text in (shop.shop_name, shop.category) if text]
+            searchable_text.extend(menu.get('name') for menu in shop.raw.get('menus', ())
+                                   if menu.get('name', ''))
             
             # 검색용 텍스트 통합 (소문자 변환)
             combined_text = ' '.join(searchable_text).lower()
-            self.content_index[shop_id] = {
+            self.content_index[shop.shop_id] = {
                 'text': combined_text,
                 'tokens': self._tokenize(combined_text),
-                'menus': [menu.get('name', '').lower() for menu in menus],
-                'category': category.lower()
+                'menus': list(shop.menu_names),
+                'category': shop.category_lower
             }
         
-        logger.info(f"콘텐츠 인덱스 구축 완료: {len(self.content_index)}개 매장")
+        self._build_inverted_index()
+        logger.info(f"콘텐츠 인덱스 구축 완료: {len(self.content_index)}개 매장, "
+                    f"토큰 {len(self.token_postings)}개, 메뉴명 {len(self.menu_postings)}개")
+    
+    def _build_inverted_index(self):
+        """content_index로부터 역색인 구축
+        
+        - menu_postings: 메뉴명 → {shop_id: 매장 내 첫 메뉴 위치}
+        - category_postings: 카테고리 → [shop_id]
+        - token_postings: 토큰 → {shop_id: 매장 내 토큰 첫 등장 순서}
+        - name_postings: 매장명 → [shop_id]
+        """
+        self.shop_positions: Dict[Any, List[int]] = defaultdict(list)
+        self.shop_names: Dict[Any, str] = {}
+        for position, restaurant in enumerate(self.restaurants):
+            self.shop_positions[restaurant.get('shopId', '')].append(position)
+            # 같은 shopId가 여러 번 나오면 첫 매장의 이름 사용 (기존 선형 탐색과 동일)
+            self.shop_names.setdefault(restaurant.get('shopId'), restaurant.get('shopName', '').lower())
+        
+        self.menu_postings: Dict[str, Dict[Any, int]] = defaultdict(dict)
+        self.category_postings: Dict[str, List[Any]] = defaultdict(list)
+        self.token_postings: Dict[str, Dict[Any, int]] = defaultdict(dict)
+        
+        for shop_id, index_data in self.content_index.items():
+            for menu_position, menu_name in enumerate(index_data['menus']):
+                self.menu_postings[menu_name].setdefault(shop_id, menu_position)
+            
+            self.category_postings[index_data['category']].append(shop_id)
+            
+            for rank, token in enumerate(dict.fromkeys(index_data['tokens'])):
+                self.token_postings[token][shop_id] = rank
+        
+        self.name_postings: Dict[str, List[Any]] = defaultdict(list)
+        for shop_id in self.content_index:
+            if shop_id in self.shop_names:
+                self.name_postings[self.shop_names[shop_id]].append(shop_id)
+        
+        self.menu_index = SubstringIndex(self.menu_postings)
+        self.token_index = SubstringIndex(self.token_postings)
+        self.name_index = SubstringIndex(self.name_postings)
     
     def _tokenize(self, text: str) -> List[str]:
         """텍스트를 토큰으로 분리"""
@@ -107,110 +173,138 @@ class ContentFunnel:
         if not query_tokens:
             return []
         
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            
-            # 콘텐츠 매칭 점수 계산
-            content_score, match_reasons = self._calculate_content_score(
-                shop_id, query_tokens, query.lower()
-            )
-            
-            # 점수가 0이면 건너뛰기
-            if content_score <= 0:
-                continue
-            
-            # 기본 필터 적용
-            if not self._passes_basic_filters(restaurant, filters or {}):
-                continue
-            
+        # 역색인으로 매칭되는 매장만 점수 계산
+        matches = self._match_shops(query_tokens, query.lower())
+        shop_scores = matches['scores']
+        
+        # 매칭된 매장 위치/점수 배열 (shopId가 겹치는 매장은 모두 같은 점수)
+        positions, scores = [], []
+        for shop_id, score in shop_scores.items():
+            if score > 0:
+                for position in self.shop_positions.get(shop_id, ()):
+                    positions.append(position)
+                    scores.append(score)
+        positions = np.array(positions, dtype=np.int64)
+        scores = np.array(scores, dtype=np.float64)
+        
+        # 필터 통과 매장 중 점수 내림차순(동점은 매장 순서) 상위 limit개만 후보 dict/이유 생성
+        passes = basic_filter_mask(self.catalog, filters, self.FILTER_KEYS)[positions]
+        for position in top_k_positions(positions, scores, limit, passes):
+            shop = self.shops[position]
+            shop_id = shop.shop_id
             candidate = {
                 'shop_id': shop_id,
-                'shop_name': restaurant.get('shopName', ''),
-                'category': restaurant.get('category', ''),
+                'shop_name': shop.shop_name,
+                'category': shop.category,
                 'funnel_source': 'content',
-                'content_score': content_score,
-                'reason': self._format_match_reason(match_reasons, query)
+                'content_score': shop_scores[shop_id],
+                'reason': self._format_match_reason(self._match_reasons(shop_id, matches), query)
             }
             candidates.append(candidate)
         
-        # 콘텐츠 점수로 정렬
-        candidates.sort(key=lambda x: x['content_score'], reverse=True)
-        
-        logger.info(f"콘텐츠 Funnel: {len(candidates[:limit])}개 후보 생성 (쿼리: '{query}')")
-        return candidates[:limit]
+        logger.info(f"콘텐츠 Funnel: {len(candidates)}개 후보 생성 (쿼리: '{query}')")
+        return candidates
     
-    def _calculate_content_score(self, shop_id: str, query_tokens: List[str], query: str) -> tuple[float, List[str]]:
-        """콘텐츠 매칭 점수 계산"""
-        if shop_id not in self.content_index:
-            return 0.0, []
+    def _match_shops(self, query_tokens: List[str], query: str) -> Dict[str, Any]:
+        """postings에 등장하는 매장들의 콘텐츠 매칭 점수 계산
         
-        index_data = self.content_index[shop_id]
-        score = 0.0
-        match_reasons = []
+        역색인 도입 전 매장별 점수 계산(test_content_funnel_index.py의 reference_candidates)과
+        같은 점수를 계산하지만
+        쿼리와 관련된 메뉴명·카테고리·토큰·매장명의 postings만 순회합니다.
         
-        # 1. 정확한 메뉴명 매칭 (최우선, 50점)
-        for menu_name in index_data['menus']:
-            if query in menu_name or menu_name in query:
-                score += 50
-                match_reasons.append(f"메뉴 '{menu_name}' 매칭")
-                break
-        
-        # 2. 카테고리 매칭 (30점)
-        category = index_data['category']
-        if any(token in category for token in query_tokens) or query in category:
-            score += 30
-            match_reasons.append(f"카테고리 '{category}' 매칭")
+        Returns:
+            scores(shop_id → 점수)와 매칭 이유 생성에 쓰는 항목별 매칭 결과
+        """
+        # 1. 메뉴명 매칭: 쿼리를 포함하거나 쿼리에 포함되는 메뉴명 (매장 내 첫 메뉴 기준)
+        menu_matches: Dict[Any, tuple] = {}
+        for menu_name in set(self.menu_index.containing(query)) | set(self.menu_index.contained_in(query)):
+            for shop_id, menu_position in self.menu_postings[menu_name].items():
+                if shop_id not in menu_matches or menu_position < menu_matches[shop_id][0]:
+                    menu_matches[shop_id] = (menu_position, menu_name)
         
-        # 3. 토큰 기반 부분 매칭 (토큰당 5점, 최대 25점)
-        content_tokens = index_data['tokens']
-        matched_tokens = []
+        # 2. 카테고리 매칭 (카테고리 어휘는 작으므로 직접 비교)
+        category_matches = set()
+        for category, shop_ids in self.category_postings.items():
+            if any(token in category for token in query_tokens) or query in category:
+                category_matches.update(shop_ids)
         
-        for query_token in query_tokens:
-            for content_token in content_tokens:
-                if query_token in content_token or content_token in query_token:
-                    if content_token not in matched_tokens:
-                        score += 5
-                        matched_tokens.append(content_token)
-                        break
+        # 3. 토큰 부분 매칭 개수
+        token_match_counts = self._count_token_matches(query_tokens)
         
-        if matched_tokens:
-            # 최대 25점으로 제한
-            token_score = min(len(matched_tokens) * 5, 25)
-            score = score - len(matched_tokens) * 5 + token_score  # 위에서 더한 것 조정
-            if len(matched_tokens) > 1:
-                match_reasons.append(f"키워드 {len(matched_tokens)}개 매칭")
+        # 4. 매장명 매칭
+        name_matches = set()
+        for fragment in set(query_tokens) | {query}:
+            for shop_name in self.name_index.containing(fragment):
+                name_matches.update(self.name_postings[shop_name])
         
-        # 4. 매장명 매칭 (15점)
-        shop_name_tokens = self._tokenize(query)
-        for restaurant in self.restaurants:
-            if restaurant.get('shopId') == shop_id:
-                shop_name = restaurant.get('shopName', '').lower()
-                if any(token in shop_name for token in shop_name_tokens) or query in shop_name:
-                    score += 15
-                    match_reasons.append("매장명 매칭")
-                break
+        scores = {}
+        for shop_id in set(menu_matches) | category_matches | set(token_match_counts) | name_matches:
+            score = 0.0
+            if shop_id in menu_matches:
+                score += 50
+            if shop_id in category_matches:
+                score += 30
+            if shop_id in token_match_counts:
+                score += min(token_match_counts[shop_id] * 5, 25)
+            if shop_id in name_matches:
+                score += 15
+            scores[shop_id] = score
         
-        return score, match_reasons
+        return {
+            'scores': scores,
+            'menu': menu_matches,
+            'category': category_matches,
+            'token': token_match_counts,
+            'name': name_matches
+        }
     
-    def _passes_basic_filters(self, restaurant: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-        """기본 필터 조건 확인"""
-        # 카테고리 필터
-        if filters.get('category'):
-            category_filter = filters['category'].lower()
-            if category_filter not in restaurant.get('category', '').lower():
-                return False
+    def _count_token_matches(self, query_tokens: List[str]) -> Dict[Any, int]:
+        """매장별 토큰 부분 매칭 개수
         
-        # 착한가게 필터
-        if filters.get('is_good_influence'):
-            if not restaurant.get('attributes', {}).get('isGoodShop', False):
-                return False
+        쿼리 토큰 순서대로, 매장 토큰 등장 순서상 아직 매칭되지 않은 첫 토큰을 선택하는
+        기존 방식과 같은 개수를 계산합니다.
+        """
+        token_hits: List[Dict[Any, List[tuple]]] = []
+        for query_token in query_tokens:
+            related_tokens = set(self.token_index.containing(query_token)) | \
+                set(self.token_index.contained_in(query_token))
+            hits: Dict[Any, List[tuple]] = defaultdict(list)
+            for content_token in related_tokens:
+                for shop_id, rank in self.token_postings[content_token].items():
+                    hits[shop_id].append((rank, content_token))
+            token_hits.append(hits)
         
-        # 급식카드 필터
-        if filters.get('accepts_meal_card'):
-            if not restaurant.get('attributes', {}).get('acceptsMealCard', False):
-                return False
+        counts: Dict[Any, int] = {}
+        for hits in token_hits:
+            for shop_id in hits:
+                counts[shop_id] = counts.get(shop_id, 0) + 1
         
-        return True
+        # 둘 이상의 쿼리 토큰이 후보를 가진 매장만 토큰 선택 순서를 따져야 함
+        for shop_id, num_hit_tokens in counts.items():
+            if num_hit_tokens < 2:
+                continue
+            matched_tokens = set()
+            for hits in token_hits:
+                for _, content_token in sorted(hits.get(shop_id, ())):
+                    if content_token not in matched_tokens:
+                        matched_tokens.add(content_token)
+                        break
+            counts[shop_id] = len(matched_tokens)
+        
+        return counts
+    
+    def _match_reasons(self, shop_id: Any, matches: Dict[str, Any]) -> List[str]:
+        """_match_shops 결과로 매장의 매칭 이유 목록 생성"""
+        match_reasons = []
+        if shop_id in matches['menu']:
+            match_reasons.append(f"메뉴 '{matches['menu'][shop_id][1]}' 매칭")
+        if shop_id in matches['category']:
+            match_reasons.append(f"카테고리 '{self.content_index[shop_id]['category']}' 매칭")
+        if matches['token'].get(shop_id, 0) > 1:
+            match_reasons.append(f"키워드 {matches['token'][shop_id]}개 매칭")
+        if shop_id in matches['name']:
+            match_reasons.append("매장명 매칭")
+        return match_reasons
     
     def _format_match_reason(self, match_reasons: List[str], query: str) -> str:
         """매칭 이유 포맷팅"""
@@ -3,39 +3,66 @@
 시간대, 위치, 영업시간 등 컨텍스트 기반 추천
 """
 
-import json
 import logging
 from typing import List, Dict, Any, Optional
-from datetime import datetime, time
+from datetime import datetime
 import math
 
+import numpy as np
+
+try:
+    from .restaurant_catalog import RestaurantCatalog, ShopRecord, get_catalog, DEFAULT_RESTAURANTS_PATH
+    from .opening_hours import STATUS_UNKNOWN, STATUS_OPEN, STATUS_OPENS_SOON, STATUS_CLOSED
+    from .top_k import top_k_indices, basic_filter_mask
+except ImportError:
+    from restaurant_catalog import RestaurantCatalog, ShopRecord, get_catalog, DEFAULT_RESTAURANTS_PATH
+    from opening_hours import STATUS_UNKNOWN, STATUS_OPEN, STATUS_OPENS_SOON, STATUS_CLOSED
+    from top_k import top_k_indices, basic_filter_mask
+
 logger = logging.getLogger(__name__)
 
 
 class ContextualFunnel:
     """상황/규칙 기반 후보 생성 Funnel"""
     
-    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json"):
+    # basic_filter_mask에 적용할 필터 키
+    FILTER_KEYS = ('category', 'is_good_influence')
+    
+    # 시간대별 카테고리 선호도
+    TIME_CATEGORY_PREFERENCES = {
+        'breakfast': {
+            '카페': 30, '기타/디저트': 25, '베이커리': 30,
+            '한식': 15, '분식': 20
+        },
+        'lunch': {
+            '한식': 30, '중식': 25, '일식': 25, '분식': 20,
+            '양식': 20, '치킨': 15
+        },
+        'dinner': {
+            '한식': 25, '중식': 25, '일식': 25, '양식': 30,
+            '치킨': 30, '고기': 30, '분식': 15
+        },
+        'snack': {
+            '카페': 30, '기타/디저트': 30, '치킨': 25,
+            '분식': 25, '베이커리': 20
+        }
+    }
+    
+    def __init__(self, restaurants_path: str = DEFAULT_RESTAURANTS_PATH,
+                 catalog: Optional[RestaurantCatalog] = None):
         """
         Args:
             restaurants_path: 매장 데이터 파일 경로
+            catalog: 공유 매장 카탈로그 (없으면 경로별 공유 카탈로그 사용)
         """
         self.restaurants_path = restaurants_path
-        self.restaurants = []
-        self._load_data()
-    
-    def _load_data(self):
-        """매장 데이터 로드"""
-        try:
-            with open(self.restaurants_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.restaurants = data.get('restaurants', [])
-            
-            logger.info(f"상황 Funnel: {len(self.restaurants)}개 매장 데이터 로드 완료")
-            
-        except Exception as e:
-            logger.error(f"매장 데이터 로드 실패: {e}")
-            self.restaurants = []
+        self.catalog = catalog if catalog is not None else get_catalog(restaurants_path)
+        self.shops = self.catalog.shops
+        self.opening_hours = self.catalog.opening_hours
+        # 사용자 위치와 다른 구일 때의 지역 점수 (서울 20 / 경기 10 / 기타 5)
+        self._region_scores = np.select(
+            [self.catalog.address_mask('서울'), self.catalog.address_mask('경기')], [20.0, 10.0], default=5.0)
+        logger.info(f"상황 Funnel: {len(self.shops)}개 매장 데이터 로드 완료")
     
     def get_candidates(self, 
                       user_location: Optional[str] = None,
@@ -61,145 +88,72 @@ class ContextualFunnel:
         
         candidates = []
         
-        for restaurant in self.restaurants:
-            # 컨텍스트 점수 계산
-            context_score = self._calculate_context_score(
-                restaurant, user_location, current_time, time_of_day
-            )
-            
-            # 기본 필터 적용
-            if not self._passes_basic_filters(restaurant, filters or {}):
-                continue
-            
-            shop_id = restaurant.get('shopId', '')
+        # 전체 매장의 영업 상태를 한 번에 조회 (영업 중 / 1시간 이내 시작 / 영업 외 / 정보 없음)
+        operating_status = self.opening_hours.status_at(current_time, soon_minutes=60)
+        
+        # 전체 매장 컨텍스트 점수를 배열로 계산하고 상위 limit개에만 후보 dict/이유 생성
+        context_scores = self._calculate_context_scores(user_location, operating_status, time_of_day)
+        mask = basic_filter_mask(self.catalog, filters, self.FILTER_KEYS)
+        
+        for position in top_k_indices(context_scores, limit, mask):
+            shop = self.shops[position]
             candidate = {
-                'shop_id': shop_id,
-                'shop_name': restaurant.get('shopName', ''),
-                'category': restaurant.get('category', ''),
+                'shop_id': shop.shop_id,
+                'shop_name': shop.shop_name,
+                'category': shop.category,
                 'funnel_source': 'contextual',
-                'context_score': context_score,
+                'context_score': float(context_scores[position]),
                 'reason': self._get_context_reason(
-                    restaurant, user_location, current_time, time_of_day
+                    shop, user_location, operating_status[position], time_of_day
                 )
             }
             candidates.append(candidate)
         
-        # 컨텍스트 점수로 정렬
-        candidates.sort(key=lambda x: x['context_score'], reverse=True)
-        
-        logger.info(f"상황 Funnel: {len(candidates[:limit])}개 후보 생성 (위치: {user_location}, 시간: {time_of_day})")
-        return candidates[:limit]
+        logger.info(f"상황 Funnel: {len(candidates)}개 후보 생성 (위치: {user_location}, 시간: {time_of_day})")
+        return candidates
     
-    def _calculate_context_score(self, 
-                                restaurant: Dict[str, Any],
-                                user_location: Optional[str],
-                                current_time: datetime,
-                                time_of_day: Optional[str]) -> float:
-        """상황 기반 점수 계산"""
-        score = 0.0
+    def _calculate_context_scores(self,
+                                  user_location: Optional[str],
+                                  operating_status: np.ndarray,
+                                  time_of_day: Optional[str]) -> np.ndarray:
+        """전체 매장의 상황 기반 점수 배열 (위치 + 영업시간 + 시간대)"""
+        scores = np.zeros(len(self.shops), dtype=np.float64)
         
         # 1. 위치 기반 점수 (최대 40점)
         if user_location:
-            location_score = self._get_location_score(restaurant, user_location)
-            score += location_score
+            scores += np.where(self.catalog.address_mask(user_location), 40.0, self._region_scores)
         
-        # 2. 영업시간 기반 점수 (최대 30점)
-        operating_score = self._get_operating_score(restaurant, current_time)
-        score += operating_score
+        # 2. 영업시간 기반 점수 (최대 30점) - 상태 코드별 점수표 조회
+        status_scores = np.array([self._get_operating_score(status) for status in range(STATUS_CLOSED + 1)])
+        scores += status_scores[operating_status]
         
-        # 3. 시간대 기반 점수 (최대 30점)
+        # 3. 시간대 기반 점수 (최대 30점) - 카테고리 코드별 점수표 조회
         if time_of_day:
-            time_score = self._get_time_of_day_score(restaurant, time_of_day)
-            score += time_score
+            category_scores = np.array([self._get_category_time_score(category, time_of_day)
+                                        for category in self.catalog.category_codes], dtype=np.float64)
+            scores += category_scores[self.catalog.columns.category_code]
         
-        return score
+        return scores
     
-    def _get_location_score(self, restaurant: Dict[str, Any], user_location: str) -> float:
-        """위치 기반 점수 계산"""
-        address = restaurant.get('location', {}).get('address', '')
-        
-        # 같은 구에 있으면 높은 점수
-        if user_location in address:
-            return 40.0
-        
-        # 서울 지역이면 중간 점수
-        if '서울' in address:
-            return 20.0
-        
-        # 경기도면 낮은 점수
-        if '경기' in address:
-            return 10.0
-        
-        return 5.0  # 기본 점수
-    
-    def _get_operating_score(self, restaurant: Dict[str, Any], current_time: datetime) -> float:
+    def _get_operating_score(self, operating_status: int) -> float:
         """영업시간 기반 점수 계산"""
-        hours = restaurant.get('hours', {})
-        open_time_str = hours.get('open')
-        close_time_str = hours.get('close')
+        # 영업시간 정보가 없거나 파싱 실패
+        if operating_status == STATUS_UNKNOWN:
+            return 10.0
         
-        if not (open_time_str and close_time_str):
-            return 10.0  # 정보 없으면 기본 점수
+        # 현재 영업 중이면 높은 점수
+        if operating_status == STATUS_OPEN:
+            return 30.0
         
-        try:
-            current_time_only = current_time.time()
-            open_time = datetime.strptime(open_time_str, '%H:%M').time()
-            close_time = datetime.strptime(close_time_str, '%H:%M').time()
-            
-            # 현재 영업 중이면 높은 점수
-            if self._is_open_now(current_time_only, open_time, close_time):
-                return 30.0
-            
-            # 곧 열 예정이면 중간 점수 (1시간 이내)
-            if self._opens_soon(current_time_only, open_time):
-                return 15.0
-            
-            return 5.0  # 영업시간 외
-            
-        except ValueError:
-            return 10.0  # 시간 파싱 실패
-    
-    def _is_open_now(self, current_time: time, open_time: time, close_time: time) -> bool:
-        """현재 영업 중인지 확인"""
-        if close_time < open_time:  # 자정 넘어서 영업 (예: 22:00 - 02:00)
-            return current_time >= open_time or current_time <= close_time
-        else:  # 일반적인 경우
-            return open_time <= current_time <= close_time
-    
-    def _opens_soon(self, current_time: time, open_time: time) -> bool:
-        """1시간 이내에 열 예정인지 확인"""
-        current_minutes = current_time.hour * 60 + current_time.minute
-        open_minutes = open_time.hour * 60 + open_time.minute
+        # 곧 열 예정이면 중간 점수 (1시간 이내)
+        if operating_status == STATUS_OPENS_SOON:
+            return 15.0
         
-        # 1시간(60분) 이내에 열 예정
-        time_diff = (open_minutes - current_minutes) % (24 * 60)
-        return 0 < time_diff <= 60
+        return 5.0  # 영업시간 외
     
-    def _get_time_of_day_score(self, restaurant: Dict[str, Any], time_of_day: str) -> float:
-        """시간대 기반 점수 계산"""
-        category = restaurant.get('category', '').lower()
-        
-        # 시간대별 카테고리 선호도
-        time_category_preferences = {
-            'breakfast': {
-                '카페': 30, '기타/디저트': 25, '베이커리': 30,
-                '한식': 15, '분식': 20
-            },
-            'lunch': {
-                '한식': 30, '중식': 25, '일식': 25, '분식': 20,
-                '양식': 20, '치킨': 15
-            },
-            'dinner': {
-                '한식': 25, '중식': 25, '일식': 25, '양식': 30,
-                '치킨': 30, '고기': 30, '분식': 15
-            },
-            'snack': {
-                '카페': 30, '기타/디저트': 30, '치킨': 25,
-                '분식': 25, '베이커리': 20
-            }
-        }
-        
-        preferences = time_category_preferences.get(time_of_day, {})
+    def _get_category_time_score(self, category: str, time_of_day: str) -> float:
+        """카테고리(소문자)의 시간대 점수"""
+        preferences = self.TIME_CATEGORY_PREFERENCES.get(time_of_day, {})
         
         # 카테고리 매칭으로 점수 계산
         for cat_keyword, score in preferences.items():
@@ -208,53 +162,27 @@ class ContextualFunnel:
         
         return 10.0  # 기본 점수
     
-    def _passes_basic_filters(self, restaurant: Dict[str, Any], filters: Dict[str, Any]) -> bool:
-        """기본 필터 조건 확인"""
-        # 카테고리 필터
-        if filters.get('category'):
-            category_filter = filters['category'].lower()
-            if category_filter not in restaurant.get('category', '').lower():
-                return False
-        
-        # 착한가게 필터
-        if filters.get('is_good_influence'):
-            if not restaurant.get('attributes', {}).get('isGoodShop', False):
-                return False
-        
-        return True
-    
     def _get_context_reason(self, 
-                           restaurant: Dict[str, Any],
+                           shop: ShopRecord,
                            user_location: Optional[str],
-                           current_time: datetime,
+                           operating_status: int,
                            time_of_day: Optional[str]) -> str:
         """상황 기반 추천 이유 생성"""
         reasons = []
         
         # 위치 이유
         if user_location:
-            address = restaurant.get('location', {}).get('address', '')
-            if user_location in address:
+            if user_location in shop.address:
                 reasons.append(f'{user_location} 근처')
         
         # 영업시간 이유
-        hours = restaurant.get('hours', {})
-        if hours.get('open') and hours.get('close'):
-            try:
-                current_time_only = current_time.time()
-                open_time = datetime.strptime(hours['open'], '%H:%M').time()
-                close_time = datetime.strptime(hours['close'], '%H:%M').time()
-                
-                if self._is_open_now(current_time_only, open_time, close_time):
-                    reasons.append('현재 영업중')
-                elif self._opens_soon(current_time_only, open_time):
-                    reasons.append('곧 영업 시작')
-            except:
-                pass
+        if operating_status == STATUS_OPEN:
+            reasons.append('현재 영업중')
+        elif operating_status == STATUS_OPENS_SOON:
+            reasons.append('곧 영업 시작')
         
         # 시간대 이유
         if time_of_day:
-            category = restaurant.get('category', '').lower()
             time_reasons = {
                 'breakfast': '아침 추천',
                 'lunch': '점심 추천', 
@@ -10,6 +10,13 @@ from datetime import datetime, time
 import logging
 from dataclasses import dataclass
 
+try:
+    from .restaurant_catalog import RestaurantCatalog
+    from .opening_hours import STATUS_OPEN
+except ImportError:
+    from restaurant_catalog import RestaurantCatalog
+    from opening_hours import STATUS_OPEN
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,8 +46,15 @@ class FeatureConfig:
 class FeatureEngineer:
     """Layer 1 후보를 Layer 2 특성으로 변환"""
     
-    def __init__(self, config: Optional[FeatureConfig] = None):
+    def __init__(self, config: Optional[FeatureConfig] = None,
+                 catalog: Optional[RestaurantCatalog] = None):
+        """
+        Args:
+            config: 특성 엔지니어링 설정
+            catalog: 매장 카탈로그 (있으면 영업시간 타임라인으로 영업 여부 계산)
+        """
         self.config = config or FeatureConfig()
+        self.catalog = catalog
         
         # 특성 인덱스 매핑
         self._init_feature_mappings()
@@ -112,7 +126,7 @@ class FeatureEngineer:
         features[4] = np.max(scores)  # 최대 점수
         features[5] = np.mean(scores)  # 평균 점수
         features[6] = np.std(scores)  # 점수 표준편차
-        features[7] = len(candidate.get('funnel_sources', [candidate.get('funnel_source', '')]).split(' + '))
+        features[7] = len(candidate.get('funnel_sources') or candidate.get('funnel_source', '').split(' + '))
         
         # 매장 특성들
         features[10] = 1.0 if candidate.get('is_good_price', False) else 0.0
@@ -243,8 +257,17 @@ class FeatureEngineer:
     
     def _is_shop_open_now(self, candidate: Dict[str, Any], context: Dict[str, Any]) -> float:
         """현재 시간에 매장이 열려있는지"""
-        # 실제로는 영업시간 데이터 필요
-        current_hour = context.get('current_time', datetime.now()).hour
+        current_time = context.get('current_time', datetime.now())
+        
+        # 카탈로그의 영업시간 타임라인 (같은 시각은 전체 매장 상태 배열을 재사용)
+        if self.catalog is not None:
+            shop = self.catalog.get(candidate.get('shop_id'))
+            timeline = self.catalog.opening_hours
+            if shop is not None and timeline.known[shop.position]:
+                return 1.0 if timeline.status_at(current_time)[shop.position] == STATUS_OPEN else 0.0
+        
+        # 영업시간 정보가 없으면 기본 영업시간 가정
+        current_hour = current_time.hour
         if 9 <= current_hour <= 22:  # 기본 영업시간
             return 1.0
         return 0.0
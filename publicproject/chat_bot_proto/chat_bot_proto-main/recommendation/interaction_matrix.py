@@ -0,0 +1,377 @@
+"""
+사용자×매장 상호작용 행렬과 암시적 피드백 행렬 분해 (협업 필터링 Funnel용)
+
+- LearningDataCollector가 남긴 raw/recommendations_*.jsonl, raw/feedback_*.jsonl을
+  (사용자, 매장, 가중치) 상호작용으로 변환해 희소 CSR 행렬로 구축
+- 오프라인에서 implicit ALS(Hu, Koren, Volinsky 2008)로 사용자/매장 잠재 요인 학습
+- 온라인 조회는 매장 요인 행렬 × 사용자 벡터 한 번과 argpartition으로 상위 N개 선택
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Sequence
+
+import numpy as np
+from scipy import sparse
+
+try:
+    from .top_k import top_k_indices
+except ImportError:
+    from top_k import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEARNING_DATA_PATH = "outputs/learning_data"
+DEFAULT_COLLABORATIVE_MODEL_PATH = "outputs/learning_data/processed/collaborative_als.npz"
+
+# 상호작용 종류별 가중치 (같은 사용자·매장의 상호작용은 합산)
+INTERACTION_WEIGHTS = {
+    'impression': 0.1,   # 추천 목록에 노출됨
+    'selection': 3.0,    # 추천 중 선택 (user_selection, selection 피드백)
+    'rating': 1.0,       # 평점 3점 초과분 1점당 (3점 이하는 선호 신호 없음으로 보고 제외)
+    'implicit': 1.0,     # 암시적 피드백 (재방문, 상세 조회 등)
+    'text': 0.5          # 매장이 지정된 텍스트 피드백
+}
+
+Interaction = Tuple[str, str, float]
+
+
+def _shop_id_of(value: Any) -> Optional[str]:
+    """추천/피드백 항목에서 매장 ID 추출 (정수 ID는 문자열로 통일)"""
+    if isinstance(value, dict):
+        value = value.get('shop_id', value.get('shopId'))
+    if value is None or isinstance(value, (dict, list, bool)):
+        return None
+    shop_id = str(value)
+    return shop_id or None
+
+
+def _feedback_weight(feedback_type: str, content: Any) -> float:
+    """피드백 한 건의 가중치 (0이면 선호 신호 없음)"""
+    if feedback_type == 'rating':
+        rating = content.get('rating') if isinstance(content, dict) else content
+        if not isinstance(rating, (int, float)) or isinstance(rating, bool):
+            return 0.0
+        return max(float(rating) - 3.0, 0.0) * INTERACTION_WEIGHTS['rating']
+    return INTERACTION_WEIGHTS.get(feedback_type, 0.0)
+
+
+def parse_interaction_record(record: Dict[str, Any]) -> Iterator[Interaction]:
+    """LearningDataCollector 레코드 한 건 → (user_id, shop_id, weight) 상호작용"""
+    user_id = record.get('user_id')
+    if not user_id:
+        return
+    user_id = str(user_id)
+    data_type = record.get('data_type')
+
+    if data_type == 'recommendation':
+        for recommendation in record.get('recommendations') or ():
+            shop_id = _shop_id_of(recommendation)
+            if shop_id:
+                yield user_id, shop_id, INTERACTION_WEIGHTS['impression']
+        shop_id = _shop_id_of(record.get('user_selection'))
+        if shop_id:
+            yield user_id, shop_id, INTERACTION_WEIGHTS['selection']
+
+    elif data_type == 'feedback':
+        content = record.get('feedback_content')
+        # 피드백 내용이 문자열/숫자(텍스트, 평점)면 매장 ID는 context에서
+        shop_id = (_shop_id_of(content) if isinstance(content, dict) else None) \
+            or _shop_id_of(record.get('context') or {})
+        weight = _feedback_weight(record.get('feedback_type', ''), content)
+        if shop_id and weight > 0:
+            yield user_id, shop_id, weight
+
+
+def iter_interactions(log_dir: str = DEFAULT_LEARNING_DATA_PATH) -> Iterator[Interaction]:
+    """수집기 저장 경로의 추천/피드백 로그에서 상호작용 읽기 (깨진 줄은 건너뜀)"""
+    raw_dir = Path(log_dir) / "raw"
+    files = sorted(raw_dir.glob("recommendations_*.jsonl")) + sorted(raw_dir.glob("feedback_*.jsonl"))
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"상호작용 로그 파싱 실패: {file_path}:{line_number}")
+                    continue
+                if isinstance(record, dict):
+                    yield from parse_interaction_record(record)
+
+
+class InteractionMatrix:
+    """사용자×매장 암시적 피드백 희소 행렬 (CSR, float32)"""
+
+    def __init__(self, matrix: sparse.csr_matrix, user_ids: Sequence[str], shop_ids: Sequence[str]):
+        self.matrix = matrix
+        self.user_ids: List[str] = list(user_ids)
+        self.shop_ids: List[str] = list(shop_ids)
+        self.user_index: Dict[str, int] = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.shop_index: Dict[str, int] = {shop_id: i for i, shop_id in enumerate(self.shop_ids)}
+
+    @classmethod
+    def from_interactions(cls, interactions: Iterable[Interaction],
+                          shop_ids: Optional[Sequence[str]] = None) -> 'InteractionMatrix':
+        """
+        Args:
+            interactions: (user_id, shop_id, weight) 목록
+            shop_ids: 열 순서로 쓸 매장 ID (예: 카탈로그 순서). 지정하면 목록에 없는 매장은 제외
+        """
+        user_index: Dict[str, int] = {}
+        if shop_ids is not None:
+            shop_index = {}
+            for shop_id in shop_ids:
+                shop_index.setdefault(shop_id, len(shop_index))
+            fixed_columns = True
+        else:
+            shop_index = {}
+            fixed_columns = False
+
+        rows: List[int] = []
+        cols: List[int] = []
+        weights: List[float] = []
+        skipped = 0
+        for user_id, shop_id, weight in interactions:
+            col = shop_index.get(shop_id)
+            if col is None:
+                if fixed_columns:
+                    skipped += 1
+                    continue
+                col = shop_index[shop_id] = len(shop_index)
+            rows.append(user_index.setdefault(user_id, len(user_index)))
+            cols.append(col)
+            weights.append(weight)
+
+        if skipped:
+            logger.info(f"상호작용 행렬: 카탈로그에 없는 매장 상호작용 {skipped}건 제외")
+
+        shape = (len(user_index), len(shop_index))
+        # COO → CSR 변환 시 같은 (사용자, 매장) 가중치는 합산됨
+        matrix = sparse.coo_matrix(
+            (np.asarray(weights, dtype=np.float32),
+             (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))),
+            shape=shape
+        ).tocsr()
+        matrix.sum_duplicates()
+        return cls(matrix, user_index.keys(), shop_index.keys())
+
+    @classmethod
+    def from_log_dir(cls, log_dir: str = DEFAULT_LEARNING_DATA_PATH,
+                     shop_ids: Optional[Sequence[str]] = None) -> 'InteractionMatrix':
+        """LearningDataCollector 저장 경로에서 구축"""
+        return cls.from_interactions(iter_interactions(log_dir), shop_ids=shop_ids)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.matrix.shape
+
+    def get_stats(self) -> Dict[str, Any]:
+        """행렬 통계"""
+        num_users, num_shops = self.matrix.shape
+        return {
+            'users': num_users,
+            'shops': num_shops,
+            'interactions': int(self.matrix.nnz),
+            'density': self.matrix.nnz / (num_users * num_shops) if num_users and num_shops else 0.0
+        }
+
+
+class ImplicitALSModel:
+    """암시적 피드백 ALS 행렬 분해 모델
+
+    신뢰도 c_ui = 1 + alpha·r_ui, 선호 p_ui = [r_ui >= preference_threshold]로 두고
+    사용자/매장 요인을 번갈아 닫힌 해로 갱신합니다. 행마다 선형계를 푸는 대신
+    상호작용 수가 비슷한 행끼리 묶어 배치 행렬곱 + 배치 solve로 계산합니다.
+    """
+
+    def __init__(self, user_ids: Sequence[str], shop_ids: Sequence[str],
+                 user_factors: np.ndarray, item_factors: np.ndarray,
+                 seen: Optional[sparse.csr_matrix] = None,
+                 params: Optional[Dict[str, Any]] = None):
+        self.user_ids: List[str] = list(user_ids)
+        self.shop_ids: List[str] = list(shop_ids)
+        self.user_index: Dict[str, int] = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.shop_index: Dict[str, int] = {shop_id: i for i, shop_id in enumerate(self.shop_ids)}
+        self.user_factors = np.ascontiguousarray(user_factors, dtype=np.float32)
+        self.item_factors = np.ascontiguousarray(item_factors, dtype=np.float32)
+        # 사용자가 이미 상호작용한 매장 (exclude_seen 용)
+        self.seen = seen if seen is not None else sparse.csr_matrix((len(self.user_ids), len(self.shop_ids)),
+                                                                    dtype=np.float32)
+        self.params = dict(params or {})
+
+    # ------------------------------------------------------------------
+    # 학습 (오프라인)
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def fit(cls, interactions: InteractionMatrix, factors: int = 32, regularization: float = 0.1,
+            alpha: float = 10.0, iterations: int = 10, preference_threshold: float = 1.0,
+            seed: int = 42) -> 'ImplicitALSModel':
+        """상호작용 행렬로 학습
+
+        노출만 되고 선택되지 않은 매장(가중치 < preference_threshold)은 선호 0으로,
+        반복 노출될수록 더 높은 신뢰도의 비선호로 학습됩니다.
+        """
+        start = time.perf_counter()
+        user_items = interactions.matrix.astype(np.float32).tocsr()
+        item_users = user_items.T.tocsr()
+        num_users, num_items = user_items.shape
+
+        rng = np.random.default_rng(seed)
+        user_factors = np.zeros((num_users, factors), dtype=np.float32)
+        item_factors = (rng.standard_normal((num_items, factors)) * 0.01).astype(np.float32)
+
+        for _ in range(iterations):
+            user_factors = cls._solve_factors(user_items, item_factors, regularization, alpha,
+                                              preference_threshold)
+            item_factors = cls._solve_factors(item_users, user_factors, regularization, alpha,
+                                              preference_threshold)
+
+        params = {'factors': factors, 'regularization': regularization, 'alpha': alpha,
+                  'preference_threshold': preference_threshold,
+                  'iterations': iterations, 'fit_time': time.perf_counter() - start}
+        logger.info(f"ALS 학습 완료: 사용자 {num_users}명 × 매장 {num_items}개, "
+                    f"상호작용 {user_items.nnz}건 ({params['fit_time']:.1f}초)")
+        return cls(interactions.user_ids, interactions.shop_ids, user_factors, item_factors,
+                   seen=user_items, params=params)
+
+    @staticmethod
+    def _solve_factors(rows: sparse.csr_matrix, fixed: np.ndarray, regularization: float,
+                       alpha: float, preference_threshold: float = 1.0,
+                       batch_elements: int = 1 << 21) -> np.ndarray:
+        """고정된 상대편 요인으로 각 행의 요인을 닫힌 해로 계산
+
+        x_u = (YᵀY + Yᵤᵀ(Cᵤ - I)Yᵤ + λI)⁻¹ Yᵤᵀ Cᵤ pᵤ
+        """
+        num_rows = rows.shape[0]
+        factors = fixed.shape[1]
+        solved = np.zeros((num_rows, factors), dtype=np.float32)
+
+        gram = (fixed.T @ fixed).astype(np.float64) + regularization * np.eye(factors)
+        degrees = np.diff(rows.indptr)
+        # 상호작용 수 순으로 정렬해 배치 내 패딩 최소화 (상호작용 없는 행은 0 벡터)
+        order = np.argsort(degrees, kind='stable')
+        order = order[degrees[order] > 0]
+
+        start = 0
+        while start < len(order):
+            width = int(degrees[order[start]])
+            end = start + 1
+            # 배치 원소 수(행 × 최대 상호작용 수 × 요인 수)가 예산을 넘지 않는 만큼 묶음
+            while end < len(order) and (end - start + 1) * int(degrees[order[end]]) * factors <= batch_elements:
+                width = int(degrees[order[end]])
+                end += 1
+            batch = order[start:end]
+
+            offsets = np.arange(width)
+            valid = offsets[None, :] < degrees[batch][:, None]
+            flat = np.where(valid, rows.indptr[batch][:, None] + offsets[None, :], 0)
+            columns = rows.indices[flat]
+            weights = np.where(valid, rows.data[flat], 0.0)
+            confidence = (alpha * weights).astype(np.float32)
+            preference = valid & (weights >= preference_threshold)
+
+            neighbors = fixed[columns]                                   # [배치, 폭, 요인]
+            weighted = neighbors * confidence[:, :, None]
+            lhs = gram + np.matmul(weighted.transpose(0, 2, 1), neighbors)
+            rhs = np.einsum('blf,bl->bf', neighbors, (1.0 + confidence) * preference)
+            solved[batch] = np.linalg.solve(lhs, rhs[:, :, None])[:, :, 0]
+            start = end
+
+        return solved
+
+    # ------------------------------------------------------------------
+    # 조회 (온라인)
+    # ------------------------------------------------------------------
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.user_index
+
+    def score_items(self, user_id: str) -> Optional[np.ndarray]:
+        """사용자의 전체 매장 선호 점수 (학습에 없던 사용자는 None)"""
+        row = self.user_index.get(user_id)
+        if row is None:
+            return None
+        return self.item_factors @ self.user_factors[row]
+
+    def seen_items(self, user_id: str) -> np.ndarray:
+        """사용자가 상호작용한 매장 인덱스"""
+        row = self.user_index.get(user_id)
+        if row is None:
+            return np.zeros(0, dtype=np.int32)
+        return self.seen.indices[self.seen.indptr[row]:self.seen.indptr[row + 1]]
+
+    def recommend(self, user_id: str, n: int = 50, exclude_seen: bool = False) -> List[Tuple[str, float]]:
+        """상위 n개 (매장 ID, 점수)"""
+        scores = self.score_items(user_id)
+        if scores is None:
+            return []
+        mask = None
+        if exclude_seen:
+            mask = np.ones(len(scores), dtype=bool)
+            mask[self.seen_items(user_id)] = False
+        return [(self.shop_ids[i], float(scores[i])) for i in top_k_indices(scores, n, mask)]
+
+    def recommend_batch(self, user_ids: Sequence[str], n: int = 50) -> Dict[str, List[Tuple[str, float]]]:
+        """여러 사용자 상위 n개를 행렬곱 한 번으로 계산 (학습에 없던 사용자는 제외)"""
+        known = [user_id for user_id in user_ids if user_id in self.user_index]
+        if not known:
+            return {}
+        rows = np.array([self.user_index[user_id] for user_id in known])
+        scores = self.user_factors[rows] @ self.item_factors.T
+        n = min(n, scores.shape[1])
+        top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        return {
+            user_id: [(self.shop_ids[i], float(scores[row, i])) for i in top[row]]
+            for row, user_id in enumerate(known)
+        }
+
+    # ------------------------------------------------------------------
+    # 저장/로드
+    # ------------------------------------------------------------------
+
+    def save(self, path: str):
+        """npz로 저장 (임시 파일에 쓴 뒤 교체)"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target.with_name(target.name + ".tmp")
+        with open(temp_path, 'wb') as f:
+            np.savez(f,
+                     user_ids=np.array(self.user_ids, dtype=str),
+                     shop_ids=np.array(self.shop_ids, dtype=str),
+                     user_factors=self.user_factors,
+                     item_factors=self.item_factors,
+                     seen_indptr=self.seen.indptr,
+                     seen_indices=self.seen.indices,
+                     seen_data=self.seen.data,
+                     params=np.array(json.dumps(self.params)))
+        temp_path.replace(target)
+
+    @classmethod
+    def load(cls, path: str) -> 'ImplicitALSModel':
+        with np.load(path, allow_pickle=False) as data:
+            user_ids = data['user_ids'].tolist()
+            shop_ids = data['shop_ids'].tolist()
+            seen = sparse.csr_matrix((data['seen_data'], data['seen_indices'], data['seen_indptr']),
+                                     shape=(len(user_ids), len(shop_ids)))
+            return cls(user_ids, shop_ids, data['user_factors'], data['item_factors'],
+                       seen=seen, params=json.loads(str(data['params'])))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """모델 통계"""
+        return {
+            'users': len(self.user_ids),
+            'shops': len(self.shop_ids),
+            'factors': int(self.item_factors.shape[1]),
+            'interactions': int(self.seen.nnz),
+            'memory_bytes': int(self.user_factors.nbytes + self.item_factors.nbytes),
+            **{k: v for k, v in self.params.items() if k != 'factors'}
+        }
@@ -0,0 +1,204 @@
+"""
+주간 영업시간 타임라인
+매장 영업시간을 한 번만 파싱해 요일×분 단위로 조회할 수 있는 영업 여부 표로 미리 계산
+
+- 같은 영업시간(시작/종료/브레이크타임)을 가진 매장은 하나의 스케줄 행을 공유
+- 특정 시각의 "영업 중", "N분 이내 영업 시작"을 전체 매장에 대해 배열 조회 한 번으로 계산
+- ContextualFunnel, 응답 생성기의 TIME_INQUIRY 추천, 특성 엔지니어링이 공유
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple, Iterable, Sequence
+
+import numpy as np
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# 영업 상태 코드
+STATUS_UNKNOWN = 0      # 영업시간 정보 없음/파싱 실패
+STATUS_OPEN = 1         # 영업 중
+STATUS_OPENS_SOON = 2   # 영업 전이지만 곧 시작
+STATUS_CLOSED = 3       # 영업시간 외
+
+# (시작, 종료, 브레이크 시작, 브레이크 종료) - 자정 기준 분, 브레이크 없으면 None
+DailySchedule = Tuple[int, int, Optional[int], Optional[int]]
+
+CLOCK_PATTERN = re.compile(r'(\d{1,2})(?::(\d{1,2}))?(?::(\d{1,2}))?')
+
+
+def parse_clock(value: Any) -> Optional[int]:
+    """'HH:MM', 'H:MM', 'HH', 'HH:MM:SS' → 자정 기준 분 (실패 시 None)"""
+    if not isinstance(value, str):
+        return None
+    match = CLOCK_PATTERN.fullmatch(value.strip())
+    if not match:
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def parse_break(value: Any) -> Tuple[Optional[int], Optional[int]]:
+    """'15:00-16:30' → (900, 990)"""
+    if not isinstance(value, str) or '-' not in value:
+        return None, None
+    start, end = value.split('-', 1)
+    return parse_clock(start), parse_clock(end)
+
+
+def make_schedule(open_minutes: Optional[int], close_minutes: Optional[int],
+                  break_start: Optional[int] = None, break_end: Optional[int] = None) -> Optional[DailySchedule]:
+    """매일 같은 영업시간 스케줄 (시작/종료가 없으면 None)"""
+    if open_minutes is None or close_minutes is None:
+        return None
+    if break_start is None or break_end is None:
+        break_start = break_end = None
+    return open_minutes, close_minutes, break_start, break_end
+
+
+def is_open_at(schedule: Optional[DailySchedule], minute_of_day: int) -> Optional[bool]:
+    """스케줄의 특정 분 영업 여부 (스케줄 없으면 None)"""
+    if schedule is None:
+        return None
+    open_minutes, close_minutes, break_start, break_end = schedule
+    if break_start is not None and break_start <= minute_of_day <= break_end:
+        return False
+    if close_minutes < open_minutes:
+        return minute_of_day >= open_minutes or minute_of_day <= close_minutes
+    return open_minutes <= minute_of_day <= close_minutes
+
+
+def minute_of_week(when: datetime) -> int:
+    """월요일 00:00 기준 분"""
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+class OpeningHoursTimeline:
+    """매장별 주간 영업 타임라인 (불변, 스레드 간 공유 가능)
+
+    조회는 요일×분(minute-of-week) 기준이지만 데이터의 영업시간은 매일 같으므로
+    스케줄마다 하루 1,440분 표만 보관하고 요일에 관계없이 재사용합니다.
+    """
+
+    # 다음 영업 시작까지 남은 분은 uint8로 보관 (이 값 이상은 "멀리 있음")
+    MAX_SOON_MINUTES = 254
+
+    def __init__(self, schedules: Sequence[Optional[DailySchedule]], cache_size: int = 8):
+        """
+        Args:
+            schedules: 매장 순서대로의 일일 스케줄 (정보 없으면 None)
+            cache_size: 시각별 상태 배열 캐시 크기
+        """
+        schedule_ids: Dict[DailySchedule, int] = {}
+        shop_schedule = np.full(len(schedules), -1, dtype=np.int32)
+        for position, schedule in enumerate(schedules):
+            if schedule is not None:
+                shop_schedule[position] = schedule_ids.setdefault(schedule, len(schedule_ids))
+
+        self.schedules: Tuple[DailySchedule, ...] = tuple(schedule_ids)
+        self.known = shop_schedule >= 0
+        # 스케줄 없는 매장은 마지막 행(항상 영업 외)을 가리킴
+        num_schedules = len(self.schedules)
+        self.shop_schedule = np.where(self.known, shop_schedule, num_schedules).astype(np.int32)
+
+        # 스케줄 × 1,440분 영업 여부와 다음 영업 시작까지 남은 분 (스케줄 전체를 한 번에 계산)
+        open_slots = self._daily_open_slots(self.schedules)
+        self.open_slots = np.vstack([open_slots, np.zeros((1, MINUTES_PER_DAY), dtype=bool)])
+        self.minutes_until_open = np.vstack([
+            self._minutes_until_open(open_slots),
+            np.full((1, MINUTES_PER_DAY), 255, dtype=np.uint8)
+        ])
+
+        self._cache_size = cache_size
+        self._status_cache: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @staticmethod
+    def _daily_open_slots(schedules: Sequence[DailySchedule]) -> np.ndarray:
+        """스케줄별 하루 영업 여부 [스케줄 수, 1440] (is_open_at의 벡터화)"""
+        if not schedules:
+            return np.zeros((0, MINUTES_PER_DAY), dtype=bool)
+        table = np.array([(o, c, -1 if bs is None else bs, -2 if be is None else be)
+                          for o, c, bs, be in schedules], dtype=np.int32)
+        open_minutes, close_minutes, break_start, break_end = (table[:, i:i + 1] for i in range(4))
+        minutes = np.arange(MINUTES_PER_DAY, dtype=np.int32)[None, :]
+
+        regular = (open_minutes <= minutes) & (minutes <= close_minutes)
+        overnight = (minutes >= open_minutes) | (minutes <= close_minutes)
+        slots = np.where(close_minutes < open_minutes, overnight, regular)
+        on_break = (break_start <= minutes) & (minutes <= break_end)
+        return slots & ~on_break
+
+    @classmethod
+    def _minutes_until_open(cls, open_slots: np.ndarray) -> np.ndarray:
+        """각 분에서 다음 영업 시작(닫힘→열림) 분까지 남은 시간 (하루 주기, 255 = 없음/멀리 있음)"""
+        starts = open_slots & ~np.roll(open_slots, 1, axis=1)
+        # 이틀치를 이어 붙여 자정을 넘는 다음 시작까지 찾음
+        doubled = np.concatenate([starts, starts], axis=1)
+        index = np.arange(2 * MINUTES_PER_DAY, dtype=np.int32)
+        start_index = np.where(doubled, index, np.iinfo(np.int32).max)
+        next_start = np.minimum.accumulate(start_index[:, ::-1], axis=1)[:, ::-1][:, :MINUTES_PER_DAY]
+        wait = next_start.astype(np.int64) - index[:MINUTES_PER_DAY]
+        return np.minimum(wait, 255).astype(np.uint8)
+
+    @classmethod
+    def from_hours(cls, hours: Iterable[Tuple[Any, Any, Any, Any]]) -> 'OpeningHoursTimeline':
+        """(시작, 종료, 브레이크 시작, 브레이크 종료) 문자열 목록으로 생성"""
+        return cls([make_schedule(parse_clock(open_hour), parse_clock(close_hour),
+                                  parse_clock(break_start), parse_clock(break_end))
+                    for open_hour, close_hour, break_start, break_end in hours])
+
+    def __len__(self) -> int:
+        return len(self.shop_schedule)
+
+    def open_mask(self, when: datetime) -> np.ndarray:
+        """각 매장의 영업 중 여부 (정보 없는 매장은 False)"""
+        return self.status_at(when) == STATUS_OPEN
+
+    def opens_within(self, when: datetime, minutes: int = 60) -> np.ndarray:
+        """영업 전이고 minutes분 이내에 영업을 시작하는 매장"""
+        return self.status_at(when, minutes) == STATUS_OPENS_SOON
+
+    def status_at(self, when: datetime, soon_minutes: int = 60) -> np.ndarray:
+        """각 매장의 영업 상태 코드 배열 (STATUS_*)
+
+        같은 분에 대한 반복 조회는 캐시된 배열을 돌려주므로 결과를 수정하면 안 됩니다.
+        """
+        key = (minute_of_week(when), soon_minutes)
+        with self._cache_lock:
+            status = self._status_cache.get(key)
+            if status is not None:
+                self._status_cache.move_to_end(key)
+                return status
+
+        if soon_minutes > self.MAX_SOON_MINUTES:
+            raise ValueError(f"soon_minutes는 {self.MAX_SOON_MINUTES}분 이하여야 합니다: {soon_minutes}")
+        slot = key[0] % MINUTES_PER_DAY
+        is_open = self.open_slots[self.shop_schedule, slot]
+        wait = self.minutes_until_open[self.shop_schedule, slot]
+        status = np.full(len(self.shop_schedule), STATUS_CLOSED, dtype=np.int8)
+        status[(wait > 0) & (wait <= soon_minutes)] = STATUS_OPENS_SOON
+        status[is_open] = STATUS_OPEN
+        status[~self.known] = STATUS_UNKNOWN
+        status.setflags(write=False)
+
+        with self._cache_lock:
+            self._status_cache[key] = status
+            while len(self._status_cache) > self._cache_size:
+                self._status_cache.popitem(last=False)
+        return status
+
+    def get_stats(self) -> Dict[str, Any]:
+        """타임라인 통계"""
+        return {
+            'total_shops': len(self.shop_schedule),
+            'known_shops': int(self.known.sum()),
+            'unique_schedules': len(self.schedules),
+            'memory_bytes': int(self.open_slots.nbytes + self.minutes_until_open.nbytes + self.shop_schedule.nbytes)
+        }
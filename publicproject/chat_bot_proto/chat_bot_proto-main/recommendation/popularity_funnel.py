@@ -3,88 +3,93 @@
 가장 간단한 추천 로직 - 단순 집계 기반
 """
 
-import json
 import logging
 from typing import List, Dict, Any, Optional
 from collections import defaultdict, Counter
 from datetime import datetime, timedelta
 
+import numpy as np
+
+try:
+    from .restaurant_catalog import RestaurantCatalog, ShopRecord, get_catalog, DEFAULT_RESTAURANTS_PATH
+    from .top_k import first_k_in_order, stable_ranking, basic_filter_mask
+except ImportError:
+    from restaurant_catalog import RestaurantCatalog, ShopRecord, get_catalog, DEFAULT_RESTAURANTS_PATH
+    from top_k import first_k_in_order, stable_ranking, basic_filter_mask
+
 logger = logging.getLogger(__name__)
 
 
 class PopularityFunnel:
     """인기도 기반 후보 생성 Funnel"""
     
-    def __init__(self, restaurants_path: str = "data/restaurants_optimized.json"):
+    # _apply_filters와 같은 필터 (벡터화 버전에 적용할 키)
+    FILTER_KEYS = ('category', 'location', 'is_good_influence', 'accepts_meal_card')
+    
+    def __init__(self, restaurants_path: str = DEFAULT_RESTAURANTS_PATH,
+                 catalog: Optional[RestaurantCatalog] = None):
         """
         Args:
             restaurants_path: 매장 데이터 파일 경로
+            catalog: 공유 매장 카탈로그 (없으면 경로별 공유 카탈로그 사용)
         """
         self.restaurants_path = restaurants_path
-        self.restaurants = []
+        self.catalog = catalog if catalog is not None else get_catalog(restaurants_path)
+        self.shops = self.catalog.shops
         self.popularity_scores = {}
+        self.score_array = np.zeros(len(self.shops), dtype=np.float64)
+        self.ranking = stable_ranking(self.score_array)
         self._load_data()
     
     def _load_data(self):
         """매장 데이터 로드"""
         try:
-            with open(self.restaurants_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.restaurants = data.get('restaurants', [])
-            
-            logger.info(f"인기도 Funnel: {len(self.restaurants)}개 매장 데이터 로드 완료")
+            logger.info(f"인기도 Funnel: {len(self.shops)}개 매장 데이터 로드 완료")
             self._calculate_popularity_scores()
             
         except Exception as e:
-            logger.error(f"매장 데이터 로드 실패: {e}")
-            self.restaurants = []
+            logger.error(f"인기도 점수 계산 실패: {e}")
     
     def _calculate_popularity_scores(self):
         """
         매장별 인기도 점수 계산
         현재는 간단한 규칙 기반으로 계산 (추후 실제 데이터로 대체)
         """
-        for restaurant in self.restaurants:
-            shop_id = restaurant.get('shopId', '')
-            
+        for shop in self.shops:
             # 기본 점수 계산 요소들
             base_score = 0
             
             # 1. 착한가게 보너스
-            if restaurant.get('attributes', {}).get('isGoodShop', False):
+            if shop.is_good_shop:
                 base_score += 20
             
             # 2. 급식카드 사용 가능 보너스  
-            if restaurant.get('attributes', {}).get('acceptsMealCard', False):
+            if shop.accepts_meal_card:
                 base_score += 10
             
             # 3. 메뉴 다양성 점수 (메뉴 개수 기반)
-            menu_count = len(restaurant.get('menus', []))
-            base_score += min(menu_count * 5, 25)  # 최대 25점
+            base_score += min(shop.menu_count * 5, 25)  # 최대 25점
             
             # 4. 가격 접근성 점수 (저렴한 메뉴가 있으면 보너스)
-            menus = restaurant.get('menus', [])
-            if menus:
-                min_price = min(menu.get('price', float('inf')) for menu in menus)
-                if min_price <= 8000:  # 8천원 이하 메뉴가 있으면
+            if shop.min_price is not None:
+                if shop.min_price <= 8000:  # 8천원 이하 메뉴가 있으면
                     base_score += 15
-                elif min_price <= 12000:  # 1만2천원 이하
+                elif shop.min_price <= 12000:  # 1만2천원 이하
                     base_score += 10
             
             # 5. 영업시간 점수 (긴 영업시간 = 접근성 좋음)
-            hours = restaurant.get('hours', {})
-            if hours.get('open') and hours.get('close'):
-                try:
-                    open_time = datetime.strptime(hours['open'], '%H:%M').time()
-                    close_time = datetime.strptime(hours['close'], '%H:%M').time()
-                    
-                    # 영업시간이 10시간 이상이면 보너스
-                    if close_time.hour - open_time.hour >= 10:
-                        base_score += 10
-                except:
-                    pass
+            if shop.has_hours:
+                # 영업시간이 10시간 이상이면 보너스
+                if shop.close_minutes // 60 - shop.open_minutes // 60 >= 10:
+                    base_score += 10
             
-            self.popularity_scores[shop_id] = base_score
+            self.popularity_scores[shop.shop_id] = base_score
+        
+        # 매장 순서 점수 배열 (shopId가 겹치면 dict와 같이 마지막 매장 점수)
+        self.score_array = np.array([self.popularity_scores[shop.shop_id] for shop in self.shops],
+                                    dtype=np.float64).reshape(len(self.shops))
+        # 인기도 점수는 요청마다 바뀌지 않으므로 전체 순위를 한 번만 정렬
+        self.ranking = stable_ranking(self.score_array)
         
         logger.info(f"인기도 점수 계산 완료: 평균 {sum(self.popularity_scores.values()) / len(self.popularity_scores):.1f}점")
     
@@ -103,79 +108,63 @@ class PopularityFunnel:
         """
         candidates = []
         
-        # 필터링된 매장들
-        filtered_restaurants = self._apply_filters(self.restaurants, filters or {})
-        
-        # 인기도 점수로 정렬
-        sorted_restaurants = sorted(
-            filtered_restaurants,
-            key=lambda x: self.popularity_scores.get(x.get('shopId', ''), 0),
-            reverse=True
-        )
+        # 미리 정렬한 인기 순위에서 필터 통과 매장 앞쪽 limit개만 선택 (후보 dict는 선택된 매장만 생성)
+        mask = basic_filter_mask(self.catalog, filters, self.FILTER_KEYS) if filters else None
         
-        # 후보 생성
-        for restaurant in sorted_restaurants[:limit]:
-            shop_id = restaurant.get('shopId', '')
+        for position in first_k_in_order(self.ranking, limit, mask):
+            shop = self.shops[position]
             candidate = {
-                'shop_id': shop_id,
-                'shop_name': restaurant.get('shopName', ''),
-                'category': restaurant.get('category', ''),
+                'shop_id': shop.shop_id,
+                'shop_name': shop.shop_name,
+                'category': shop.category,
                 'funnel_source': 'popularity',
-                'base_score': self.popularity_scores.get(shop_id, 0),
-                'reason': self._get_popularity_reason(restaurant)
+                'base_score': self.popularity_scores.get(shop.shop_id, 0),
+                'reason': self._get_popularity_reason(shop)
             }
             candidates.append(candidate)
         
         logger.info(f"인기도 Funnel: {len(candidates)}개 후보 생성 (필터: {filters})")
         return candidates
     
-    def _apply_filters(self, restaurants: List[Dict], filters: Dict[str, Any]) -> List[Dict]:
+    def _apply_filters(self, shops: List[ShopRecord], filters: Dict[str, Any]) -> List[ShopRecord]:
         """필터 조건 적용"""
-        filtered = restaurants
+        filtered = shops
         
         # 카테고리 필터
         if filters.get('category'):
             category_filter = filters['category'].lower()
-            filtered = [r for r in filtered 
-                       if category_filter in r.get('category', '').lower()]
+            filtered = [s for s in filtered if category_filter in s.category_lower]
         
         # 위치 필터 (주소에 포함된 키워드로 검색)
         if filters.get('location'):
             location_filter = filters['location']
-            filtered = [r for r in filtered 
-                       if location_filter in r.get('location', {}).get('address', '')]
+            filtered = [s for s in filtered if location_filter in s.address]
         
         # 착한가게 필터
         if filters.get('is_good_influence'):
-            filtered = [r for r in filtered 
-                       if r.get('attributes', {}).get('isGoodShop', False)]
+            filtered = [s for s in filtered if s.is_good_shop]
         
         # 급식카드 필터
         if filters.get('accepts_meal_card'):
-            filtered = [r for r in filtered 
-                       if r.get('attributes', {}).get('acceptsMealCard', False)]
+            filtered = [s for s in filtered if s.accepts_meal_card]
         
         return filtered
     
-    def _get_popularity_reason(self, restaurant: Dict[str, Any]) -> str:
+    def _get_popularity_reason(self, shop: ShopRecord) -> str:
         """인기 이유 생성"""
         reasons = []
         
-        if restaurant.get('attributes', {}).get('isGoodShop', False):
+        if shop.is_good_shop:
             reasons.append('착한가게')
         
-        if restaurant.get('attributes', {}).get('acceptsMealCard', False):
+        if shop.accepts_meal_card:
             reasons.append('급식카드 사용가능')
         
-        menu_count = len(restaurant.get('menus', []))
-        if menu_count >= 5:
+        if shop.menu_count >= 5:
             reasons.append('다양한 메뉴')
         
-        menus = restaurant.get('menus', [])
-        if menus:
-            min_price = min(menu.get('price', float('inf')) for menu in menus)
-            if min_price <= 8000:
-                reasons.append('저렴한 가격')
+        if shop.min_price is not None and shop.min_price <= 8000:
+            reasons.append('저렴한 가격')
         
         return ' · '.join(reasons) if reasons else '인기 매장'
     
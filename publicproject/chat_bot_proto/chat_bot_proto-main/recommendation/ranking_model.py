@@ -11,8 +11,21 @@ import logging
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 
+try:
+    from .rule_scoring import RuleKernel, ScoringRule, layer1_max_scores
+except ImportError:
+    from rule_scoring import RuleKernel, ScoringRule, layer1_max_scores
+
 logger = logging.getLogger(__name__)
 
+# 규칙 기반 랭킹의 개인화 보너스 (_personalization_features 열 기준)
+PERSONALIZATION_RULES = RuleKernel([
+    ScoringRule(0, 0.5, 10, "선호 카테고리"),
+    ScoringRule(1, 0.5, 5, "예산 적합"),
+    ScoringRule(2, 0.5, 3, "착한가게"),
+    ScoringRule(3, 0.5, -2, "거리 페널티"),
+])
+
 
 @dataclass
 class RankingModelConfig:
@@ -191,57 +204,67 @@ class PersonalizedRanker:
                            context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         규칙 기반 랭킹 (모델 없을 때 사용)
+        후보 전체 보너스를 PERSONALIZATION_RULES 커널로 한 번에 계산
         """
         logger.info("규칙 기반 랭킹 수행")
         
-        for candidate in candidates:
-            # 기본 점수 (Layer 1에서 가장 높은 점수 사용)
-            base_score = max([
-                candidate.get('collaborative_score', 0),
-                candidate.get('content_score', 0), 
-                candidate.get('context_score', 0),
-                candidate.get('base_score', 0)
-            ])
-            
-            personalization_bonus = 0
-            
-            # 선호 카테고리 보너스
-            preferred_categories = user_profile.get('preferred_categories', [])
-            if candidate.get('category') in preferred_categories:
-                personalization_bonus += 10
-                
-            # 예산 적합성 보너스
-            avg_budget = user_profile.get('average_budget', 0)
-            if avg_budget > 0:
-                shop_price_range = candidate.get('price_range', 'medium')
-                if (avg_budget <= 10000 and shop_price_range == 'low') or \
-                   (10000 < avg_budget <= 30000 and shop_price_range == 'medium') or \
-                   (avg_budget > 30000 and shop_price_range == 'high'):
-                    personalization_bonus += 5
-            
-            # 착한가게 보너스
-            if candidate.get('is_good_price', False):
-                personalization_bonus += 3
-                
-            # 거리 페널티 (상황 정보 활용)
-            user_location = context.get('user_location', '')
-            if user_location and candidate.get('district') != user_location:
-                personalization_bonus -= 2
-            
-            # 최종 점수 계산
-            final_score = base_score + personalization_bonus
+        # 기본 점수 (Layer 1에서 가장 높은 점수 사용)
+        base_scores = layer1_max_scores(candidates)
+        
+        personalization_bonus, _ = PERSONALIZATION_RULES.score(
+            self._personalization_features(candidates, user_profile, context)
+        )
+        personalization_bonus = personalization_bonus.astype(np.int64)  # 정수 보너스
+        
+        # 최종 점수 계산
+        final_scores = base_scores + personalization_bonus
+        for candidate, final_score, bonus in zip(candidates, final_scores.tolist(), personalization_bonus.tolist()):
             candidate['personalized_score'] = final_score
-            candidate['personalization_bonus'] = personalization_bonus
+            candidate['personalization_bonus'] = bonus
             candidate['ranking_method'] = 'rule_based'
         
-        # 점수 기준 정렬
-        ranked_candidates = sorted(candidates, 
-                                 key=lambda x: x['personalized_score'], 
-                                 reverse=True)
+        # 점수 기준 정렬 (동점은 Layer 1 순서)
+        ranked_candidates = [candidates[index] for index in np.argsort(-final_scores, kind='stable').tolist()]
         
         logger.info(f"규칙 기반 랭킹 완료: {len(ranked_candidates)}개 후보")
         return ranked_candidates
     
+    def _personalization_features(self,
+                                  candidates: List[Dict[str, Any]],
+                                  user_profile: Dict[str, Any],
+                                  context: Dict[str, Any]) -> np.ndarray:
+        """
+        PERSONALIZATION_RULES 입력 행렬 (후보 수 × 4, bool)
+        선호 카테고리, 예산-가격대 일치, 착한가게, 다른 지역 여부
+        """
+        num_candidates = len(candidates)
+        features = np.zeros((num_candidates, 4), dtype=bool)
+        
+        # 선호 카테고리
+        preferred_categories = user_profile.get('preferred_categories', [])
+        if preferred_categories:
+            features[:, 0] = np.fromiter((candidate.get('category') in preferred_categories for candidate in candidates),
+                                         dtype=bool, count=num_candidates)
+        
+        # 예산 적합성 (사용자 예산에 맞는 가격대)
+        avg_budget = user_profile.get('average_budget', 0)
+        if avg_budget > 0:
+            budget_price_range = 'low' if avg_budget <= 10000 else 'medium' if avg_budget <= 30000 else 'high'
+            features[:, 1] = np.fromiter((candidate.get('price_range', 'medium') == budget_price_range
+                                          for candidate in candidates), dtype=bool, count=num_candidates)
+        
+        # 착한가게
+        features[:, 2] = np.fromiter((bool(candidate.get('is_good_price', False)) for candidate in candidates),
+                                     dtype=bool, count=num_candidates)
+        
+        # 거리 (상황 정보 활용)
+        user_location = context.get('user_location', '')
+        if user_location:
+            features[:, 3] = np.fromiter((candidate.get('district') != user_location for candidate in candidates),
+                                         dtype=bool, count=num_candidates)
+        
+        return features
+    
     def _model_based_ranking(self,
                            candidates: List[Dict[str, Any]], 
                            user_profile: Dict[str, Any],
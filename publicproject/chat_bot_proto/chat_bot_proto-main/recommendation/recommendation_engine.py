@@ -13,20 +13,97 @@ from datetime import datetime
 from pathlib import Path
 import numpy as np
 import hashlib
+from functools import lru_cache
 
 try:
     from .candidate_generator import CandidateGenerator, CandidateGenerationConfig
     from .ranking_model import PersonalizedRanker, RankingModelConfig
     from .feature_engineering import FeatureEngineer, FeatureConfig
     from .model_trainer import ModelTrainer
+    from .rule_scoring import RuleKernel, ScoringRule, LAYER1_SCORE_FIELDS, layer1_max_scores
+    from .top_k import top_k_indices
+    from .result_cache import RecommendationResultCache
 except ImportError:
     from candidate_generator import CandidateGenerator, CandidateGenerationConfig
     from ranking_model import PersonalizedRanker, RankingModelConfig
     from feature_engineering import FeatureEngineer, FeatureConfig
     from model_trainer import ModelTrainer
+    from rule_scoring import RuleKernel, ScoringRule, LAYER1_SCORE_FIELDS, layer1_max_scores
+    from top_k import top_k_indices
+    from result_cache import RecommendationResultCache
 
 logger = logging.getLogger(__name__)
 
+# 추천 결과 캐시 기본값 (크기 0이면 캐시 사용 안 함)
+DEFAULT_RESULT_CACHE_SIZE = 1024
+DEFAULT_RESULT_CACHE_TTL = 300.0
+
+# RealDataFeatureExtractor 특성 크기
+WIDE_FEATURE_SIZE = 50
+DEEP_NUMERICAL_SIZE = 10
+
+# Wide 특성의 Funnel 열 순서 (활성화 여부 9~12, 점수 13~16은 LAYER1_SCORE_FIELDS 순)
+FUNNEL_NAMES = ('collaborative', 'content', 'contextual', 'popularity')
+
+# Deep 수치형 특성의 매장 열 (4~8)과 정규화 기준
+SHOP_NUMERICAL_FIELDS = (
+    ('avg_menu_price', 50000.0),
+    ('menu_count', 30.0),
+    ('rating', 5.0),
+    ('review_count', 1000.0),
+    ('order_count', 1000.0),
+)
+SHOP_NUMERICAL_SCALES = np.array([scale for _, scale in SHOP_NUMERICAL_FIELDS])
+
+# extract_deep_features_batch 결과 중 후보별 값 (리스트/행렬)
+DEEP_CANDIDATE_KEYS = ('shop_id', 'brand_id', 'category', 'numerical_features')
+
+# Wide Component 규칙 (_wide_rule_features 열 기준, 고정 보너스 → 특성값 배수 순)
+WIDE_COMPONENT_RULES = RuleKernel([
+    ScoringRule(0, 0.7, 3.0, "연령-카테고리 매칭"),     # 연령대-카테고리 교차
+    ScoringRule(1, 0.7, 2.0, "위치 매칭"),              # 위치-지역 교차
+    ScoringRule(2, 0.7, 2.0, "시간-카테고리 매칭"),     # 시간-카테고리 교차
+    ScoringRule(3, 0.8, 5.0, "개인화 특별 매칭"),       # 사용자-매장 교차
+    ScoringRule(4, 0.8, 2.0, "예산 적합"),              # 예산 적합성
+    ScoringRule(5, 0.8, 1.5, "위치 편의"),              # 위치 거리
+    ScoringRule(6, 0.6, 2.5, "식단 선호"),              # 식단 선호
+    ScoringRule(7, 0.0, 10.0, "착한가게(편향보정)", scaled=True),  # 원래 3점이었으나 보정으로 0.9점
+    # 기존 규칙의 열 번호를 그대로 옮긴 것 (의도적 유지): 평점 특성은 8열이고 9열은 collaborative Funnel 활성화 여부
+    ScoringRule(9, 0.5, 2.0, "고평점(임계값적용)", scaled=True),
+    ScoringRule(10, 1.0, 1.0, "다중Funnel", scaled=True),          # Funnel별 신뢰도 합
+    ScoringRule(11, 0.3, 2.0, "활발한사용자", scaled=True),
+    ScoringRule(12, 0.5, 1.5, "인기매장", scaled=True),
+])
+WIDE_GOOD_SHOP_RULE = 7
+
+# Funnel 신뢰도 합: (활성화 열, 점수 열, 가중치) - content(벡터 검색)는 가중치 증가
+# 기존 계산의 열 번호를 그대로 옮긴 것 (의도적 유지): 실제 활성화 열은 9~12, 점수 열은 13~16이라
+# 한 칸씩 어긋나 있고 마지막 항의 17열은 항상 0
+WIDE_FUNNEL_BOOST_TERMS = ((10, 14, 2.0), (11, 15, 3.0), (12, 16, 2.0), (13, 17, 1.5))
+
+# 주소에서 찾는 지역구
+KNOWN_DISTRICTS = ('강남구', '서초구', '관악구', '동작구', '영등포구', '마포구', '용산구', '중구', '종로구', '성동구')
+
+
+@lru_cache(maxsize=65536)
+def _hashed_cross_feature(combined: str) -> float:
+    """교차 특성 문자열의 MD5 해시를 0~1 범위로 정규화 (같은 조합은 요청 간에도 재사용)"""
+    hash_value = int(hashlib.md5(combined.encode()).hexdigest()[:8], 16)
+    return (hash_value % 10000) / 10000.0
+
+
+@lru_cache(maxsize=16384)
+def _district_from_address(address: str) -> str:
+    """주소 문자열 → 지역구 (없으면 'unknown')"""
+    if not address:
+        return 'unknown'
+    
+    for district in KNOWN_DISTRICTS:
+        if district in address:
+            return district
+    
+    return 'unknown'
+
 
 class RealDataFeatureExtractor:
     """
@@ -53,101 +130,99 @@ class RealDataFeatureExtractor:
         """
         Wide Component 특성 추출 (Cross-Product Features)
         실제 DB 시트 기반: user, user_location, shop, brand, shop_menu
+        (후보 1개짜리 extract_wide_features_batch)
+        """
+        return self.extract_wide_features_batch([candidate], user_profile, chatbot_output, context)[0]
+    
+    def extract_wide_features_batch(self,
+                                   candidates: List[Dict[str, Any]],
+                                   user_profile: Dict[str, Any],
+                                   chatbot_output: Dict[str, Any],
+                                   context: Dict[str, Any],
+                                   dtype: np.dtype = np.float32) -> np.ndarray:
+        """
+        후보 전체 Wide 특성 행렬 (후보 수 × 50, 기본 float32)
+        사용자/챗봇 Output 쪽 값은 요청당 한 번, 매장 쪽 값은 후보 전체에 대해 열 단위로 계산
+        (규칙 랭킹처럼 점수를 그대로 더하는 경우 dtype=np.float64로 기존 점수와 같은 값 유지)
+        
+        열 구성:
+            0~3: 연령대×카테고리, 도시×지역구, 시간대×카테고리, 사용자×매장 교차 해시
+            4~6: 예산 적합성, 위치 거리, 식단 선호 매칭
+            7~8: 착한가게(편향 보정), 평점(임계값 적용)
+            9~12: Funnel별 활성화 여부, 13~16: Funnel별 점수 / 10
         """
-        wide_features = []
+        num_candidates = len(candidates)
+        wide_features = np.zeros((num_candidates, WIDE_FEATURE_SIZE), dtype=dtype)
+        if num_candidates == 0:
+            return wide_features
         
         # 1. 사용자-매장 교차 특성 (실제 DB 컬럼 기반)
-        
-        # user.birthday(연령대) × shop.category
         user_age_group = self._calculate_age_group_from_birthday(user_profile.get('birthday', ''))
-        shop_category = candidate.get('category', 'unknown')
-        age_category_cross = self._hash_cross_feature(user_age_group, shop_category)
-        wide_features.append(age_category_cross)
-        
-        # user_location.city × shop.address(지역구)
         user_city = user_profile.get('location', {}).get('city', 'unknown')
-        shop_district = self._extract_district_from_address(candidate.get('address', ''))
-        location_cross = self._hash_cross_feature(user_city, shop_district)
-        wide_features.append(location_cross)
-        
-        # 시간대 × shop.category (챗봇 output + DB)
         time_of_day = context.get('time_of_day', 'unknown')
-        time_category_cross = self._hash_cross_feature(time_of_day, shop_category)
-        wide_features.append(time_category_cross)
+        user_key = str(user_profile.get('id', 0))
         
-        # user.id × shop.id (특정 사용자-매장 상호작용 암기)
-        user_shop_cross = self._hash_cross_feature(
-            str(user_profile.get('id', 0)), 
-            str(candidate.get('id', 'unknown'))
-        )
-        wide_features.append(user_shop_cross)
+        categories = [candidate.get('category', 'unknown') for candidate in candidates]
+        shop_districts = [self._extract_district_from_address(candidate.get('address', '')) for candidate in candidates]
+        
+        wide_features[:, 0] = [self._hash_cross_feature(user_age_group, category) for category in categories]
+        wide_features[:, 1] = [self._hash_cross_feature(user_city, district) for district in shop_districts]
+        wide_features[:, 2] = [self._hash_cross_feature(time_of_day, category) for category in categories]
+        wide_features[:, 3] = [self._hash_cross_feature(user_key, str(candidate.get('id', 'unknown')))
+                               for candidate in candidates]
         
         # 2. 챗봇 Output 기반 직접 특성
         
         # 예산 적합성 (챗봇 budget_filter vs shop_menu.price 평균)
-        budget_compatibility = self._calculate_budget_compatibility(
-            candidate.get('avg_menu_price', 0),
-            chatbot_output.get('budget_filter', 0)
-        )
-        wide_features.append(budget_compatibility)
+        budget_filter = chatbot_output.get('budget_filter', 0)
+        if budget_filter <= 0:
+            wide_features[:, 4] = 0.5
+        else:
+            prices = np.array([candidate.get('avg_menu_price', 0) for candidate in candidates], dtype=np.float64)
+            with np.errstate(divide='ignore'):
+                compatibility = np.where(prices <= budget_filter, 1.0, np.maximum(0.0, budget_filter / prices))
+            wide_features[:, 4] = np.where(prices <= 0, 0.5, compatibility)
         
         # 위치 거리 (챗봇 location_filter vs shop.address)
-        location_distance = self._calculate_location_distance(
-            shop_district,
-            chatbot_output.get('location_filter', {}).get('district', '')
-        )
-        wide_features.append(location_distance)
+        user_district = chatbot_output.get('location_filter', {}).get('district', '')
+        wide_features[:, 5] = [self._calculate_location_distance(district, user_district) for district in shop_districts]
         
         # 식단 선호 매칭 (챗봇 dietary_preferences vs shop features)
-        dietary_match = self._calculate_dietary_preference_match(
-            candidate,
-            chatbot_output.get('filters', {}).get('dietary_preferences', [])
-        )
-        wide_features.append(dietary_match)
+        dietary_preferences = chatbot_output.get('filters', {}).get('dietary_preferences', [])
+        if dietary_preferences:
+            wide_features[:, 6] = [self._calculate_dietary_preference_match(candidate, dietary_preferences)
+                                   for candidate in candidates]
+        else:
+            wide_features[:, 6] = 0.5  # 중립
         
         # 3. 데이터 편향 보정 적용 (Section 28 문제 해결)
         
         # 착한가게 특성 (10% 편향 → 가중치 축소)
-        good_shop_feature = 0.0
-        if candidate.get('isGoodShop', False):
-            good_shop_feature = self.bias_corrections['good_shop_weight']
-        wide_features.append(good_shop_feature)
+        is_good_shop = np.array([bool(candidate.get('isGoodShop', False)) for candidate in candidates])
+        wide_features[:, 7] = np.where(is_good_shop, self.bias_corrections['good_shop_weight'], 0.0)
         
         # 급식카드는 90% 편향으로 변별력 없음 → 무시 (feature 추가 안함)
         # 인기메뉴는 100% 편향으로 완전 무의미 → 무시 (feature 추가 안함)
         
         # 평점 특성 (편향 고려한 임계값 적용)
-        rating_feature = 0.0
-        rating = candidate.get('rating', 0)
-        if rating > self.bias_corrections['rating_threshold']:
-            rating_feature = (rating - self.bias_corrections['rating_threshold']) / (5.0 - self.bias_corrections['rating_threshold'])
-        wide_features.append(rating_feature)
+        threshold = self.bias_corrections['rating_threshold']
+        ratings = np.array([candidate.get('rating', 0) for candidate in candidates], dtype=np.float64)
+        wide_features[:, 8] = np.where(ratings > threshold, (ratings - threshold) / (5.0 - threshold), 0.0)
         
         # 4. Layer 1 Funnel 정보 활용
         
-        # 어떤 Funnel에서 나왔는지 (funnel_source)
-        funnel_sources = candidate.get('funnel_sources', [candidate.get('funnel_source', 'unknown')])
-        if isinstance(funnel_sources, str):
-            funnel_sources = funnel_sources.split(' + ')
-        
         # 각 Funnel별 활성화 여부
-        wide_features.append(1.0 if 'collaborative' in ' '.join(funnel_sources) else 0.0)
-        wide_features.append(1.0 if 'content' in ' '.join(funnel_sources) else 0.0)
-        wide_features.append(1.0 if 'contextual' in ' '.join(funnel_sources) else 0.0)
-        wide_features.append(1.0 if 'popularity' in ' '.join(funnel_sources) else 0.0)
+        joined_sources = [' '.join(self._funnel_sources_of(candidate)) for candidate in candidates]
+        for column, funnel_name in enumerate(FUNNEL_NAMES, start=9):
+            wide_features[:, column] = [funnel_name in sources for sources in joined_sources]
         
         # Layer 1 점수들 (각 Funnel의 신뢰도)
-        wide_features.append(candidate.get('collaborative_score', 0) / 10.0)  # 정규화
-        wide_features.append(candidate.get('content_score', 0) / 10.0)
-        wide_features.append(candidate.get('context_score', 0) / 10.0)
-        wide_features.append(candidate.get('base_score', 0) / 10.0)
+        funnel_scores = np.array([[candidate.get(key, 0) for key in LAYER1_SCORE_FIELDS] for candidate in candidates],
+                                 dtype=np.float64)
+        wide_features[:, 13:13 + len(LAYER1_SCORE_FIELDS)] = funnel_scores / 10.0  # 정규화
         
-        # 필요한 길이로 패딩 (Wide component 목표: 50차원)
-        target_length = 50
-        while len(wide_features) < target_length:
-            wide_features.append(0.0)
-        
-        return np.array(wide_features[:target_length])
+        # 나머지 열은 0 (Wide component 목표: 50차원)
+        return wide_features
     
     def extract_deep_features(self,
                              candidate: Dict[str, Any],
@@ -156,50 +231,60 @@ class RealDataFeatureExtractor:
                              context: Dict[str, Any]) -> Dict[str, Any]:
         """
         Deep Component 특성 추출 (Embedding + Numerical Features)
-        실제 DB 시트 기반
+        실제 DB 시트 기반 (후보 1개짜리 extract_deep_features_batch)
+        """
+        features = self.extract_deep_features_batch([candidate], user_profile, chatbot_output, context)
+        for key in DEEP_CANDIDATE_KEYS:
+            features[key] = features[key][0]
+        return features
+    
+    def extract_deep_features_batch(self,
+                                   candidates: List[Dict[str, Any]],
+                                   user_profile: Dict[str, Any],
+                                   chatbot_output: Dict[str, Any],
+                                   context: Dict[str, Any],
+                                   dtype: np.dtype = np.float32) -> Dict[str, Any]:
+        """
+        후보 전체 Deep 특성
+        사용자 쪽 ID/수치형 값은 요청당 한 번 계산하고,
+        매장 쪽 ID는 후보 순서 리스트, 수치형 특성은 (후보 수 × 10, 기본 float32) 행렬로 반환
         """
+        location = user_profile.get('location', {})
         
         # 1. ID 기반 임베딩 특성들 (실제 DB 컬럼)
         features = {
-            'user_id': user_profile.get('id', 0),                    # user.id
-            'shop_id': candidate.get('id', 'unknown'),               # shop.id  
-            'brand_id': candidate.get('brand_id', 'unknown'),        # brand.id
-            'category': candidate.get('category', 'unknown'),        # shop.category
-            'user_location_state': user_profile.get('location', {}).get('state', 'unknown'),  # user_location.state
-            'user_location_city': user_profile.get('location', {}).get('city', 'unknown')     # user_location.city
+            'user_id': user_profile.get('id', 0),                                             # user.id
+            'shop_id': [candidate.get('id', 'unknown') for candidate in candidates],         # shop.id
+            'brand_id': [candidate.get('brand_id', 'unknown') for candidate in candidates],  # brand.id
+            'category': [candidate.get('category', 'unknown') for candidate in candidates],  # shop.category
+            'user_location_state': location.get('state', 'unknown'),                          # user_location.state
+            'user_location_city': location.get('city', 'unknown')                             # user_location.city
         }
         
         # 2. 챗봇 semantic query (벡터 검색 우선 전략)
         features['semantic_query'] = chatbot_output.get('semantic_query', '')
         
         # 3. 수치형 특성들 (실제 DB 컬럼 기반)
-        numerical_features = []
+        num_candidates = len(candidates)
+        numerical_features = np.zeros((num_candidates, DEEP_NUMERICAL_SIZE), dtype=dtype)
         
-        # 사용자 수치형 특성
+        # 사용자 수치형 특성 (모든 후보에 같은 값)
         user_age = self._calculate_age_from_birthday(user_profile.get('birthday', ''))
-        numerical_features.append(user_age / 100.0)  # 정규화
+        numerical_features[:, 0] = user_age / 100.0                                      # 정규화
+        numerical_features[:, 1] = user_profile.get('shop_favorite_count', 0) / 50.0     # userfavorite 집계
+        numerical_features[:, 2] = user_profile.get('total_orders', 0) / 100.0          # product_order 집계
+        numerical_features[:, 3] = user_profile.get('review_count', 0) / 50.0           # review 집계
         
-        # 사용자 활동 기록 (집계 필요 - product_order, userfavorite, review 시트)
-        numerical_features.append(user_profile.get('shop_favorite_count', 0) / 50.0)      # userfavorite 집계
-        numerical_features.append(user_profile.get('total_orders', 0) / 100.0)           # product_order 집계
-        numerical_features.append(user_profile.get('review_count', 0) / 50.0)            # review 집계
-        
-        # 매장 수치형 특성 (실제 DB 컬럼)
-        numerical_features.append(candidate.get('avg_menu_price', 0) / 50000.0)          # shop_menu.price 평균
-        numerical_features.append(candidate.get('menu_count', 0) / 30.0)                 # shop_menu 개수
-        numerical_features.append(candidate.get('rating', 0) / 5.0)                      # review.rating 평균
-        numerical_features.append(candidate.get('review_count', 0) / 1000.0)             # review 개수
-        numerical_features.append(candidate.get('order_count', 0) / 1000.0)              # product_order 개수
+        # 매장 수치형 특성 (shop_menu.price 평균, shop_menu 개수, review.rating 평균, review 개수, product_order 개수)
+        shop_values = np.array([[candidate.get(key, 0) for key, _ in SHOP_NUMERICAL_FIELDS] for candidate in candidates],
+                               dtype=np.float64).reshape(num_candidates, len(SHOP_NUMERICAL_FIELDS))
+        numerical_features[:, 4:4 + len(SHOP_NUMERICAL_FIELDS)] = shop_values / SHOP_NUMERICAL_SCALES
         
         # 영업시간 정보 (shop.operating_hours에서 계산)
-        operating_hours = self._calculate_operating_hours(candidate.get('operating_hours', ''))
-        numerical_features.append(operating_hours / 24.0)  # 정규화
-        
-        # 10차원으로 맞춤
-        while len(numerical_features) < 10:
-            numerical_features.append(0.0)
+        operating_hours = [self._calculate_operating_hours(candidate.get('operating_hours', '')) for candidate in candidates]
+        numerical_features[:, 9] = np.array(operating_hours, dtype=np.float64) / 24.0  # 정규화
         
-        features['numerical_features'] = np.array(numerical_features[:10])
+        features['numerical_features'] = numerical_features
         
         return features
     
@@ -276,23 +361,18 @@ class RealDataFeatureExtractor:
     
     def _extract_district_from_address(self, address: str) -> str:
         """주소에서 구/시 정보 추출 (shop.address → 지역구)"""
-        if not address:
-            return 'unknown'
-        
-        # 간단한 정규식으로 구/시 추출
-        districts = ['강남구', '서초구', '관악구', '동작구', '영등포구', '마포구', '용산구', '중구', '종로구', '성동구']
-        for district in districts:
-            if district in address:
-                return district
-        
-        return 'unknown'
+        return _district_from_address(address)
     
     def _hash_cross_feature(self, feature1: str, feature2: str) -> float:
         """교차 특성 해싱 (Wide Component용)"""
-        combined = f"{feature1}_{feature2}"
-        # MD5 해싱 후 0~1 범위로 정규화
-        hash_value = int(hashlib.md5(combined.encode()).hexdigest()[:8], 16)
-        return (hash_value % 10000) / 10000.0
+        return _hashed_cross_feature(f"{feature1}_{feature2}")
+    
+    def _funnel_sources_of(self, candidate: Dict[str, Any]) -> List[str]:
+        """후보가 나온 Funnel 목록 (funnel_sources 리스트 또는 ' + '로 합친 funnel_source)"""
+        funnel_sources = candidate.get('funnel_sources', [candidate.get('funnel_source', 'unknown')])
+        if isinstance(funnel_sources, str):
+            funnel_sources = funnel_sources.split(' + ')
+        return funnel_sources
     
     def _calculate_budget_compatibility(self, avg_menu_price: float, budget_filter: float) -> float:
         """예산 적합성 계산"""
@@ -363,7 +443,9 @@ class RecommendationEngine:
     def __init__(self,
                  candidate_config: Optional[CandidateGenerationConfig] = None,
                  ranking_config: Optional[RankingModelConfig] = None,
-                 model_path: Optional[str] = None):
+                 model_path: Optional[str] = None,
+                 result_cache_size: int = DEFAULT_RESULT_CACHE_SIZE,
+                 result_cache_ttl: float = DEFAULT_RESULT_CACHE_TTL):
         
         # Layer 1: 4-Funnel 후보 생성기 (기존 완성된 시스템)
         self.candidate_generator = CandidateGenerator(candidate_config)
@@ -381,6 +463,11 @@ class RecommendationEngine:
         if model_path and Path(model_path).exists():
             self._try_load_deep_model(model_path)
         
+        # 사용자별 추천 결과 캐시 (프로필 변경 시 attach_user_manager로 연결한 관리자가 무효화)
+        self.result_cache = None
+        if result_cache_size > 0:
+            self.result_cache = RecommendationResultCache(result_cache_size, result_cache_ttl)
+        
         # 성능 통계
         self.stats = {
             'total_requests': 0,
@@ -407,6 +494,7 @@ class RecommendationEngine:
         Args:
             user_id: 사용자 ID (user.id)
             user_profile: 실제 DB 시트 구조 (user, user_location, 집계 정보)
+                profile_version이 있으면 결과 캐시 키로 사용 (NaviyamUserManager.get_profile_version)
             chatbot_output: 챗봇 분석 결과 (semantic_query, filters 등)
             context: 상황 정보 (시간, 위치 등)
             top_k: 반환할 추천 수
@@ -416,6 +504,15 @@ class RecommendationEngine:
         """
         start_time = datetime.now()
         
+        # 같은 사용자/프로필/쿼리/상황 구간의 최근 결과 재사용
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.make_key(user_id, user_profile, chatbot_output, context, top_k,
+                                                   deep_learning=self.deep_learning_available)
+            cached_result = self.result_cache.get(cache_key)
+            if cached_result is not None:
+                return self._cached_recommendation_result(cached_result, chatbot_output, context, start_time)
+        
         # Layer 1: 4-Funnel 후보 생성 (벡터 검색 우선 전략)
         candidates = self._generate_candidates_with_vector_priority(
             user_id, user_profile, chatbot_output, context
@@ -438,7 +535,7 @@ class RecommendationEngine:
         else:
             # 실제 데이터 기반 규칙 랭킹 (Wide Component 규칙 구현)
             ranked_candidates = self._wide_component_ranking(
-                candidates, user_profile, chatbot_output, context
+                candidates, user_profile, chatbot_output, context, top_k=top_k
             )
             ranking_method = 'wide_component_rules'
         
@@ -469,16 +566,48 @@ class RecommendationEngine:
                 'layer1_funnel_breakdown': self._analyze_funnel_breakdown(candidates),
                 'total_time': total_time,
                 'filters_applied': chatbot_output.get('filters', {}),
-                'context': context
+                'context': context,
+                'cache_hit': False
             }
         }
         
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result)
+        
         # 통계 업데이트
         self._update_stats(len(candidates), total_time)
         
         logger.info(f"Layer 2 완료: {len(top_recommendations)}개 추천 반환 ({ranking_method}, {total_time:.3f}초)")
         return result
     
+    def _cached_recommendation_result(self,
+                                      cached_result: Dict[str, Any],
+                                      chatbot_output: Dict[str, Any],
+                                      context: Dict[str, Any],
+                                      start_time: datetime) -> Dict[str, Any]:
+        """캐시된 추천 결과에 이번 요청의 원본 쿼리/상황 정보 반영"""
+        total_time = (datetime.now() - start_time).total_seconds()
+        
+        cached_result['original_query'] = chatbot_output.get('original_query', '')
+        metadata = cached_result['metadata']
+        metadata['context'] = context
+        metadata['total_time'] = total_time
+        metadata['cache_hit'] = True
+        
+        self._update_stats(metadata['total_candidates'], total_time)
+        
+        logger.info(f"추천 결과 캐시 사용: {cached_result['user_id']} ({total_time:.3f}초)")
+        return cached_result
+    
+    def attach_user_manager(self, user_manager):
+        """NaviyamUserManager 프로필 변경 시 해당 사용자 결과 캐시 무효화"""
+        user_manager.add_profile_listener(self.invalidate_user_cache)
+    
+    def invalidate_user_cache(self, user_id: str):
+        """사용자 추천 결과 캐시 제거"""
+        if self.result_cache is not None:
+            self.result_cache.invalidate_user(user_id)
+    
     def _generate_candidates_with_vector_priority(self,
                                                 user_id: str,
                                                 user_profile: Dict[str, Any],
@@ -523,137 +652,73 @@ class RecommendationEngine:
                                candidates: List[Dict[str, Any]],
                                user_profile: Dict[str, Any],
                                chatbot_output: Dict[str, Any],
-                               context: Dict[str, Any]) -> List[Dict[str, Any]]:
+                               context: Dict[str, Any],
+                               top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Wide Component 규칙 기반 랭킹 (딥러닝 모델 없을 때)
         실제 DB 특성 기반 Cross-Product Features 활용
+        
+        후보 전체 점수는 WIDE_COMPONENT_RULES 커널로 한 번에 계산하고,
+        점수/추천 이유 필드는 반환하는 상위 top_k개(None이면 전체)에만 기록합니다.
         """
+        # 실제 데이터 기반 특성 추출 (후보 전체를 한 번에, 점수 합산용이라 float64)
+        wide_matrix = self.feature_extractor.extract_wide_features_batch(
+            candidates, user_profile, chatbot_output, context, dtype=np.float64
+        )
+        numerical_matrix = self.feature_extractor.extract_deep_features_batch(
+            candidates, user_profile, chatbot_output, context, dtype=np.float64
+        )['numerical_features']
         
-        for candidate in candidates:
-            # 실제 데이터 기반 특성 추출
-            wide_features = self.feature_extractor.extract_wide_features(
-                candidate, user_profile, chatbot_output, context
-            )
-            deep_features = self.feature_extractor.extract_deep_features(
-                candidate, user_profile, chatbot_output, context
-            )
-            
-            # Layer 1 기본 점수 (벡터 검색 우선 반영)
-            layer1_score = max([
-                candidate.get('collaborative_score', 0),
-                candidate.get('content_score', 0),      # 벡터 검색 부스트 반영
-                candidate.get('context_score', 0),
-                candidate.get('base_score', 0)
-            ])
-            
-            # Wide Component Cross-Product 점수 계산
-            cross_product_score = 0.0
-            bonus_reasons = []
-            
-            # 연령대-카테고리 교차 특성 (wide_features[0])
-            age_category_match = wide_features[0]
-            if age_category_match > 0.7:
-                cross_product_score += 3.0
-                bonus_reasons.append("연령-카테고리 매칭")
-            
-            # 위치-지역 교차 특성 (wide_features[1])
-            location_match = wide_features[1]
-            if location_match > 0.7:
-                cross_product_score += 2.0
-                bonus_reasons.append("위치 매칭")
-            
-            # 시간-카테고리 교차 특성 (wide_features[2])
-            time_category_match = wide_features[2]
-            if time_category_match > 0.7:
-                cross_product_score += 2.0
-                bonus_reasons.append("시간-카테고리 매칭")
-            
-            # 사용자-매장 특별 교차 특성 (wide_features[3])
-            user_shop_special = wide_features[3]
-            if user_shop_special > 0.8:
-                cross_product_score += 5.0
-                bonus_reasons.append("개인화 특별 매칭")
-            
-            # 챗봇 Output 기반 직접 특성들
-            budget_compat = wide_features[4]  # 예산 적합성
-            location_dist = wide_features[5]  # 위치 거리
-            dietary_match = wide_features[6]  # 식단 선호
-            
-            if budget_compat > 0.8:
-                cross_product_score += 2.0
-                bonus_reasons.append("예산 적합")
-            
-            if location_dist > 0.8:
-                cross_product_score += 1.5
-                bonus_reasons.append("위치 편의")
-            
-            if dietary_match > 0.6:
-                cross_product_score += 2.5
-                bonus_reasons.append("식단 선호")
-            
-            # 데이터 편향 보정된 특성들
-            good_shop_corrected = wide_features[7]  # 착한가게 (보정됨)
-            rating_corrected = wide_features[9]     # 평점 (임계값 적용)
-            
-            if good_shop_corrected > 0:
-                cross_product_score += good_shop_corrected * 10  # 원래 3점이었으나 보정으로 0.9점
-                bonus_reasons.append("착한가게(편향보정)")
-                self.stats['data_bias_corrections'] += 1
-            
-            if rating_corrected > 0.5:
-                cross_product_score += rating_corrected * 2.0
-                bonus_reasons.append("고평점(임계값적용)")
-            
-            # Layer 1 Funnel 정보 활용 (Funnel별 신뢰도)
-            funnel_boost = 0.0
-            if wide_features[10] > 0:  # collaborative
-                funnel_boost += wide_features[14] * 2.0  # collaborative_score
-            if wide_features[11] > 0:  # content (벡터 검색)
-                funnel_boost += wide_features[15] * 3.0  # content_score (가중치 증가)
-            if wide_features[12] > 0:  # contextual
-                funnel_boost += wide_features[16] * 2.0  # context_score
-            if wide_features[13] > 0:  # popularity
-                funnel_boost += wide_features[17] * 1.5  # base_score
-            
-            if funnel_boost > 1.0:
-                cross_product_score += funnel_boost
-                bonus_reasons.append("다중Funnel")
-            
-            # Deep Component 수치형 특성 간단 활용
-            numerical_features = deep_features['numerical_features']
-            
-            # 사용자 활동성 점수 (numerical_features[1:4])
-            user_activity = np.mean(numerical_features[1:4])  # 즐겨찾기, 주문, 리뷰
-            if user_activity > 0.3:
-                cross_product_score += user_activity * 2.0
-                bonus_reasons.append("활발한사용자")
-            
-            # 매장 인기도 점수 (numerical_features[5:8])
-            shop_popularity = np.mean(numerical_features[5:8])  # 메뉴수, 평점, 리뷰수
-            if shop_popularity > 0.5:
-                cross_product_score += shop_popularity * 1.5
-                bonus_reasons.append("인기매장")
-            
-            # 최종 점수 계산
-            final_score = layer1_score + cross_product_score
+        # Layer 1 기본 점수 (벡터 검색 우선 반영)
+        layer1_scores = layer1_max_scores(candidates)
+        
+        # Wide Component Cross-Product 점수 계산
+        cross_product_scores, rule_hits = WIDE_COMPONENT_RULES.score(
+            self._wide_rule_features(wide_matrix, numerical_matrix)
+        )
+        final_scores = layer1_scores + cross_product_scores
+        
+        # 착한가게(편향보정) 적용 횟수
+        self.stats['data_bias_corrections'] += int(rule_hits[:, WIDE_GOOD_SHOP_RULE].sum())
+        
+        # 점수 기준 상위 k개 (동점은 Layer 1 순서)
+        k = len(candidates) if top_k is None else top_k
+        ranked_candidates = []
+        for index in top_k_indices(final_scores, k).tolist():
+            candidate = candidates[index]
+            bonus_reasons = WIDE_COMPONENT_RULES.reasons(rule_hits[index])
             
             # 결과 저장
-            candidate['personalized_score'] = final_score
-            candidate['layer1_base_score'] = layer1_score
-            candidate['wide_component_score'] = cross_product_score
+            candidate['personalized_score'] = float(final_scores[index])
+            candidate['layer1_base_score'] = float(layer1_scores[index])
+            candidate['wide_component_score'] = float(cross_product_scores[index])
             candidate['bonus_reasons'] = bonus_reasons
             candidate['ranking_method'] = 'wide_component_cross_product'
             candidate['vector_search_boosted'] = candidate.get('vector_search_boosted', False)
-            candidate['data_bias_corrected'] = '편향보정' in ' '.join(bonus_reasons)
-        
-        # 점수 기준 정렬
-        ranked_candidates = sorted(candidates,
-                                 key=lambda x: x['personalized_score'],
-                                 reverse=True)
+            candidate['data_bias_corrected'] = bool(rule_hits[index, WIDE_GOOD_SHOP_RULE])
+            ranked_candidates.append(candidate)
         
         logger.info(f"Wide Component 랭킹 완료: {len(ranked_candidates)}개 후보")
         return ranked_candidates
     
+    def _wide_rule_features(self, wide_matrix: np.ndarray, numerical_matrix: np.ndarray) -> np.ndarray:
+        """
+        WIDE_COMPONENT_RULES 입력 행렬
+        Wide 특성 0~9열 + Funnel 신뢰도 합(10) + 사용자 활동성(11) + 매장 인기도(12)
+        """
+        # Layer 1 Funnel 정보 활용 (Funnel별 신뢰도)
+        funnel_boost = np.zeros(len(wide_matrix))
+        for flag_column, score_column, weight in WIDE_FUNNEL_BOOST_TERMS:
+            funnel_boost = funnel_boost + np.where(wide_matrix[:, flag_column] > 0,
+                                                   wide_matrix[:, score_column] * weight, 0.0)
+        
+        return np.column_stack([
+            wide_matrix[:, :10],
+            funnel_boost,
+            numerical_matrix[:, 1:4].mean(axis=1),  # 사용자 활동성: 즐겨찾기, 주문, 리뷰
+            numerical_matrix[:, 5:8].mean(axis=1),  # 매장 인기도: 메뉴수, 평점, 리뷰수
+        ])
+    
     def _generate_explanations(self,
                               recommendations: List[Dict[str, Any]],
                               user_profile: Dict[str, Any],
@@ -790,6 +855,7 @@ class RecommendationEngine:
         return {
             'engine_stats': self.stats.copy(),
             'layer1_stats': self.candidate_generator.get_funnel_stats(),
+            'result_cache': self.result_cache.get_stats() if self.result_cache is not None else {'enabled': False},
             'feature_extractor_config': {
                 'data_bias_corrections': self.feature_extractor.bias_corrections,
                 'vector_search_weight': self.vector_search_weight,
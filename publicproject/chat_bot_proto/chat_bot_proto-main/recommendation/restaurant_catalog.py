@@ -0,0 +1,295 @@
+"""
+추천 Funnel 공용 매장 카탈로그
+restaurants_optimized.json을 한 번만 읽어 불변 객체로 만들고 모든 Funnel이 공유
+
+- 원본 매장 dict는 읽기 전용 매핑(MappingProxyType)/튜플로 고정
+- 반복되는 문자열(키, 카테고리, 주소 등)은 sys.intern으로 한 번만 보관
+- 최저/평균 메뉴 가격, 영업 시작/종료 분, 지역구·카테고리 코드는 로드 시 미리 계산
+- 주간 영업시간 타임라인(opening_hours)도 카탈로그와 함께 한 번만 구축
+- 벡터화 필터/점수 계산용 매장 속성 배열(columns)을 매장 순서로 보관
+"""
+
+import gc
+import os
+import re
+import sys
+import json
+import logging
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Mapping, NamedTuple
+
+import numpy as np
+
+try:
+    from .opening_hours import OpeningHoursTimeline, make_schedule, parse_break
+except ImportError:
+    from opening_hours import OpeningHoursTimeline, make_schedule, parse_break
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESTAURANTS_PATH = "data/restaurants_optimized.json"
+
+# "서울 관악구 봉천로 ..." → "관악구"
+DISTRICT_PATTERN = re.compile(r'([가-힣]+(?:구|군))(?:\s|$)')
+
+# datetime.strptime(..., '%H:%M')과 같은 형식 (시/분 1~2자리)
+TIME_PATTERN = re.compile(r'(\d{1,2}):(\d{1,2})')
+
+
+def _freeze_value(value: Any) -> Any:
+    if type(value) is str:
+        return sys.intern(value)
+    if type(value) is list:
+        return tuple([_freeze_value(item) for item in value])
+    if type(value) is dict:
+        return _freeze_object(value)
+    return value
+
+
+def _freeze_object(obj: Dict[str, Any]) -> Mapping[str, Any]:
+    """JSON 객체를 읽기 전용 매핑으로 변환 (list → tuple, str → intern)
+    
+    json.load의 object_hook으로 쓰면 파싱하면서 안쪽 객체부터 바로 고정됩니다.
+    (키 문자열은 json 디코더가 이미 공유하므로 값만 변환)
+    """
+    if type(obj) is MappingProxyType:
+        return obj
+    for key, value in obj.items():
+        value_type = type(value)
+        if value_type is str or value_type is list or value_type is dict:
+            obj[key] = _freeze_value(value)
+    return MappingProxyType(obj)
+
+
+def parse_minutes(time_str: Optional[str]) -> Optional[int]:
+    """'HH:MM' → 자정 기준 분 (파싱 실패 시 None)"""
+    if not time_str or not isinstance(time_str, str):
+        return None
+    match = TIME_PATTERN.fullmatch(time_str)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    if hour > 23 or minute > 59:
+        return None
+    return hour * 60 + minute
+
+
+def extract_district(address: str) -> str:
+    """주소에서 구/군 이름 추출 (없으면 빈 문자열)"""
+    match = DISTRICT_PATTERN.search(address)
+    return sys.intern(match.group(1)) if match else ''
+
+
+class ShopRecord(NamedTuple):
+    """매장 한 곳의 미리 계산된 필드 (불변)"""
+    position: int
+    shop_id: str
+    shop_name: str
+    category: str
+    category_lower: str
+    category_code: int
+    address: str
+    district: str
+    district_code: int
+    is_good_shop: bool
+    accepts_meal_card: bool
+    menu_names: Tuple[str, ...]
+    menu_count: int
+    min_price: Optional[float]   # 메뉴 없으면 None, 가격 없는 메뉴는 inf로 취급
+    avg_price: Optional[float]   # 가격 > 0인 메뉴 평균, 없으면 None
+    open_minutes: Optional[int]
+    close_minutes: Optional[int]
+    raw: Mapping[str, Any]       # 읽기 전용 원본 매장 데이터
+
+    @property
+    def has_hours(self) -> bool:
+        """영업 시작/종료 시각이 모두 파싱되었는지"""
+        return self.open_minutes is not None and self.close_minutes is not None
+
+
+class ShopColumns(NamedTuple):
+    """매장 순서(ShopRecord.position)의 속성 배열 (읽기 전용)"""
+    category_code: np.ndarray      # int32
+    district_code: np.ndarray      # int32
+    is_good_shop: np.ndarray       # bool
+    accepts_meal_card: np.ndarray  # bool
+    menu_count: np.ndarray         # int32
+    min_price: np.ndarray          # float64, 메뉴 없으면 NaN (가격 없는 메뉴만 있으면 inf)
+    avg_price: np.ndarray          # float64, 없으면 NaN
+
+    @classmethod
+    def from_shops(cls, shops: Tuple[ShopRecord, ...]) -> 'ShopColumns':
+        def column(values, dtype):
+            array = np.fromiter(values, dtype=dtype, count=len(shops))
+            array.setflags(write=False)
+            return array
+        
+        return cls(
+            category_code=column((s.category_code for s in shops), np.int32),
+            district_code=column((s.district_code for s in shops), np.int32),
+            is_good_shop=column((s.is_good_shop for s in shops), bool),
+            accepts_meal_card=column((s.accepts_meal_card for s in shops), bool),
+            menu_count=column((s.menu_count for s in shops), np.int32),
+            min_price=column((np.nan if s.min_price is None else s.min_price for s in shops), np.float64),
+            avg_price=column((np.nan if s.avg_price is None else s.avg_price for s in shops), np.float64)
+        )
+
+
+class RestaurantCatalog:
+    """불변 매장 카탈로그 (스레드 간 공유 가능)"""
+
+    def __init__(self, restaurants: Iterable[Dict[str, Any]], source: Optional[str] = None):
+        """
+        Args:
+            restaurants: 원본 매장 dict 목록
+            source: 데이터 파일 경로 (로그/통계용)
+        """
+        self.source = source
+        self.restaurants: Tuple[Mapping[str, Any], ...] = tuple(_freeze_object(r) for r in restaurants)
+
+        category_codes: Dict[str, int] = {}
+        district_codes: Dict[str, int] = {'': 0}
+        shops: List[ShopRecord] = []
+
+        for position, restaurant in enumerate(self.restaurants):
+            category = restaurant.get('category', '')
+            category_lower = sys.intern(category.lower())
+            address = restaurant.get('location', {}).get('address', '')
+            district = extract_district(address)
+            attributes = restaurant.get('attributes', {})
+            hours = restaurant.get('hours', {})
+            menus = restaurant.get('menus', ())
+
+            prices = [menu.get('price', 0) for menu in menus if menu.get('price', 0) > 0]
+
+            shops.append(ShopRecord(
+                position=position,
+                shop_id=restaurant.get('shopId', ''),
+                shop_name=restaurant.get('shopName', ''),
+                category=category,
+                category_lower=category_lower,
+                category_code=category_codes.setdefault(category_lower, len(category_codes)),
+                address=address,
+                district=district,
+                district_code=district_codes.setdefault(district, len(district_codes)),
+                is_good_shop=bool(attributes.get('isGoodShop', False)),
+                accepts_meal_card=bool(attributes.get('acceptsMealCard', False)),
+                menu_names=tuple(sys.intern(menu.get('name', '').lower()) for menu in menus),
+                menu_count=len(menus),
+                min_price=min(menu.get('price', float('inf')) for menu in menus) if menus else None,
+                avg_price=sum(prices) / len(prices) if prices else None,
+                open_minutes=parse_minutes(hours.get('open')),
+                close_minutes=parse_minutes(hours.get('close')),
+                raw=restaurant
+            ))
+
+        self.shops: Tuple[ShopRecord, ...] = tuple(shops)
+        self.category_codes: Mapping[str, int] = MappingProxyType(category_codes)
+        self.district_codes: Mapping[str, int] = MappingProxyType(district_codes)
+
+        # shopId 중복 시 첫 매장 기준
+        by_id: Dict[str, ShopRecord] = {}
+        for shop in self.shops:
+            by_id.setdefault(shop.shop_id, shop)
+        self._by_id: Mapping[str, ShopRecord] = MappingProxyType(by_id)
+
+        self.columns = ShopColumns.from_shops(self.shops)
+        self._mask_cache: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._mask_lock = threading.Lock()
+        
+        # 매장 순서(ShopRecord.position)와 같은 순서의 영업시간 타임라인
+        self.opening_hours = OpeningHoursTimeline([
+            make_schedule(shop.open_minutes, shop.close_minutes,
+                          *parse_break(shop.raw.get('hours', {}).get('break')))
+            for shop in self.shops
+        ])
+
+    @classmethod
+    def from_file(cls, restaurants_path: str = DEFAULT_RESTAURANTS_PATH) -> 'RestaurantCatalog':
+        """JSON 파일에서 로드 (실패 시 빈 카탈로그)"""
+        # 순환 참조가 없는 대량 객체 생성 중에는 GC 탐색이 로드 시간 대부분을 차지하므로 잠시 끔
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(restaurants_path, 'r', encoding='utf-8') as f:
+                data = json.load(f, object_hook=_freeze_object)
+            catalog = cls(data.get('restaurants', ()), source=restaurants_path)
+            logger.info(f"매장 카탈로그: {len(catalog)}개 매장 로드 완료 ({restaurants_path})")
+            return catalog
+        except Exception as e:
+            logger.error(f"매장 데이터 로드 실패: {e}")
+            return cls([], source=restaurants_path)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def __len__(self) -> int:
+        return len(self.shops)
+
+    def __iter__(self):
+        return iter(self.shops)
+
+    def get(self, shop_id: str) -> Optional[ShopRecord]:
+        """shopId로 매장 조회"""
+        return self._by_id.get(shop_id)
+
+    def category_mask(self, keyword: str) -> np.ndarray:
+        """카테고리(소문자)에 keyword가 포함된 매장 (읽기 전용, 캐시됨)"""
+        def build():
+            codes = [code for category, code in self.category_codes.items() if keyword in category]
+            return np.isin(self.columns.category_code, codes)
+        return self._cached_mask(('category', keyword), build)
+    
+    def address_mask(self, keyword: str) -> np.ndarray:
+        """주소에 keyword가 포함된 매장 (읽기 전용, 캐시됨)"""
+        return self._cached_mask(('address', keyword), lambda: np.fromiter(
+            (keyword in shop.address for shop in self.shops), dtype=bool, count=len(self.shops)))
+    
+    def _cached_mask(self, key: Tuple[str, str], build, cache_size: int = 64) -> np.ndarray:
+        with self._mask_lock:
+            mask = self._mask_cache.get(key)
+            if mask is not None:
+                self._mask_cache.move_to_end(key)
+                return mask
+        
+        mask = build()
+        mask.setflags(write=False)
+        with self._mask_lock:
+            self._mask_cache[key] = mask
+            while len(self._mask_cache) > cache_size:
+                self._mask_cache.popitem(last=False)
+        return mask
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """카탈로그 통계"""
+        return {
+            'source': self.source,
+            'total_shops': len(self.shops),
+            'categories': len(self.category_codes),
+            'districts': len(self.district_codes) - 1,
+            'opening_hours': self.opening_hours.get_stats()
+        }
+
+
+_catalog_cache: Dict[Tuple[str, float], RestaurantCatalog] = {}
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(restaurants_path: str = DEFAULT_RESTAURANTS_PATH) -> RestaurantCatalog:
+    """경로별 공유 카탈로그 반환 (파일이 바뀌면 다시 로드)"""
+    try:
+        key = (os.path.abspath(restaurants_path), os.path.getmtime(restaurants_path))
+    except OSError:
+        key = (os.path.abspath(restaurants_path), -1.0)
+
+    with _catalog_lock:
+        catalog = _catalog_cache.get(key)
+        if catalog is None:
+            catalog = RestaurantCatalog.from_file(restaurants_path)
+            # 같은 경로의 이전 버전은 더 이상 공유하지 않음
+            for old_key in [k for k in _catalog_cache if k[0] == key[0]]:
+                del _catalog_cache[old_key]
+            _catalog_cache[key] = catalog
+        return catalog
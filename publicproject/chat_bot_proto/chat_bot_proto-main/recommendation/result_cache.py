@@ -0,0 +1,187 @@
+"""
+사용자별 추천 결과 캐시
+
+같은 아이가 몇 분 안에 비슷한 질문을 다시 하면 Layer 1 + Layer 2를 처음부터 다시 계산하지 않도록
+(user_id, 프로필 버전, 정규화된 쿼리, 필터, 상황 구간, top_k) → 추천 결과를 LRU/TTL 방식으로 보관합니다.
+
+- 프로필 버전: user_profile['profile_version'] (NaviyamUserManager.get_profile_version)
+  없으면 프로필 내용의 지문을 사용하므로 프로필이 바뀌면 자연히 다른 키가 됩니다.
+- 상황 구간: time_of_day, user_location, current_time을 context_bucket_minutes 단위로 내림
+  (영업 상태가 바뀌는 시각을 넘기지 않도록 짧게 유지)
+  딥러닝 랭킹을 쓸 때는 Deep 피처가 읽는 weather, companion도 포함
+- NaviyamUserManager가 프로필을 바꾸면 invalidate_user로 해당 사용자 항목을 즉시 제거
+"""
+
+import re
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple, Set
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# 결과에 영향을 주는 챗봇 Output 필드 (semantic_query 제외)
+CHATBOT_OUTPUT_KEY_FIELDS = ('filters', 'budget_filter', 'location_filter')
+
+# 딥러닝 랭킹에서만 결과에 영향을 주는 상황 필드 (feature_engineering의 weather/companion 피처)
+DEEP_CONTEXT_KEY_FIELDS = ('weather', 'companion')
+
+CacheKey = Tuple[str, str, str, str, Tuple[Any, ...], int]
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 쿼리 정규화 (NFC, 소문자, 공백 정리)"""
+    text = unicodedata.normalize('NFC', query or '')
+    return _WHITESPACE_PATTERN.sub(' ', text).strip().lower()
+
+
+def _stable_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def profile_version(user_profile: Dict[str, Any]) -> str:
+    """프로필 버전 (명시된 버전이 없으면 프로필 내용 지문)"""
+    version = user_profile.get('profile_version')
+    if version is not None:
+        return f"v{version}"
+    return hashlib.md5(_stable_json(user_profile).encode()).hexdigest()
+
+
+class RecommendationResultCache:
+    """크기 제한 LRU + TTL 추천 결과 캐시 (스레드 안전)"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0, context_bucket_minutes: int = 15):
+        """
+        Args:
+            max_size: 최대 보관 결과 수 (초과 시 가장 오래 사용되지 않은 항목 제거)
+            ttl_seconds: 항목 유효 시간 (0 이하면 만료 없음)
+            context_bucket_minutes: current_time을 묶는 구간 (분)
+        """
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.context_bucket_minutes = max(1, context_bucket_minutes)
+
+        self._entries: "OrderedDict[CacheKey, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._user_keys: Dict[str, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def make_key(self,
+                 user_id: str,
+                 user_profile: Dict[str, Any],
+                 chatbot_output: Dict[str, Any],
+                 context: Dict[str, Any],
+                 top_k: int,
+                 deep_learning: bool = False) -> CacheKey:
+        """요청 → 캐시 키 (deep_learning: 딥러닝 랭킹 사용 여부)"""
+        output_key = _stable_json({field: chatbot_output.get(field) for field in CHATBOT_OUTPUT_KEY_FIELDS})
+        return (str(user_id), profile_version(user_profile), normalize_query(chatbot_output.get('semantic_query', '')),
+                output_key, self.context_bucket(context, deep_learning), top_k)
+
+    def context_bucket(self, context: Dict[str, Any], deep_learning: bool = False) -> Tuple[Any, ...]:
+        """상황 구간 (시간대, 위치, current_time을 구간 단위로 내린 값, 딥러닝 랭킹이면 날씨/동행자 추가)"""
+        current_time = context.get('current_time') or datetime.now()
+        minutes = current_time.hour * 60 + current_time.minute
+        bucket_start = minutes - minutes % self.context_bucket_minutes
+        bucket = (context.get('time_of_day'), context.get('user_location'),
+                  current_time.date().isoformat(), bucket_start)
+        if deep_learning:
+            bucket += tuple(context.get(field) for field in DEEP_CONTEXT_KEY_FIELDS)
+        return bucket
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def _remove(self, key: CacheKey):
+        del self._entries[key]
+        user_keys = self._user_keys.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[key[0]]
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """캐시된 결과 사본 반환 (없거나 만료되면 None)"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[1], now):
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = entry[0]
+
+        # 호출 측이 결과를 수정해도 캐시 항목은 그대로 유지
+        return copy.deepcopy(result)
+
+    def put(self, key: CacheKey, result: Dict[str, Any]):
+        """결과 사본 저장"""
+        result = copy.deepcopy(result)
+
+        with self._lock:
+            self._entries[key] = (result, time.time())
+            self._entries.move_to_end(key)
+            self._user_keys.setdefault(key[0], set()).add(key)
+
+            while len(self._entries) > self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> int:
+        """사용자 항목 전체 제거 (프로필 변경 시), 제거한 항목 수 반환"""
+        with self._lock:
+            keys = self._user_keys.pop(str(user_id), set())
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+        if keys:
+            logger.debug(f"추천 결과 캐시 무효화: {user_id} ({len(keys)}개)")
+        return len(keys)
+
+    def clear(self):
+        """캐시 항목 및 통계 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
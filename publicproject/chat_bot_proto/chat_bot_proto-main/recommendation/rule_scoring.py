@@ -0,0 +1,72 @@
+"""
+규칙 기반 랭킹 공용 점수 커널
+
+"특성 > 임계값이면 보너스" 규칙들을 후보 전체 특성 행렬에 한 번에 적용합니다.
+(후보마다 if 체인을 도는 대신 규칙별 적중 행렬 + 마스크 내적)
+
+- 고정 보너스 규칙: 적중 행렬 × 보너스 벡터 내적
+- 특성값 배수 규칙(scaled): 규칙 순서대로 특성값 × 가중치를 더함
+고정 보너스 규칙을 앞에, 배수 규칙을 뒤에 두면 기존 순차 덧셈과 같은 점수가 나옵니다.
+(고정 보너스는 0.5 단위라 내적 순서와 무관하게 정확)
+"""
+
+from typing import List, Dict, Any, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+# Layer 1 Funnel 점수 필드
+LAYER1_SCORE_FIELDS = ('collaborative_score', 'content_score', 'context_score', 'base_score')
+
+
+class ScoringRule(NamedTuple):
+    """특성 열(column)이 임계값(threshold)을 넘으면 적용되는 규칙"""
+    column: int
+    threshold: float
+    weight: float        # 고정 보너스, scaled이면 특성값에 곱하는 가중치
+    reason: str
+    scaled: bool = False
+
+
+class RuleKernel:
+    """규칙 목록을 배열로 바꿔 두고 후보 전체에 적용"""
+
+    def __init__(self, rules: Sequence[ScoringRule]):
+        self.rules = tuple(rules)
+        self.columns = np.array([rule.column for rule in self.rules], dtype=np.int64)
+        self.thresholds = np.array([rule.threshold for rule in self.rules], dtype=np.float64)
+        scaled = np.array([rule.scaled for rule in self.rules], dtype=bool)
+        self.fixed_indices = np.flatnonzero(~scaled)
+        self.fixed_weights = np.array([self.rules[i].weight for i in self.fixed_indices], dtype=np.float64)
+        self.scaled_indices = np.flatnonzero(scaled)
+
+    def score(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            features: (후보 수 × 특성 수) 행렬
+
+        Returns:
+            (후보별 보너스 합계, 후보 × 규칙 적중 여부 행렬)
+        """
+        rule_values = features[:, self.columns]
+        hits = rule_values > self.thresholds
+        bonus = hits[:, self.fixed_indices].astype(np.float64) @ self.fixed_weights
+        for index in self.scaled_indices:
+            bonus = bonus + np.where(hits[:, index], rule_values[:, index] * self.rules[index].weight, 0.0)
+        return bonus, hits
+
+    def reasons(self, hit_row: np.ndarray) -> List[str]:
+        """적중한 규칙의 이유 (규칙 순서)"""
+        return [self.rules[index].reason for index in np.flatnonzero(hit_row)]
+
+
+def layer1_max_scores(candidates: List[Dict[str, Any]]) -> np.ndarray:
+    """후보별 Layer 1 Funnel 점수 중 최댓값"""
+    if not candidates:
+        return np.zeros(0)
+    return np.max([candidate_column(candidates, field, 0) for field in LAYER1_SCORE_FIELDS], axis=0)
+
+
+def candidate_column(candidates: List[Dict[str, Any]], field: str, default: float = 0) -> np.ndarray:
+    """후보 dict들의 한 필드를 float64 배열로"""
+    return np.fromiter((candidate.get(field, default) for candidate in candidates), dtype=np.float64,
+                       count=len(candidates))
@@ -0,0 +1,99 @@
+"""
+Funnel 공용 상위 k개 선택
+
+각 Funnel은 매장 순서 NumPy 배열로 점수와 필터 마스크를 계산하고
+여기서 상위 k개 위치만 고른 뒤, 선택된 매장에 대해서만 후보 dict와 추천 이유를 만듭니다.
+(전체 후보 dict 생성 → 정렬 → [:limit] 대신)
+
+정렬 순서는 기존 구현(list.sort 안정 정렬)과 같게 점수 내림차순, 동점은 매장 순서입니다.
+"""
+
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .restaurant_catalog import RestaurantCatalog
+except ImportError:
+    from restaurant_catalog import RestaurantCatalog
+
+# Funnel별 _passes_basic_filters가 지원하는 필터 키
+BASIC_FILTER_KEYS = ('category', 'is_good_influence', 'accepts_meal_card')
+
+
+def top_k_indices(scores: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """점수 내림차순 상위 k개 인덱스 (동점은 인덱스 오름차순, 전체 안정 정렬과 같은 결과)
+
+    전체 정렬 대신 argpartition으로 경계 점수를 찾고 경계 이상인 항목만 정렬합니다.
+    """
+    candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(scores))
+    if k <= 0 or len(candidates) == 0:
+        return candidates[:0]
+
+    candidate_scores = scores[candidates]
+    if len(candidates) > k:
+        threshold = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+        above = candidate_scores > threshold
+        # 경계 점수와 같은 항목은 인덱스 순으로 남은 자리만큼
+        tied = np.flatnonzero(candidate_scores == threshold)[:k - int(above.sum())]
+        keep = np.concatenate([np.flatnonzero(above), tied])
+        candidates = candidates[keep]
+        candidate_scores = candidate_scores[keep]
+
+    order = np.lexsort((candidates, -candidate_scores))
+    return candidates[order]
+
+
+def top_k_positions(positions: np.ndarray, scores: np.ndarray, k: int,
+                    mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """일부 매장(positions)과 그 점수에서 상위 k개 매장 위치 (동점은 매장 순서)"""
+    order = np.argsort(positions, kind='stable')
+    positions, scores = positions[order], scores[order]
+    if mask is not None:
+        mask = mask[order]
+    return positions[top_k_indices(scores, k, mask)]
+
+
+def first_k_in_order(order: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """미리 정렬해 둔 순서(order)에서 mask를 통과하는 앞쪽 k개 (점수가 요청마다 바뀌지 않는 Funnel용)"""
+    if mask is None:
+        return order[:k]
+    return order[mask[order]][:k]
+
+
+def stable_ranking(scores: np.ndarray) -> np.ndarray:
+    """점수 내림차순, 동점은 인덱스 순 전체 순서 (정적 점수의 사전 계산용)"""
+    return np.argsort(-scores, kind='stable')
+
+
+def basic_filter_mask(catalog: RestaurantCatalog, filters: Optional[Dict[str, Any]],
+                      keys: Sequence[str] = BASIC_FILTER_KEYS) -> np.ndarray:
+    """_passes_basic_filters의 벡터화 (전체 매장 통과 여부 배열, keys에 있는 필터만 적용)
+
+    Args:
+        catalog: 매장 카탈로그
+        filters: 필터 조건
+        keys: 적용할 필터 ('category', 'location', 'is_good_influence', 'accepts_meal_card', 'max_price')
+    """
+    mask = np.ones(len(catalog), dtype=bool)
+    if not filters:
+        return mask
+    columns = catalog.columns
+
+    if 'category' in keys and filters.get('category'):
+        mask &= catalog.category_mask(filters['category'].lower())
+
+    if 'location' in keys and filters.get('location'):
+        mask &= catalog.address_mask(filters['location'])
+
+    if 'is_good_influence' in keys and filters.get('is_good_influence'):
+        mask &= columns.is_good_shop
+
+    if 'accepts_meal_card' in keys and filters.get('accepts_meal_card'):
+        mask &= columns.accepts_meal_card
+
+    # 메뉴 없는 매장(NaN)은 가격 필터 통과
+    if 'max_price' in keys and filters.get('max_price'):
+        mask &= ~(columns.min_price > filters['max_price'])
+
+    return mask
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+/chat 비동기 처리 부하 테스트 (스레드 풀 실행 + 입장 제한 + LLM 전용 워커)
+
+1. LLMWorker: 생성은 워커 스레드 1개에서 순차 실행, 큐가 가득 차면 바로 LLMOverloadedError,
+   대기 시간 초과 시 LLMTimeoutError와 시작 전 작업 취소, 종료 시 대기 작업까지 처리
+2. 입장 제한: 실행 슬롯 + 대기열 초과분은 바로 429, 슬롯 대기 시간 초과는 503 (Retry-After),
+   LLM 큐 초과는 템플릿 응답으로 폴백, /health는 /chat 부하 중에도 바로 응답
+   대기 시간 초과/연결 끊김(슬롯을 얻은 직후 포함)으로 대기를 포기한 요청이 슬롯을 남기지 않음
+3. 동시 요청 수별 처리량: 기존 핸들러(이벤트 루프에서 동기 실행) vs 스레드 풀 실행
+
+단계 지연은 time.sleep으로 흉내 (FAISS/numpy/토크나이저/torch처럼 GIL을 놓는 구간)
+--url을 주면 실행 중인 서버(uvicorn api.server:app)에 같은 부하를 보냄
+"""
+
+import time
+import asyncio
+import logging
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+import api.server as server
+from api.admission import ChatDispatcher, AdmissionRejected
+from data.data_structure import (
+    UserInput, ChatbotResponse, ExtractedInfo, ExtractedEntity, IntentType, ConfidenceLevel, UserProfile
+)
+from inference.chatbot import NaviyamChatbot, ConversationMemory, PerformanceMonitor
+from inference.llm_worker import LLMWorker, LLMOverloadedError, LLMTimeoutError
+
+logging.disable(logging.CRITICAL)
+
+
+class FakeModel:
+    """delay초 걸리는 generate_text (동시 실행 수 기록)"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_text(self, prompt, max_new_tokens=None, temperature=None, stop_words=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+            self.calls.append(prompt)
+        return {"text": f"{prompt} 맛있게 먹어요!"}
+
+
+class FakeUserManager:
+    def get_or_create_user_profile(self, user_id):
+        return UserProfile(user_id=user_id)
+
+    def update_user_interaction(self, user_id, extracted_info, emotion):
+        pass
+
+    def personalize_response(self, response, user_profile):
+        return response
+
+    def determine_user_strategy(self, user_id):
+        return "normal_mode"
+
+
+def make_chatbot(cpu_delay: float, llm_delay: float, llm_queue: int = 8) -> NaviyamChatbot:
+    """모델/데이터 로드 없이 NLU/RAG 단계에 cpu_delay, LLM 응답 생성에 llm_delay를 넣은 챗봇"""
+    chatbot = NaviyamChatbot.__new__(NaviyamChatbot)
+    chatbot.config = SimpleNamespace(debug=False, inference=SimpleNamespace(save_conversations=False))
+    chatbot.conversation_memory = ConversationMemory(10)
+    chatbot.performance_monitor = PerformanceMonitor()
+    chatbot.user_manager = FakeUserManager()
+    chatbot.data_collector = None
+    chatbot.model = None
+    chatbot.knowledge = None
+    chatbot.query_cache = None
+    chatbot.embedding_batcher = None
+    chatbot.retriever = None
+    chatbot.write_behind = None
+    chatbot.llm_worker = LLMWorker(FakeModel(llm_delay), max_queue=llm_queue, timeout=5.0)
+    chatbot.is_initialized = True
+    chatbot.last_cleanup_time = datetime.now()
+
+    chatbot.preprocessor = SimpleNamespace(preprocess=lambda text: SimpleNamespace(
+        emotion=SimpleNamespace(value="neutral"), extracted_keywords=["치킨"]))
+
+    def nlu(user_input, preprocessed):
+        time.sleep(cpu_delay / 2)
+        return ExtractedInfo(intent=IntentType.FOOD_REQUEST, entities=ExtractedEntity(food_type="치킨"),
+                             confidence=0.9, confidence_level=ConfidenceLevel.HIGH, raw_text=user_input.text)
+
+    def rag(user_input, extracted_info):
+        time.sleep(cpu_delay / 2)
+        return "컨텍스트"
+
+    def respond(extracted_info, user_profile, user_id, rag_context=""):
+        # LLMNormalizer.generate_child_friendly_response와 같이 실패 시 템플릿으로 폴백
+        try:
+            text = chatbot.llm_worker.generate_text(prompt=extracted_info.raw_text, max_new_tokens=150)["text"]
+            method = "llm_child_friendly"
+        except (LLMOverloadedError, LLMTimeoutError):
+            text, method = "치킨 추천해드릴게요!", "template_fallback"
+        return ChatbotResponse(text=text, recommendations=[], follow_up_questions=[],
+                               metadata={"generation_method": method})
+
+    chatbot._smart_nlu_processing = nlu
+    chatbot._perform_rag_search = rag
+    chatbot._smart_response_generation = respond
+    return chatbot
+
+
+def make_reference_app(chatbot: NaviyamChatbot) -> FastAPI:
+    """기존 /chat 핸들러 (async def 안에서 process_user_input 동기 호출)"""
+    app = FastAPI()
+
+    @app.post("/chat")
+    async def chat(request: server.ChatRequest):
+        output = chatbot.process_user_input(UserInput(text=request.message, user_id=request.user_id))
+        return {"response": output.response.text}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+def use_server(chatbot: NaviyamChatbot, dispatcher: ChatDispatcher) -> httpx.AsyncClient:
+    server.chatbot = chatbot
+    server.dispatcher = dispatcher
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test", timeout=60)
+
+
+async def post_chat(client: httpx.AsyncClient, i: int):
+    start = time.perf_counter()
+    response = await client.post("/chat", json={"message": "치킨 먹고 싶어", "user_id": f"user_{i % 50}"})
+    return response, (time.perf_counter() - start) * 1000
+
+
+async def delayed_health(client: httpx.AsyncClient, delay: float):
+    """delay초 뒤 /health 호출, 예정 시각부터 응답까지 걸린 시간 (이벤트 루프가 막히면 대기도 늦어짐)"""
+    start = time.perf_counter()
+    await asyncio.sleep(delay)
+    response = await client.get("/health")
+    return response, (time.perf_counter() - start - delay) * 1000
+
+
+async def run_load(client: httpx.AsyncClient, concurrency: int, total: int, probe_health: bool = False):
+    """동시 요청 concurrency개로 total건 전송 (처리량, 지연, 상태 코드, /health 최대 지연)"""
+    next_index = iter(range(total))
+    statuses = Counter()
+    latencies = []
+    health_ms = []
+    done = asyncio.Event()
+
+    async def user():
+        for i in next_index:
+            response, elapsed_ms = await post_chat(client, i)
+            statuses[response.status_code] += 1
+            latencies.append(elapsed_ms)
+
+    async def health_probe():
+        while not done.is_set():
+            _, elapsed_ms = await delayed_health(client, 0.01)
+            health_ms.append(elapsed_ms)
+
+    probe = asyncio.create_task(health_probe()) if probe_health else None
+    start = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    if probe:
+        await probe
+
+    return {
+        "rps": total / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "statuses": dict(statuses),
+        "health_max_ms": max(health_ms) if health_ms else None
+    }
+
+
+def test_llm_worker():
+    model = FakeModel(0.02)
+    worker = LLMWorker(model, max_queue=4, timeout=2.0)
+    results = []
+
+    def call(i):
+        results.append(worker.generate_text(prompt=f"p{i}")["text"])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 4 and model.max_active == 1
+
+    # 큐가 가득 차면 기다리지 않고 거절
+    model.delay = 0.2
+    blockers = [threading.Thread(target=lambda: worker.generate_text(prompt="느림")) for _ in range(5)]
+    for thread in blockers:
+        thread.start()
+        time.sleep(0.005)
+    start = time.perf_counter()
+    try:
+        worker.generate_text(prompt="초과")
+        assert False, "LLMOverloadedError가 나야 함"
+    except LLMOverloadedError:
+        pass
+    assert (time.perf_counter() - start) < 0.01
+
+    # 대기 시간 초과 작업은 취소되어 실행되지 않음
+    for thread in blockers:
+        thread.join()
+    model.delay = 0.1
+    slow = threading.Thread(target=lambda: worker.generate_text(prompt="먼저"))
+    slow.start()
+    time.sleep(0.01)
+    try:
+        worker.generate_text(prompt="취소됨", timeout=0.02)
+        assert False, "LLMTimeoutError가 나야 함"
+    except LLMTimeoutError:
+        pass
+    slow.join()
+    worker.close()
+    assert "취소됨" not in model.calls
+
+    stats = worker.get_stats()
+    assert stats["rejected"] == 1 and stats["timeouts"] == 1 and stats["cancelled"] == 1
+    assert stats["completed"] == 4 + 5 + 1 and stats["closed"]
+    try:
+        worker.generate_text(prompt="종료 후")
+        assert False
+    except LLMOverloadedError:
+        pass
+    print("[PASS] LLM 워커 순차 실행 (동시 실행 1), 큐 초과 즉시 거절, 대기 시간 초과 작업 취소")
+
+
+async def admission_checks():
+    # 실행 2 + 대기 2 → 나머지 6건은 바로 429
+    chatbot = make_chatbot(cpu_delay=0.2, llm_delay=0.0)
+    dispatcher = ChatDispatcher(max_concurrency=2, max_queue=2, queue_timeout=2.0)
+    async with use_server(chatbot, dispatcher) as client:
+        tasks = [asyncio.create_task(post_chat(client, i)) for i in range(10)]
+        health, health_ms = await delayed_health(client, 0.05)
+
+        results = await asyncio.gather(*tasks)
+        statuses = Counter(response.status_code for response, _ in results)
+        assert statuses == {200: 4, 429: 6}, statuses
+        assert max(ms for response, ms in results if response.status_code == 429) < 100
+        assert health.status_code == 200 and health_ms < 100, health_ms
+
+        rejected = next(response for response, _ in results if response.status_code == 429)
+        assert rejected.headers["Retry-After"] == "1" and rejected.json()["error"] == "HTTP_ERROR"
+
+        metrics = (await client.get("/metrics")).json()["metrics"]
+        assert metrics["admission"]["rejected_queue_full"] == 6 and metrics["admission"]["max_active"] == 2
+        assert metrics["total_conversations"] == 4 and "llm_worker" in metrics
+    dispatcher.shutdown()
+    chatbot.shutdown()
+
+    # 슬롯 대기 시간 초과 → 503
+    chatbot = make_chatbot(cpu_delay=0.2, llm_delay=0.0)
+    dispatcher = ChatDispatcher(max_concurrency=1, max_queue=4, queue_timeout=0.05)
+    async with use_server(chatbot, dispatcher) as client:
+        results = await asyncio.gather(*(post_chat(client, i) for i in range(3)))
+        statuses = Counter(response.status_code for response, _ in results)
+        assert statuses == {200: 1, 503: 2}, statuses
+        assert all(ms < 150 for response, ms in results if response.status_code == 503)
+        assert all("Retry-After" in response.headers for response, _ in results if response.status_code == 503)
+    dispatcher.shutdown()
+    chatbot.shutdown()
+
+    # LLM 큐 초과는 요청 실패가 아니라 템플릿 폴백
+    chatbot = make_chatbot(cpu_delay=0.0, llm_delay=0.05, llm_queue=1)
+    dispatcher = ChatDispatcher(max_concurrency=6, max_queue=0)
+    async with use_server(chatbot, dispatcher) as client:
+        results = await asyncio.gather(*(post_chat(client, i) for i in range(6)))
+        assert all(response.status_code == 200 for response, _ in results)
+        methods = Counter(response.json()["metadata"]["generation_method"] for response, _ in results)
+        assert methods["template_fallback"] >= 1 and methods["llm_child_friendly"] >= 1, methods
+        assert chatbot.llm_worker.model.max_active == 1
+    dispatcher.shutdown()
+    chatbot.shutdown()
+
+    # 기존 핸들러는 /chat 처리 중 /health도 막힘
+    chatbot = make_chatbot(cpu_delay=0.2, llm_delay=0.0)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=make_reference_app(chatbot)),
+                                 base_url="http://test") as client:
+        task = asyncio.create_task(post_chat(client, 0))
+        _, blocked_ms = await delayed_health(client, 0.01)
+        await task
+        assert blocked_ms > 150, blocked_ms
+    chatbot.shutdown()
+
+    print(f"[PASS] 실행 슬롯+대기열 초과 429, 대기 시간 초과 503 (Retry-After), LLM 큐 초과 템플릿 폴백, "
+          f"/health {health_ms:.1f}ms (기존 핸들러 {blocked_ms:.0f}ms)")
+
+
+async def slot_release_checks():
+    dispatcher = ChatDispatcher(max_concurrency=1, max_queue=16, queue_timeout=0.05)
+
+    # 대기 시간 초과 4건 + 대기 중 연결 끊김 4건
+    holder = asyncio.create_task(dispatcher.run(time.sleep, 0.2))
+    await asyncio.sleep(0.01)
+    timed_out = [asyncio.create_task(dispatcher.run(time.sleep, 0)) for _ in range(4)]
+    disconnected = [asyncio.create_task(dispatcher.run(time.sleep, 0)) for _ in range(4)]
+    await asyncio.sleep(0.01)
+    for task in disconnected:
+        task.cancel()
+    results = await asyncio.gather(*timed_out, *disconnected, return_exceptions=True)
+    assert all(isinstance(result, AdmissionRejected) and result.status_code == 503 for result in results[:4])
+    assert all(isinstance(result, asyncio.CancelledError) for result in results[4:])
+    await holder
+
+    # 앞 요청이 슬롯을 반환한 바로 그 차례에 대기 요청 취소 (슬롯은 이미 넘겨받은 상태)
+    holder = asyncio.create_task(dispatcher.run(time.sleep, 0.05))
+    await asyncio.sleep(0.01)
+    dispatcher.queue_timeout = 5.0
+    waiter = asyncio.create_task(dispatcher.run(time.sleep, 0))
+    holder.add_done_callback(lambda _: waiter.cancel())
+    await holder
+    await asyncio.gather(waiter, return_exceptions=True)
+    assert waiter.cancelled() and dispatcher.stats["admitted"] == 2
+
+    # 남은 슬롯이 없으면 다음 요청은 대기 시간 초과(503)
+    dispatcher.queue_timeout = 0.05
+    for _ in range(3):
+        await dispatcher.run(time.sleep, 0)
+    stats = dispatcher.get_stats()
+    assert stats["active"] == 0 and stats["waiting"] == 0 and stats["rejected_timeout"] == 4
+    dispatcher.shutdown()
+    print("[PASS] 대기 시간 초과/연결 끊김(슬롯 획득 직후 포함) 후 실행 슬롯 반환")
+
+
+async def benchmark(levels, per_level: int, cpu_delay: float, llm_delay: float, workers: int):
+    print(f"\n/chat 처리량 (요청당 CPU 단계 {cpu_delay * 1000:.0f}ms + LLM {llm_delay * 1000:.0f}ms, "
+          f"스레드 풀 {workers}):")
+    for concurrency in levels:
+        total = per_level * concurrency
+        chatbot = make_chatbot(cpu_delay, llm_delay, llm_queue=max(levels))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=make_reference_app(chatbot)),
+                                     base_url="http://test", timeout=60) as client:
+            before = await run_load(client, concurrency, total, probe_health=True)
+        chatbot.shutdown()
+
+        chatbot = make_chatbot(cpu_delay, llm_delay, llm_queue=max(levels))
+        dispatcher = ChatDispatcher(max_concurrency=workers, max_queue=max(levels), queue_timeout=30.0)
+        async with use_server(chatbot, dispatcher) as client:
+            after = await run_load(client, concurrency, total, probe_health=True)
+        dispatcher.shutdown()
+        chatbot.shutdown()
+
+        assert after["statuses"] == {200: total}, after["statuses"]
+        print(f"  동시 {concurrency:>3}: 기존 {before['rps']:6.1f} req/s (p95 {before['p95_ms']:6.0f}ms, "
+              f"/health 최대 {before['health_max_ms']:5.0f}ms) → "
+              f"스레드 풀 {after['rps']:6.1f} req/s (p95 {after['p95_ms']:6.0f}ms, "
+              f"/health 최대 {after['health_max_ms']:5.1f}ms)")
+
+
+async def load_remote(url: str, levels, per_level: int):
+    print(f"\n{url} 부하:")
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        for concurrency in levels:
+            result = await run_load(client, concurrency, per_level * concurrency, probe_health=True)
+            print(f"  동시 {concurrency:>3}: {result['rps']:6.1f} req/s, p50 {result['p50_ms']:6.0f}ms, "
+                  f"p95 {result['p95_ms']:6.0f}ms, 상태 {result['statuses']}, "
+                  f"/health 최대 {result['health_max_ms']:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat 비동기 처리 부하 테스트")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--per-level", type=int, default=10, help="동시 요청 1개당 요청 수")
+    parser.add_argument("--cpu-ms", type=float, default=20.0)
+    parser.add_argument("--llm-ms", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--url", default=None, help="실행 중인 서버 주소 (예: http://localhost:8000)")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(load_remote(args.url, args.levels, args.per_level))
+        return
+
+    test_llm_worker()
+    asyncio.run(admission_checks())
+    asyncio.run(slot_release_checks())
+    asyncio.run(benchmark(args.levels, args.per_level, args.cpu_ms / 1000, args.llm_ms / 1000, args.workers))
+
+
+if __name__ == "__main__":
+    main()
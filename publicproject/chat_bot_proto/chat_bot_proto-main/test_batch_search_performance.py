@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+PrebuiltFAISS 배치 검색 성능 테스트
+
+합성 인덱스를 임시 디렉토리에 빌드한 뒤
+N번의 단일 search() 호출과 한 번의 search_batch() 호출을 비교합니다.
+임베딩 모델 없이 랜덤 벡터로 동작합니다.
+
+배치 이득은 FAISS 거리 계산에서 나옵니다: 쿼리 BLAS_MIN_QUERIES개 이상이면 BLAS 행렬곱 한 번,
+필터가 있으면 (Flat 인덱스) 선택된 벡터만 모아 행렬곱. 쿼리 수가 그보다 적으면 단일 검색과 비슷합니다.
+"""
+
+import time
+import json
+import tempfile
+import argparse
+import numpy as np
+from pathlib import Path
+
+from rag.vector_stores import PrebuiltFAISSVectorStore
+from rag.metadata_columns import MetadataColumns
+from rag.document_table import write_document_table
+from rag.index_factory import BLAS_MIN_QUERIES
+
+
+# 배치 검색이 단일 검색 반복보다 최소 이만큼 빨라야 함 (측정 환경 차이를 감안한 느슨한 기준, 실측 약 4배)
+MIN_SPEEDUP = 1.5
+
+
+def build_synthetic_index(output_dir: Path, num_docs: int, dim: int, seed: int = 42,
+                          table: bool = True) -> Path:
+    """랜덤 임베딩과 메타데이터로 사전 빌드 인덱스 생성
+
+    table=True면 mmap 문서 테이블(_docs.bin)을, False면 기존 JSON + 컬럼 사이드카를 생성
+    """
+    import faiss
+
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((num_docs, dim)).astype('float32')
+
+    index = faiss.IndexFlatL2(dim)
+    index.add(embeddings)
+    index_path = output_dir / "bench_faiss.faiss"
+    faiss.write_index(index, str(index_path))
+
+    categories = ["한식", "중식", "일식", "양식", "분식", "치킨"]
+    metadata_info = {
+        "index_info": {
+            "total_documents": num_docs,
+            "embedding_dimension": dim,
+            "embedding_model": "synthetic",
+            "index_type": "IndexFlatL2",
+            "created_at": time.time()
+        },
+        "document_mapping": {},
+        "documents_metadata": {},
+        "documents_content": {}
+    }
+    for i in range(num_docs):
+        doc_id = f"menu_{i}"
+        metadata_info["document_mapping"][str(i)] = doc_id
+        metadata_info["documents_metadata"][doc_id] = {
+            "type": "menu",
+            "category": categories[i % len(categories)],
+            "price": int(rng.integers(3000, 30000)),
+            "is_popular": bool(i % 5 == 0)
+        }
+        metadata_info["documents_content"][doc_id] = f"메뉴 {i}"
+
+    doc_ids = [metadata_info["document_mapping"][str(i)] for i in range(num_docs)]
+    if table:
+        write_document_table(
+            str(output_dir / "bench_faiss_docs.bin"),
+            doc_ids=doc_ids,
+            contents=[metadata_info["documents_content"][doc_id] for doc_id in doc_ids],
+            metadatas=[metadata_info["documents_metadata"][doc_id] for doc_id in doc_ids],
+            info=metadata_info["index_info"]
+        )
+    else:
+        with open(output_dir / "bench_faiss_metadata.json", 'w', encoding='utf-8') as f:
+            json.dump(metadata_info, f, ensure_ascii=False)
+
+        columns = MetadataColumns.from_metadata([
+            metadata_info["documents_metadata"][doc_id] for doc_id in doc_ids
+        ])
+        columns.save(str(output_dir / "bench_faiss_columns.npz"))
+
+    return index_path
+
+
+def run_benchmark(num_docs: int, num_queries: int, dim: int, top_k: int, repeat: int):
+    """단일 검색 반복 vs 배치 검색 비교"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = build_synthetic_index(Path(tmp_dir), num_docs, dim)
+        store = PrebuiltFAISSVectorStore(str(index_path))
+
+        rng = np.random.default_rng(7)
+        queries = rng.standard_normal((num_queries, dim)).astype('float32')
+
+        for filters in [None, {"category": "한식", "max_price": 15000}]:
+            # 결과 일치 확인
+            single_results = [store.search(q, top_k=top_k, filters=filters) for q in queries]
+            batch_results = store.search_batch(queries, top_k=top_k, filters=filters)
+            assert single_results == batch_results, "단일/배치 검색 결과 불일치"
+
+            single_times = []
+            batch_times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for q in queries:
+                    store.search(q, top_k=top_k, filters=filters)
+                single_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                store.search_batch(queries, top_k=top_k, filters=filters)
+                batch_times.append(time.perf_counter() - start)
+
+            single_best = min(single_times)
+            batch_best = min(batch_times)
+            print(f"\n필터: {filters}")
+            print(f"  단일 검색 x{num_queries}: {single_best * 1000:.2f}ms")
+            print(f"  배치 검색 (1회):     {batch_best * 1000:.2f}ms")
+            speedup = single_best / batch_best
+            print(f"  속도 배수:           {speedup:.1f}배")
+            if num_queries >= BLAS_MIN_QUERIES:
+                assert speedup > MIN_SPEEDUP, f"배치 검색 속도 배수 {speedup:.1f} <= {MIN_SPEEDUP}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PrebuiltFAISS 배치 검색 벤치마크")
+    parser.add_argument("--docs", type=int, default=20000, help="문서 수")
+    parser.add_argument("--queries", type=int, default=64, help="쿼리 수")
+    parser.add_argument("--dim", type=int, default=384, help="임베딩 차원")
+    parser.add_argument("--top_k", type=int, default=5, help="쿼리별 반환 문서 수")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 측정 횟수")
+    args = parser.parse_args()
+
+    print("PrebuiltFAISS 배치 검색 성능 테스트")
+    print("=" * 50)
+    print(f"문서 수: {args.docs}, 쿼리 수: {args.queries}, 차원: {args.dim}")
+    run_benchmark(args.docs, args.queries, args.dim, args.top_k, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
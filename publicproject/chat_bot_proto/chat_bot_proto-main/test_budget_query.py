@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+예산 범위 조회 엔진 테스트
+
+1. BudgetQueryEngine 상위 k개가 예산 내 메뉴 전체 점수 계산 + 안정 정렬과 같은지 확인
+   (카테고리 부분 문자열, 동점, 가게 없는 메뉴, 예산 부족, limit 변화)
+2. RecommendationEngine.recommend_by_budget 결과가 기존 구현과 같은지, 지식베이스 변경 시 재구축
+3. 메뉴 수별 "예산 내 상위 3개 (카테고리 선택)" 조회 시간 비교 (전체 스캔 vs 엔진)
+"""
+
+import time
+import random
+import logging
+import argparse
+
+from data.data_structure import NaviyamKnowledge, NaviyamShop, NaviyamMenu
+from inference.response_generator import RecommendationEngine
+from recommendation.budget_query import BudgetQueryEngine
+
+logging.disable(logging.INFO)
+
+CATEGORIES = ['한식', '중식', '일식', '한식/치킨', '치킨', '양식', '분식', '카페/디저트', 'Cafe', '']
+QUERY_CATEGORIES = [None, '치킨', '한식', 'cafe', '디저트', '/', '없는카테고리']
+BUDGETS = [0, 2999, 3000, 5000, 8000, 12500, 20000, 10 ** 9]
+
+
+def make_knowledge(num_shops: int, num_menus: int, seed: int = 0, price_step: int = 500) -> NaviyamKnowledge:
+    """합성 지식베이스 (가게 없는 메뉴, 같은 가격/같은 점수 메뉴 다수 포함)"""
+    rng = random.Random(seed)
+    knowledge = NaviyamKnowledge()
+    for shop_id in range(1, num_shops + 1):
+        knowledge.shops[shop_id] = NaviyamShop(
+            id=shop_id, name=f'가게{shop_id}', category=rng.choice(CATEGORIES),
+            is_good_influence_shop=rng.random() < 0.3, is_food_card_shop='Y', address='',
+            open_hour='', close_hour='', ordinary_discount=rng.random() < 0.2)
+
+    prices = list(range(3000, 20001, price_step))
+    for menu_id in range(1, num_menus + 1):
+        shop_id = rng.randint(1, num_shops + num_shops // 20)
+        knowledge.menus[menu_id] = NaviyamMenu(id=menu_id, shop_id=shop_id, name=f'메뉴{menu_id}',
+                                               price=rng.choice(prices))
+    return knowledge
+
+
+def reference_recommend_by_budget(knowledge, budget, food_type=None, limit=3):
+    """엔진 도입 전 RecommendationEngine.recommend_by_budget (전체 메뉴 필터 → 점수 → 정렬)"""
+    recommendations = []
+    affordable_menus = [menu for menu in knowledge.menus.values() if menu.price <= budget]
+
+    if food_type:
+        target_category = {'치킨': '치킨', '한식': '한식', '중식': '중식', '일식': '일식'}.get(food_type, food_type)
+        filtered_menus = []
+        for menu in affordable_menus:
+            shop = knowledge.shops.get(menu.shop_id)
+            if shop and target_category.lower() in shop.category.lower():
+                filtered_menus.append(menu)
+        affordable_menus = filtered_menus
+
+    menu_recommendations = []
+    for menu in affordable_menus:
+        shop = knowledge.shops.get(menu.shop_id)
+        if shop:
+            score = budget - menu.price
+            if shop.is_good_influence_shop:
+                score += 1000
+            if shop.ordinary_discount:
+                score += 500
+            menu_recommendations.append((score, menu, shop))
+
+    menu_recommendations.sort(key=lambda x: x[0], reverse=True)
+
+    for score, menu, shop in menu_recommendations[:limit]:
+        recommendations.append({
+            'shop_id': shop.id,
+            'shop_name': shop.name,
+            'menu_id': menu.id,
+            'menu_name': menu.name,
+            'price': menu.price,
+            'category': shop.category,
+            'is_good_influence_shop': shop.is_good_influence_shop,
+            'ordinary_discount': shop.ordinary_discount,
+            'budget_remaining': budget - menu.price,
+            'value_score': score
+        })
+    return recommendations
+
+
+def test_engine_parity():
+    cases = 0
+    for seed in range(4):
+        # 가격 종류가 적을수록 동점이 많음
+        knowledge = make_knowledge(40, 600, seed, price_step=500 if seed % 2 else 2500)
+        engine = BudgetQueryEngine(list(knowledge.menus.values()), knowledge.shops)
+        assert len(engine) == sum(1 for menu in knowledge.menus.values() if menu.shop_id in knowledge.shops)
+        for category in QUERY_CATEGORIES:
+            for budget in BUDGETS:
+                for limit in (0, 1, 3, 10, 1000):
+                    expected = reference_recommend_by_budget(knowledge, budget, category, limit)
+                    actual = engine.query(budget, category, limit)
+                    assert [(item['menu_id'], item['value_score']) for item in expected] == \
+                        [(menu.id, score) for score, menu, shop in actual], (seed, category, budget, limit)
+                    cases += 1
+
+    empty = BudgetQueryEngine([], {})
+    assert empty.query(10000) == [] and empty.query(10000, '한식') == []
+    print(f"[PASS] 예산 내 상위 k개 == 전체 점수 계산 + 안정 정렬 ({cases}개 조합, 동점/가게 없는 메뉴 포함)")
+
+
+def test_recommend_by_budget():
+    knowledge = make_knowledge(60, 800, seed=11)
+    recommender = RecommendationEngine(knowledge)
+    for food_type in (None, '치킨', '중식', '카페'):
+        for budget in (2000, 6000, 15000):
+            assert recommender.recommend_by_budget(budget, food_type, limit=3) == \
+                reference_recommend_by_budget(knowledge, budget, food_type, 3)
+
+    # 지식베이스가 바뀌면(보조 인덱스 재구축) 엔진도 다시 구축
+    engine = recommender.budget_engine
+    assert recommender.budget_engine is engine
+    shop = NaviyamShop(999, '새 착한가게', '치킨', True, 'Y', '', '', '', ordinary_discount=True)
+    knowledge.shops[shop.id] = shop
+    knowledge.menus[99999] = NaviyamMenu(99999, shop.id, '새 메뉴', 1000)
+    assert recommender.recommend_by_budget(6000, '치킨', limit=1)[0]['menu_id'] == 99999
+    assert recommender.budget_engine is not engine
+    assert recommender.recommend_by_budget(6000, '치킨') == reference_recommend_by_budget(knowledge, 6000, '치킨')
+    print("[PASS] recommend_by_budget == 기존 구현, 지식베이스 변경 시 엔진 재구축")
+
+
+def benchmark(sizes, repeat: int):
+    print("\n예산 내 상위 3개 조회 (예산 12000원):")
+    for num_menus in sizes:
+        knowledge = make_knowledge(max(num_menus // 15, 10), num_menus, seed=3)
+
+        start = time.perf_counter()
+        engine = BudgetQueryEngine(list(knowledge.menus.values()), knowledge.shops)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for category in (None, '치킨'):
+            assert [(menu.id, score) for score, menu, shop in engine.query(12000, category)] == \
+                [(item['menu_id'], item['value_score']) for item in
+                 reference_recommend_by_budget(knowledge, 12000, category)]
+
+            scan_repeat = max(1, repeat // 100)
+            start = time.perf_counter()
+            for _ in range(scan_repeat):
+                reference_recommend_by_budget(knowledge, 12000, category)
+            scan_ms = (time.perf_counter() - start) * 1000 / scan_repeat
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                engine.query(12000, category)
+            engine_us = (time.perf_counter() - start) * 1e6 / repeat
+
+            label = f"카테고리 '{category}'" if category else "카테고리 없음"
+            print(f"  메뉴 {num_menus:>9,}개, {label:12s}: 전체 스캔 {scan_ms:9.2f}ms → 엔진 {engine_us:7.1f}µs")
+        print(f"  (엔진 구축 {build_ms:.0f}ms, 로드 시 1회)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="예산 범위 조회 엔진 테스트")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    test_engine_parity()
+    test_recommend_by_budget()
+    benchmark(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
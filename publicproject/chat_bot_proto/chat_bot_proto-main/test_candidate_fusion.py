@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+CandidateGenerator 점수 기반 후보 통합 테스트
+
+1. 통합 점수(RRF)가 Funnel별 순위/가중치로 계산되고 상위 MAX_TOTAL_CANDIDATES개가 남는지 확인
+2. 도착 순서로 자르던 기존 방식과 달리 모든 Funnel의 상위 후보가 살아남는지 비교
+3. 여러 Funnel에 나온 매장은 모든 Funnel 점수 필드를 유지하는지, weighted_max 방식 확인
+"""
+
+import time
+import logging
+import argparse
+from collections import Counter
+from datetime import datetime
+
+from recommendation.restaurant_catalog import RestaurantCatalog
+from recommendation.candidate_generator import (
+    CandidateGenerator, CandidateGenerationConfig, FUNNEL_SCORE_KEYS
+)
+from test_top_k_selection import make_restaurants
+
+logging.disable(logging.INFO)
+
+REQUEST = dict(user_id=None, user_location="관악구", query="비빔밥", time_of_day="lunch",
+               user_type="healthy_eater", filters={}, current_time=datetime(2026, 3, 2, 12, 30))
+
+
+def run_funnels(generator: CandidateGenerator):
+    """Funnel별 결과 (Funnel 순서)"""
+    return [(name, run()) for name, _, run in generator._build_funnel_tasks(**REQUEST)]
+
+
+def arrival_order_merge(funnel_results, max_candidates: int):
+    """통합 점수 도입 전: 도착 순서로 중복 제거 후 앞에서부터 자르기"""
+    seen, merged = set(), []
+    for _, candidates in funnel_results:
+        for candidate in candidates:
+            if candidate['shop_id'] not in seen:
+                seen.add(candidate['shop_id'])
+                merged.append(candidate)
+    return merged[:max_candidates]
+
+
+def make_generator(catalog, **overrides) -> CandidateGenerator:
+    config = CandidateGenerationConfig()
+    config.PARALLEL_FUNNELS = False
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return CandidateGenerator(config, catalog=catalog)
+
+
+def expected_rrf(funnel_results, weights, k):
+    scores = {}
+    for name, candidates in funnel_results:
+        seen = set()
+        for rank, candidate in enumerate(candidates, 1):
+            if candidate['shop_id'] in seen:
+                continue
+            seen.add(candidate['shop_id'])
+            scores[candidate['shop_id']] = scores.get(candidate['shop_id'], 0.0) + weights[name] / (k + rank)
+    return scores
+
+
+def test_rrf_fusion(catalog):
+    generator = make_generator(catalog, MAX_TOTAL_CANDIDATES=40)
+    funnel_results = run_funnels(generator)
+    expected = expected_rrf(funnel_results, generator.config.FUNNEL_WEIGHTS, generator.config.RRF_K)
+
+    fused = generator._fuse_candidates(run_funnels(generator))
+    assert len(fused) == 40
+    scores = [candidate['fusion_score'] for candidate in fused]
+    assert scores == sorted(scores, reverse=True)
+    for candidate in fused:
+        assert abs(candidate['fusion_score'] - expected[candidate['shop_id']]) < 1e-12
+    # 잘린 후보는 남은 후보보다 점수가 높지 않음
+    kept = {candidate['shop_id'] for candidate in fused}
+    assert max(score for shop_id, score in expected.items() if shop_id not in kept) <= scores[-1]
+
+    # 모든 Funnel의 1위 후보가 포함됨 (도착 순서 방식은 앞 Funnel이 자리를 모두 차지)
+    old = arrival_order_merge(run_funnels(generator), 40)
+    for name, candidates in funnel_results:
+        assert candidates[0]['shop_id'] in kept, name
+    old_sources = Counter(candidate['funnel_source'] for candidate in old)
+    new_sources = Counter(source for candidate in fused for source in candidate['funnel_sources'])
+    assert 'popularity' not in old_sources and new_sources['popularity'] > 0
+    print(f"[PASS] RRF 통합 점수 상위 40개 (Funnel별 포함 수: {dict(new_sources)}, "
+          f"기존 도착 순서: {dict(old_sources)})")
+
+
+def test_merged_fields(catalog):
+    generator = make_generator(catalog)
+    fused = generator.generate_candidates(**REQUEST)
+    multi = [candidate for candidate in fused if len(candidate['funnel_sources']) > 1]
+    assert multi
+    for candidate in fused:
+        assert candidate['funnel_source'] == ' + '.join(candidate['funnel_sources'])
+        assert set(candidate['funnel_scores']) == set(candidate['funnel_sources'])
+        for name in candidate['funnel_sources']:
+            assert FUNNEL_SCORE_KEYS[name] in candidate
+            assert 0.0 <= candidate['funnel_scores'][name] <= 1.0
+    print(f"[PASS] 여러 Funnel 매장 {len(multi)}개: 모든 Funnel 점수 필드/정규화 점수 유지")
+
+
+def test_weights_and_weighted_max(catalog):
+    weights = {'collaborative': 1.0, 'content': 1.0, 'contextual': 1.0, 'popularity': 0.0}
+    fused = make_generator(catalog, FUNNEL_WEIGHTS=weights).generate_candidates(**REQUEST)
+    only_popularity = [i for i, c in enumerate(fused) if c['funnel_sources'] == ['popularity']]
+    assert all(fused[i]['fusion_score'] == 0.0 for i in only_popularity)
+    assert not only_popularity or min(only_popularity) == len(fused) - len(only_popularity)
+
+    weights = {'collaborative': 0.5, 'content': 2.0, 'contextual': 1.0, 'popularity': 1.0}
+    generator = make_generator(catalog, FUSION_METHOD='weighted_max', FUNNEL_WEIGHTS=weights)
+    fused = generator.generate_candidates(**REQUEST)
+    for candidate in fused:
+        expected = max(weights[name] * score for name, score in candidate['funnel_scores'].items())
+        assert abs(candidate['fusion_score'] - expected) < 1e-12
+    assert fused[0]['funnel_scores'].get('content') == 1.0
+    print("[PASS] FUNNEL_WEIGHTS 반영 (가중치 0 Funnel 단독 후보는 최하위), weighted_max 통합")
+
+
+def benchmark(catalog, repeat: int):
+    generator = make_generator(catalog)
+    results = [run_funnels(generator) for _ in range(repeat)]
+    start = time.perf_counter()
+    for funnel_results in results:
+        generator._fuse_candidates(funnel_results)
+    fuse_ms = (time.perf_counter() - start) * 1000 / repeat
+    total = sum(len(candidates) for _, candidates in results[0])
+    print(f"\n통합 단계: Funnel 후보 {total}개 → {generator.config.MAX_TOTAL_CANDIDATES}개, {fuse_ms:.3f}ms/요청")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="후보 통합 테스트")
+    parser.add_argument("--shops", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    catalog = RestaurantCatalog(make_restaurants(args.shops))
+    test_rrf_fusion(catalog)
+    test_merged_fields(catalog)
+    test_weights_and_weighted_max(catalog)
+    benchmark(catalog, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+협업 필터링 상호작용 행렬 / ALS 테스트
+
+1. 사용자 타입 규칙 경로의 벡터화 결과가 기존 매장 루프 구현과 완전히 같은지 확인
+2. LearningDataCollector 로그 → 상호작용 행렬 변환, 모델 저장/로드, 콜드 스타트 폴백
+3. 사용자 100k × 매장 50k 합성 데이터에서 학습 시간, 조회 지연, hit rate 측정
+"""
+
+import json
+import time
+import tempfile
+import argparse
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from recommendation.restaurant_catalog import RestaurantCatalog
+from recommendation.collaborative_funnel import CollaborativeFunnel
+from recommendation.interaction_matrix import (
+    InteractionMatrix, ImplicitALSModel, iter_interactions, INTERACTION_WEIGHTS
+)
+from test_content_funnel_index import make_catalog
+
+FILTER_CASES = [{}, {"category": "한식"}, {"is_good_influence": True}, {"accepts_meal_card": True},
+                {"max_price": 8000}, {"category": "식", "max_price": 20000}, {"category": "없는카테고리"}]
+USER_TYPES = ["healthy_eater", "convenience_seeker", "gourmet", "budget_conscious", "default", "unknown_type"]
+
+
+def reference_candidates(funnel: CollaborativeFunnel, user_type: str, filters, limit: int):
+    """벡터화 이전 get_candidates의 사용자 타입 경로 (비교 기준)"""
+    if user_type not in funnel.user_type_preferences:
+        user_type = 'default'
+    candidates = []
+    for shop in funnel.shops:
+        if not funnel._passes_basic_filters(shop, filters):
+            continue
+        collaborative_score = funnel.shop_type_scores.get(shop.shop_id, {}).get(user_type, 0)
+        if collaborative_score < 10:
+            continue
+        candidates.append({
+            'shop_id': shop.shop_id,
+            'shop_name': shop.shop_name,
+            'category': shop.category,
+            'funnel_source': 'collaborative',
+            'collaborative_score': collaborative_score,
+            'reason': funnel._get_collaborative_reason(shop, user_type)
+        })
+    candidates.sort(key=lambda x: x['collaborative_score'], reverse=True)
+    return candidates[:limit]
+
+
+def test_type_parity():
+    """사용자 타입 경로 벡터화 결과 일치"""
+    funnel = CollaborativeFunnel(catalog=RestaurantCatalog(make_catalog(3000)), model_path=None)
+    for user_type in USER_TYPES:
+        for filters in FILTER_CASES:
+            for limit in (5, 50, 10000):
+                expected = reference_candidates(funnel, user_type, filters, limit)
+                actual = funnel.get_candidates(user_type=user_type, filters=filters, limit=limit)
+                assert actual == expected, f"불일치: {user_type} {filters} {limit}"
+    print(f"[PASS] 사용자 타입 점수 일치: 타입 {len(USER_TYPES)}개 × 필터 {len(FILTER_CASES)}개 × limit 3개")
+
+
+def write_logs(log_dir: Path, catalog: RestaurantCatalog):
+    """LearningDataCollector 형식의 추천/피드백 로그 작성"""
+    raw_dir = log_dir / "raw"
+    raw_dir.mkdir(parents=True)
+    shop_ids = [shop.shop_id for shop in catalog]
+    korean = [shop.shop_id for shop in catalog if shop.category == "한식"]
+    chinese = [shop.shop_id for shop in catalog if shop.category == "중식"]
+
+    recommendations, feedback = [], []
+    for i in range(40):
+        group = korean if i % 2 == 0 else chinese
+        user_id = f"user_{i}"
+        for j in range(6):
+            recommendations.append({
+                "timestamp": "2026-01-01T12:00:00", "user_id": user_id, "data_type": "recommendation",
+                "recommendations": [{"shop_id": shop_id, "score": 0.5} for shop_id in shop_ids[j * 3:j * 3 + 3]],
+                "user_selection": {"shop_id": group[(i + j) % len(group)]},
+                "recommendation_count": 3
+            })
+        feedback.append({"timestamp": "2026-01-01T12:00:00", "user_id": user_id, "data_type": "feedback",
+                         "feedback_type": "rating", "feedback_content": {"shop_id": group[i % len(group)], "rating": 5},
+                         "context": {}})
+    feedback.append({"timestamp": "2026-01-01T12:00:00", "user_id": "user_0", "data_type": "feedback",
+                     "feedback_type": "rating", "feedback_content": 2, "context": {"shop_id": chinese[0]}})
+    feedback.append({"timestamp": "2026-01-01T12:00:00", "user_id": "user_0", "data_type": "feedback",
+                     "feedback_type": "selection", "feedback_content": "좋아요", "context": {"shop_id": 12345}})
+
+    with open(raw_dir / "recommendations_20260101.jsonl", 'w', encoding='utf-8') as f:
+        for record in recommendations:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.write("{깨진 줄\n")
+    with open(raw_dir / "feedback_20260101.jsonl", 'w', encoding='utf-8') as f:
+        for record in feedback:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return korean, chinese
+
+
+def test_logs_and_fallback(tmp_dir: Path):
+    """로그 → 행렬 → 모델 → Funnel (이력 사용자는 모델, 신규 사용자는 규칙 점수)"""
+    restaurants = make_catalog(400, seed=7)
+    catalog = RestaurantCatalog(restaurants)
+    korean, chinese = write_logs(tmp_dir / "learning_data", catalog)
+
+    interactions = list(iter_interactions(str(tmp_dir / "learning_data")))
+    assert ("user_0", korean[0], INTERACTION_WEIGHTS['selection']) in interactions
+    assert ("user_0", "12345", INTERACTION_WEIGHTS['selection']) in interactions  # 정수 ID는 문자열로
+    assert not any(user == "user_0" and shop == chinese[0] and weight == 0 for user, shop, weight in interactions)
+
+    matrix = InteractionMatrix.from_log_dir(str(tmp_dir / "learning_data"), shop_ids=[s.shop_id for s in catalog])
+    assert matrix.shape == (40, len({s.shop_id for s in catalog}))
+    assert "12345" not in matrix.shop_index  # 카탈로그에 없는 매장 제외
+    # 같은 사용자·매장 상호작용은 합산 (노출 + 선택 + 평점 5점 → 2.0)
+    row, col = matrix.user_index["user_0"], matrix.shop_index[korean[0]]
+    expected = sum(w for user, shop, w in interactions if user == "user_0" and shop == korean[0])
+    assert expected >= INTERACTION_WEIGHTS['selection'] + 2.0
+    assert abs(matrix.matrix[row, col] - expected) < 1e-5
+
+    model = ImplicitALSModel.fit(matrix, factors=8, iterations=15)
+    model_path = tmp_dir / "model.npz"
+    model.save(str(model_path))
+    loaded = ImplicitALSModel.load(str(model_path))
+    assert loaded.recommend("user_2", 10) == model.recommend("user_2", 10)
+    assert loaded.get_stats()["interactions"] == matrix.get_stats()["interactions"]
+
+    funnel = CollaborativeFunnel(catalog=catalog, model_path=str(model_path))
+    candidates = funnel.get_candidates(user_id="user_2", filters={}, limit=10)
+    assert all(c['reason'] == '비슷한 취향의 사용자들이 선택' for c in candidates)
+    assert sum(c['category'] == "한식" for c in candidates) >= 8, candidates
+    # 모델 후보 + 필터
+    filtered = funnel.get_candidates(user_id="user_3", filters={"is_good_influence": True}, limit=10)
+    assert filtered and all(catalog.get(c['shop_id']).is_good_shop for c in filtered)
+    # 모델 후보가 부족하면 규칙 점수로 채움 (중복 없음)
+    many = funnel.get_candidates(user_id="user_2", filters={}, limit=300)
+    assert len(many) == 300 and len({(c['shop_id'], c['shop_name']) for c in many}) == 300
+    # 신규 사용자는 규칙 경로와 동일
+    assert funnel.get_candidates(user_id="new_user", filters={}, limit=20) == \
+        reference_candidates(funnel, 'default', {}, 20)
+    print(f"[PASS] 로그 {matrix.get_stats()['interactions']}건 → ALS 모델, 이력 사용자 모델 추천 / 신규 사용자 폴백")
+
+
+def synthetic_interactions(num_users: int, num_shops: int, per_user: int = 20, groups: int = 50, seed: int = 0):
+    """취향 그룹이 있는 합성 상호작용 (80% 자기 그룹 매장, 20% 임의 매장), 사용자당 1건 홀드아웃"""
+    rng = np.random.default_rng(seed)
+    shop_groups = rng.integers(0, groups, num_shops)
+    group_shops = [np.flatnonzero(shop_groups == g) for g in range(groups)]
+    user_groups = rng.integers(0, groups, num_users)
+    degrees = np.maximum(rng.poisson(per_user, num_users), 2)
+
+    rows, cols = [], []
+    for g in range(groups):
+        users = np.flatnonzero(user_groups == g)
+        total = int(degrees[users].sum())
+        in_group = rng.random(total) < 0.8
+        # 그룹 내 인기 편중 (앞쪽 매장일수록 자주 선택)
+        local = group_shops[g][np.minimum(rng.zipf(1.3, total) - 1, len(group_shops[g]) - 1)]
+        cols.append(np.where(in_group, local, rng.integers(0, num_shops, total)))
+        rows.append(np.repeat(users, degrees[users]))
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+
+    # 사용자별 마지막 상호작용은 평가용으로 제외
+    order = np.argsort(rows, kind='stable')
+    rows, cols = rows[order], cols[order]
+    last = np.r_[np.flatnonzero(np.diff(rows) != 0), len(rows) - 1]
+    train = np.ones(len(rows), dtype=bool)
+    train[last] = False
+    weights = np.where(rng.random(len(rows)) < 0.3, INTERACTION_WEIGHTS['selection'],
+                       INTERACTION_WEIGHTS['implicit']).astype(np.float32)
+    matrix = sparse.csr_matrix((weights[train], (rows[train], cols[train])), shape=(num_users, num_shops))
+    matrix.sum_duplicates()
+    holdout = dict(zip(rows[last].tolist(), cols[last].tolist()))
+    return matrix, holdout
+
+
+def benchmark(num_users: int, num_shops: int, iterations: int, sample_users: int = 2000):
+    print(f"\n=== 사용자 {num_users:,} × 매장 {num_shops:,} ===")
+    start = time.perf_counter()
+    matrix, holdout = synthetic_interactions(num_users, num_shops)
+    user_ids = [f"user_{i}" for i in range(num_users)]
+    shop_ids = [f"shop_{i}" for i in range(num_shops)]
+    interactions = InteractionMatrix(matrix, user_ids, shop_ids)
+    print(f"상호작용 행렬: {matrix.nnz:,}건 ({time.perf_counter() - start:.1f}초)")
+
+    model = ImplicitALSModel.fit(interactions, factors=32, iterations=iterations)
+    print(f"ALS 학습 ({iterations}회 반복): {model.params['fit_time']:.1f}초, "
+          f"요인 메모리 {model.get_stats()['memory_bytes'] / 1e6:.1f}MB")
+
+    rng = np.random.default_rng(1)
+    sample = rng.choice(num_users, sample_users, replace=False)
+
+    start = time.perf_counter()
+    hits = 0
+    for user in sample:
+        top = model.recommend(user_ids[user], 50)
+        hits += f"shop_{holdout[user]}" in {shop_id for shop_id, _ in top}
+    single_ms = (time.perf_counter() - start) * 1000 / sample_users
+
+    start = time.perf_counter()
+    for chunk in np.array_split(sample, max(1, sample_users // 256)):
+        model.recommend_batch([user_ids[user] for user in chunk], 50)
+    batch_ms = (time.perf_counter() - start) * 1000 / sample_users
+
+    popular = set(np.argsort(-np.asarray(matrix.sum(axis=0)).ravel(), kind='stable')[:50].tolist())
+    popular_hits = sum(holdout[user] in popular for user in sample)
+    print(f"조회 지연: 단건 {single_ms:.2f}ms/사용자, 256명 배치 {batch_ms:.3f}ms/사용자")
+    print(f"hit rate@50 (홀드아웃 {sample_users}명): ALS {hits / sample_users:.3f}, "
+          f"인기순 {popular_hits / sample_users:.3f}")
+
+    # Funnel 경로: 규칙 기반 매장 루프(기존) vs 벡터화 / 모델
+    catalog = RestaurantCatalog(make_catalog(num_shops))
+    funnel = CollaborativeFunnel(catalog=catalog, model=model, model_path=None)
+    queries = 20
+    start = time.perf_counter()
+    for _ in range(queries):
+        reference_candidates(funnel, 'gourmet', {"max_price": 15000}, 50)
+    loop_ms = (time.perf_counter() - start) * 1000 / queries
+    start = time.perf_counter()
+    for _ in range(queries):
+        funnel.get_candidates(user_type='gourmet', filters={"max_price": 15000}, limit=50)
+    vector_ms = (time.perf_counter() - start) * 1000 / queries
+    start = time.perf_counter()
+    for user in sample[:queries]:
+        funnel.get_candidates(user_id=user_ids[user], filters={"max_price": 15000}, limit=50)
+    model_ms = (time.perf_counter() - start) * 1000 / queries
+    print(f"CollaborativeFunnel.get_candidates: 기존 매장 루프 {loop_ms:.1f}ms, "
+          f"규칙 벡터화 {vector_ms:.1f}ms, ALS 모델 {model_ms:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="협업 필터링 상호작용 행렬 / ALS 테스트")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--shops", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=5, help="벤치마크 ALS 반복 수")
+    args = parser.parse_args()
+
+    test_type_parity()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_logs_and_fallback(Path(tmp))
+    benchmark(args.users, args.shops, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
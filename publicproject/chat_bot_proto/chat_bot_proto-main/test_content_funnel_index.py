@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+ContentFunnel 역색인 테스트
+
+1. 기존 전수 탐색 방식(매장 × 쿼리 토큰 × 매장 토큰)과 점수/이유/순서가 완전히 같은지 확인
+2. 매장 1k/10k/100k 합성 카탈로그에서 쿼리당 지연 측정
+"""
+
+import json
+import time
+import random
+import tempfile
+import argparse
+from pathlib import Path
+
+from recommendation.content_funnel import ContentFunnel
+
+CATEGORIES = ["한식", "중식", "일식", "양식", "분식", "치킨", "카페", "기타/디저트"]
+MENU_WORDS = ["김치찌개", "된장찌개", "비빔밥", "불고기", "짜장면", "짬뽕", "탕수육", "돈까스",
+              "치즈카츠", "우동", "초밥", "파스타", "피자", "떡볶이", "순대", "김밥", "라면",
+              "후라이드치킨", "양념치킨", "아메리카노", "케이크", "매운떡볶이", "치즈돈까스", "제육볶음"]
+NAME_WORDS = ["백년", "청년밥상", "행복", "착한", "엄마손", "골목", "동네", "맛있는", "우리집", "할매"]
+DISTRICTS = ["관악점", "정릉점", "낙성대점", "혜화점", "신림점", "강남점"]
+
+QUERIES = ["비빔밥", "한식", "치킨 매운", "떡볶이", "김치찌개 먹고 싶어", "돈까스", "청년밥상",
+           "치즈", "짜장면 짬뽕", "카페 케이크", "관악점 우동", "Pizza", "양념", "매운 떡볶이 순대",
+           "없는메뉴", "밥", "행복 한식 김밥"]
+
+
+def make_catalog(num_shops: int, seed: int = 42):
+    """합성 매장 카탈로그 (중복 shopId, 이름 없는 메뉴 등 예외 케이스 포함)"""
+    rng = random.Random(seed)
+    restaurants = []
+    for i in range(num_shops):
+        name = f"{rng.choice(NAME_WORDS)}{rng.choice(['', '식당', '분식', '카츠'])} {rng.choice(DISTRICTS)}"
+        menus = [{"name": rng.choice(MENU_WORDS), "price": rng.randrange(3000, 20000, 500)}
+                 for _ in range(rng.randint(1, 6))]
+        if i % 997 == 0:
+            menus.append({"price": 1000})  # 이름 없는 메뉴
+        restaurant = {
+            "shopId": f"shop_{i}",
+            "shopName": name,
+            "category": rng.choice(CATEGORIES),
+            "attributes": {"isGoodShop": rng.random() < 0.3, "acceptsMealCard": rng.random() < 0.5},
+            "menus": menus
+        }
+        if i % 1009 == 5:
+            restaurant["shopId"] = f"shop_{i - 1}"  # 중복 shopId
+        if i % 2003 == 7:
+            del restaurant["shopId"]  # shopId 없음
+        restaurants.append(restaurant)
+    return restaurants
+
+
+def reference_filters(restaurant, filters) -> bool:
+    """역색인 도입 전 _passes_basic_filters (원본 매장 dict 기준)"""
+    if filters.get('category'):
+        if filters['category'].lower() not in restaurant.get('category', '').lower():
+            return False
+    if filters.get('is_good_influence'):
+        if not restaurant.get('attributes', {}).get('isGoodShop', False):
+            return False
+    if filters.get('accepts_meal_card'):
+        if not restaurant.get('attributes', {}).get('acceptsMealCard', False):
+            return False
+    return True
+
+
+def reference_candidates(funnel: ContentFunnel, query: str, filters=None, limit: int = 50):
+    """역색인 도입 전 get_candidates 구현 (비교 기준)"""
+    def content_score(shop_id, query_tokens, query):
+        if shop_id not in funnel.content_index:
+            return 0.0, []
+        index_data = funnel.content_index[shop_id]
+        score = 0.0
+        match_reasons = []
+        for menu_name in index_data['menus']:
+            if query in menu_name or menu_name in query:
+                score += 50
+                match_reasons.append(f"메뉴 '{menu_name}' 매칭")
+                break
+        category = index_data['category']
+        if any(token in category for token in query_tokens) or query in category:
+            score += 30
+            match_reasons.append(f"카테고리 '{category}' 매칭")
+        content_tokens = index_data['tokens']
+        matched_tokens = []
+        for query_token in query_tokens:
+            for content_token in content_tokens:
+                if query_token in content_token or content_token in query_token:
+                    if content_token not in matched_tokens:
+                        score += 5
+                        matched_tokens.append(content_token)
+                        break
+        if matched_tokens:
+            token_score = min(len(matched_tokens) * 5, 25)
+            score = score - len(matched_tokens) * 5 + token_score
+            if len(matched_tokens) > 1:
+                match_reasons.append(f"키워드 {len(matched_tokens)}개 매칭")
+        shop_name_tokens = funnel._tokenize(query)
+        for restaurant in funnel.restaurants:
+            if restaurant.get('shopId') == shop_id:
+                shop_name = restaurant.get('shopName', '').lower()
+                if any(token in shop_name for token in shop_name_tokens) or query in shop_name:
+                    score += 15
+                    match_reasons.append("매장명 매칭")
+                break
+        return score, match_reasons
+
+    candidates = []
+    query_tokens = funnel._tokenize(query.lower())
+    if not query_tokens:
+        return []
+    for restaurant in funnel.restaurants:
+        shop_id = restaurant.get('shopId', '')
+        score, match_reasons = content_score(shop_id, query_tokens, query.lower())
+        if score <= 0:
+            continue
+        if not reference_filters(restaurant, filters or {}):
+            continue
+        candidates.append({
+            'shop_id': shop_id,
+            'shop_name': restaurant.get('shopName', ''),
+            'category': restaurant.get('category', ''),
+            'funnel_source': 'content',
+            'content_score': score,
+            'reason': funnel._format_match_reason(match_reasons, query)
+        })
+    candidates.sort(key=lambda x: x['content_score'], reverse=True)
+    return candidates[:limit]
+
+
+def build_funnel(restaurants, tmp_dir: Path) -> ContentFunnel:
+    path = tmp_dir / f"restaurants_{len(restaurants)}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"restaurants": restaurants}, f, ensure_ascii=False)
+    return ContentFunnel(str(path))
+
+
+def test_score_parity(tmp_dir: Path):
+    """기존 구현과 결과 완전 일치"""
+    funnel = build_funnel(make_catalog(3000), tmp_dir)
+    filter_cases = [None, {"category": "한식"}, {"is_good_influence": True}]
+    for query in QUERIES:
+        for filters in filter_cases:
+            expected = reference_candidates(funnel, query, filters, limit=10000)
+            actual = funnel.get_candidates(query, filters, limit=10000)
+            assert actual == expected, f"불일치: '{query}' {filters}"
+    print(f"[PASS] 점수 일치: 쿼리 {len(QUERIES)}개 × 필터 {len(filter_cases)}개")
+
+
+def benchmark(tmp_dir: Path, sizes):
+    print(f"\n{'매장 수':>8} | {'인덱스 구축(s)':>13} | {'역색인(ms/쿼리)':>15} | {'전수 탐색(ms/쿼리)':>17}")
+    print("-" * 66)
+    for size in sizes:
+        restaurants = make_catalog(size)
+        start = time.perf_counter()
+        funnel = build_funnel(restaurants, tmp_dir)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in QUERIES:
+            funnel.get_candidates(query, limit=50)
+        indexed_ms = (time.perf_counter() - start) * 1000 / len(QUERIES)
+
+        # 전수 탐색은 매장 이름 선형 탐색 때문에 O(N²)이므로 작은 규모에서만 측정
+        if size <= 10000:
+            sample = QUERIES[:3]
+            start = time.perf_counter()
+            for query in sample:
+                reference_candidates(funnel, query, limit=50)
+            reference_ms = f"{(time.perf_counter() - start) * 1000 / len(sample):.2f}"
+        else:
+            reference_ms = "(생략)"
+
+        print(f"{size:>8} | {build_time:>13.2f} | {indexed_ms:>15.2f} | {reference_ms:>17}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ContentFunnel 역색인 테스트")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        test_score_parity(tmp_dir)
+        benchmark(tmp_dir, args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+임베딩 마이크로 배칭 부하 테스트
+
+동시 사용자 1/8/32/128명이 각자 쿼리를 인코딩할 때
+직접 encode 호출과 MicroBatchingEncoder 사용 시의 p50/p99 지연과 처리량을 비교합니다.
+
+기본은 SentenceTransformer와 비슷한 비용 구조(호출당 고정 오버헤드 + 문장당 비용,
+모델은 한 번에 하나의 호출만 처리)를 흉내 낸 모의 인코더를 사용하며,
+--real-model 옵션으로 실제 모델을 측정할 수 있습니다.
+"""
+
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from rag.embedding_batcher import MicroBatchingEncoder
+
+
+class SimulatedEncoder:
+    """호출당 고정 비용 + 문장당 비용을 가지는 모의 임베딩 모델"""
+
+    def __init__(self, dim: int = 384, call_overhead_ms: float = 8.0, per_text_ms: float = 0.5):
+        self.dim = dim
+        self.call_overhead = call_overhead_ms / 1000.0
+        self.per_text = per_text_ms / 1000.0
+        self._lock = threading.Lock()  # GPU/CPU 모델 한 개를 공유하는 상황
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        with self._lock:
+            self.calls += 1
+            time.sleep(self.call_overhead + self.per_text * len(texts))
+        return np.stack([np.full(self.dim, len(text), dtype=np.float32) for text in texts])
+
+
+QUERIES = ["치킨 먹고 싶어", "떡볶이 추천해줘", "만원으로 뭐 먹지", "근처 착한가게 알려줘",
+           "피자집 어디 있어", "오늘 점심 뭐 먹을까", "한식 먹고 싶어", "쿠폰 쓸 수 있는 곳"]
+
+
+def run_load(encoder, concurrency: int, requests_per_user: int):
+    """동시 사용자 수만큼 스레드를 띄워 요청별 지연 측정"""
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def user_session(user_idx: int):
+        local = []
+        for i in range(requests_per_user):
+            query = f"{QUERIES[(user_idx + i) % len(QUERIES)]} {user_idx}"
+            start = time.perf_counter()
+            encoder.encode([query])
+            local.append(time.perf_counter() - start)
+        with latencies_lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(user_session, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50": float(np.percentile(latencies_ms, 50)),
+        "p99": float(np.percentile(latencies_ms, 99)),
+        "qps": len(latencies) / elapsed
+    }
+
+
+def test_batching_correctness():
+    """배치로 묶여도 각 호출자는 자기 쿼리의 임베딩을 받아야 함"""
+    model = SimulatedEncoder(dim=4, call_overhead_ms=2.0, per_text_ms=0.0)
+    batcher = MicroBatchingEncoder(model, max_batch_size=16, max_wait_ms=10.0)
+
+    texts = [f"쿼리{'!' * i}" for i in range(32)]
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        results = list(executor.map(lambda text: batcher.encode([text]), texts))
+
+    for text, embedding in zip(texts, results):
+        assert embedding.shape == (1, 4)
+        assert embedding[0, 0] == len(text)
+
+    stats = batcher.get_stats()
+    assert stats["total_requests"] == 32
+    assert stats["total_batches"] < 32
+    batcher.close()
+    print(f"[PASS] 배치 결과 분배: {stats['total_batches']}회 encode로 32개 요청 처리")
+
+
+def test_batching_error_propagation():
+    """encode 실패는 배치 내 모든 호출자에게 전달"""
+
+    class FailingEncoder:
+        def encode(self, texts, **kwargs):
+            raise RuntimeError("encode 실패")
+
+    batcher = MicroBatchingEncoder(FailingEncoder(), max_wait_ms=1.0)
+    try:
+        batcher.encode(["치킨"], timeout=5)
+        assert False, "예외가 전달되어야 합니다"
+    except RuntimeError:
+        pass
+    batcher.close()
+    print("[PASS] 인코딩 예외 전달")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 마이크로 배칭 부하 테스트")
+    parser.add_argument("--real-model", type=str, default=None,
+                        help="SentenceTransformer 모델명 (미지정 시 모의 인코더)")
+    parser.add_argument("--requests-per-user", type=int, default=20)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    test_batching_correctness()
+    test_batching_error_propagation()
+
+    if args.real_model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.real_model)
+        print(f"\n실제 모델 사용: {args.real_model}")
+    else:
+        model = SimulatedEncoder()
+        print("\n모의 인코더 사용 (호출당 8ms + 문장당 0.5ms)")
+
+    batcher = MicroBatchingEncoder(model, max_batch_size=args.max_batch_size,
+                                   max_wait_ms=args.max_wait_ms)
+
+    print(f"\n{'동시 사용자':>10} | {'방식':>6} | {'p50(ms)':>9} | {'p99(ms)':>9} | {'QPS':>8}")
+    print("-" * 55)
+    for concurrency in [1, 8, 32, 128]:
+        direct = run_load(model, concurrency, args.requests_per_user)
+        batched = run_load(batcher, concurrency, args.requests_per_user)
+        for name, result in [("직접", direct), ("배칭", batched)]:
+            print(f"{concurrency:>10} | {name:>6} | {result['p50']:>9.2f} | "
+                  f"{result['p99']:>9.2f} | {result['qps']:>8.1f}")
+
+    print(f"\n배처 통계: {batcher.get_stats()}")
+    batcher.close()
+
+
+if __name__ == "__main__":
+    main()
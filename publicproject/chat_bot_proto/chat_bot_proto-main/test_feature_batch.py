@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+RealDataFeatureExtractor 배치 특성 추출 테스트
+
+1. extract_wide_features_batch / extract_deep_features_batch 결과가
+   후보별 추출(기존 방식)과 같은지 확인
+2. 후보 150개 요청당 특성 추출 시간 비교 (후보별 2회 호출 vs 배치)
+"""
+
+import time
+import random
+import argparse
+
+import numpy as np
+
+from recommendation.recommendation_engine import RealDataFeatureExtractor
+
+PROFILES = [
+    {'id': 863, 'birthday': '1985-03-20', 'location': {'state': '서울특별시', 'city': '서울특별시'},
+     'shop_favorite_count': 8, 'total_orders': 25, 'review_count': 12},
+    {},
+]
+CHATBOT_OUTPUTS = [
+    {'semantic_query': '가족 건강식 저녁 식당', 'budget_filter': 30000, 'location_filter': {'district': '관악구'},
+     'filters': {'dietary_preferences': ['건강식', '가족식']}},
+    {'budget_filter': 8000},
+    {},
+]
+CONTEXTS = [{'time_of_day': 'dinner'}, {}]
+
+
+def make_candidates(num_candidates: int, seed: int = 0):
+    """Layer 1 후보 형태의 합성 후보 (필드 누락 포함)"""
+    rng = random.Random(seed)
+    candidates = []
+    for i in range(num_candidates):
+        source = rng.choice(['content', 'popularity', 'collaborative + contextual'])
+        candidate = {'shop_id': i, 'shop_name': f'매장{i}', 'funnel_source': source,
+                     'category': rng.choice(['한식', '중식', '카페', '건강식 한식'])}
+        if rng.random() < 0.5:
+            candidate['funnel_sources'] = source.split(' + ')
+        for key in ('collaborative_score', 'content_score', 'context_score', 'base_score', 'rating',
+                    'avg_menu_price', 'menu_count', 'review_count', 'order_count'):
+            if rng.random() < 0.6:
+                candidate[key] = rng.choice([0, 3.7, 4.2, 5, 45.5, 12000])
+        if rng.random() < 0.5:
+            candidate['address'] = rng.choice(['서울 관악구 봉천로 1', '서울 마포구 2', '부산 해운대구', ''])
+        if rng.random() < 0.3:
+            candidate['isGoodShop'] = True
+        if rng.random() < 0.3:
+            candidate['operating_hours'] = rng.choice(['09:00-22:00', '11:30-15:00', '영업중'])
+        if rng.random() < 0.3:
+            candidate['description'] = '가족식 건강식'
+        candidates.append(candidate)
+    return candidates
+
+
+def reference_wide_features(extractor, candidate, user_profile, chatbot_output, context):
+    """배치 추출 도입 전 extract_wide_features (후보 1개)"""
+    category = candidate.get('category', 'unknown')
+    district = extractor._extract_district_from_address(candidate.get('address', ''))
+    features = [
+        extractor._hash_cross_feature(extractor._calculate_age_group_from_birthday(user_profile.get('birthday', '')),
+                                      category),
+        extractor._hash_cross_feature(user_profile.get('location', {}).get('city', 'unknown'), district),
+        extractor._hash_cross_feature(context.get('time_of_day', 'unknown'), category),
+        extractor._hash_cross_feature(str(user_profile.get('id', 0)), str(candidate.get('id', 'unknown'))),
+        extractor._calculate_budget_compatibility(candidate.get('avg_menu_price', 0),
+                                                  chatbot_output.get('budget_filter', 0)),
+        extractor._calculate_location_distance(district, chatbot_output.get('location_filter', {}).get('district', '')),
+        extractor._calculate_dietary_preference_match(
+            candidate, chatbot_output.get('filters', {}).get('dietary_preferences', [])),
+        extractor.bias_corrections['good_shop_weight'] if candidate.get('isGoodShop', False) else 0.0,
+    ]
+    threshold = extractor.bias_corrections['rating_threshold']
+    rating = candidate.get('rating', 0)
+    features.append((rating - threshold) / (5.0 - threshold) if rating > threshold else 0.0)
+
+    sources = ' '.join(extractor._funnel_sources_of(candidate))
+    features += [1.0 if name in sources else 0.0 for name in ('collaborative', 'content', 'contextual', 'popularity')]
+    features += [candidate.get(key, 0) / 10.0 for key in ('collaborative_score', 'content_score',
+                                                          'context_score', 'base_score')]
+    return np.array(features + [0.0] * (50 - len(features)))
+
+
+def reference_numerical_features(extractor, candidate, user_profile):
+    """배치 추출 도입 전 extract_deep_features의 numerical_features (후보 1개)"""
+    return np.array([
+        extractor._calculate_age_from_birthday(user_profile.get('birthday', '')) / 100.0,
+        user_profile.get('shop_favorite_count', 0) / 50.0,
+        user_profile.get('total_orders', 0) / 100.0,
+        user_profile.get('review_count', 0) / 50.0,
+        candidate.get('avg_menu_price', 0) / 50000.0,
+        candidate.get('menu_count', 0) / 30.0,
+        candidate.get('rating', 0) / 5.0,
+        candidate.get('review_count', 0) / 1000.0,
+        candidate.get('order_count', 0) / 1000.0,
+        extractor._calculate_operating_hours(candidate.get('operating_hours', '')) / 24.0,
+    ])
+
+
+def test_batch_parity():
+    extractor = RealDataFeatureExtractor()
+    candidates = make_candidates(200)
+    cases = 0
+    for user_profile in PROFILES:
+        for chatbot_output in CHATBOT_OUTPUTS:
+            for context in CONTEXTS:
+                wide = extractor.extract_wide_features_batch(candidates, user_profile, chatbot_output, context)
+                deep = extractor.extract_deep_features_batch(candidates, user_profile, chatbot_output, context)
+                assert wide.dtype == np.float32 and wide.shape == (len(candidates), 50)
+                assert deep['numerical_features'].dtype == np.float32
+
+                for i, candidate in enumerate(candidates):
+                    expected = reference_wide_features(extractor, candidate, user_profile, chatbot_output, context)
+                    assert np.allclose(wide[i], expected, atol=1e-6), (i, wide[i][:17], expected[:17])
+                    assert np.allclose(deep['numerical_features'][i],
+                                       reference_numerical_features(extractor, candidate, user_profile), atol=1e-6)
+
+                    single = extractor.extract_deep_features(candidate, user_profile, chatbot_output, context)
+                    assert single['shop_id'] == deep['shop_id'][i] == candidate.get('id', 'unknown')
+                    assert single['category'] == deep['category'][i]
+                    assert np.array_equal(single['numerical_features'], deep['numerical_features'][i])
+                    assert np.array_equal(
+                        extractor.extract_wide_features(candidate, user_profile, chatbot_output, context), wide[i])
+                    cases += 1
+
+    exact = extractor.extract_wide_features_batch(candidates, PROFILES[0], CHATBOT_OUTPUTS[0], CONTEXTS[0],
+                                                  dtype=np.float64)
+    expected = np.array([reference_wide_features(extractor, candidate, PROFILES[0], CHATBOT_OUTPUTS[0], CONTEXTS[0])
+                         for candidate in candidates])
+    assert np.array_equal(exact, expected)
+    assert extractor.extract_wide_features_batch([], {}, {}, {}).shape == (0, 50)
+    print(f"[PASS] 배치 Wide/Deep 특성 == 후보별 추출 ({cases}개 후보×요청, float64 지정 시 완전 일치)")
+
+
+def benchmark(num_candidates: int, repeat: int):
+    extractor = RealDataFeatureExtractor()
+    candidates = make_candidates(num_candidates, seed=1)
+    user_profile, chatbot_output, context = PROFILES[0], CHATBOT_OUTPUTS[0], CONTEXTS[0]
+
+    def per_candidate():
+        for candidate in candidates:
+            reference_wide_features(extractor, candidate, user_profile, chatbot_output, context)
+            reference_numerical_features(extractor, candidate, user_profile)
+
+    def batched():
+        extractor.extract_wide_features_batch(candidates, user_profile, chatbot_output, context)
+        extractor.extract_deep_features_batch(candidates, user_profile, chatbot_output, context)
+
+    for name, fn in (('후보별', per_candidate), ('배치', batched)):
+        fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        print(f"  {name}: {(time.perf_counter() - start) * 1000 / repeat:.2f}ms/요청 (후보 {num_candidates}개)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="배치 특성 추출 테스트")
+    parser.add_argument("--candidates", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    test_batch_parity()
+    print("\n특성 추출 시간:")
+    benchmark(args.candidates, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
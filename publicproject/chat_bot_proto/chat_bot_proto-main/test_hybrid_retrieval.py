@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Hybrid(BM25 + Dense) 검색 테스트 및 평가
+
+1. 문자 n-gram 토큰화(띄어쓰기/구두점 무관), BM25 점수가 문서별 직접 계산과 같은지 확인
+2. 필터, 문서 교체, PrebuiltFAISS 문서 테이블로 만든 인덱스 확인
+3. 가중 RRF 결합, hybrid 모드에서 두 검색이 동시에 실행되는지 확인
+   세대 교체 중에도 한 요청이 같은 세대의 Vector Store / BM25 인덱스만 쓰는지 확인
+4. rag/retrieval_eval_set.json 으로 dense / sparse / hybrid recall@5 와 검색 지연 시간 보고
+   (sentence_transformers가 없으면 Dense는 MockVectorStore로 대체되어 recall이 의미 없음)
+"""
+
+import json
+import math
+import time
+import logging
+import argparse
+import threading
+from collections import Counter
+
+from rag.documents import ShopDocument, MenuDocument
+from rag.document_table import JSONDocumentTable
+from rag.query_parser import QueryStructurizer
+from rag.retriever import NaviyamRetriever, reciprocal_rank_fusion, load_knowledge_from_file
+from rag.sparse_index import BM25Index, char_ngrams
+from rag.vector_stores import MockVectorStore, create_vector_store
+
+logging.disable(logging.INFO)
+
+KNOWLEDGE_FILE = "rag/test_data.json"
+EVAL_SET_FILE = "rag/retrieval_eval_set.json"
+
+
+def load_documents():
+    knowledge_data = load_knowledge_from_file(KNOWLEDGE_FILE)
+    shops = knowledge_data['shops']
+    documents = [ShopDocument(shop) for shop in shops.values()]
+    documents += [MenuDocument(menu, shops.get(str(menu['shop_id']), {})) for menu in knowledge_data['menus'].values()]
+    return knowledge_data, documents
+
+
+def reference_bm25_scores(documents, query, k1=1.2, b=0.75):
+    """문서별로 BM25 공식을 그대로 계산 (포스팅 가중치 사전 계산 전 기준)"""
+    doc_terms = [Counter(char_ngrams(doc.get_content())) for doc in documents]
+    avg_length = sum(sum(terms.values()) for terms in doc_terms) / len(doc_terms)
+    scores = {}
+    for doc, terms in zip(documents, doc_terms):
+        length = sum(terms.values())
+        score = 0.0
+        for term in set(char_ngrams(query)):
+            df = sum(1 for other in doc_terms if term in other)
+            if terms[term] == 0:
+                continue
+            idf = math.log(1.0 + (len(documents) - df + 0.5) / (df + 0.5))
+            score += idf * terms[term] * (k1 + 1) / (terms[term] + k1 * (1 - b + b * length / avg_length))
+        scores[doc.id] = score
+    return scores
+
+
+def test_char_ngrams():
+    assert char_ngrams("쏙,닭") == char_ngrams("쏙닭") == ["쏙닭"]
+    assert char_ngrams("치즈 돈까스") == char_ngrams("치즈돈까스!")
+    assert char_ngrams("ＡＢ") == char_ngrams("ab") == ["ab"]
+    assert char_ngrams("닭") == ["닭"] and char_ngrams(" ,.") == []
+    assert char_ngrams("치즈카츠") == ["치즈", "즈카", "카츠", "치즈카", "즈카츠"]
+    print("[PASS] 문자 n-gram 토큰화 (NFKC/소문자, 띄어쓰기·구두점 무관)")
+
+
+def test_bm25_scores(documents):
+    index = BM25Index()
+    index.add_documents(documents)
+    for query in ("치즈카츠 먹고 싶어", "청년밥상문간 이대점", "급식카드로 아이와 나눔 가능한 곳", "없는메뉴"):
+        expected = reference_bm25_scores(documents, query)
+        actual = dict(index.search_with_scores(query, top_k=len(documents)))
+        assert set(actual) == {doc_id for doc_id, score in expected.items() if score > 0}
+        assert all(abs(actual[doc_id] - expected[doc_id]) < 1e-9 for doc_id in actual)
+
+        ranked = index.search(query, top_k=3)
+        assert ranked == sorted(actual, key=lambda doc_id: -actual[doc_id])[:3]
+
+    assert index.search("치즈카츠", top_k=1) == ["menu_2"]
+    print("[PASS] BM25 점수 == 문서별 직접 계산, 정확한 메뉴 이름이 1위")
+
+
+def test_filters_and_updates(knowledge_data, documents):
+    index = BM25Index()
+    index.add_documents(documents)
+    assert all(doc_id.startswith("shop_") for doc_id in index.search("백년카츠 돈까스", 10, {"type": "shop"}))
+    assert index.search("돈까스", 10, {"type": "menu", "max_price": 12000}) == ["menu_1"]
+    assert index.search("돈까스", 10, {"category": "없는카테고리"}) == []
+
+    # 같은 ID는 교체, 다음 검색에서 다시 컴파일
+    menu = dict(knowledge_data['menus']['3'], name="냉모밀", description="시원한 냉모밀")
+    index.add_documents([MenuDocument(menu, knowledge_data['shops']['1'])])
+    assert len(index) == len(documents)
+    assert "menu_3" not in index.search("우동", 10) and index.search("냉모밀", 1) == ["menu_3"]
+
+    # PrebuiltFAISS 문서 테이블(JSON 형식)로 만든 인덱스도 같은 결과
+    table = JSONDocumentTable({
+        'document_mapping': {str(i): doc.id for i, doc in enumerate(documents)},
+        'documents_metadata': {doc.id: doc.get_metadata() for doc in documents},
+        'documents_content': {doc.id: doc.get_content() for doc in documents},
+    }, len(documents))
+    from_table = BM25Index.from_document_table(table)
+    from_documents = BM25Index()
+    from_documents.add_documents(documents)
+    for query in ("치즈카츠", "급식카드 나눔", "라공방 신림점 메뉴"):
+        assert from_table.search_with_scores(query, 5) == from_documents.search_with_scores(query, 5)
+    print("[PASS] 필터(MetadataColumns), 같은 ID 교체, 문서 테이블로 생성한 인덱스")
+
+
+def test_rank_fusion():
+    ranked = {"dense": ["a", "b", "c"], "sparse": ["c", "d"]}
+    assert reciprocal_rank_fusion(ranked, {"dense": 1.0, "sparse": 1.0}, 4) == ["c", "a", "b", "d"]
+    assert reciprocal_rank_fusion(ranked, {"dense": 1.0, "sparse": 0.0}, 4) == ["a", "b", "c"]
+    assert reciprocal_rank_fusion(ranked, {"dense": 0.5, "sparse": 2.0}, 2) == ["c", "d"]
+    # 동점은 앞선 검색 결과 순서
+    assert reciprocal_rank_fusion({"dense": ["a"], "sparse": ["b"]}, {"dense": 1.0, "sparse": 1.0}, 2) == ["a", "b"]
+    print("[PASS] 가중 Reciprocal Rank Fusion")
+
+
+class SlowVectorStore(MockVectorStore):
+    """검색에 delay초가 걸리는 Vector Store (동시 실행 확인용)"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def search(self, query_embedding, top_k=10, filters=None):
+        time.sleep(self.delay)
+        return super().search(query_embedding, top_k, filters)
+
+
+class SlowBM25Index(BM25Index):
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def search(self, query, top_k=10, filters=None):
+        time.sleep(self.delay)
+        return super().search(query, top_k, filters)
+
+
+def test_concurrent_legs(knowledge_data, delay: float = 0.05):
+    retriever = NaviyamRetriever(SlowVectorStore(delay), QueryStructurizer(None), retrieval_mode="hybrid",
+                                 sparse_index=SlowBM25Index(delay))
+    retriever.add_knowledge_base(knowledge_data)
+    retriever.search("치즈카츠")
+
+    start = time.perf_counter()
+    documents = retriever.search("치즈카츠 먹고 싶어")
+    elapsed = time.perf_counter() - start
+    assert elapsed < delay * 1.8, elapsed
+    assert "menu_2" in [doc.id for doc in documents[:2]] and len(documents) == retriever.top_k
+    assert retriever.get_index_stats()["sparse_index"]["documents"] == 39
+    print(f"[PASS] hybrid 두 검색 동시 실행 (각 {delay * 1000:.0f}ms → 전체 {elapsed * 1000:.0f}ms)")
+
+
+def make_generation(knowledge_data, id_offset: int):
+    """문서 ID를 id_offset만큼 옮긴 (Vector Store, BM25 인덱스) 세대"""
+    shops = {key: dict(shop, id=int(shop['id']) + id_offset) for key, shop in knowledge_data['shops'].items()}
+    documents = [ShopDocument(shop) for shop in shops.values()]
+    documents += [MenuDocument(dict(menu, id=int(menu['id']) + id_offset), shops.get(str(menu['shop_id']), {}))
+                  for menu in knowledge_data['menus'].values()]
+    vector_store, sparse_index = MockVectorStore(), BM25Index()
+    vector_store.add_documents(documents)
+    sparse_index.add_documents(documents)
+    return vector_store, sparse_index
+
+
+def test_generation_swap(knowledge_data, swaps: int = 300):
+    """교체 중 요청이 새 BM25 ID를 이전 Vector Store로 조회하는 등 두 세대를 섞지 않음"""
+    offset = 100000
+    generations = [make_generation(knowledge_data, 0), make_generation(knowledge_data, offset)]
+    retriever = NaviyamRetriever(generations[0][0], QueryStructurizer(None), retrieval_mode="hybrid",
+                                 sparse_index=generations[0][1])
+    errors = []
+    stop = threading.Event()
+
+    def search_loop():
+        while not stop.is_set():
+            doc_ids = [doc.id for doc in retriever.search("치즈카츠 먹고 싶어")]
+            generation_of = {int(doc_id.split('_')[1]) >= offset for doc_id in doc_ids}
+            if len(doc_ids) != retriever.top_k or len(generation_of) != 1:
+                errors.append(doc_ids)
+
+    threads = [threading.Thread(target=search_loop) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(swaps):
+        retriever._publish(*generations[(i + 1) % 2])
+        time.sleep(0.001)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors, errors[:3]
+    assert retriever.get_index_stats()["sparse_index"]["documents"] == 39
+    print(f"[PASS] 세대 교체 {swaps}회 중 hybrid 검색: 요청마다 한 세대의 Vector Store / BM25 인덱스만 사용")
+
+
+def create_dense_store(store: str):
+    if store == "faiss":
+        try:
+            import sentence_transformers  # noqa: F401
+        except ImportError:
+            print("\n[참고] sentence_transformers가 없어 Dense 검색을 MockVectorStore로 대체합니다 (Dense recall 의미 없음)")
+            store = "mock"
+    return create_vector_store(store_type=store)
+
+
+def evaluate(knowledge_data, store: str, top_k: int, repeat: int):
+    eval_set = json.load(open(EVAL_SET_FILE, encoding='utf-8'))['queries']
+    vector_store = create_dense_store(store)
+    sparse_index = BM25Index()
+    base = NaviyamRetriever(vector_store, QueryStructurizer(None), top_k=top_k, retrieval_mode="hybrid",
+                            sparse_index=sparse_index)
+    base.add_knowledge_base(knowledge_data)
+
+    print(f"\n검색 평가 ({len(eval_set)}개 질문, recall@{top_k}):")
+    for mode in ("dense", "sparse", "hybrid"):
+        retriever = NaviyamRetriever(vector_store, base.query_structurizer, top_k=top_k, retrieval_mode=mode,
+                                     sparse_index=sparse_index)
+        recalls, timings = [], []
+        for item in eval_set:
+            retrieved = [doc.id for doc in retriever.search(item['query'])]
+            recalls.append(len(set(retrieved) & set(item['relevant'])) / len(item['relevant']))
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                retriever.search(item['query'])
+            timings.append((time.perf_counter() - start) * 1000 / repeat)
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"  {mode:6s}: recall@{top_k} {sum(recalls) / len(recalls):.3f}, "
+              f"평균 {sum(timings) / len(timings):.2f}ms, p95 {p95:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid 검색 테스트 및 평가")
+    parser.add_argument("--store", default="faiss", choices=["faiss", "mock"], help="Dense 검색 Vector Store")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    knowledge_data, documents = load_documents()
+    test_char_ngrams()
+    test_bm25_scores(documents)
+    test_filters_and_updates(knowledge_data, documents)
+    test_rank_fusion()
+    test_concurrent_legs(knowledge_data)
+    test_generation_swap(knowledge_data)
+    evaluate(knowledge_data, args.store, args.top_k, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+FAISS 인덱스 증분 업데이트 테스트
+
+rag/test_data.json으로 전체 빌드한 뒤 메뉴 가격 변경/추가/삭제를 반영하여
+--incremental 업데이트가 바뀐 문서만 다시 임베딩하고, 삭제·변경된 문서는
+tombstone으로 검색에서 제외되며, 새 세대가 포인터 파일로 게시되는지 확인합니다.
+
+임베딩 모델 없이 동작하도록 텍스트 해시 기반 인코더를 사용합니다.
+"""
+
+import sys
+import json
+import types
+import hashlib
+import tempfile
+import numpy as np
+from pathlib import Path
+from unittest import mock
+
+
+class HashEncoder:
+    """텍스트마다 고정된 벡터를 돌려주고 인코딩한 문장 수를 세는 임베딩 모델 대역"""
+
+    encoded = 0
+
+    def __init__(self, model_name: str = "hash", dim: int = 32):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        HashEncoder.encoded += len(texts)
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.md5(text.encode('utf-8')).digest()[:4], 'little')
+            vectors.append(np.random.default_rng(seed).standard_normal(self.dim))
+        return np.array(vectors, dtype=np.float32)
+
+
+def write_data(path: Path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def main():
+    fake_module = types.ModuleType("sentence_transformers")
+    fake_module.SentenceTransformer = HashEncoder
+
+    with mock.patch.dict(sys.modules, {"sentence_transformers": fake_module}), \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        from build_faiss_index import build_faiss_index, update_faiss_index
+        from rag.index_generations import IndexGenerations
+        from rag.vector_stores import create_vector_store
+
+        tmp_path = Path(tmp_dir)
+        data_path = tmp_path / "data.json"
+        with open("rag/test_data.json", 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        write_data(data_path, data)
+        total_docs = len(data['shops']) + len(data['menus'])
+
+        # 1. 전체 빌드 → 1세대
+        result = build_faiss_index(str(data_path), str(tmp_path), eval_queries=0)
+        assert result["success"], result
+        generations = IndexGenerations(str(tmp_path), "prebuilt_faiss")
+        assert generations.current_name() == "gen-000001"
+        print(f"[PASS] 전체 빌드: {result['total_documents']}개 문서, {result['generation']}")
+
+        # 2. 변경 없음 → 임베딩 0건
+        HashEncoder.encoded = 0
+        result = update_faiss_index(str(data_path), str(tmp_path))
+        assert result["success"] and result["embedded_documents"] == 0 and HashEncoder.encoded == 0
+        print("[PASS] 변경 없는 증분 업데이트: 임베딩 0건")
+
+        # 3. 가격 변경 1건, 메뉴 추가 1건, 메뉴 삭제 1건
+        menu_ids = list(data['menus'].keys())
+        updated_key, deleted_key = menu_ids[0], menu_ids[1]
+        data['menus'][updated_key]['price'] += 1000
+        deleted_doc_id = f"menu_{data['menus'][deleted_key]['id']}"
+        del data['menus'][deleted_key]
+        new_menu = dict(data['menus'][updated_key], id=99999, name="새 메뉴", price=4000)
+        data['menus']['99999'] = new_menu
+        write_data(data_path, data)
+
+        HashEncoder.encoded = 0
+        result = update_faiss_index(str(data_path), str(tmp_path))
+        assert result["success"], result
+        assert (result["added"], result["updated"], result["deleted"]) == (1, 1, 1)
+        assert result["embedded_documents"] == 2 and HashEncoder.encoded == 2
+        assert result["tombstones"] == 2 and not result["compacted"]
+        assert generations.current_name() == "gen-000003"
+        print(f"[PASS] 증분 업데이트: 추가/변경/삭제 = 1/1/1, 임베딩 {HashEncoder.encoded}건")
+
+        # 4. 현재 세대 로드: 삭제 문서는 검색/조회 제외, 변경 문서는 새 내용
+        store = create_vector_store("prebuilt_faiss", index_path=str(tmp_path / "prebuilt_faiss.faiss"))
+        assert "gen-000003" in store.index_path
+        assert store.index.ntotal == total_docs + 2  # tombstone 행 포함
+
+        updated_doc_id = f"menu_{data['menus'][updated_key]['id']}"
+        table = store.document_table
+        assert table.find(deleted_doc_id) is None
+        assert table.find("menu_99999") is not None
+        assert table.get_metadata(table.find(updated_doc_id))['price'] == data['menus'][updated_key]['price']
+
+        encoder = HashEncoder()
+        all_ids = store.search_batch(encoder.encode(["치킨", "떡볶이"]), top_k=store.index.ntotal)
+        for doc_ids in all_ids:
+            assert deleted_doc_id not in doc_ids
+            assert len(doc_ids) == len(set(doc_ids)) == total_docs
+        print("[PASS] tombstone 문서 검색 제외, 변경 문서 최신 내용 반환")
+
+        # 5. 대량 삭제 → tombstone 비율 초과 시 재구성
+        data['menus'] = dict(list(data['menus'].items())[:5])
+        write_data(data_path, data)
+        result = update_faiss_index(str(data_path), str(tmp_path))
+        assert result["success"] and result["compacted"] and result["tombstones"] == 0
+        store = create_vector_store("prebuilt_faiss", index_path=str(tmp_path / "prebuilt_faiss.faiss"))
+        assert store.index.ntotal == len(data['shops']) + 5
+        print(f"[PASS] 인덱스 재구성: {store.index.ntotal}개 문서")
+
+        # 6. 세대 보관 개수
+        assert len(generations.list_generations()) == 3
+        print(f"[PASS] 세대 보관: {generations.list_generations()}")
+
+        # 7. IVFPQ 재구성 시 PQ 설정(pq_m, pq_nbits) 유지
+        import faiss
+        from build_faiss_index import compact_index
+        from rag.index_factory import build_index
+
+        vectors = encoder.encode([f"문서 {i}" for i in range(300)])
+        ivfpq, search_params = build_index(vectors, index_type='ivfpq', nlist=2, pq_m=4, pq_nbits=4)
+        alive = np.ones(len(vectors), dtype=bool)
+        alive[::10] = False
+        compacted = faiss.downcast_index(compact_index(ivfpq, alive, search_params))
+        assert compacted.ntotal == int(alive.sum())
+        assert (compacted.pq.M, compacted.pq.nbits) == (4, 4)
+        print(f"[PASS] IVFPQ 재구성: PQ m={compacted.pq.M}, nbits={compacted.pq.nbits} 유지")
+
+
+if __name__ == "__main__":
+    main()
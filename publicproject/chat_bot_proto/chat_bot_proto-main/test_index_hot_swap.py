@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+인덱스 세대 핫 스왑 테스트
+
+검색 스레드들이 계속 요청을 보내는 동안 새 세대를 게시하고
+NaviyamRetriever.reload_index / 백그라운드 감시로 교체하여
+- 교체 중 검색 실패가 없는지
+- 교체 후 새 세대의 문서가 검색되는지
+- 활성 세대/로드 시간 통계가 갱신되는지 확인합니다.
+"""
+
+import sys
+import json
+import time
+import types
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from test_incremental_index import HashEncoder, write_data
+
+
+def main():
+    fake_module = types.ModuleType("sentence_transformers")
+    fake_module.SentenceTransformer = HashEncoder
+
+    with mock.patch.dict(sys.modules, {"sentence_transformers": fake_module}), \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        from build_faiss_index import build_faiss_index, update_faiss_index
+        from rag.vector_stores import create_vector_store
+        from rag.query_parser import QueryStructurizer
+        from rag.retriever import NaviyamRetriever
+
+        tmp_path = Path(tmp_dir)
+        data_path = tmp_path / "data.json"
+        index_path = str(tmp_path / "prebuilt_faiss.faiss")
+        with open("rag/test_data.json", 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        write_data(data_path, data)
+
+        assert build_faiss_index(str(data_path), str(tmp_path), eval_queries=0)["success"]
+
+        store = create_vector_store("prebuilt_faiss", index_path=index_path)
+        store.embedding_model = HashEncoder()
+        retriever = NaviyamRetriever(store, QueryStructurizer(llm_client=None))
+        retriever.index_path = index_path
+        assert retriever.get_index_stats()["active_generation"] == "gen-000001"
+
+        # 1. 검색 부하 중 교체
+        errors = []
+        searches = [0]
+        stop = threading.Event()
+
+        def search_loop():
+            while not stop.is_set():
+                try:
+                    retriever.search("착한가게 알려줘")
+                    searches[0] += 1
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=search_loop) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+
+        shop = next(iter(data['shops'].values()))
+        data['shops']['99999'] = dict(shop, id=99999, name="새로 생긴 착한가게")
+        write_data(data_path, data)
+        assert update_faiss_index(str(data_path), str(tmp_path))["success"]
+
+        assert retriever.reload_index() is True
+        assert retriever.reload_index() is False  # 이미 최신
+        time.sleep(0.2)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        assert not errors, errors
+        stats = retriever.get_index_stats()
+        assert stats["active_generation"] == "gen-000002" and stats["swap_count"] == 1
+        assert retriever.vector_store.embedding_model is store.embedding_model  # 모델 공유
+        assert retriever.vector_store.get_documents_by_ids(["shop_99999"])
+        assert store.get_documents_by_ids(["shop_1"])  # 이전 세대 참조는 계속 사용 가능
+        print(f"[PASS] 검색 {searches[0]}회 중 무중단 교체: {stats['active_generation']} "
+              f"(로드 {stats['load_time'] * 1000:.1f}ms)")
+
+        # 2. 백그라운드 감시로 자동 교체
+        retriever.enable_hot_reload(index_path, poll_interval=0.05)
+        del data['shops']['99999']
+        write_data(data_path, data)
+        assert update_faiss_index(str(data_path), str(tmp_path))["success"]
+
+        deadline = time.time() + 5
+        while retriever.get_index_stats()["active_generation"] != "gen-000003" and time.time() < deadline:
+            time.sleep(0.05)
+        retriever.stop_hot_reload()
+
+        assert retriever.get_index_stats()["active_generation"] == "gen-000003"
+        assert not retriever.vector_store.get_documents_by_ids(["shop_99999"])
+        print("[PASS] 포인터 파일 감시로 새 세대 자동 교체")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+NaviyamKnowledge 보조 인덱스 테스트
+
+1. 가게별 메뉴, 가게별 최저가 메뉴, 카테고리별 가게, 가격 정렬 메뉴(bisect) 조회가 전체 스캔과 같은지 확인
+2. inference/response_generator.py 추천 (음식 종류/예산/착한가게/영업중/근처)이 인덱스 도입 전과 같은지 확인
+3. 가게/메뉴 목록 변경 시 인덱스 재구축
+4. 응답 1회 추천 시간 비교 (가게 × 메뉴 스캔 vs 인덱스)
+"""
+
+import time
+import random
+import logging
+import argparse
+
+from data.data_structure import (
+    NaviyamKnowledge, NaviyamShop, NaviyamMenu, ExtractedInfo, ExtractedEntity, ConfidenceLevel, IntentType
+)
+from inference.response_generator import RecommendationEngine, NaviyamResponseGenerator
+
+logging.disable(logging.INFO)
+
+CATEGORIES = ['한식', '중식', '일식', '한식/치킨', '치킨', '양식', '분식', ' 기타/디저트 ', 'Cafe']
+FOOD_TYPES = ['치킨', '한식', '짜장면', '돈카츠', '피자', '떡볶이', '디저트', 'cafe', '없는음식']
+BUDGETS = [None, 0, 5000, 8000, 12000, 30000]
+
+
+def make_knowledge(num_shops: int, menus_per_shop: int, seed: int = 0) -> NaviyamKnowledge:
+    """합성 지식베이스 (메뉴 없는 가게, 가게 없는 메뉴, 같은 가격 메뉴 포함)"""
+    rng = random.Random(seed)
+    knowledge = NaviyamKnowledge()
+    for shop_id in rng.sample(range(1, num_shops * 3), num_shops):
+        knowledge.shops[shop_id] = NaviyamShop(
+            id=shop_id, name=f'가게{shop_id}', category=rng.choice(CATEGORIES),
+            is_good_influence_shop=rng.random() < 0.3, is_food_card_shop='Y', address=f'서울 {shop_id}',
+            open_hour='', close_hour='', ordinary_discount=rng.random() < 0.2)
+
+    shop_ids = list(knowledge.shops) + [-1]
+    menu_id = 0
+    for _ in range(num_shops * menus_per_shop):
+        menu_id += 1
+        shop_id = rng.choice(shop_ids)
+        knowledge.menus[menu_id] = NaviyamMenu(id=menu_id, shop_id=shop_id, name=f'메뉴{menu_id}',
+                                               price=rng.choice(range(3000, 20001, 500)))
+    return knowledge
+
+
+def reference_recommend_by_food_type(knowledge, target_category, budget, limit):
+    """인덱스 도입 전 RecommendationEngine.recommend_by_food_type의 가게/메뉴 선택 (카테고리 매핑 이후)"""
+    matching_shops = [shop for shop in knowledge.shops.values()
+                      if target_category.strip().lower() in shop.category.strip().lower()]
+    matching_shops.sort(key=lambda x: (-1 if x.is_good_influence_shop else 0, -1 if x.ordinary_discount else 0))
+    result = []
+    for shop in matching_shops[:limit]:
+        shop_menus = [menu for menu in knowledge.menus.values() if menu.shop_id == shop.id]
+        if budget:
+            shop_menus = [menu for menu in shop_menus if menu.price <= budget]
+        if shop_menus:
+            result.append((shop.id, min(shop_menus, key=lambda x: x.price).id))
+    return result
+
+
+def reference_recommend_by_budget(knowledge, budget, limit):
+    """인덱스 도입 전 RecommendationEngine.recommend_by_budget (음식 종류 없음)"""
+    scored = []
+    for menu in [menu for menu in knowledge.menus.values() if menu.price <= budget]:
+        shop = knowledge.shops.get(menu.shop_id)
+        if shop:
+            score = budget - menu.price + (1000 if shop.is_good_influence_shop else 0) + \
+                (500 if shop.ordinary_discount else 0)
+            scored.append((score, menu, shop))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [(shop.id, menu.id, score) for score, menu, shop in scored[:limit]]
+
+
+def reference_cheapest(knowledge, shop):
+    shop_menus = [menu for menu in knowledge.menus.values() if menu.shop_id == shop.id]
+    return min(shop_menus, key=lambda x: x.price) if shop_menus else None
+
+
+def extracted(intent, food_type=None, budget=None):
+    return ExtractedInfo(intent=intent, entities=ExtractedEntity(food_type=food_type, budget=budget),
+                         confidence=0.9, confidence_level=ConfidenceLevel.HIGH, raw_text='')
+
+
+def test_index_lookups():
+    for seed in range(3):
+        knowledge = make_knowledge(300, 8, seed)
+        assert knowledge.get_good_influence_shops() == \
+            [shop for shop in knowledge.shops.values() if shop.is_good_influence_shop]
+        for category in CATEGORIES + ['기타/디저트', 'cafe', '없음']:
+            assert knowledge.get_shops_by_category(category) == [
+                shop for shop in knowledge.shops.values()
+                if shop.category.strip().lower() == category.strip().lower()]
+        for shop in list(knowledge.shops.values()) + [NaviyamShop(-1, '', '', False, 'N', '', '', '')]:
+            assert knowledge.get_menus_by_shop(shop.id) == \
+                [menu for menu in knowledge.menus.values() if menu.shop_id == shop.id]
+            assert knowledge.get_cheapest_menu(shop.id) is reference_cheapest(knowledge, shop)
+        for budget in (0, 2999, 3000, 7500, 7501, 20000, 10 ** 9):
+            assert knowledge.get_menus_in_budget(budget) == \
+                [menu for menu in knowledge.menus.values() if menu.price <= budget]
+    print("[PASS] 가게별 메뉴/최저가 메뉴, 카테고리별 가게, 예산 내 메뉴(bisect) == 전체 스캔")
+
+
+def test_recommendation_parity():
+    cases = 0
+    for seed in range(3):
+        knowledge = make_knowledge(200, 6, seed)
+        engine = RecommendationEngine(knowledge)
+        for food_type in FOOD_TYPES:
+            for budget in BUDGETS:
+                actual = engine.recommend_by_food_type(food_type, budget, limit=3)
+                # 카테고리 매핑 결과는 추천 결과의 category로 확인할 수 없으므로 같은 매핑 후 비교
+                target = {'짜장면': '중식', '돈카츠': '일식', '피자': '양식', '떡볶이': '분식'}.get(food_type, food_type)
+                expected = reference_recommend_by_food_type(knowledge, target, budget, 3)
+                assert [(r['shop_id'], r['menu_id']) for r in actual] == expected, (food_type, budget)
+                cases += 1
+        for budget in (3000, 8000, 15000):
+            actual = engine.recommend_by_budget(budget, limit=5)
+            assert [(r['shop_id'], r['menu_id'], r['value_score']) for r in actual] == \
+                reference_recommend_by_budget(knowledge, budget, 5)
+            cases += 1
+
+        generator = NaviyamResponseGenerator(knowledge, nlg=None)
+        good = [r['shop_id'] for r in generator._get_recommendations(extracted(IntentType.FOOD_REQUEST))]
+        expected = [shop.id for shop in knowledge.shops.values()
+                    if shop.is_good_influence_shop][:3]
+        assert good == [shop_id for shop_id in expected if reference_cheapest(knowledge, knowledge.shops[shop_id])]
+        for intent in (IntentType.TIME_INQUIRY, IntentType.LOCATION_INQUIRY):
+            for recommendation in generator._get_recommendations(extracted(intent)):
+                best = reference_cheapest(knowledge, knowledge.shops[recommendation['shop_id']])
+                assert (recommendation['menu_name'], recommendation['price']) == (best.name, best.price)
+            cases += 1
+    print(f"[PASS] response_generator 추천 == 인덱스 도입 전 ({cases}개 조합)")
+
+
+def test_index_refresh():
+    knowledge = make_knowledge(50, 4)
+    indexes = knowledge.indexes
+    assert knowledge.indexes is indexes
+
+    shop = NaviyamShop(9999, '새 가게', '치킨', True, 'Y', '', '', '')
+    knowledge.shops[shop.id] = shop
+    knowledge.menus[9999] = NaviyamMenu(9999, shop.id, '새 메뉴', 1000)
+    assert knowledge.indexes is not indexes
+    assert knowledge.get_cheapest_menu(shop.id).id == 9999 and shop in knowledge.get_shops_by_category('치킨')
+    assert knowledge.get_menus_in_budget(1000)[-1].id == 9999
+
+    # 같은 키의 값을 바꾸면 개수가 같으므로 rebuild_indexes로 반영
+    knowledge.menus[9999] = NaviyamMenu(9999, shop.id, '바뀐 메뉴', 500)
+    knowledge.rebuild_indexes()
+    assert knowledge.get_cheapest_menu(shop.id).name == '바뀐 메뉴'
+
+    knowledge.shops = {}
+    assert knowledge.get_shops_matching_category('') == []
+    print("[PASS] 가게/메뉴 목록 변경 시 인덱스 재구축")
+
+
+def benchmark(num_shops: int, menus_per_shop: int, repeat: int):
+    knowledge = make_knowledge(num_shops, menus_per_shop, seed=7)
+    engine = RecommendationEngine(knowledge)
+    knowledge.rebuild_indexes()
+
+    print(f"\n음식 종류 추천 1회 (가게 {num_shops}개, 메뉴 {len(knowledge.menus)}개):")
+    for name, fn in (('전체 스캔', lambda: reference_recommend_by_food_type(knowledge, '치킨', 12000, 3)),
+                     ('인덱스', lambda: engine.recommend_by_food_type('치킨', 12000, limit=3))):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        print(f"  {name}: {(time.perf_counter() - start) * 1000 / repeat:.3f}ms")
+
+    start = time.perf_counter()
+    knowledge.rebuild_indexes()
+    print(f"  인덱스 구축 (로드 시 1회): {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NaviyamKnowledge 인덱스 테스트")
+    parser.add_argument("--shops", type=int, default=2000)
+    parser.add_argument("--menus-per-shop", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    test_index_lookups()
+    test_recommendation_parity()
+    test_index_refresh()
+    benchmark(args.shops, args.menus_per_shop, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
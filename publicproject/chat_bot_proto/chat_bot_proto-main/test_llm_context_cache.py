@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+LLM 컨텍스트 문자열 사전 계산/캐시 테스트
+
+1. get_context_for_llm 결과가 요청마다 doc.get_content()로 조립하던 기존 방식과 같은지 확인
+   (Mock Vector Store, PrebuiltFAISS 문서 테이블 모두)
+2. 같은 문서 ID 조합은 Document 생성/내용 조립 없이 재사용, 지식 베이스 추가/세대 교체 시 무효화
+3. 같은 문서 조합 기준 컨텍스트 조립 시간 비교 (요청마다 조립 vs 사전 계산 + 캐시)
+"""
+
+import sys
+import time
+import types
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from rag.documents import StoredDocument
+from rag.document_table import ContentTable
+from rag.query_parser import QueryStructurizer
+from rag.retriever import NaviyamRetriever, load_knowledge_from_file
+from rag.vector_stores import MockVectorStore
+from test_incremental_index import HashEncoder, write_data
+
+logging.disable(logging.INFO)
+
+QUERIES = ["치킨 맛집 추천해줘", "2만원 이하 가게 찾아줘", "착한가게 알려줘", "인기 메뉴 있는 곳", "없는 가게"]
+
+
+def reference_context(retriever: NaviyamRetriever, user_query: str) -> str:
+    """사전 계산/캐시 도입 전 get_context_for_llm"""
+    documents = retriever.search(user_query)
+
+    if not documents:
+        return "관련된 가게나 메뉴 정보를 찾을 수 없습니다."
+
+    context_parts = ["다음은 관련된 가게 및 메뉴 정보입니다:"]
+
+    for i, doc in enumerate(documents, 1):
+        context_parts.append(f"\n{i}. {doc.get_content()}")
+
+    return "\n".join(context_parts)
+
+
+def test_content_table(knowledge_data):
+    retriever = NaviyamRetriever(MockVectorStore(), QueryStructurizer(None))
+    retriever.add_knowledge_base(knowledge_data)
+    documents = retriever.vector_store.documents
+    assert len(retriever.content_table) == len(documents)
+    assert all(retriever.content_table.get(doc_id) == doc.get_content() for doc_id, doc in documents.items())
+    assert retriever.content_table.get("shop_없음") is None
+
+    table = ContentTable()
+    table.add_documents([StoredDocument("a", "가", {}), StoredDocument("b", "나", {})])
+    table.add_documents([StoredDocument("a", "다시 쓴 내용", {})])
+    assert (len(table), table.get("a"), table.get("b")) == (2, "다시 쓴 내용", "나")
+
+    document = StoredDocument("shop_1", "내용", {"type": "shop"})
+    assert not hasattr(document, '__dict__') and document.get_content() == "내용"
+    print("[PASS] 색인 시 렌더링한 내용 테이블, __slots__ 문서")
+
+
+def test_mock_store_context(knowledge_data):
+    retriever = NaviyamRetriever(MockVectorStore(), QueryStructurizer(None))
+    retriever.add_knowledge_base(knowledge_data)
+
+    expected = {query: reference_context(retriever, query) for query in QUERIES}
+    for query in QUERIES:
+        assert retriever.get_context_for_llm(query) == expected[query]
+
+    # 두 번째부터는 캐시 적중: Document 조회/내용 조립 없이 같은 문자열
+    with mock.patch.object(retriever.vector_store, 'get_documents_by_ids',
+                           side_effect=AssertionError("캐시 적중 시 Document 조회 없음")):
+        for query in QUERIES:
+            assert retriever.get_context_for_llm(query) == expected[query]
+    stats = retriever.get_index_stats()["context_cache"]
+    assert stats["hits"] + stats["misses"] == len(QUERIES) * 2 and stats["hits"] >= len(QUERIES)
+
+    # 지식 베이스가 바뀌면 무효화
+    shop = dict(knowledge_data['shops']['1'], name="새 이름 도시락")
+    retriever.add_knowledge_base({'shops': {'1': shop}, 'menus': {}})
+    context = retriever.get_context_for_llm("착한가게 알려줘")
+    assert "새 이름 도시락" in context and context == reference_context(retriever, "착한가게 알려줘")
+    print("[PASS] Mock Vector Store 컨텍스트 == 기존 방식, 같은 문서 조합 재사용, 지식 베이스 변경 시 무효화")
+
+
+def test_prebuilt_context(tmp_path: Path, knowledge_data):
+    from build_faiss_index import build_faiss_index, update_faiss_index
+    from rag.vector_stores import create_vector_store
+
+    data_path = tmp_path / "data.json"
+    index_path = str(tmp_path / "prebuilt_faiss.faiss")
+    write_data(data_path, knowledge_data)
+    assert build_faiss_index(str(data_path), str(tmp_path), eval_queries=0)["success"]
+
+    store = create_vector_store("prebuilt_faiss", index_path=index_path)
+    store.embedding_model = HashEncoder()
+    retriever = NaviyamRetriever(store, QueryStructurizer(llm_client=None), retrieval_mode="hybrid")
+    retriever.sparse_index = retriever.build_sparse_index_from_store()
+    retriever.index_path = index_path
+
+    for query in QUERIES:
+        assert retriever.get_context_for_llm(query) == reference_context(retriever, query)
+        assert all(isinstance(doc, StoredDocument) for doc in retriever.search(query))
+
+    # 새 세대로 교체되면 이전 컨텍스트를 쓰지 않음
+    shop = dict(knowledge_data['shops']['10'], owner_message="새 세대 사장님 한마디")
+    write_data(data_path, {**knowledge_data, 'shops': {**knowledge_data['shops'], '10': shop}})
+    assert update_faiss_index(str(data_path), str(tmp_path))["success"]
+    assert retriever.reload_index() is True
+    context = retriever.get_context_for_llm("착한가게 알려줘")
+    assert "새 세대 사장님 한마디" in context and context == reference_context(retriever, "착한가게 알려줘")
+    print("[PASS] PrebuiltFAISS 컨텍스트 == 기존 방식, 세대 교체 시 무효화")
+
+
+def benchmark(knowledge_data, top_k: int, repeat: int):
+    """검색을 뺀 컨텍스트 조립 시간 (같은 문서 ID 조합 반복)"""
+    retriever = NaviyamRetriever(MockVectorStore(), QueryStructurizer(None), top_k=top_k)
+    retriever.add_knowledge_base(knowledge_data)
+    vector_store = retriever.vector_store
+    doc_ids = list(vector_store.documents)[:top_k]
+
+    def per_request():
+        documents = vector_store.get_documents_by_ids(doc_ids)
+        return "\n".join(["다음은 관련된 가게 및 메뉴 정보입니다:"] +
+                         [f"\n{i}. {doc.get_content()}" for i, doc in enumerate(documents, 1)])
+
+    with mock.patch.object(retriever, '_search_doc_ids', return_value=doc_ids):
+        assert retriever.get_context_for_llm("") == per_request()
+        print(f"\n컨텍스트 조립 (문서 {len(doc_ids)}개, 검색 제외):")
+        for name, fn in (('요청마다 조립', per_request), ('사전 계산 + 캐시', lambda: retriever.get_context_for_llm(""))):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            print(f"  {name}: {(time.perf_counter() - start) * 1000 / repeat:.4f}ms/요청")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 컨텍스트 캐시 테스트")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    knowledge_data = load_knowledge_from_file("rag/test_data.json")
+    test_content_table(knowledge_data)
+    test_mock_store_context(knowledge_data)
+
+    fake_module = types.ModuleType("sentence_transformers")
+    fake_module.SentenceTransformer = HashEncoder
+    with mock.patch.dict(sys.modules, {"sentence_transformers": fake_module}), \
+            tempfile.TemporaryDirectory() as tmp_dir:
+        test_prebuilt_context(Path(tmp_dir), knowledge_data)
+
+    benchmark(knowledge_data, args.top_k, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
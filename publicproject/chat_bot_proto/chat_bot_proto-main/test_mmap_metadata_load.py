@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+문서 테이블(mmap) vs JSON 메타데이터 로드 성능 테스트
+
+같은 합성 데이터를 두 형식으로 저장한 뒤, 새 프로세스에서
+PrebuiltFAISSVectorStore를 로드하여 초기화 시간과 RSS 증가량을 비교합니다.
+(새 프로세스를 사용해야 워커 콜드 스타트와 같은 조건이 됩니다)
+"""
+
+import sys
+import json
+import tempfile
+import argparse
+import subprocess
+from pathlib import Path
+
+from test_batch_search_performance import build_synthetic_index
+
+# 자식 프로세스에서 실행할 측정 코드
+LOAD_SCRIPT = """
+import json, sys, time, resource
+import faiss
+from rag.vector_stores import PrebuiltFAISSVectorStore
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+index_path = sys.argv[1]
+rss_before = rss_kb()
+start = time.perf_counter()
+store = PrebuiltFAISSVectorStore(index_path)
+load_time = time.perf_counter() - start
+rss_after = rss_kb()
+
+# 문서 조회가 정상 동작하는지 확인
+docs = store.get_documents_by_ids(['menu_0', 'menu_1'])
+print(json.dumps({'load_time': load_time, 'rss_delta_kb': rss_after - rss_before}))
+"""
+
+
+def measure(index_path: Path) -> dict:
+    """새 프로세스에서 로드 시간과 RSS 증가량 측정"""
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD_SCRIPT, str(index_path)],
+        capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문서 테이블 로드 성능 테스트")
+    parser.add_argument("--docs", type=int, default=100000, help="문서 수")
+    parser.add_argument("--dim", type=int, default=64, help="임베딩 차원 (인덱스 크기 영향 최소화)")
+    args = parser.parse_args()
+
+    print("문서 테이블(mmap) vs JSON 메타데이터 로드 테스트")
+    print("=" * 50)
+    print(f"문서 수: {args.docs}")
+
+    with tempfile.TemporaryDirectory() as json_dir, tempfile.TemporaryDirectory() as table_dir:
+        json_index = build_synthetic_index(Path(json_dir), args.docs, args.dim, table=False)
+        table_index = build_synthetic_index(Path(table_dir), args.docs, args.dim, table=True)
+
+        json_result = measure(json_index)
+        table_result = measure(table_index)
+
+    print(f"\nJSON 메타데이터:")
+    print(f"  로드 시간: {json_result['load_time'] * 1000:.1f}ms")
+    print(f"  RSS 증가: {json_result['rss_delta_kb'] / 1024:.1f}MB")
+    print(f"\n문서 테이블 (mmap):")
+    print(f"  로드 시간: {table_result['load_time'] * 1000:.1f}ms")
+    print(f"  RSS 증가: {table_result['rss_delta_kb'] / 1024:.1f}MB (공유 가능한 파일 페이지 포함)")
+    print(f"\n로드 속도 배수: {json_result['load_time'] / max(table_result['load_time'], 1e-9):.1f}배")
+
+
+if __name__ == "__main__":
+    main()
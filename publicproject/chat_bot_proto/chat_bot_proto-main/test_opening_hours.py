@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+주간 영업시간 타임라인 테스트
+
+1. 기존 매장별 파싱 로직(ContextualFunnel 영업 중/1시간 이내 시작, 응답 생성기 _is_shop_open)과
+   하루 모든 분에 대해 결과가 같은지 확인
+2. 매장 10만 개에서 전체 매장 영업 상태 계산 시간 비교
+"""
+
+import time
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+from recommendation.opening_hours import (
+    OpeningHoursTimeline, make_schedule, parse_clock, is_open_at,
+    STATUS_UNKNOWN, STATUS_OPEN, STATUS_OPENS_SOON, STATUS_CLOSED
+)
+from recommendation.restaurant_catalog import RestaurantCatalog
+from recommendation.contextual_funnel import ContextualFunnel
+
+logging.disable(logging.INFO)
+
+MONDAY = datetime(2026, 10, 12)
+
+
+def reference_contextual_status(open_str, close_str, current: datetime) -> int:
+    """기존 ContextualFunnel._get_operating_score의 분기 (브레이크타임 미반영)"""
+    if not (open_str and close_str):
+        return STATUS_UNKNOWN
+    try:
+        open_time = datetime.strptime(open_str, '%H:%M').time()
+        close_time = datetime.strptime(close_str, '%H:%M').time()
+    except ValueError:
+        return STATUS_UNKNOWN
+    now = current.time()
+    if close_time < open_time:
+        is_open = now >= open_time or now <= close_time
+    else:
+        is_open = open_time <= now <= close_time
+    if is_open:
+        return STATUS_OPEN
+    diff = (open_time.hour * 60 + open_time.minute - now.hour * 60 - now.minute) % (24 * 60)
+    return STATUS_OPENS_SOON if 0 < diff <= 60 else STATUS_CLOSED
+
+
+def reference_is_shop_open(open_hour, close_hour, break_start, break_end, current) -> bool:
+    """기존 NaviyamResponseGenerator._is_shop_open"""
+    from datetime import time as dtime
+    try:
+        if not open_hour or not close_hour:
+            return True
+        to_time = lambda v: dtime.fromisoformat(v + ":00") if ":" not in v else dtime.fromisoformat(v)
+        open_time, close_time = to_time(open_hour), to_time(close_hour)
+        if break_start and break_end:
+            if to_time(break_start) <= current <= to_time(break_end):
+                return False
+        if close_time < open_time:
+            return current >= open_time or current <= close_time
+        return open_time <= current <= close_time
+    except Exception:
+        return True
+
+
+def random_hours(rng: random.Random):
+    def clock():
+        return f"{rng.randrange(24):02d}:{rng.choice([0, 15, 30, 45, 59]):02d}"
+    open_hour = rng.choice([clock(), clock(), "11:00", "", "잘못된값"])
+    close_hour = rng.choice([clock(), clock(), "21:00", "02:00", ""])
+    if rng.random() < 0.4:
+        start = rng.randrange(11 * 60, 16 * 60)
+        return open_hour, close_hour, f"{start // 60:02d}:{start % 60:02d}", f"{(start + 90) // 60:02d}:{(start + 90) % 60:02d}"
+    return open_hour, close_hour, None, None
+
+
+def test_contextual_parity(rng: random.Random):
+    hours = [random_hours(rng)[:2] for _ in range(300)]
+    restaurants = [{"shopId": f"s{i}", "hours": {"open": o, "close": c}} for i, (o, c) in enumerate(hours)]
+    timeline = RestaurantCatalog(restaurants).opening_hours
+
+    for minute in range(24 * 60):
+        current = MONDAY + timedelta(days=minute % 7, minutes=minute)
+        expected = [reference_contextual_status(o, c, current) for o, c in hours]
+        assert timeline.status_at(current).tolist() == expected, current
+    print(f"[PASS] ContextualFunnel 영업 상태 일치: 매장 {len(hours)}개 × 1,440분")
+
+
+def test_break_time_parity(rng: random.Random):
+    hours = [random_hours(rng) for _ in range(300)]
+    timeline = OpeningHoursTimeline.from_hours(hours)
+
+    for minute in range(24 * 60):
+        current = MONDAY + timedelta(minutes=minute)
+        status = timeline.status_at(current)
+        actual = ((status == STATUS_OPEN) | (status == STATUS_UNKNOWN)).tolist()
+        expected = [reference_is_shop_open(*h, current.time()) for h in hours]
+        assert actual == expected, current
+        for h, is_open in zip(hours[:20], expected):
+            schedule = make_schedule(*(parse_clock(v) for v in h))
+            single = is_open_at(schedule, minute)
+            assert (True if single is None else single) == is_open
+    print(f"[PASS] 브레이크타임 포함 영업 여부 일치 (TIME_INQUIRY): 매장 {len(hours)}개 × 1,440분")
+
+
+def test_break_reopen():
+    timeline = OpeningHoursTimeline.from_hours([("11:00", "21:00", "15:00", "16:30")])
+    assert timeline.status_at(MONDAY.replace(hour=15, minute=45))[0] == STATUS_OPENS_SOON
+    assert timeline.status_at(MONDAY.replace(hour=16, minute=31))[0] == STATUS_OPEN
+    assert timeline.status_at(MONDAY.replace(hour=23))[0] == STATUS_CLOSED
+
+    funnel = ContextualFunnel(catalog=RestaurantCatalog([
+        {"shopId": "a", "shopName": "브레이크", "category": "한식",
+         "hours": {"open": "11:00", "close": "21:00", "break": "15:00-16:30"}}
+    ]))
+    candidate = funnel.get_candidates(current_time=MONDAY.replace(hour=15, minute=45))[0]
+    assert candidate['context_score'] == 15.0 and candidate['reason'] == '곧 영업 시작'
+    print("[PASS] 브레이크타임 중에는 영업 외, 재개 1시간 전에는 곧 영업 시작")
+
+
+def benchmark(num_shops: int, rng: random.Random):
+    hours = [random_hours(rng)[:2] for _ in range(num_shops)]
+    restaurants = [{"shopId": f"s{i}", "hours": {"open": o, "close": c}} for i, (o, c) in enumerate(hours)]
+
+    start = time.perf_counter()
+    timeline = RestaurantCatalog(restaurants).opening_hours
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = [MONDAY + timedelta(minutes=rng.randrange(7 * 24 * 60)) for _ in range(20)]
+    start = time.perf_counter()
+    for current in queries:
+        timeline.status_at(current)
+    timeline_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    start = time.perf_counter()
+    for current in queries[:2]:
+        [reference_contextual_status(o, c, current) for o, c in hours]
+    reference_ms = (time.perf_counter() - start) * 1000 / 2
+
+    stats = timeline.get_stats()
+    print(f"\n매장 {num_shops}개 (스케줄 {stats['unique_schedules']}종, {stats['memory_bytes'] / 1024 / 1024:.1f}MB, "
+          f"카탈로그 포함 구축 {build_ms:.0f}ms)")
+    print(f"  매장별 strptime: {reference_ms:8.1f}ms/조회")
+    print(f"  타임라인      : {timeline_ms:8.2f}ms/조회 ({reference_ms / timeline_ms:.0f}배)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="영업시간 타임라인 테스트")
+    parser.add_argument("--shops", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    test_contextual_parity(rng)
+    test_break_time_parity(rng)
+    test_break_reopen()
+    benchmark(args.shops, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+CandidateGenerator Funnel 동시 실행 테스트
+
+1. 병렬 실행 결과가 순차 실행과 같은지 확인
+2. Funnel마다 지연을 주입해 Layer 1 지연이 합이 아닌 최댓값이 되는지 측정
+3. 시간 예산을 넘긴 Funnel을 제외한 부분 결과를 반환하고 get_funnel_stats에 기록되는지 확인
+4. 풀이 찬 상태에서 시간 예산은 실행 시작부터 계산하고, 풀 대기 시간은 따로 기록/제한되는지 확인
+"""
+
+import time
+import logging
+import threading
+
+from recommendation.candidate_generator import CandidateGenerator, CandidateGenerationConfig
+
+logging.disable(logging.INFO)
+
+REQUEST = dict(user_location="관악구", time_of_day="lunch", query="비빔밥",
+               user_type="healthy_eater", filters={})
+
+
+def inject_delay(generator: CandidateGenerator, funnel_attr: str, delay: float):
+    """Funnel get_candidates 호출 앞에 지연 추가"""
+    funnel = getattr(generator, funnel_attr)
+    original = funnel.get_candidates
+
+    def delayed(*args, **kwargs):
+        time.sleep(delay)
+        return original(*args, **kwargs)
+
+    funnel.get_candidates = delayed
+
+
+def make_generator(parallel: bool, timeouts=None, concurrent_requests=None, queue_timeout=None) -> CandidateGenerator:
+    config = CandidateGenerationConfig()
+    config.PARALLEL_FUNNELS = parallel
+    if timeouts is not None:
+        config.FUNNEL_TIMEOUTS = timeouts
+    if concurrent_requests is not None:
+        config.FUNNEL_CONCURRENT_REQUESTS = concurrent_requests
+    if queue_timeout is not None:
+        config.FUNNEL_QUEUE_TIMEOUT = queue_timeout
+    return CandidateGenerator(config)
+
+
+def run_concurrently(generator: CandidateGenerator, num_requests: int, stagger: float = 0.03):
+    """요청 num_requests개를 stagger초 간격으로 시작해 동시에 실행하고 요청별 후보 목록 반환"""
+    results = [None] * num_requests
+
+    def worker(i):
+        results[i] = generator.generate_candidates(**REQUEST)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_requests)]
+    for thread in threads:
+        thread.start()
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_parity():
+    sequential = make_generator(parallel=False)
+    parallel = make_generator(parallel=True)
+    for query in ["비빔밥", "치킨", None]:
+        request = dict(REQUEST, query=query)
+        assert sequential.generate_candidates(**request) == parallel.generate_candidates(**request)
+    print("[PASS] 병렬/순차 실행 결과 일치")
+
+
+def test_latency(delays):
+    timings = {}
+    for parallel in (False, True):
+        generator = make_generator(parallel=parallel, timeouts={name: 1.0 for name in delays})
+        for name, delay in delays.items():
+            inject_delay(generator, f"{name}_funnel", delay)
+        generator.generate_candidates(**REQUEST)
+        timings[parallel] = generator.get_funnel_stats()['execution']['last_total_time_ms']
+
+    expected_max = max(delays.values()) * 1000
+    assert timings[True] < expected_max * 1.5 < timings[False]
+    print(f"[PASS] Layer 1 지연: 순차 {timings[False]:.1f}ms → 병렬 {timings[True]:.1f}ms "
+          f"(Funnel 최대 {expected_max:.0f}ms, 합 {sum(delays.values()) * 1000:.0f}ms)")
+
+
+def test_timeout():
+    baseline = make_generator(parallel=True).generate_candidates(**REQUEST)
+
+    generator = make_generator(parallel=True, timeouts={'collaborative': 0.5, 'content': 0.5,
+                                                        'contextual': 0.05, 'popularity': 0.5})
+    inject_delay(generator, "contextual_funnel", 0.3)
+
+    start = time.perf_counter()
+    candidates = generator.generate_candidates(**REQUEST)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    stats = generator.get_funnel_stats()['execution']
+    assert stats['last_timed_out'] == ['contextual'] and stats['timeouts']['contextual'] == 1
+    assert elapsed_ms < 200
+    assert candidates and all('contextual' not in c['funnel_source'] for c in candidates)
+    assert len(candidates) <= len(baseline)
+    print(f"[PASS] 시간 초과 Funnel 제외: {stats['last_timed_out']}, "
+          f"{len(candidates)}개 부분 결과 ({elapsed_ms:.1f}ms)")
+
+
+def test_queue_wait():
+    funnels = ('collaborative', 'content', 'contextual', 'popularity')
+
+    # 풀 4개 스레드에 요청 2개: 두 번째 요청은 첫 요청이 끝날 때까지(~120ms) 대기 후 실행
+    generator = make_generator(parallel=True, timeouts={name: 0.25 for name in funnels},
+                               concurrent_requests=1, queue_timeout=1.0)
+    for name in funnels:
+        inject_delay(generator, f"{name}_funnel", 0.15)
+    results = run_concurrently(generator, 2)
+
+    stats = generator.get_funnel_stats()
+    execution = stats['execution']
+    assert stats['config']['funnel_workers'] == 4
+    assert sum(execution['timeouts'].values()) == 0 and all(results)
+    queue_ms = execution['last_funnel_queue_ms']
+    assert min(queue_ms.values()) > 80
+    assert all(100 < ms < 250 for ms in execution['last_funnel_times_ms'].values())
+    print(f"[PASS] 시간 예산은 실행 시작부터: 대기 {max(queue_ms.values()):.0f}ms + "
+          f"실행 {max(execution['last_funnel_times_ms'].values()):.0f}ms, 시간 초과 없음")
+
+    # 대기 제한보다 오래 기다린 Funnel은 실행하지 않고 제외
+    generator = make_generator(parallel=True, timeouts={name: 0.5 for name in funnels},
+                               concurrent_requests=1, queue_timeout=0.05)
+    for name in funnels:
+        inject_delay(generator, f"{name}_funnel", 0.15)
+    results = run_concurrently(generator, 2)
+
+    execution = generator.get_funnel_stats()['execution']
+    assert sum(execution['queue_timeouts'].values()) == len(funnels)
+    assert execution['queue_timeouts'] == execution['timeouts']
+    assert results[0] and not results[1]
+    print(f"[PASS] 대기 시간 초과 Funnel 제외: {execution['queue_timeouts']}")
+
+
+def main():
+    test_parity()
+    test_latency({'collaborative': 0.04, 'content': 0.08, 'contextual': 0.06, 'popularity': 0.02})
+    test_timeout()
+    test_queue_wait()
+
+
+if __name__ == "__main__":
+    main()
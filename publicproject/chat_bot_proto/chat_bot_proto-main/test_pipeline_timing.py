@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+process_user_input 단계별 시간 측정 테스트
+
+1. LatencyHistogram 백분위수(p50/p95/p99), 최근 window개 유지, RequestTrace 단계 기록/실패 단계 표시
+2. 단계별로 지연을 넣은 챗봇에서 느린 단계(FAISS/LLM/프로필 디스크 I/O)가 구분되는지,
+   get_performance_metrics의 stage_latency_ms, 디버그 모드의 session_data["stage_trace"] 확인
+3. 단계 측정 오버헤드
+"""
+
+import time
+import logging
+import argparse
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from data.data_structure import (
+    UserInput, ChatbotResponse, ExtractedInfo, ExtractedEntity, IntentType, ConfidenceLevel, UserProfile
+)
+from inference.chatbot import NaviyamChatbot, ConversationMemory, PerformanceMonitor
+from inference.pipeline_timing import LatencyHistogram, RequestTrace, PIPELINE_STAGES
+
+logging.disable(logging.ERROR)
+
+
+class FakeUserManager:
+    """프로필 조회에 profile_delay초가 걸리는 사용자 관리자"""
+
+    def __init__(self, profile_delay: float):
+        self.profile_delay = profile_delay
+
+    def get_or_create_user_profile(self, user_id):
+        time.sleep(self.profile_delay)
+        return UserProfile(user_id=user_id)
+
+    def update_user_interaction(self, user_id, extracted_info, emotion):
+        pass
+
+    def personalize_response(self, response, user_profile):
+        return response
+
+    def determine_user_strategy(self, user_id):
+        return "normal_mode"
+
+
+def make_chatbot(debug: bool, delays: dict, fail_stage: str = None) -> NaviyamChatbot:
+    """모델/데이터 로드 없이 단계별 지연만 넣은 챗봇"""
+    chatbot = NaviyamChatbot.__new__(NaviyamChatbot)
+    chatbot.config = SimpleNamespace(debug=debug, inference=SimpleNamespace(save_conversations=True))
+    chatbot.conversation_memory = ConversationMemory(10)
+    chatbot.performance_monitor = PerformanceMonitor()
+    chatbot.user_manager = FakeUserManager(delays.get("profile", 0.0))
+    chatbot.data_collector = None
+    chatbot.model = None
+    chatbot.knowledge = None
+    chatbot.query_cache = None
+    chatbot.embedding_batcher = None
+    chatbot.retriever = None
+    chatbot.write_behind = None
+    chatbot.llm_worker = None
+    chatbot.is_initialized = True
+    chatbot.last_cleanup_time = datetime.now()
+
+    def delayed(stage, result):
+        def run(*args, **kwargs):
+            time.sleep(delays.get(stage, 0.0))
+            if stage == fail_stage:
+                raise RuntimeError(f"{stage} 실패")
+            return result(*args) if callable(result) else result
+        return run
+
+    chatbot.preprocessor = SimpleNamespace(preprocess=delayed(
+        "preprocess", SimpleNamespace(emotion=SimpleNamespace(value="neutral"), extracted_keywords=["치킨"])))
+    chatbot._smart_nlu_processing = delayed("nlu", lambda user_input, preprocessed: ExtractedInfo(
+        intent=IntentType.FOOD_REQUEST, entities=ExtractedEntity(food_type="치킨"), confidence=0.9,
+        confidence_level=ConfidenceLevel.HIGH, raw_text=user_input.text))
+    chatbot._perform_rag_search = delayed("rag", "컨텍스트")
+    chatbot._smart_response_generation = delayed("response", lambda *args: ChatbotResponse(
+        text="치킨 추천해드릴게요!", recommendations=[{"shop_id": 1}], follow_up_questions=[]))
+    return chatbot
+
+
+def test_histogram_and_trace():
+    histogram = LatencyHistogram(window=100)
+    samples = np.random.default_rng(0).exponential(10.0, 500)
+    for sample in samples:
+        histogram.record(float(sample))
+    summary = histogram.summary()
+    recent = samples[-100:]
+    assert summary["count"] == 500 and abs(summary["avg_ms"] - samples.mean()) < 1e-3
+    for p in (50, 95, 99):
+        assert abs(summary[f"p{p}_ms"] - np.percentile(recent, p)) < 1e-3
+    assert summary["max_ms"] == round(float(recent.max()), 3)
+    assert LatencyHistogram().summary() == {"count": 0, "avg_ms": 0.0}
+
+    trace = RequestTrace()
+    with trace.stage("rag"):
+        time.sleep(0.01)
+    try:
+        with trace.stage("response"):
+            raise ValueError("LLM 실패")
+    except ValueError:
+        pass
+    result = trace.to_dict()
+    assert list(result["stages_ms"]) == ["rag", "response"] and result["stages_ms"]["rag"] >= 10
+    assert result["failed_stage"] == "response" and result["slowest_stage"] == "rag"
+    assert result["total_ms"] >= sum(result["stages_ms"].values())
+    print("[PASS] 최근 window 기준 p50/p95/p99, 단계 기록 및 실패 단계 표시")
+
+
+def test_stage_attribution(requests: int):
+    delays = {"rag": 0.03, "response": 0.015, "profile": 0.005}
+    chatbot = make_chatbot(debug=True, delays=delays)
+    for i in range(requests):
+        output = chatbot.process_user_input(UserInput(text="치킨 먹고 싶어", user_id=f"user_{i % 3}"))
+        assert output.response.text == "치킨 추천해드릴게요!"
+
+    trace = output.session_data["stage_trace"]
+    assert list(trace["stages_ms"]) == list(PIPELINE_STAGES)
+    assert trace["slowest_stage"] == "rag" and trace["stages_ms"]["rag"] >= 30
+    assert output.session_data["has_recommendations"] is True
+
+    metrics = chatbot.get_performance_metrics()
+    stages = metrics["stage_latency_ms"]
+    assert list(stages) == list(PIPELINE_STAGES) + ["total"]
+    assert all(stats["count"] == requests for stats in stages.values())
+    for stage, delay in delays.items():
+        assert delay * 1000 <= stages[stage]["p50_ms"] < delay * 1000 + 15, (stage, stages[stage])
+    assert stages["nlu"]["p99_ms"] < 5 and stages["total"]["p50_ms"] >= sum(delays.values()) * 1000
+    assert metrics["total_conversations"] == requests
+
+    # 디버그 모드가 아니면 session_data에 trace 없음
+    quiet = make_chatbot(debug=False, delays={})
+    assert "stage_trace" not in quiet.process_user_input(UserInput(text="안녕", user_id="u")).session_data
+
+    print("단계별 p50 (ms): " + ", ".join(f"{name} {stats['p50_ms']:.1f}" for name, stats in stages.items()))
+    print("[PASS] 느린 단계 구분 (rag > response > profile), stage_latency_ms, 디버그 모드 stage_trace")
+
+
+def test_failed_stage():
+    chatbot = make_chatbot(debug=True, delays={}, fail_stage="rag")
+    output = chatbot.process_user_input(UserInput(text="치킨", user_id="u"))
+    assert output.session_data["error"] is True
+    assert output.session_data["stage_trace"]["failed_stage"] == "rag"
+    assert list(output.session_data["stage_trace"]["stages_ms"]) == ["preprocess", "nlu", "rag"]
+
+    stages = chatbot.get_performance_metrics()["stage_latency_ms"]
+    assert "response" not in stages and stages["rag"]["count"] == 1
+    assert chatbot.get_performance_metrics()["error_count"] == 1
+    print("[PASS] 실패 요청도 실패 단계까지 기록, 에러 응답 stage_trace")
+
+
+def benchmark(repeat: int):
+    trace = RequestTrace()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with trace.stage("nlu"):
+            pass
+    overhead_us = (time.perf_counter() - start) * 1e6 / repeat
+
+    chatbot = make_chatbot(debug=False, delays={})
+    start = time.perf_counter()
+    for _ in range(repeat // 10):
+        chatbot.process_user_input(UserInput(text="치킨", user_id="u"))
+    request_us = (time.perf_counter() - start) * 1e6 / (repeat // 10)
+    print(f"\n단계 측정 오버헤드: {overhead_us:.2f}µs/단계 ({len(PIPELINE_STAGES)}단계), "
+          f"지연 없는 요청 전체 {request_us:.0f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파이프라인 단계별 시간 측정 테스트")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10000)
+    args = parser.parse_args()
+
+    test_histogram_and_trace()
+    test_stage_attribution(args.requests)
+    test_failed_stage()
+    benchmark(args.repeat)
+
+
+if __name__ == "__main__":
+    main()
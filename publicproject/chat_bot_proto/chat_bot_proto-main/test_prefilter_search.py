@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+FAISS pre-filtering 검색 테스트
+
+컬럼형 메타데이터 + IDSelector 기반 필터 검색이
+1) 선택적인 필터에서도 top_k를 모두 채우는지
+2) 전수 탐색 기준 정답과 일치하는지
+3) 10만 문서 규모에서 쿼리당 지연시간이 얼마인지 확인합니다.
+"""
+
+import time
+import tempfile
+import argparse
+import numpy as np
+from pathlib import Path
+
+from rag.vector_stores import PrebuiltFAISSVectorStore
+from test_batch_search_performance import build_synthetic_index
+
+
+def brute_force_filtered(store, query, top_k, filters):
+    """필터를 먼저 적용한 뒤 전수 L2 탐색한 정답"""
+    mask = store.columns.filter_mask(filters)
+    candidate_idx = np.flatnonzero(mask)
+    vectors = store.index.reconstruct_batch(candidate_idx)
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    order = np.argsort(distances, kind='stable')[:top_k]
+    return store.document_table.doc_ids(candidate_idx[order])
+
+
+def run_test(num_docs: int, dim: int, top_k: int, num_queries: int):
+    test_filters = [
+        {"category": "한식"},
+        {"max_price": 4000},
+        {"category": "치킨", "max_price": 5000, "is_popular": True},
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("합성 인덱스 빌드 중...")
+        index_path = build_synthetic_index(Path(tmp_dir), num_docs, dim)
+        store = PrebuiltFAISSVectorStore(str(index_path))
+
+        rng = np.random.default_rng(11)
+        queries = rng.standard_normal((num_queries, dim)).astype('float32')
+
+        all_passed = True
+        for filters in test_filters:
+            matching = int(store.columns.filter_mask(filters).sum())
+            expected_count = min(top_k, matching)
+
+            # 정확도 확인 (첫 쿼리 기준)
+            results = store.search(queries[0], top_k=top_k, filters=filters)
+            expected = brute_force_filtered(store, queries[0], top_k, filters)
+            exact = results == expected
+            full = len(results) == expected_count
+
+            # 지연시간 측정 (필터 파라미터 캐시가 데워진 상태)
+            start = time.perf_counter()
+            for q in queries:
+                store.search(q, top_k=top_k, filters=filters)
+            per_query_ms = (time.perf_counter() - start) / num_queries * 1000
+
+            status = "PASS" if exact and full else "FAIL"
+            all_passed &= status == "PASS"
+            print(f"\n[{status}] 필터: {filters}")
+            print(f"  일치 문서 수: {matching} ({matching / num_docs * 100:.2f}%)")
+            print(f"  반환 문서 수: {len(results)} / 기대 {expected_count}")
+            print(f"  전수 탐색 결과와 일치: {exact}")
+            print(f"  쿼리당 지연시간: {per_query_ms:.3f}ms")
+
+        print(f"\n전체 결과: {'PASS' if all_passed else 'FAIL'}")
+        return all_passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS pre-filtering 검색 테스트")
+    parser.add_argument("--docs", type=int, default=100000, help="문서 수")
+    parser.add_argument("--dim", type=int, default=384, help="임베딩 차원")
+    parser.add_argument("--top_k", type=int, default=5, help="반환 문서 수")
+    parser.add_argument("--queries", type=int, default=50, help="측정 쿼리 수")
+    args = parser.parse_args()
+
+    print("FAISS pre-filtering 검색 테스트")
+    print("=" * 50)
+    run_test(args.docs, args.dim, args.top_k, args.queries)
+
+
+if __name__ == "__main__":
+    main()
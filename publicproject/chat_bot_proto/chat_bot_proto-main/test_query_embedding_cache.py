@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+쿼리 임베딩 캐시 테스트
+
+LRU 제거, TTL 만료, 적중/미스 통계, 디스크 저장/복원, 임베딩 모델 불일치 처리와
+PrebuiltFAISSVectorStore.encode_query 연동을 확인합니다.
+"""
+
+import time
+import tempfile
+import numpy as np
+from pathlib import Path
+
+from rag.embedding_cache import QueryEmbeddingCache, normalize_query_text
+
+
+class CountingEncoder:
+    """encode 호출 횟수를 세는 임베딩 모델 대역"""
+
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return np.stack([np.full(self.dim, len(text), dtype=np.float32) for text in texts])
+
+
+def test_normalization():
+    """공백/대소문자 차이는 같은 키로 취급"""
+    assert normalize_query_text("  치킨   먹고 싶어 ") == "치킨 먹고 싶어"
+    assert normalize_query_text("Pizza") == normalize_query_text("pizza")
+    print("[PASS] 쿼리 정규화")
+
+
+def test_lru_and_stats():
+    """최대 크기 초과 시 가장 오래 사용되지 않은 항목 제거"""
+    cache = QueryEmbeddingCache(max_size=2)
+    cache.put("치킨", [1.0, 2.0])
+    cache.put("떡볶이", [3.0, 4.0])
+    assert cache.get("치킨") is not None  # 치킨을 최근 사용으로 갱신
+    cache.put("피자", [5.0, 6.0])  # 떡볶이 제거
+
+    assert cache.get("떡볶이") is None
+    assert cache.get("피자").dtype == np.float32
+    stats = cache.get_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["evictions"] == 1
+    print(f"[PASS] LRU 제거 및 통계: {stats}")
+
+
+def test_ttl():
+    """TTL이 지난 항목은 미스로 처리"""
+    cache = QueryEmbeddingCache(max_size=10, ttl_seconds=0.05)
+    cache.put("치킨", [1.0])
+    assert cache.get("치킨") is not None
+    time.sleep(0.1)
+    assert cache.get("치킨") is None
+    assert cache.get_stats()["expirations"] == 1
+    print("[PASS] TTL 만료")
+
+
+def test_persistence():
+    """저장 후 새 캐시에서 복원"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir) / "query_embeddings.npz")
+        cache = QueryEmbeddingCache(max_size=10, persist_path=path, model_name="model-a", embedding_dim=3)
+        cache.put("치킨 먹고 싶어", [1.0, 2.0, 3.0])
+        cache.save()
+
+        restored = QueryEmbeddingCache(max_size=10, persist_path=path)
+        vector = restored.get("치킨 먹고 싶어")
+        assert vector is not None and vector.tolist() == [1.0, 2.0, 3.0]
+        assert restored.model_identity == ("model-a", 3)
+    print("[PASS] 디스크 저장/복원")
+
+
+def test_model_mismatch():
+    """다른 임베딩 모델(같은 차원)로 만든 항목은 사용하지 않음"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir) / "query_embeddings.npz")
+        cache = QueryEmbeddingCache(max_size=10, persist_path=path, model_name="model-a", embedding_dim=3)
+        cache.put("치킨", [1.0, 2.0, 3.0])
+        cache.save()
+
+        # 파일 로드 시 모델 비교
+        other = QueryEmbeddingCache(max_size=10, persist_path=path, model_name="model-b", embedding_dim=3)
+        assert other.get("치킨") is None
+
+        # 모델 정보 없이 복원한 뒤 Vector Store가 다른 모델로 연결
+        restored = QueryEmbeddingCache(max_size=10, persist_path=path)
+        restored.bind_model("model-b", 3)
+        assert restored.get("치킨") is None and restored.model_identity == ("model-b", 3)
+
+        # 같은 모델로 연결하면 유지
+        same = QueryEmbeddingCache(max_size=10, persist_path=path)
+        same.bind_model("model-a", 3)
+        assert same.get("치킨") is not None
+    print("[PASS] 임베딩 모델 불일치 시 캐시 미사용")
+
+
+def test_vector_store_integration():
+    """encode_query가 캐시 적중 시 모델을 호출하지 않음"""
+    from rag.vector_stores import FAISSVectorStore
+
+    encoder = CountingEncoder()
+    store = FAISSVectorStore(embedding_model=encoder, embedding_dim=encoder.dim,
+                             query_cache=QueryEmbeddingCache(max_size=10))
+    first = store.encode_query("떡볶이 추천해줘")
+    second = store.encode_query("떡볶이  추천해줘")
+    assert first == second and encoder.calls == 1
+    assert store.query_cache.model_identity == ("CountingEncoder", encoder.dim)
+    print(f"[PASS] Vector Store 연동 (encode 호출 {encoder.calls}회)")
+
+
+if __name__ == "__main__":
+    print("쿼리 임베딩 캐시 테스트")
+    print("=" * 40)
+    test_normalization()
+    test_lru_and_stats()
+    test_ttl()
+    test_persistence()
+    test_model_mismatch()
+    try:
+        test_vector_store_integration()
+    except ImportError as e:
+        print(f"[SKIP] Vector Store 연동: {e}")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+추천 결과 캐시 테스트
+
+1. 같은 사용자/프로필/쿼리/상황 구간 요청은 Layer 1 + 2를 다시 계산하지 않고 같은 결과 반환
+2. 쿼리 정규화, 필터/상황 구간/top_k 변경 시 캐시 미스, TTL 만료와 LRU 제거
+3. NaviyamUserManager 프로필 변경 시 해당 사용자 캐시 무효화 (선호가 그대로인 대화 턴은 유지),
+   get_performance_stats 적중률
+4. 딥러닝 랭킹 사용 시 날씨/동행자도 상황 구간에 포함
+"""
+
+import time
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+
+from recommendation.recommendation_engine import RecommendationEngine
+from recommendation.result_cache import RecommendationResultCache
+from inference.user_manager import NaviyamUserManager
+from data.data_structure import ExtractedInfo, ExtractedEntity, ConfidenceLevel, IntentType
+
+logging.disable(logging.INFO)
+
+USER_PROFILE = {'id': 863, 'birthday': '2014-03-20', 'location': {'state': '서울특별시', 'city': '서울특별시'},
+                'shop_favorite_count': 3, 'total_orders': 5, 'review_count': 1}
+CHATBOT_OUTPUT = {'original_query': '저녁 뭐 먹지', 'semantic_query': '맛있는 저녁',
+                  'filters': {}, 'budget_filter': 15000}
+CONTEXT = {'user_location': '관악구', 'time_of_day': 'dinner', 'current_time': datetime(2026, 3, 2, 18, 5)}
+
+
+def recommend(engine, user_id='user_863', profile=None, output=None, context=None, top_k=5):
+    return engine.get_recommendations(user_id, profile or USER_PROFILE, output or CHATBOT_OUTPUT,
+                                      context or CONTEXT, top_k=top_k)
+
+
+def computations(engine) -> int:
+    """Layer 1 + 2를 실제로 계산한 횟수"""
+    return engine.stats['vector_search_usage']
+
+
+def test_cache_hit(engine):
+    first = recommend(engine)
+    second = recommend(engine, output={**CHATBOT_OUTPUT, 'original_query': '저녁 추천해줘!!',
+                                       'semantic_query': '  맛있는   저녁 '})
+    assert computations(engine) == 1
+    assert not first['metadata']['cache_hit'] and second['metadata']['cache_hit']
+    assert len(first['recommendations']) == 5 and second['original_query'] == '저녁 추천해줘!!'
+    assert [r['shop_id'] for r in second['recommendations']] == [r['shop_id'] for r in first['recommendations']]
+
+    # 반환 결과를 수정해도 캐시 항목은 그대로
+    second['recommendations'].clear()
+    assert recommend(engine)['recommendations'] == first['recommendations']
+    print("[PASS] 같은 요청(정규화된 쿼리) 재사용, 원본 쿼리는 이번 요청 값, 반환 결과 수정과 분리")
+
+
+def test_cache_misses(engine):
+    before = computations(engine)
+    recommend(engine, output={**CHATBOT_OUTPUT, 'filters': {'category': '한식'}})
+    recommend(engine, output={**CHATBOT_OUTPUT, 'budget_filter': 8000})
+    recommend(engine, context={**CONTEXT, 'current_time': datetime(2026, 3, 2, 18, 20)})
+    recommend(engine, context={**CONTEXT, 'user_location': '마포구'})
+    recommend(engine, top_k=3)
+    recommend(engine, user_id='user_864')
+    recommend(engine, profile={**USER_PROFILE, 'total_orders': 6})
+    assert computations(engine) == before + 7
+
+    # 같은 15분 구간은 적중
+    recommend(engine, context={**CONTEXT, 'current_time': datetime(2026, 3, 2, 18, 14)})
+    assert computations(engine) == before + 7
+    print("[PASS] 필터/예산/상황 구간/위치/top_k/사용자/프로필이 다르면 다시 계산")
+
+
+def test_ttl_and_lru():
+    cache = RecommendationResultCache(max_size=2, ttl_seconds=0.05)
+    keys = [cache.make_key(f'user_{i}', USER_PROFILE, CHATBOT_OUTPUT, CONTEXT, 5) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, {'user_id': f'user_{i}'})
+    assert cache.get(keys[0]) is None and cache.get(keys[2]) == {'user_id': 'user_2'}
+    assert cache.get_stats()['evictions'] == 1
+
+    time.sleep(0.06)
+    assert cache.get(keys[2]) is None and cache.get_stats()['expirations'] == 1
+    assert len(cache) == 1
+    print("[PASS] LRU 크기 제한, TTL 만료")
+
+
+def test_deep_context_bucket():
+    cache = RecommendationResultCache()
+    rainy = {**CONTEXT, 'weather': 'rain', 'companion': 'family'}
+    assert cache.context_bucket(rainy) == cache.context_bucket(CONTEXT)
+    assert cache.context_bucket(rainy, deep_learning=True) != cache.context_bucket(CONTEXT, deep_learning=True)
+    assert (cache.make_key('user_1', USER_PROFILE, CHATBOT_OUTPUT, rainy, 5, deep_learning=True) !=
+            cache.make_key('user_1', USER_PROFILE, CHATBOT_OUTPUT, CONTEXT, 5, deep_learning=True))
+    print("[PASS] 딥러닝 랭킹 사용 시 날씨/동행자별로 다른 캐시 키")
+
+
+def extracted(food_type=None, budget=None):
+    return ExtractedInfo(intent=IntentType.FOOD_REQUEST, entities=ExtractedEntity(food_type=food_type, budget=budget),
+                         confidence=0.9, confidence_level=ConfidenceLevel.HIGH, raw_text='')
+
+
+def test_user_manager_invalidation(engine):
+    with tempfile.TemporaryDirectory() as save_path:
+        user_manager = NaviyamUserManager(save_path)
+        engine.attach_user_manager(user_manager)
+        user_manager.get_or_create_user_profile('user_900')
+
+        def profile():
+            return {**USER_PROFILE, 'profile_version': user_manager.get_profile_version('user_900')}
+
+        before = computations(engine)
+        recommend(engine, user_id='user_900', profile=profile())
+        recommend(engine, user_id='user_900', profile=profile())
+        assert computations(engine) == before + 1
+
+        invalidations = engine.result_cache.get_stats()['invalidations']
+        user_manager.add_favorite_shop('user_900', 15)
+        assert engine.result_cache.get_stats()['invalidations'] == invalidations + 1
+        recommend(engine, user_id='user_900', profile=profile())
+        assert computations(engine) == before + 2
+
+        # 선호가 그대로인 대화 턴(interaction_count, 최근 주문만 변경)은 버전 유지 → 캐시 적중
+        user_manager.update_user_interaction('user_900', extracted(food_type='치킨'))
+        version = user_manager.get_profile_version('user_900')
+        user_manager.update_user_interaction('user_900', extracted(food_type='치킨'))
+        user_manager.update_user_interaction('user_900', extracted())
+        assert user_manager.get_profile_version('user_900') == version
+        recommend(engine, user_id='user_900', profile=profile())
+        assert recommend(engine, user_id='user_900', profile=profile())['metadata']['cache_hit']
+        assert computations(engine) == before + 3
+
+        # 예산이 바뀌면 무효화
+        user_manager.update_user_interaction('user_900', extracted(budget=8000))
+        assert user_manager.get_profile_version('user_900') == version + 1
+        assert not recommend(engine, user_id='user_900', profile=profile())['metadata']['cache_hit']
+        assert computations(engine) == before + 4
+
+        # 버전을 넘기지 않는 호출자도 무효화로 다시 계산
+        recommend(engine, user_id='user_900')
+        user_manager.delete_user_data('user_900')
+        recommend(engine, user_id='user_900')
+        assert computations(engine) == before + 6
+    print("[PASS] NaviyamUserManager 프로필 변경/삭제 시 사용자 캐시 무효화, 선호 변화 없는 대화 턴은 유지")
+
+
+def benchmark(engine, repeat: int):
+    engine.result_cache.clear()
+    start = time.perf_counter()
+    recommend(engine, user_id='bench')
+    miss_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        recommend(engine, user_id='bench')
+    hit_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    stats = engine.get_performance_stats()['result_cache']
+    assert stats['hits'] == repeat and stats['misses'] == 1
+    print(f"\n캐시 미스 {miss_ms:.1f}ms → 적중 {hit_ms:.2f}ms, 적중률 {stats['hit_rate']:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="추천 결과 캐시 테스트")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    engine = RecommendationEngine()
+    test_cache_hit(engine)
+    test_cache_misses(engine)
+    test_ttl_and_lru()
+    test_deep_context_bucket()
+    test_user_manager_invalidation(engine)
+    benchmark(engine, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+공유 매장 카탈로그 테스트
+
+1. 미리 계산된 필드(최저/평균 가격, 영업 시작/종료 분, 지역구·카테고리 코드)와 불변성 확인
+2. CandidateGenerator의 네 Funnel이 같은 카탈로그 객체를 공유하는지 확인
+3. 합성 카탈로그에서 기존 방식(Funnel마다 json.load) 대비 로드 시간/상주 메모리 측정
+"""
+
+import gc
+import json
+import time
+import logging
+import tempfile
+import argparse
+import tracemalloc
+import dataclasses
+from pathlib import Path
+
+from recommendation.candidate_generator import CandidateGenerator
+from recommendation.restaurant_catalog import RestaurantCatalog, get_catalog
+from test_content_funnel_index import make_catalog
+
+logging.disable(logging.INFO)
+
+
+def test_precomputed_fields():
+    restaurants = [
+        {"shopId": "a", "shopName": "백년카츠 관악점", "category": "일식",
+         "location": {"address": "서울 관악구 봉천로 391"},
+         "hours": {"open": "11:00", "close": "20:30"},
+         "attributes": {"isGoodShop": True, "acceptsMealCard": False},
+         "menus": [{"name": "돈까스", "price": 12000}, {"name": "우동", "price": 8000}, {"name": "물"}]},
+        {"shopId": "b", "shopName": "심야분식", "category": "분식",
+         "location": {"address": "경기 성남시 분당구 정자동"},
+         "hours": {"open": "22:00", "close": "잘못된값"}, "menus": []},
+        {"shopId": "c", "shopName": "정릉 밥집", "category": "일식",
+         "location": {"address": "서울 성북구 정릉로 10"}, "hours": {"open": "07:05", "close": "02:00"}},
+    ]
+    catalog = RestaurantCatalog(restaurants)
+    a, b, c = catalog.shops
+
+    assert (a.min_price, a.avg_price, a.menu_count) == (8000, 10000, 3)
+    assert a.menu_names == ("돈까스", "우동", "물") and a.is_good_shop and not a.accepts_meal_card
+    assert (a.open_minutes, a.close_minutes, a.has_hours) == (660, 1230, True)
+    assert (b.min_price, b.avg_price, b.open_minutes, b.close_minutes) == (None, None, 1320, None)
+    assert (c.open_minutes, c.close_minutes) == (425, 120)
+    assert (a.district, b.district, c.district) == ("관악구", "분당구", "성북구")
+    assert a.category_code == c.category_code != b.category_code
+    assert len({a.district_code, b.district_code, c.district_code}) == 3
+    assert catalog.get("c") is c and catalog.get("없음") is None
+
+    for mutate in (lambda: setattr(a, "min_price", 0),
+                   lambda: a.raw.__setitem__("shopName", "x"),
+                   lambda: a.raw["menus"].append({})):
+        try:
+            mutate()
+        except (dataclasses.FrozenInstanceError, TypeError, AttributeError):
+            continue
+        raise AssertionError("카탈로그가 수정 가능함")
+    print("[PASS] 미리 계산된 필드 및 불변성")
+
+
+def test_shared_catalog(tmp_dir: Path):
+    path = tmp_dir / "shared.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"restaurants": make_catalog(200)}, f, ensure_ascii=False)
+
+    catalog = get_catalog(str(path))
+    assert get_catalog(str(path)) is catalog
+    generator = CandidateGenerator(catalog=catalog)
+    funnels = [generator.popularity_funnel, generator.contextual_funnel,
+               generator.content_funnel, generator.collaborative_funnel]
+    assert all(funnel.catalog is catalog and funnel.shops is catalog.shops for funnel in funnels)
+    assert generator.generate_candidates(query="비빔밥", time_of_day="lunch", filters={})
+    print(f"[PASS] 네 Funnel이 카탈로그 1개 공유 ({len(catalog)}개 매장)")
+
+
+def measure(load):
+    """load()의 소요 시간(s)과 결과의 상주 메모리(MB) (메모리는 tracemalloc 오버헤드 때문에 따로 측정)"""
+    gc.collect()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = load()
+    resident, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return resident / 1024 / 1024, elapsed
+
+
+def benchmark(tmp_dir: Path, num_shops: int):
+    path = tmp_dir / f"restaurants_{num_shops}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"restaurants": make_catalog(num_shops)}, f, ensure_ascii=False)
+
+    def load_per_funnel():
+        copies = []
+        for _ in range(4):  # 기존: Funnel마다 json.load
+            with open(path, 'r', encoding='utf-8') as f:
+                copies.append(json.load(f)['restaurants'])
+        return copies
+
+    before_mb, before_s = measure(load_per_funnel)
+    after_mb, after_s = measure(lambda: RestaurantCatalog.from_file(str(path)))
+
+    print(f"\n매장 {num_shops}개 데이터 로드 (Funnel 4개 기준)")
+    print(f"  Funnel별 json.load: {before_mb:7.1f}MB, {before_s * 1000:7.1f}ms")
+    print(f"  공유 카탈로그     : {after_mb:7.1f}MB, {after_s * 1000:7.1f}ms "
+          f"(메모리 {before_mb / after_mb:.1f}배 감소)")
+    assert after_mb * 2 < before_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공유 매장 카탈로그 테스트")
+    parser.add_argument("--shops", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        test_precomputed_fields()
+        test_shared_catalog(tmp_dir)
+        benchmark(tmp_dir, args.shops)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+규칙 기반 랭킹 점수 커널 테스트
+
+1. RecommendationEngine._wide_component_ranking / PersonalizedRanker._rule_based_ranking이
+   후보별 if 체인 구현(기존 방식)과 같은 순위, 점수, 추천 이유를 내는지 확인
+2. 후보 150개 기준 규칙 점수 계산 시간 비교 (후보별 if 체인 vs 커널)
+"""
+
+import copy
+import time
+import random
+import logging
+import argparse
+
+import numpy as np
+
+from recommendation.recommendation_engine import RecommendationEngine, WIDE_COMPONENT_RULES
+from recommendation.ranking_model import PersonalizedRanker
+from test_feature_batch import make_candidates, PROFILES, CHATBOT_OUTPUTS, CONTEXTS
+
+logging.disable(logging.INFO)
+
+ACTIVE_PROFILE = {'id': 7, 'birthday': '2001-01-01', 'shop_favorite_count': 40, 'total_orders': 90, 'review_count': 45}
+
+
+def reference_wide_scores(wide_features, numerical_features, candidate):
+    """커널 도입 전 _wide_component_ranking의 후보 1개 점수 계산 (if 체인)"""
+    layer1_score = max([candidate.get('collaborative_score', 0), candidate.get('content_score', 0),
+                        candidate.get('context_score', 0), candidate.get('base_score', 0)])
+    score, reasons = 0.0, []
+    for column, threshold, bonus, reason in ((0, 0.7, 3.0, "연령-카테고리 매칭"), (1, 0.7, 2.0, "위치 매칭"),
+                                             (2, 0.7, 2.0, "시간-카테고리 매칭"), (3, 0.8, 5.0, "개인화 특별 매칭"),
+                                             (4, 0.8, 2.0, "예산 적합"), (5, 0.8, 1.5, "위치 편의"),
+                                             (6, 0.6, 2.5, "식단 선호")):
+        if wide_features[column] > threshold:
+            score += bonus
+            reasons.append(reason)
+    if wide_features[7] > 0:
+        score += wide_features[7] * 10
+        reasons.append("착한가게(편향보정)")
+    if wide_features[9] > 0.5:
+        score += wide_features[9] * 2.0
+        reasons.append("고평점(임계값적용)")
+
+    funnel_boost = 0.0
+    for flag, value, weight in ((10, 14, 2.0), (11, 15, 3.0), (12, 16, 2.0), (13, 17, 1.5)):
+        if wide_features[flag] > 0:
+            funnel_boost += wide_features[value] * weight
+    if funnel_boost > 1.0:
+        score += funnel_boost
+        reasons.append("다중Funnel")
+
+    user_activity = np.mean(numerical_features[1:4])
+    if user_activity > 0.3:
+        score += user_activity * 2.0
+        reasons.append("활발한사용자")
+    shop_popularity = np.mean(numerical_features[5:8])
+    if shop_popularity > 0.5:
+        score += shop_popularity * 1.5
+        reasons.append("인기매장")
+    return layer1_score + score, layer1_score, score, reasons
+
+
+def reference_wide_ranking(engine, candidates, user_profile, chatbot_output, context):
+    """커널 도입 전 _wide_component_ranking (후보별 특성 추출 + if 체인 + 전체 정렬)"""
+    extractor = engine.feature_extractor
+    wide = extractor.extract_wide_features_batch(candidates, user_profile, chatbot_output, context, dtype=np.float64)
+    numerical = extractor.extract_deep_features_batch(candidates, user_profile, chatbot_output, context,
+                                                      dtype=np.float64)['numerical_features']
+    for candidate, wide_row, numerical_row in zip(candidates, wide, numerical):
+        final_score, layer1_score, cross_score, reasons = reference_wide_scores(wide_row, numerical_row, candidate)
+        candidate.update(personalized_score=final_score, layer1_base_score=layer1_score,
+                         wide_component_score=cross_score, bonus_reasons=reasons,
+                         data_bias_corrected='편향보정' in ' '.join(reasons))
+    return sorted(candidates, key=lambda x: x['personalized_score'], reverse=True)
+
+
+def reference_rule_ranking(candidates, user_profile, context):
+    """커널 도입 전 PersonalizedRanker._rule_based_ranking"""
+    for candidate in candidates:
+        base_score = max([candidate.get('collaborative_score', 0), candidate.get('content_score', 0),
+                          candidate.get('context_score', 0), candidate.get('base_score', 0)])
+        bonus = 0
+        if candidate.get('category') in user_profile.get('preferred_categories', []):
+            bonus += 10
+        avg_budget = user_profile.get('average_budget', 0)
+        if avg_budget > 0:
+            price_range = candidate.get('price_range', 'medium')
+            if (avg_budget <= 10000 and price_range == 'low') or \
+               (10000 < avg_budget <= 30000 and price_range == 'medium') or \
+               (avg_budget > 30000 and price_range == 'high'):
+                bonus += 5
+        if candidate.get('is_good_price', False):
+            bonus += 3
+        user_location = context.get('user_location', '')
+        if user_location and candidate.get('district') != user_location:
+            bonus -= 2
+        candidate['personalized_score'] = base_score + bonus
+        candidate['personalization_bonus'] = bonus
+    return sorted(candidates, key=lambda x: x['personalized_score'], reverse=True)
+
+
+def make_ranker_candidates(num_candidates: int, seed: int = 0):
+    rng = random.Random(seed)
+    candidates = []
+    for i in range(num_candidates):
+        candidate = {'shop_id': i, 'shop_name': f'매장{i}', 'category': rng.choice(['한식', '중식', None]),
+                     'district': rng.choice(['관악구', '마포구', None]), 'is_good_price': rng.random() < 0.3,
+                     'content_score': rng.choice([0, 3.3, 5, 10]), 'base_score': rng.choice([0, 5, 7])}
+        if rng.random() < 0.7:
+            candidate['price_range'] = rng.choice(['low', 'medium', 'high'])
+        candidates.append(candidate)
+    return candidates
+
+
+def test_wide_component_parity(engine: RecommendationEngine):
+    fields = ('shop_id', 'personalized_score', 'layer1_base_score', 'wide_component_score',
+              'bonus_reasons', 'data_bias_corrected')
+    cases = 0
+    for seed in range(3):
+        candidates = make_candidates(150, seed)
+        for user_profile in PROFILES + [ACTIVE_PROFILE]:
+            for chatbot_output in CHATBOT_OUTPUTS:
+                for context in CONTEXTS:
+                    expected = reference_wide_ranking(engine, copy.deepcopy(candidates), user_profile,
+                                                      chatbot_output, context)
+                    for top_k in (None, 1, 10, 500):
+                        actual = engine._wide_component_ranking(copy.deepcopy(candidates), user_profile,
+                                                                chatbot_output, context, top_k=top_k)
+                        reference = expected if top_k is None else expected[:top_k]
+                        assert len(actual) == len(reference)
+                        for a, b in zip(actual, reference):
+                            assert all(a[field] == b[field] for field in fields), (a, b)
+                        cases += 1
+    print(f"[PASS] Wide Component 규칙 커널 == 후보별 if 체인 ({cases}개 조합, 추천 이유는 반환 top_k만)")
+
+
+def test_rule_based_parity():
+    ranker = PersonalizedRanker()
+    cases = 0
+    for seed in range(10):
+        candidates = make_ranker_candidates(100, seed)
+        for user_profile in ({}, {'preferred_categories': ['한식'], 'average_budget': 5000},
+                             {'preferred_categories': ['중식', None], 'average_budget': 20000},
+                             {'average_budget': 50000}):
+            for context in ({}, {'user_location': '관악구'}):
+                expected = reference_rule_ranking(copy.deepcopy(candidates), user_profile, context)
+                actual = ranker._rule_based_ranking(copy.deepcopy(candidates), user_profile, context)
+                assert [(c['shop_id'], c['personalized_score'], c['personalization_bonus']) for c in actual] == \
+                       [(c['shop_id'], c['personalized_score'], c['personalization_bonus']) for c in expected]
+                assert all(isinstance(c['personalization_bonus'], int) for c in actual)
+                cases += 1
+    print(f"[PASS] PersonalizedRanker 규칙 커널 == 후보별 if 체인 ({cases}개 조합)")
+
+
+def benchmark(engine: RecommendationEngine, num_candidates: int, repeat: int):
+    candidates = make_candidates(num_candidates, seed=9)
+    extractor = engine.feature_extractor
+    wide = extractor.extract_wide_features_batch(candidates, ACTIVE_PROFILE, CHATBOT_OUTPUTS[0], CONTEXTS[0],
+                                                 dtype=np.float64)
+    numerical = extractor.extract_deep_features_batch(candidates, ACTIVE_PROFILE, CHATBOT_OUTPUTS[0], CONTEXTS[0],
+                                                      dtype=np.float64)['numerical_features']
+    ranker = PersonalizedRanker()
+    ranker_candidates = make_ranker_candidates(num_candidates, seed=9)
+    user_profile = {'preferred_categories': ['한식'], 'average_budget': 20000}
+    context = {'user_location': '관악구'}
+
+    cases = [
+        ('Wide 규칙', lambda: [reference_wide_scores(w, n, c) for w, n, c in zip(wide, numerical, candidates)],
+         lambda: WIDE_COMPONENT_RULES.score(engine._wide_rule_features(wide, numerical))),
+        ('Ranker 규칙', lambda: reference_rule_ranking(ranker_candidates, user_profile, context),
+         lambda: ranker._rule_based_ranking(ranker_candidates, user_profile, context)),
+    ]
+    print(f"\n규칙 점수 계산 (후보 {num_candidates}개):")
+    for name, old, new in cases:
+        timings = []
+        for fn in (old, new):
+            fn()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            timings.append((time.perf_counter() - start) * 1000 / repeat)
+        print(f"  {name}: if 체인 {timings[0]:.3f}ms → 커널 {timings[1]:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규칙 점수 커널 테스트")
+    parser.add_argument("--candidates", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    engine = RecommendationEngine()
+    test_wide_component_parity(engine)
+    test_rule_based_parity()
+    benchmark(engine, args.candidates, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Funnel 상위 k개 선택 테스트
+
+1. 인기도/상황/콘텐츠 Funnel이 기존 방식(전체 후보 dict 생성 → 정렬 → [:limit])과 같은 결과인지 확인
+2. 매장 1k/10k/100k 합성 카탈로그에서 요청당 지연과 메모리 할당량(tracemalloc) 측정
+"""
+
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from recommendation.restaurant_catalog import RestaurantCatalog
+from recommendation.popularity_funnel import PopularityFunnel
+from recommendation.contextual_funnel import ContextualFunnel
+from recommendation.content_funnel import ContentFunnel
+from recommendation.top_k import top_k_indices, top_k_positions
+from test_content_funnel_index import make_catalog, reference_candidates as reference_content
+
+ADDRESSES = ["서울 관악구 봉천로 1", "서울 성북구 정릉로 2", "경기 성남시 분당구 3", "부산 해운대구 4", ""]
+FILTER_CASES = [None, {"category": "한식"}, {"is_good_influence": True},
+                {"accepts_meal_card": True, "location": "관악구"}, {"category": "없는카테고리"}]
+TIMES = [datetime(2026, 3, 2, 8, 0), datetime(2026, 3, 2, 12, 30), datetime(2026, 3, 2, 22, 45)]
+
+
+def make_restaurants(num_shops: int, seed: int = 42):
+    """영업시간/주소가 있는 합성 매장 (형식 오류/누락 포함)"""
+    rng = random.Random(seed)
+    restaurants = make_catalog(num_shops, seed)
+    for restaurant in restaurants:
+        hours = {"open": rng.choice(["09:00", "11:30", "17:00", "7:05", "bad", None]),
+                 "close": rng.choice(["21:00", "02:00", "15:00", "23:59", None])}
+        restaurant["hours"] = {key: value for key, value in hours.items() if value}
+        restaurant["location"] = {"address": rng.choice(ADDRESSES)}
+    return restaurants
+
+
+def reference_shop_filters(shop, filters, keys) -> bool:
+    """벡터화 도입 전 Funnel별 _passes_basic_filters (ShopRecord 기준, keys에 있는 필터만 적용)"""
+    if 'category' in keys and filters.get('category'):
+        if filters['category'].lower() not in shop.category_lower:
+            return False
+    if 'is_good_influence' in keys and filters.get('is_good_influence'):
+        if not shop.is_good_shop:
+            return False
+    if 'accepts_meal_card' in keys and filters.get('accepts_meal_card'):
+        if not shop.accepts_meal_card:
+            return False
+    return True
+
+
+def reference_popularity(funnel: PopularityFunnel, filters, limit: int):
+    """상위 k개 선택 도입 전 PopularityFunnel.get_candidates"""
+    filtered_shops = funnel._apply_filters(funnel.shops, filters or {})
+    sorted_shops = sorted(filtered_shops, key=lambda x: funnel.popularity_scores.get(x.shop_id, 0), reverse=True)
+    return [{
+        'shop_id': shop.shop_id,
+        'shop_name': shop.shop_name,
+        'category': shop.category,
+        'funnel_source': 'popularity',
+        'base_score': funnel.popularity_scores.get(shop.shop_id, 0),
+        'reason': funnel._get_popularity_reason(shop)
+    } for shop in sorted_shops[:limit]]
+
+
+def reference_context_score(funnel: ContextualFunnel, shop, user_location, operating_status, time_of_day) -> float:
+    """벡터화 도입 전 ContextualFunnel._calculate_context_score (매장 1개 점수)"""
+    score = 0.0
+    if user_location:
+        address = shop.address
+        if user_location in address:
+            score += 40.0
+        elif '서울' in address:
+            score += 20.0
+        elif '경기' in address:
+            score += 10.0
+        else:
+            score += 5.0
+    score += funnel._get_operating_score(operating_status)
+    if time_of_day:
+        score += funnel._get_category_time_score(shop.category_lower, time_of_day)
+    return score
+
+
+def reference_contextual(funnel: ContextualFunnel, user_location, current_time, time_of_day, filters, limit: int):
+    """상위 k개 선택 도입 전 ContextualFunnel.get_candidates"""
+    operating_status = funnel.opening_hours.status_at(current_time, soon_minutes=60)
+    candidates = []
+    for shop in funnel.shops:
+        if not reference_shop_filters(shop, filters or {}, funnel.FILTER_KEYS):
+            continue
+        status = operating_status[shop.position]
+        candidates.append({
+            'shop_id': shop.shop_id,
+            'shop_name': shop.shop_name,
+            'category': shop.category,
+            'funnel_source': 'contextual',
+            'context_score': reference_context_score(funnel, shop, user_location, status, time_of_day),
+            'reason': funnel._get_context_reason(shop, user_location, status, time_of_day)
+        })
+    candidates.sort(key=lambda x: x['context_score'], reverse=True)
+    return candidates[:limit]
+
+
+def sorted_content(funnel: ContentFunnel, query: str, filters, limit: int):
+    """상위 k개 선택 도입 전 ContentFunnel.get_candidates (역색인 매칭 후 전체 정렬)"""
+    matches = funnel._match_shops(funnel._tokenize(query.lower()), query.lower())
+    ranked = sorted((-score, position) for shop_id, score in matches['scores'].items() if score > 0
+                    for position in funnel.shop_positions.get(shop_id, []))
+    candidates = []
+    for negative_score, position in ranked:
+        shop = funnel.shops[position]
+        if not reference_shop_filters(shop, filters or {}, funnel.FILTER_KEYS):
+            continue
+        candidates.append({
+            'shop_id': shop.shop_id,
+            'shop_name': shop.shop_name,
+            'category': shop.category,
+            'funnel_source': 'content',
+            'content_score': -negative_score,
+            'reason': funnel._format_match_reason(funnel._match_reasons(shop.shop_id, matches), query)
+        })
+        if len(candidates) >= limit:
+            break
+    return candidates
+
+
+def test_top_k_helpers():
+    """top_k_indices / top_k_positions == 전체 안정 정렬 (동점 포함)"""
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        size = int(rng.integers(1, 200))
+        scores = rng.integers(0, 8, size).astype(np.float64)
+        mask = rng.random(size) < 0.7
+        k = int(rng.integers(0, size + 3))
+        candidates = np.flatnonzero(mask)
+        expected = candidates[np.argsort(-scores[candidates], kind='stable')][:k]
+        assert np.array_equal(top_k_indices(scores, k, mask), expected)
+
+        positions = rng.permutation(size * 2)[:size]
+        expected = sorted(zip(-scores, positions))[:k]
+        assert top_k_positions(positions, scores, k).tolist() == [p for _, p in expected]
+    print("[PASS] top_k_indices / top_k_positions: 전체 안정 정렬과 일치")
+
+
+def test_parity():
+    """세 Funnel 결과가 기존 전체 정렬 방식과 일치"""
+    catalog = RestaurantCatalog(make_restaurants(3000))
+    popularity, contextual, content = (PopularityFunnel(catalog=catalog), ContextualFunnel(catalog=catalog),
+                                       ContentFunnel(catalog=catalog))
+    cases = 0
+    for filters in FILTER_CASES:
+        for limit in (1, 7, 30, 5000):
+            assert popularity.get_candidates(filters, limit) == reference_popularity(popularity, filters, limit)
+            cases += 1
+            for current_time in TIMES:
+                for time_of_day in (None, "lunch", "snack", "unknown"):
+                    for location in (None, "관악구", "해운대구"):
+                        expected = reference_contextual(contextual, location, current_time, time_of_day, filters, limit)
+                        actual = contextual.get_candidates(location, current_time, time_of_day, filters, limit)
+                        assert actual == expected, (filters, limit, current_time, time_of_day, location)
+                        cases += 1
+            for query in ("비빔밥", "한식", "치즈 카츠", "밥"):
+                assert content.get_candidates(query, filters, limit) == reference_content(content, query, filters, limit)
+                cases += 1
+    print(f"[PASS] 인기도/상황/콘텐츠 Funnel 결과 일치 ({cases}개 조합)")
+
+
+def measure(fn, repeat: int):
+    """요청당 평균 지연(ms)과 요청 중 피크 할당량(KB)"""
+    fn()  # 캐시(영업 상태, 주소 마스크) 준비
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed_ms, peak / 1024
+
+
+def benchmark(sizes):
+    now = datetime(2026, 3, 2, 12, 30)
+    print(f"\n{'매장 수':>8} | {'Funnel':<10} | {'기존(ms)':>9} | {'상위k(ms)':>9} | "
+          f"{'기존 피크(KB)':>12} | {'상위k 피크(KB)':>13}")
+    print("-" * 80)
+    for size in sizes:
+        catalog = RestaurantCatalog(make_restaurants(size))
+        popularity, contextual, content = (PopularityFunnel(catalog=catalog), ContextualFunnel(catalog=catalog),
+                                           ContentFunnel(catalog=catalog))
+        repeat = max(1, 200000 // size)
+        cases = [
+            ('popularity', lambda: reference_popularity(popularity, None, 30),
+             lambda: popularity.get_candidates(None, 30)),
+            ('contextual', lambda: reference_contextual(contextual, "관악구", now, "lunch", None, 30),
+             lambda: contextual.get_candidates("관악구", now, "lunch", None, 30)),
+            ('content', lambda: sorted_content(content, "한식", None, 50),
+             lambda: content.get_candidates("한식", None, 50)),
+        ]
+        for name, old, new in cases:
+            old_ms, old_peak = measure(old, repeat)
+            new_ms, new_peak = measure(new, repeat)
+            print(f"{size:>8} | {name:<10} | {old_ms:>9.2f} | {new_ms:>9.2f} | {old_peak:>12.0f} | {new_peak:>13.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Funnel 상위 k개 선택 테스트")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    test_top_k_helpers()
+    test_parity()
+    benchmark(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
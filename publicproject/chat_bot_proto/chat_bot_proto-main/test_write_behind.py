@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+프로필/학습 데이터 write-behind 저장 테스트
+
+1. WriteBehindQueue: 사용자별 병합, 배치 저장, 배압(대기/버림) 통계, flush, 종료 시 남은 이벤트 저장
+   프로필 submit이 가득 찬 큐에서 대기 중이어도 학습 데이터 submit은 put_timeout 안에 버려지고 반환
+2. NaviyamUserManager: 큐를 거친 프로필 파일 == 바로 저장한 파일, 삭제는 대기 중인 저장 뒤에 반영
+3. WriteBehindDataCollector: 수집 이벤트가 원래 수집기에 전달, 이벤트는 호출 뒤 원본 수정과 무관
+4. process_user_input 응답이 프로필 디스크 쓰기를 기다리지 않는지 (느린 디스크에서 profile 단계 시간 비교)
+"""
+
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+from data.data_structure import ExtractedInfo, ExtractedEntity, IntentType, ConfidenceLevel, UserInput
+from inference.data_collector import LearningDataCollector, WriteBehindDataCollector
+from inference.user_manager import NaviyamUserManager
+from inference.write_behind import WriteBehindQueue
+from nlp.preprocessor import EmotionType
+from test_pipeline_timing import make_chatbot
+
+logging.disable(logging.ERROR)
+
+
+def extracted(food_type=None, budget=None):
+    return ExtractedInfo(intent=IntentType.FOOD_REQUEST, entities=ExtractedEntity(food_type=food_type, budget=budget),
+                         confidence=0.9, confidence_level=ConfidenceLevel.HIGH, raw_text='')
+
+
+def stop_collector(collector: LearningDataCollector):
+    """자동 저장 스레드(auto_save_interval 대기)를 기다리지 않고 수집기 종료"""
+    collector.is_running = False
+    collector.auto_save_thread = None
+    collector.shutdown()
+
+
+def test_queue_coalescing_and_drain():
+    written = []
+    gate = threading.Event()
+
+    def write_profiles(events):
+        gate.wait()
+        written.append([(event.key, event.payload) for event in events])
+
+    write_behind = WriteBehindQueue(max_size=100, flush_interval=0.01)
+    write_behind.register("profile", write_profiles, coalesce=True)
+    write_behind.submit("profile", "warmup", 0)
+    time.sleep(0.05)  # writer가 첫 배치에서 gate 대기
+
+    for version in range(1, 11):
+        for user_id in ("a", "b", "c"):
+            write_behind.submit("profile", user_id, version)
+    gate.set()
+    assert write_behind.flush(timeout=5)
+
+    # 대기 중에 쌓인 30건은 한 배치로 병합되어 사용자별 마지막 값만 저장
+    assert written[0] == [("warmup", 0)]
+    assert written[1] == [("a", 10), ("b", 10), ("c", 10)]
+    stats = write_behind.get_stats()
+    assert stats["submitted"] == stats["processed"] == 31 and stats["coalesced"] == 27
+    assert stats["max_batch_size"] == 30 and stats["depth"] == 0
+
+    # 종료 시 남은 이벤트까지 저장, 종료 후 추가는 호출 스레드에서 바로 저장
+    gate.clear()
+    write_behind.submit("profile", "d", 1)
+    threading.Timer(0.05, gate.set).start()
+    assert write_behind.close(timeout=5) and written[-1] == [("d", 1)]
+    write_behind.submit("profile", "e", 1)
+    assert written[-1] == [("e", 1)] and write_behind.get_stats()["closed"]
+    print("[PASS] 사용자별 병합 배치 저장, flush, 종료 시 남은 이벤트 저장")
+
+
+def test_backpressure():
+    gate = threading.Event()
+    saved = {"profile": 0, "interaction": 0}
+
+    def handler(kind):
+        def write(events):
+            gate.wait()
+            saved[kind] += len(events)
+        return write
+
+    write_behind = WriteBehindQueue(max_size=4, max_batch=1, put_timeout=0.01)
+    write_behind.register("profile", handler("profile"), coalesce=True)
+    write_behind.register("interaction", handler("interaction"), drop_when_full=True)
+    write_behind.submit("interaction", "u", 0)
+    time.sleep(0.05)  # writer가 첫 이벤트를 잡고 대기
+
+    accepted = sum(write_behind.submit("interaction", "u", i) for i in range(10))
+    stats = write_behind.get_stats()
+    assert accepted == 4 and stats["dropped"] == 6 and stats["high_watermark"] == 4
+    assert stats["utilization"] == 1.0 and stats["blocked_puts"] == 6
+
+    # 프로필은 버리지 않고 자리가 날 때까지 대기
+    threading.Timer(0.1, gate.set).start()
+    start = time.perf_counter()
+    assert write_behind.submit("profile", "u", 1)
+    waited = time.perf_counter() - start
+    assert write_behind.flush(timeout=5) and waited >= 0.05
+    assert saved == {"profile": 1, "interaction": 5}
+    assert write_behind.get_stats()["blocked_wait_ms"] >= 50
+    write_behind.close()
+    print(f"[PASS] 배압: 학습 데이터는 버림(dropped 6), 프로필은 대기({waited * 1000:.0f}ms)")
+
+
+def test_blocked_submit_does_not_stall_others():
+    gate = threading.Event()
+    entered = threading.Event()
+    saved = {"profile": 0, "interaction": 0}
+
+    def handler(kind):
+        def write(events):
+            entered.set()
+            gate.wait()
+            saved[kind] += len(events)
+        return write
+
+    write_behind = WriteBehindQueue(max_size=2, max_batch=1, put_timeout=0.02)
+    write_behind.register("profile", handler("profile"), coalesce=True)
+    write_behind.register("interaction", handler("interaction"), drop_when_full=True)
+    write_behind.submit("interaction", "u", 0)
+    assert entered.wait(timeout=5)  # writer가 첫 이벤트를 잡고 멈춤
+    assert write_behind.submit("interaction", "u", 1) and write_behind.submit("interaction", "u", 2)
+
+    # 가득 찬 큐에서 자리가 날 때까지 대기하는 프로필 submit
+    profile_thread = threading.Thread(target=write_behind.submit, args=("profile", "u", 1))
+    profile_thread.start()
+    time.sleep(0.05)
+    assert profile_thread.is_alive()
+
+    # 대기 중인 submit과 무관하게 학습 데이터는 put_timeout 뒤 버려지고 바로 반환
+    release = threading.Timer(2.0, gate.set)  # 멈춘 경우에도 테스트가 끝나도록
+    release.start()
+    start = time.perf_counter()
+    accepted = write_behind.submit("interaction", "u", 3)
+    elapsed = time.perf_counter() - start
+    assert not accepted and elapsed < write_behind.put_timeout + 0.2, elapsed
+
+    # 종료는 대기 중인 프로필 submit이 큐에 들어간 뒤 종료 신호를 넣으므로 모두 저장
+    closer = threading.Thread(target=write_behind.close)
+    closer.start()
+    gate.set()
+    release.cancel()
+    closer.join(timeout=5)
+    profile_thread.join(timeout=5)
+    assert saved == {"profile": 1, "interaction": 3}
+    print(f"[PASS] 프로필 submit 대기 중에도 학습 데이터 submit은 {elapsed * 1000:.0f}ms 만에 버림, 종료 시 모두 저장")
+
+
+def test_user_manager_profiles(tmp_path: Path):
+    direct = NaviyamUserManager(str(tmp_path / "direct"))
+    write_behind = WriteBehindQueue()
+    queued = NaviyamUserManager(str(tmp_path / "queued"), write_behind=write_behind)
+
+    versions = []
+    queued.add_profile_listener(lambda user_id: versions.append(user_id))
+    for manager in (direct, queued):
+        for food_type, budget in [("치킨", 10000), ("피자", None), (None, 8000), ("한식", 12000)]:
+            manager.update_user_interaction("child_1", extracted(food_type, budget), EmotionType.NEUTRAL)
+        manager.add_favorite_shop("child_1", 15)
+        # 저장 시각만 맞춰 비교
+        manager.user_profiles["child_1"].last_updated = direct.user_profiles["child_1"].last_updated
+        manager._save_user_profile(manager.user_profiles["child_1"])
+
+    # 프로필 변경 알림(캐시 무효화)은 요청 스레드에서 바로, 추천 항목이 그대로인 마지막 저장은 알림 없음
+    assert len(versions) == 6 and queued.get_profile_version("child_1") == 6
+    assert write_behind.flush(timeout=5)
+    queued_file = (tmp_path / "queued" / "child_1.json").read_text(encoding='utf-8')
+    assert queued_file == queued._serialize_profile(queued.user_profiles["child_1"])
+
+    # 주문 기록 시각만 빼면 바로 저장한 파일과 같음
+    def without_order_times(path):
+        data = json.loads(path.read_text(encoding='utf-8'))
+        for order in data["recent_orders"]:
+            order.pop("timestamp")
+        return data
+    assert without_order_times(tmp_path / "queued" / "child_1.json") == \
+        without_order_times(tmp_path / "direct" / "child_1.json")
+    assert json.loads(queued_file)["interaction_count"] == 4
+
+    # 다시 로드해도 같은 프로필
+    reloaded = NaviyamUserManager(str(tmp_path / "queued"))
+    assert reloaded.user_profiles["child_1"].preferred_categories == ["치킨", "피자", "한식"]
+
+    # 삭제는 대기 중인 저장 뒤에 반영되어 파일이 다시 생기지 않음
+    queued.update_user_interaction("child_1", extracted("분식"), EmotionType.NEUTRAL)
+    assert queued.delete_user_data("child_1")
+    assert write_behind.flush(timeout=5) and not (tmp_path / "queued" / "child_1.json").exists()
+    write_behind.close()
+    print("[PASS] 큐를 거친 프로필 파일 == 바로 저장한 파일, 삭제 순서 보장")
+
+
+def test_data_collector(tmp_path: Path):
+    collector = LearningDataCollector(str(tmp_path / "learning"), buffer_size=100, auto_save_interval=3600)
+    write_behind = WriteBehindQueue()
+    proxy = WriteBehindDataCollector(collector, write_behind)
+
+    features = {"nlu_intent": "food_request", "keywords": ["치킨"]}
+    interaction = {"input_text": "치킨 먹고 싶어", "recommendation_count": 1}
+    recommendations = [{"shop_id": 1, "menu_name": "후라이드"}]
+    proxy.collect_nlu_features("u1", features)
+    proxy.collect_interaction_data("u1", interaction)
+    proxy.collect_recommendation_data("u1", recommendations, {"shop_id": 1})
+
+    # 큐에 넣은 뒤 원본을 바꿔도 저장되는 값은 그대로
+    features["nlu_intent"] = "변경"
+    interaction.clear()
+    recommendations[0]["menu_name"] = "변경"
+    assert write_behind.flush(timeout=5)
+
+    assert collector.nlu_buffer[-1]["features"]["nlu_intent"] == "food_request"
+    assert collector.interaction_buffer[-1]["interaction"]["input_text"] == "치킨 먹고 싶어"
+    stored = collector.recommendation_buffer[-1]
+    assert stored["recommendations"] == [{"shop_id": 1, "menu_name": "후라이드"}]
+    assert stored["user_selection"] == {"shop_id": 1}
+    assert proxy.get_collection_statistics()["quality_stats"]["total_collected"] == 3
+
+    proxy.collect_interaction_data("u2", {"input_text": "종료 전"})
+    proxy.force_save()
+    assert any(path.stat().st_size > 0 for path in (tmp_path / "learning" / "raw").iterdir())
+    write_behind.close()
+    stop_collector(collector)
+    print("[PASS] 수집 이벤트 → 원래 수집기 전달 (불변 스냅샷), force_save 전 반영")
+
+
+class SlowDiskUserManager(NaviyamUserManager):
+    """프로필 파일 쓰기에 disk_delay초가 걸리는 사용자 관리자"""
+
+    def __init__(self, save_path, disk_delay, write_behind=None):
+        self.disk_delay = disk_delay
+        super().__init__(save_path, write_behind=write_behind)
+
+    def _write_profile_file(self, user_id, profile_json):
+        time.sleep(self.disk_delay)
+        super()._write_profile_file(user_id, profile_json)
+
+
+def run_requests(tmp_path: Path, requests: int, disk_delay: float, use_write_behind: bool):
+    chatbot = make_chatbot(debug=False, delays={})
+    chatbot.write_behind = WriteBehindQueue() if use_write_behind else None
+    chatbot.user_manager = SlowDiskUserManager(str(tmp_path), disk_delay, chatbot.write_behind)
+    preprocessed = chatbot.preprocessor.preprocess("")
+    preprocessed.emotion = EmotionType.NEUTRAL
+    chatbot.preprocessor.preprocess = lambda text: preprocessed
+
+    collector = LearningDataCollector(str(tmp_path / "learning"), auto_save_interval=3600)
+    chatbot.nlu = None
+    if use_write_behind:
+        chatbot.attach_data_collector(collector)
+    else:
+        chatbot.data_collector = collector
+
+    for i in range(requests):
+        chatbot.process_user_input(UserInput(text="치킨 먹고 싶어", user_id=f"user_{i % 5}"))
+    metrics = chatbot.get_performance_metrics()
+
+    if use_write_behind:
+        chatbot.shutdown()
+        assert metrics["write_behind"]["submitted"] >= requests
+    profile = json.loads((tmp_path / "user_0.json").read_text(encoding='utf-8'))
+    assert profile["interaction_count"] == requests // 5
+    assert len(collector.interaction_buffer) == requests
+    stop_collector(collector)
+    return metrics
+
+
+def test_request_path(requests: int, disk_delay: float):
+    with tempfile.TemporaryDirectory() as sync_dir, tempfile.TemporaryDirectory() as queued_dir:
+        sync = run_requests(Path(sync_dir), requests, disk_delay, use_write_behind=False)
+        queued = run_requests(Path(queued_dir), requests, disk_delay, use_write_behind=True)
+
+    sync_profile = sync["stage_latency_ms"]["profile"]
+    queued_profile = queued["stage_latency_ms"]["profile"]
+    assert sync_profile["p50_ms"] >= disk_delay * 1000 and queued_profile["p99_ms"] < disk_delay * 1000
+    stats = queued["write_behind"]
+    print(f"\n요청 {requests}건, 프로필 파일 쓰기 {disk_delay * 1000:.0f}ms:")
+    for name, metrics in (("바로 저장", sync), ("write-behind", queued)):
+        profile, total = metrics["stage_latency_ms"]["profile"], metrics["stage_latency_ms"]["total"]
+        print(f"  {name:12s}: profile 단계 p50 {profile['p50_ms']:6.2f}ms / p99 {profile['p99_ms']:6.2f}ms, "
+              f"전체 p50 {total['p50_ms']:6.2f}ms")
+    print(f"  큐: 최대 깊이 {stats['high_watermark']}, 평균 배치 {stats['avg_batch_size']:.1f}건, "
+          f"병합 {stats['coalesced']}건, 버림 {stats['dropped']}건")
+    print("[PASS] 응답이 프로필 디스크 쓰기를 기다리지 않음, 종료 시 모두 저장")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="write-behind 저장 테스트")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--disk-delay", type=float, default=0.005, help="프로필 파일 쓰기 지연 (초)")
+    args = parser.parse_args()
+
+    test_queue_coalescing_and_drain()
+    test_backpressure()
+    test_blocked_submit_does_not_stall_others()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_user_manager_profiles(Path(tmp_dir))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_data_collector(Path(tmp_dir))
+    test_request_path(args.requests, args.disk_delay)
+
+
+if __name__ == "__main__":
+    main()
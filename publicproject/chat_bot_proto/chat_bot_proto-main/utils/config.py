@@ -58,6 +58,21 @@ class RAGConfig:
     index_path: str = "./outputs/faiss_index.faiss"
     top_k: int = 5
     enable_rag: bool = True
+    # 쿼리 임베딩 캐시
+    enable_query_cache: bool = True
+    query_cache_size: int = 2048  # 최대 캐시 쿼리 수 (LRU)
+    query_cache_ttl: float = 86400.0  # 초, 0이면 만료 없음
+    query_cache_path: Optional[str] = None  # 예: "./cache/query_embeddings.npz", None이면 메모리만 사용
+    # 임베딩 마이크로 배칭 (동시 요청의 encode 호출을 묶음)
+    enable_embedding_batching: bool = False
+    embedding_batch_size: int = 32  # 한 번에 인코딩할 최대 쿼리 수
+    embedding_batch_wait_ms: float = 5.0  # 배치를 모으는 최대 대기 시간
+    # 사전 빌드 인덱스 세대 감시 (새 세대 게시 시 무중단 교체)
+    index_reload_interval: float = 30.0  # 초, 0이면 감시 안 함 (/admin/reload-index로 수동 교체)
+    # 검색 모드: "dense"(Vector Store만), "sparse"(BM25만), "hybrid"(동시 실행 후 RRF 결합)
+    retrieval_mode: str = "dense"
+    hybrid_dense_weight: float = 1.0
+    hybrid_sparse_weight: float = 1.0
 
 
 @dataclass
@@ -69,6 +84,19 @@ class InferenceConfig:
     save_conversations: bool = False
     response_timeout: int = 30  # 초
 
+    # 프로필/학습 데이터 write-behind 저장 (False면 요청 스레드에서 바로 저장)
+    write_behind: bool = True
+    write_behind_queue_size: int = 10000
+
+    # API 서버 /chat 동시성 (스레드 풀 크기, 대기열 길이, 대기 시간 초) - 초과 시 429/503
+    max_concurrent_requests: int = 4
+    max_queued_requests: int = 32
+    queue_timeout: float = 5.0
+
+    # LLM 생성 전용 워커 (False면 요청 스레드에서 모델 직접 호출), 대기 시간은 response_timeout
+    llm_worker: bool = True
+    llm_queue_size: int = 8
+
 
 @dataclass
 class AppConfig: